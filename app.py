@@ -1,194 +1,151 @@
+import contextlib
 from pathlib import Path
 import streamlit as st
-import pandas as pd
-import unicodedata
-import html
+import app_render
 import engine
-
-
-def _upper_no_accents(s: str) -> str:
-    s = "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
-    return s.upper()
-
-def format_courses(liste_courses: dict) -> str:
-    """
-    Transforme la structure dict {rayon: {label: {val, unit, recipes, ...}}}
-    en texte lisible style notebook.
-    """
-    lines = []
-    # ordre de rayons : Marché en premier si présent, sinon tri alpha
-    rayons = list(liste_courses.keys())
-    rayons_sorted = sorted(rayons, key=lambda r: (0 if r.lower() in ["marché","marche"] else 1, r.lower()))
-    for rayon in rayons_sorted:
-        header = _upper_no_accents(rayon)
-        lines.append(f"**{header}**")
-        items = liste_courses[rayon] or {}
-        # tri : indispensable d'abord, puis alpha
-        def _k(item):
-            label, d = item
-            return (0 if d.get("indispensable") else 1, label.lower())
-        for label, d in sorted(items.items(), key=_k):
-            val = d.get("val")
-            unit = d.get("unit") or ""
-            if val is None:
-                qty = ""
-            else:
-                qty = f"{val} {unit}".strip()
-            recipes = d.get("recipes") or []
-            n = len(recipes)
-            recettes_txt = " / ".join(recipes)
-            lines.append(f"{label} : {qty}  — dans : {n} recette(s) ({recettes_txt})")
-        lines.append("")  # blank line
-    return "\n".join(lines).strip()
+import profiling
+import seasonal
+import watcher
 
 
 st.set_page_config(page_title="Meal Planner", layout="wide")
 st.title("🍽️ Meal Planner")
 
 DATA_DIR = Path("data")
-
-# 1) Matching
-match = engine.compute_matching(DATA_DIR)
-
-st.subheader("📊 Matching des recettes (marché / placard)")
-
-df = pd.DataFrame(match["scored"])
-
-# Renommage colonnes (voir section suivante)
-df = df.rename(columns={
-    "category": "catégorie",
-    "name": "nom",
-    "score_market": "taux de match marché",
-    "score_pantry": "taux de match placard",
-    "ok_market": "OK marché",
-    "ok_pantry": "OK placard",
-    "manque_market": "manque marché",
-    "manque_pantry": "manque placard",
-})
-
-cols = ["catégorie", "nom", "taux de match marché", "OK marché", "manque marché", "link"]
-cols = [c for c in cols if c in df.columns]  # sécurité
-
-# On veut afficher les colonnes sans la catégorie (affichée en titre)
-# et ne pas afficher explicitement la colonne 'link' :
-cols_sub = [c for c in cols if c != "catégorie"]  # la catégorie sera dans le sous-titre, pas dans le tableau
-# Remplace la section de tri des catégories par ton ordre personnalisé
-CUSTOM_CATEGORY_ORDER = [
-    "🍗 poulet",
-    "🥩 boeuf",
-    "🌮 boeuf haché",
-    "🍖 porc",
-    "🦆 canard",
-    "🍝 pâtes végé",
-    "🥕 végé",
-    "🍜 soupe",
-    "🥧 tarte",
-    "🥬 salade",
-    "🍣 saumon",
-    "🐟 poisson blanc",
-    "🦐 crevettes"
-]
-
-order_map = {c: i for i, c in enumerate(CUSTOM_CATEGORY_ORDER)}
-
-# Trier les catégories selon CUSTOM_CATEGORY_ORDER, les autres à la fin
-categories = sorted(
-    df["catégorie"].dropna().unique(),
-    key=lambda c: order_map.get(c, 999)
-)
-
-for cat in categories:
-    st.markdown(f"### {cat.upper()}") 
-    sdf = df[df["catégorie"] == cat]
-
-    # hauteur auto (évite un gros tableau vide)
-    h = min(520, 38 * (len(sdf) + 1) + 20)
-
-    # Préparer les colonnes à afficher : on ne montre pas explicitement la
-    # colonne 'link'. Si elle existe, on transforme la colonne 'nom' en
-    # liens HTML et on affiche un tableau HTML (avec les ancres <a>), sinon
-    # on affiche un data_editor simple.
-    visible_cols = [c for c in cols_sub if c != "link"]
-
-    # Construire un DataFrame pour affichage (avec ou sans liens)
-    if "link" in sdf.columns:
-        df_display = sdf[visible_cols].copy()
-
-        def _make_anchor(row):
-            url = row.get("link", "")
-            name = row.get("nom", "")
-            name_escaped = html.escape(str(name))
-            url_escaped = html.escape(str(url))
-            if pd.isna(url) or url == "":
-                return name_escaped
-            return f'<a href="{url_escaped}" target="_blank" rel="noopener noreferrer">{name_escaped}</a>'
-
-        if "nom" in df_display.columns:
-            df_display["nom"] = sdf.apply(_make_anchor, axis=1)
-    else:
-        df_display = sdf[visible_cols].copy()
-
-    # Nettoyer les colonnes contenant des listes pour enlever crochets
-    for col in ["OK marché", "manque marché"]:
-        if col in df_display.columns:
-            def _clean_cell(v):
-                if isinstance(v, (list, tuple, set)):
-                    return ", ".join(map(str, v))
-                if pd.isna(v):
-                    return ""
-                s = str(v)
-                # retire crochets s'ils existent dans la représentation
-                if s.startswith("[") and s.endswith("]"):
-                    return s[1:-1]
-                return s
-            df_display[col] = df_display[col].apply(_clean_cell)
-
-    # Générer HTML et appliquer CSS pour aligner les tableaux
-    html_table = df_display.to_html(escape=False, index=False)
-    html_table = html_table.replace('class="dataframe"', 'class="mealplanner"')
-
-    # CSS : mise en page et alignement. On construit un seul <style> pour
-    # éviter que le CSS soit affiché comme du texte.
-    base_css = (
-        "table.mealplanner { width:100%; border-collapse:collapse; table-layout:fixed; }"
-        "table.mealplanner th, table.mealplanner td { padding:6px; text-align:left; vertical-align:middle; border-bottom:1px solid #ddd; }"
-        "table.mealplanner th { background:#f9f9f9; }"
-    )
-
-    # Centrer les colonnes numériques/OK/manque si présentes
-    center_cols = ["taux de match marché", "OK marché", "manque marché"]
-    extra_css_lines = []
-    for col in center_cols:
-        if col in df_display.columns:
-            idx = list(df_display.columns).index(col) + 1
-            extra_css_lines.append(f'table.mealplanner td:nth-child({idx}), table.mealplanner th:nth-child({idx}) {{ text-align:center; }}')
-
-    style_content = base_css + ("\n" + "\n".join(extra_css_lines) if extra_css_lines else "")
-    css = f"<style>{style_content}</style>"
-
-    st.markdown(css + html_table, unsafe_allow_html=True)
-
-st.divider()
-
-# 2) Choix + courses
-st.subheader("✅ Choisir les recettes et générer les courses")
-
-options = [r["name"] for r in match["scored"]]  # on propose les recettes filtrées
-selection = st.multiselect("Recettes", options=options, default=[], help="Utilise Ctrl/Cmd+clic pour sélectionner plusieurs items")
-if selection:
-    st.markdown('**Recettes sélectionnées :**  ' + '  |  '.join(selection))
-
-personnes = st.number_input("Nombre de personnes", min_value=1, max_value=12, value=4, step=1)
-update_prov = st.checkbox("Mettre à jour le placard (provisions.txt) et générer courses_placard.txt", value=False)
-
-if st.button("Générer les courses"):
-    if not selection:
-        st.error("Choisis au moins une recette.")
+WATCH_EVERY = 2  # secondes entre deux vérifications de la version des fichiers de data/
+
+# Panneau de profilage (barre latérale) : temps par étape de ce rerun, + cProfile / tracemalloc
+debug = st.sidebar.checkbox("🐞 Profilage", value=False)
+capture = st.sidebar.selectbox("Capture", ["aucune", "cprofile", "tracemalloc"]) if debug else "aucune"
+# Instrumentation de tout le rendu ; refermée même si le script s'arrête en route (st.rerun, st.stop, exception)
+with profiling.collect(None if capture == "aucune" else capture) if debug else contextlib.nullcontext() as stats:
+    # 1) Matching (mis en cache par version des données : un rerun sans changement de data/ ne recalcule rien)
+    # « Disponibilités » : le fichier ingredients_disponibles.txt, ou la saison du catalogue pour un mois donné
+    dispo_source = st.selectbox("Disponibilités marché", ["fichier"] + seasonal.MONTHS)
+    month = None if dispo_source == "fichier" else seasonal.month_index(dispo_source) + 1
+
+    # Démarrage rapide : avec les dispos du fichier, le premier écran précalculé (data/.index/) s'affiche
+    # sans charger les recettes ; le matching n'est calculé que si cet écran est périmé, pour un mois,
+    # ou pour une page de tableau au-delà de la première
+    screen = app_render.first_screen(DATA_DIR) if month is None else None
+
+    def full_matching():
+        """(version, résultat) du matching affiché ; repris du cache de app_render d'un rerun à l'autre."""
+        return app_render.matching(DATA_DIR, month=month, watcher=watcher.get_watcher(DATA_DIR))
+
+    if screen is not None:
+        groups, names = screen["groups"], screen["names"]
     else:
-        out = engine.compute_courses(DATA_DIR, selection, int(personnes), update_provisions=update_prov)
-        st.success("Courses générées.")
-        st.markdown(format_courses(out["liste_courses"]).replace("\n", "  \n"))
-        with st.expander("Voir la version JSON (debug)"):
-            st.json(out["liste_courses"])
-        with st.expander("Voir détails placard (consommation / utilisé)"):
-            st.json(out["pantry_used"])
+        version, match = full_matching()
+        groups = [(cat, len(rows), app_render.page_count(rows), None)
+                  for cat, rows in app_render.category_groups(version, match["scored"])]
+        names = [r["name"] for r in match["scored"]]
+
+    st.subheader("📊 Matching des recettes (marché / placard)")
+
+    # Un seul <style> pour toute la page, puis une section repliée par catégorie :
+    # le HTML de chaque page de tableau vient du premier écran ou du cache de app_render.
+    st.markdown(app_render.TABLE_STYLE, unsafe_allow_html=True)
+
+    for cat, count, pages, first_page in groups:
+        with st.expander(f"{cat.upper()} ({count})", expanded=False):
+            page = 0
+            if pages > 1:
+                page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key=f"page-{cat}") - 1
+            if page == 0 and first_page is not None:
+                st.markdown(first_page, unsafe_allow_html=True)
+            else:
+                version, match = full_matching()
+                rows = dict(app_render.category_groups(version, match["scored"])).get(cat, [])
+                st.markdown(app_render.category_table(version, cat, rows, page), unsafe_allow_html=True)
+
+    # Recettes à qui il manque peu (aucun seuil) : les 10 de plus faible coût manques + achats
+    with st.expander("🛒 Presque cuisinables (10 meilleures)", expanded=False):
+        if screen is not None:
+            recommended = screen["recommended"]
+        else:
+            source = DATA_DIR if month is None else seasonal.seasonal_snapshot(DATA_DIR, month)
+            recommended = engine.recommend_recipes(source, app_render.RECOMMENDED)
+        for r in recommended:
+            manque = f" — manque : {', '.join(r['missing'])}" if r["missing"] else ""
+            st.markdown(f"**{r['name']}** · coût {r['cost']:.2f}{manque}")
+
+    # Rechargement à chaud : le watcher relit seul le fichier de data/ modifié (à la main, pendant que
+    # l'app est ouverte) ; le fragment compare sa version à celle de ce rendu et relance la page si besoin.
+    # Démarré après le premier écran : le chargement des recettes ne retarde pas son affichage.
+    watch = watcher.get_watcher(DATA_DIR)
+    st.session_state["data_version"] = watch.version
+
+    @st.fragment(run_every=WATCH_EVERY)
+    def _follow_data():
+        if watch.version != st.session_state.get("data_version"):
+            st.rerun()
+
+    _follow_data()
+
+    # Premier écran absent ou périmé : réécrit pour le prochain démarrage (matching et HTML déjà en cache)
+    if screen is None and month is None:
+        app_render.save_first_screen(DATA_DIR, watch)
+
+    # Contrôle de data/ (validate.py) : repris du cache tant que les fichiers ne changent pas
+    report = engine.validate_data(DATA_DIR)
+    if report["issues"]:
+        label = f"{'❌' if report['errors'] else '⚠️'} Données : {report['errors']} erreur(s), {report['warnings']} avertissement(s)"
+        with st.sidebar.expander(label, expanded=bool(report["errors"])):
+            for i in sorted(report["issues"], key=lambda i: i["severity"] != "erreur")[:50]:
+                where = f" — {i['where']}" if "where" in i else ""
+                st.caption(f"**{i['file']}**{where} : {i['message']}")
+            if len(report["issues"]) > 50:
+                st.caption(f"… et {len(report['issues']) - 50} autre(s) : python validate.py")
+
+    st.divider()
+
+    # 2) Recherche plein texte (nom, ingrédients, étapes) ; le dernier mot tapé est complété
+    st.subheader("🔎 Rechercher une recette")
+    query = st.text_input("Recherche", placeholder="ex. poulet curry, saum…")
+    ingredient_names = app_render.ingredient_names(DATA_DIR, screen)
+    col_with, col_without = st.columns(2)
+    with_ings = col_with.multiselect("Avec", ingredient_names)
+    without_ings = col_without.multiselect("Sans", ingredient_names)
+    found = []
+    if query.strip() or with_ings or without_ings:
+        found = engine.search_recipes(DATA_DIR, query, with_ings, without_ings, limit=30)
+        st.markdown("  \n".join(f"[{r['name']}]({r['link']})" if r.get("link") else r["name"] for r in found)
+                    or "Aucune recette trouvée.")
+
+    st.divider()
+
+    # 3) Choix + courses
+    st.subheader("✅ Choisir les recettes et générer les courses")
+
+    # recettes trouvées par la recherche d'abord, puis les recettes filtrées par le matching et les presque cuisinables
+    options = list(dict.fromkeys([r["name"] for r in found] + names + [r["name"] for r in recommended]))
+    selection = st.multiselect("Recettes", options=options, default=[], help="Utilise Ctrl/Cmd+clic pour sélectionner plusieurs items")
+    if selection:
+        st.markdown('**Recettes sélectionnées :**  ' + '  |  '.join(selection))
+
+    personnes = st.number_input("Nombre de personnes", min_value=1, max_value=12, value=4, step=1)
+    update_prov = st.checkbox("Mettre à jour le placard (provisions.txt) et générer courses_placard.txt", value=False)
+
+    if st.button("Générer les courses"):
+        if not selection:
+            st.error("Choisis au moins une recette.")
+        else:
+            out = engine.compute_courses(DATA_DIR, selection, int(personnes), update_provisions=update_prov)
+            st.success("Courses générées.")
+            for msg in out["diagnostics"]:
+                st.warning(f"Unités : {msg}")
+            st.markdown(app_render.format_courses(out["liste_courses"]).replace("\n", "  \n"))
+            with st.expander("Voir la version JSON (debug)"):
+                st.json(out["liste_courses"])
+            with st.expander("Voir détails placard (consommation / utilisé)"):
+                st.json(out["pantry_used"])
+
+if stats is not None:
+    with st.sidebar.expander("Étapes de ce rerun", expanded=True):
+        st.code(profiling.report(stats))
+        if "profile" in stats:
+            st.code(stats["profile"])
+        if "allocations" in stats:
+            st.caption(f"Pic mémoire : {stats['peak_bytes'] / 2**20:.1f} Mio")
+            st.code("\n".join(stats["allocations"]))
@@ -0,0 +1,267 @@
+# app_render.py
+# Rendu de app.py sans Streamlit ni pandas : fonctions pures, résultats mis en cache par
+# version des données (signatures du snapshot) + seuils, donc réutilisés d'un rerun à l'autre
+# tant que data/ ne change pas (cocher une case ne recalcule ni le matching ni le HTML).
+from __future__ import annotations
+
+import html, json, threading, unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+import corpus_index
+import engine
+
+CUSTOM_CATEGORY_ORDER = [
+    "🍗 poulet",
+    "🥩 boeuf",
+    "🌮 boeuf haché",
+    "🍖 porc",
+    "🦆 canard",
+    "🍝 pâtes végé",
+    "🥕 végé",
+    "🍜 soupe",
+    "🥧 tarte",
+    "🥬 salade",
+    "🍣 saumon",
+    "🐟 poisson blanc",
+    "🦐 crevettes"
+]
+ROWS_PER_PAGE = 25  # lignes par page dans le tableau d'une catégorie
+MAX_VERSIONS = 4    # versions de données gardées en cache
+RECOMMENDED = 10    # recettes « presque cuisinables » affichées
+FIRST_SCREEN_FILE = "first_screen.json"  # dans data/.index/
+
+# (en-tête affiché, clé de la ligne de compute_matching) ; la colonne 'link' sert au lien du nom
+COLUMNS = [
+    ("nom", "name"),
+    ("taux de match marché", "score_market"),
+    ("OK marché", "ok_market"),
+    ("manque marché", "manque_market"),
+]
+CENTER_COLS = ["taux de match marché", "OK marché", "manque marché"]
+
+# CSS : mise en page et alignement, un seul <style> pour toute la page
+TABLE_STYLE = "<style>" + (
+    "table.mealplanner { width:100%; border-collapse:collapse; table-layout:fixed; }"
+    "table.mealplanner th, table.mealplanner td { padding:6px; text-align:left; vertical-align:middle; border-bottom:1px solid #ddd; }"
+    "table.mealplanner th { background:#f9f9f9; }"
+) + "\n" + "\n".join(
+    f"table.mealplanner td:nth-child({i}), table.mealplanner th:nth-child({i}) {{ text-align:center; }}"
+    for i, (label, _) in enumerate(COLUMNS, 1) if label in CENTER_COLS
+) + "</style>"
+
+
+# ---------- CACHE PAR VERSION ----------
+_lock = threading.Lock()
+_matching = OrderedDict()   # version → résultat de compute_matching
+_groups = {}                # version → [(catégorie, lignes)]
+_fragments = {}             # (version, catégorie, page) → HTML
+
+def clear_caches():
+    with _lock:
+        _matching.clear()
+        _groups.clear()
+        _fragments.clear()
+        _screens.clear()
+
+def matching(data_dir, match_min: float = None, match_min_pantry: float = None, month=None, watcher=None):
+    """(version, résultat de compute_matching) ; recalculé seulement si data/, les seuils ou le mois changent.
+
+    `watcher` (watcher.DataWatcher) : avec les seuils par défaut et sans mois, la version est celle
+    des fichiers vus par le watcher (une réécriture à l'identique ne compte pas) et le résultat est
+    tenu à jour par deltas quand seuls les dispos ou le placard changent.
+    """
+    if watcher is not None and match_min is None and match_min_pantry is None and month is None:
+        version = ("watch", watcher.view_version("matching"))
+        compute = watcher.matching
+    else:
+        snap = engine.get_engine(data_dir).snapshot()
+        version = (tuple(sorted(snap.signatures.items())), match_min, match_min_pantry, month)
+        compute = lambda: engine.compute_matching(snap, match_min, match_min_pantry, month=month, with_text=False)
+    with _lock:
+        if version in _matching:
+            _matching.move_to_end(version)
+            return version, _matching[version]
+    result = compute()
+    with _lock:
+        _matching[version] = result
+        while len(_matching) > MAX_VERSIONS:
+            old, _ = _matching.popitem(last=False)
+            _groups.pop(old, None)
+            for key in [k for k in _fragments if k[0] == old]:
+                del _fragments[key]
+    return version, result
+
+def category_groups(version, scored: list) -> list:
+    """[(catégorie, lignes)] dans l'ordre de CUSTOM_CATEGORY_ORDER, les autres à la fin."""
+    with _lock:
+        groups = _groups.get(version)
+    if groups is None:
+        by_cat = {}
+        for r in scored:
+            if r.get("category") is not None:
+                by_cat.setdefault(r["category"], []).append(r)
+        order_map = {c: i for i, c in enumerate(CUSTOM_CATEGORY_ORDER)}
+        groups = sorted(by_cat.items(), key=lambda kv: order_map.get(kv[0], 999))
+        with _lock:
+            _groups[version] = groups
+    return groups
+
+def page_count(rows: list) -> int:
+    return max(1, -(-len(rows) // ROWS_PER_PAGE))
+
+
+# ---------- RENDU ----------
+def _cell(key: str, r: dict) -> str:
+    v = r.get(key)
+    if key == "name":
+        name = html.escape(str(v or ""))
+        url = r.get("link")
+        if not url:
+            return name
+        return f'<a href="{html.escape(str(url))}" target="_blank" rel="noopener noreferrer">{name}</a>'
+    if isinstance(v, (list, tuple, set)):
+        return html.escape(", ".join(map(str, v)))
+    return "" if v is None else html.escape(str(v))
+
+def render_table(rows: list) -> str:
+    """Tableau HTML d'une liste de lignes (même structure que DataFrame.to_html)."""
+    out = ['<table border="1" class="mealplanner">', "  <thead>", '    <tr style="text-align: right;">']
+    out += [f"      <th>{label}</th>" for label, _ in COLUMNS]
+    out += ["    </tr>", "  </thead>", "  <tbody>"]
+    for r in rows:
+        out.append("    <tr>")
+        out += [f"      <td>{_cell(key, r)}</td>" for _, key in COLUMNS]
+        out.append("    </tr>")
+    out += ["  </tbody>", "</table>"]
+    return "\n".join(out)
+
+def category_table(version, category: str, rows: list, page: int = 0) -> str:
+    """HTML de la page `page` du tableau d'une catégorie, mis en cache pour cette version."""
+    key = (version, category, page)
+    with _lock:
+        fragment = _fragments.get(key)
+    if fragment is None:
+        fragment = render_table(rows[page * ROWS_PER_PAGE:(page + 1) * ROWS_PER_PAGE])
+        with _lock:
+            _fragments[key] = fragment
+    return fragment
+
+
+# ---------- PREMIER ÉCRAN PRÉCALCULÉ ----------
+# Matching par défaut (dispos du fichier, seuils par défaut) prêt à afficher : catégories avec leur
+# nombre de lignes et le HTML de leur 1re page, noms des recettes retenues, recommandations, noms
+# du catalogue (choix de la recherche).
+# Écrit dans data/.index/ à chaque nouvelle version des données ; relu au démarrage de app.py tant
+# que les signatures des fichiers (mtime + taille) n'ont pas changé : le premier affichage ne charge
+# ni les recettes ni NumPy et ne calcule rien.
+# rendu ou contenu de l'écran changé → écran précalculé périmé (1er champ : version du contenu)
+_LAYOUT = repr((2, ROWS_PER_PAGE, COLUMNS, RECOMMENDED))
+_screens = {}  # chemin → (signatures, écran) : fichier relu seulement quand data/ change
+
+def _screen_path(data_dir) -> Path:
+    return Path(data_dir) / corpus_index.INDEX_DIRNAME / FIRST_SCREEN_FILE
+
+def _signatures(data_dir) -> dict:
+    return {key: None if signature is None else list(signature)
+            for key, signature in engine.data_signatures(Path(data_dir)).items()}
+
+def first_screen(data_dir):
+    """Premier écran précalculé s'il correspond encore aux fichiers de data/, sinon None.
+
+    {'groups': [[catégorie, nb de lignes, nb de pages, HTML de la 1re page]], 'names': [...],
+    'recommended': [{'name', 'cost', 'missing'}], 'ingredients': [...]} ; un stat par fichier quand
+    rien n'a changé.
+    """
+    path = _screen_path(data_dir)
+    signatures = _signatures(data_dir)
+    with _lock:
+        hit = _screens.get(path)
+    if hit is not None and hit[0] == signatures:
+        return hit[1]
+    try:
+        screen = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    if screen.get("layout") != _LAYOUT or screen.get("signatures") != signatures:
+        return None
+    with _lock:
+        _screens[path] = (signatures, screen)
+    return screen
+
+def save_first_screen(data_dir, watcher=None):
+    """Calcule (ou reprend des caches) le premier écran de la version actuelle de data/ et l'écrit.
+
+    Renvoie l'écran, ou None si data/ a changé pendant le calcul (réécrit au rendu suivant).
+    """
+    eng = engine.get_engine(data_dir)
+    snap = eng.snapshot()
+    version, match = matching(data_dir, watcher=watcher)
+    groups = [[cat, len(rows), page_count(rows), category_table(version, cat, rows, 0)]
+              for cat, rows in category_groups(version, match["scored"])]
+    recommended = [{"name": r["name"], "cost": r["cost"], "missing": r["missing"]}
+                   for r in engine.recommend_recipes(snap, RECOMMENDED)]
+    if eng.snapshot() is not snap:
+        return None
+    screen = {
+        "layout": _LAYOUT,
+        "signatures": {key: None if sig is None else list(sig) for key, sig in snap.signatures.items()},
+        "groups": groups,
+        "names": [r["name"] for r in match["scored"]],
+        "recommended": recommended,
+        "ingredients": ingredient_names(snap),
+    }
+    path = _screen_path(data_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    engine._dump_json(screen, path)
+    with _lock:
+        _screens[path] = (screen["signatures"], screen)
+    return screen
+
+def ingredient_names(source, screen=None) -> list:
+    """Noms du catalogue triés (choix « Avec » / « Sans » de la recherche) : ceux de l'écran précalculé
+    s'il y en a un (sans charger les données), sinon calculés une fois par version du catalogue."""
+    if screen is not None:
+        return screen["ingredients"]
+    return engine.context(source).cached(
+        "ingredient_names", ("catalogue",), lambda c: sorted(c.catalogue_norm_to_pretty.values()))
+
+
+# ---------- COURSES ----------
+def _upper_no_accents(s: str) -> str:
+    s = "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+    return s.upper()
+
+def format_courses(liste_courses: dict) -> str:
+    """
+    Transforme la structure dict {rayon: {label: {val, unit, recipes, ...}}}
+    en texte lisible style notebook.
+    """
+    lines = []
+    # ordre de rayons : Marché en premier si présent, sinon tri alpha
+    rayons = list(liste_courses.keys())
+    rayons_sorted = sorted(rayons, key=lambda r: (0 if r.lower() in ["marché","marche"] else 1, r.lower()))
+    for rayon in rayons_sorted:
+        header = _upper_no_accents(rayon)
+        lines.append(f"**{header}**")
+        items = liste_courses[rayon] or {}
+        # tri : indispensable d'abord, puis alpha
+        def _k(item):
+            label, d = item
+            return (0 if d.get("indispensable") else 1, label.lower())
+        for label, d in sorted(items.items(), key=_k):
+            val = d.get("val")
+            unit = d.get("unit") or ""
+            if val is None:
+                qty = ""
+            else:
+                qty = f"{val} {unit}".strip()
+            # quantités dans une unité non convertible (ex. sachets + kg)
+            extra = [f"{e['val']} {e.get('unit') or ''}".strip() for e in d.get("extra", [])]
+            qty = " + ".join([qty] * bool(qty) + extra)
+            recipes = d.get("recipes") or []
+            n = len(recipes)
+            recettes_txt = " / ".join(recipes)
+            lines.append(f"{label} : {qty}  — dans : {n} recette(s) ({recettes_txt})")
+        lines.append("")  # blank line
+    return "\n".join(lines).strip()
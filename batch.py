@@ -0,0 +1,103 @@
+# batch.py
+# Listes de courses pour plusieurs foyers en un passage : recettes et catalogue lus une fois
+# (un snapshot partagé, en lecture seule), placard et dispos propres à chaque foyer.
+# Le travail par foyer est réparti sur un pool de threads ou de processus et les résultats
+# sont rendus au fil de l'eau, dans l'ordre où ils se terminent.
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import engine
+
+_BASE = None  # snapshot de base, dans un processus du pool seulement (reçu par _init_worker)
+
+
+def _household_snapshot(base, spec: dict, i: int):
+    """Snapshot de `base` avec le placard et les dispos du foyer `spec` (chemin ou liste ; absent = data/)."""
+    overrides = {}
+    provisions = spec.get("provisions")
+    if isinstance(provisions, (str, Path)):
+        hh = engine.get_engine(base.data_dir).household(provisions).context()
+        overrides["provisions"] = (hh.parts["provisions"], hh.signatures["provisions"])
+    elif provisions is not None:
+        part = engine.provisions_part(list(provisions), base.provisions_path, base.aliases)
+        overrides["provisions"] = (part, ("lot", i))
+    dispos = spec.get("dispos")
+    if isinstance(dispos, (str, Path)):
+        path = Path(dispos)
+        overrides["dispos"] = (engine._build_dispos(path, base.aliases), ("foyer", str(path), engine._file_signature(path)))
+    elif dispos is not None:
+        overrides["dispos"] = (engine.dispos_part(dispos, base.aliases), ("lot", i))
+    return base.derive(isolated=True, **overrides) if overrides else base
+
+
+def _run(base, i: int, spec: dict) -> dict:
+    try:
+        ctx = _household_snapshot(base, spec, i)
+        res = engine.compute_courses(ctx, spec["selection"], spec["personnes"])
+    except (OSError, ValueError) as e:  # placard / dispos illisible : le lot continue
+        return {"id": spec.get("id", i), "error": f"{type(e).__name__}: {e}"}
+    return {"id": spec.get("id", i), **res}
+
+
+def _init_worker(base):
+    # fork : `base` est hérité tel quel ; sinon il arrive picklé (parties seulement, y compris celles
+    # d'un foyer ou d'une saison, les index dérivés sont recalculés dans le processus)
+    global _BASE
+    _BASE = base
+
+def _run_in_worker(i: int, spec: dict) -> dict:
+    return _run(_BASE, i, spec)
+
+
+def run_batch(source, households, workers: int = None, executor: str = "thread"):
+    """Génère (rang, résultat) pour chaque foyer de `households`, au fur et à mesure.
+
+    Foyer = {'selection': [...], 'personnes': n, 'provisions': chemin ou liste d'entrées,
+    'dispos': chemin ou liste de noms, 'id': libre} ; résultat = celui de compute_courses
+    (+ 'id'), ou {'id', 'error'} si le placard ou les dispos du foyer sont illisibles.
+    `executor` : "thread" (défaut), "process" (fork : le snapshot est hérité, pas copié ;
+    sinon ses parties sont picklées, dérivations comprises) ou "serial". Rien n'est écrit dans data/.
+    """
+    base = engine.context(source)
+    households = list(households)
+    for spec in households:
+        if "selection" not in spec or "personnes" not in spec:
+            raise ValueError(f"foyer incomplet (attendu 'selection' et 'personnes') : {spec!r}")
+    # index communs calculés une fois, avant de les recopier dans chaque foyer
+    engine.replacement_closure(base)
+    engine.replacement_users(base)
+
+    if executor == "serial":
+        for i, spec in enumerate(households):
+            yield i, _run(base, i, spec)
+        return
+    if executor == "thread":
+        pool = ThreadPoolExecutor(workers)
+        submit = lambda i, spec: pool.submit(_run, base, i, spec)
+    elif executor == "process":
+        methods = multiprocessing.get_all_start_methods()
+        mp = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        # base propre à ce pool (initargs) : deux lots simultanés ne se marchent pas dessus
+        pool = ProcessPoolExecutor(workers, mp_context=mp, initializer=_init_worker, initargs=(base,))
+        submit = lambda i, spec: pool.submit(_run_in_worker, i, spec)
+    else:
+        raise ValueError(f"executor inconnu : {executor!r} (attendu 'thread', 'process' ou 'serial')")
+
+    with pool:
+        pending = {submit(i, spec): i for i, spec in enumerate(households)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield pending.pop(fut), fut.result()
+
+
+def compute_batch(source, households, workers: int = None, executor: str = "thread") -> list:
+    """Résultats de run_batch dans l'ordre de `households`."""
+    households = list(households)
+    out = [None] * len(households)
+    for i, res in run_batch(source, households, workers, executor):
+        out[i] = res
+    return out
@@ -0,0 +1 @@
+"""Scripts de mesure et de stress pour engine.py (à lancer depuis la racine : python -m benchmarks.<script>)."""
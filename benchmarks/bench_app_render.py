@@ -0,0 +1,71 @@
+# benchmarks/bench_app_render.py
+# Temps d'affichage de app.py sans navigateur : appelle les fonctions de rendu de app_render
+# comme le ferait un rerun Streamlit.
+#   premier affichage = matching + regroupement + tableau de la première catégorie
+#   page complète     = + première page de toutes les catégories
+#   rerun             = mêmes appels, données inchangées (case cochée, etc.)
+#   sans cache        = matching + tous les tableaux complets à chaque rerun (comportement d'avant)
+from __future__ import annotations
+
+import argparse, shutil, sys, tempfile, time
+from pathlib import Path
+
+import app_render
+import engine
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+
+def _rerun(data_dir) -> tuple[float, float, int]:
+    """(temps jusqu'au premier tableau, temps de la page complète, octets de HTML)."""
+    t0 = time.perf_counter()
+    version, match = app_render.matching(data_dir)
+    groups = app_render.category_groups(version, match["scored"])
+    size = len(app_render.TABLE_STYLE)
+    first = None
+    for cat, rows in groups:
+        size += len(app_render.category_table(version, cat, rows, 0))
+        if first is None:
+            first = time.perf_counter() - t0
+    return first or time.perf_counter() - t0, time.perf_counter() - t0, size
+
+def _uncached(data_dir) -> float:
+    t0 = time.perf_counter()
+    match = engine.compute_matching(data_dir)
+    for cat, rows in app_render.category_groups(object(), match["scored"]):
+        app_render.render_table(rows)
+    return time.perf_counter() - t0
+
+
+def _report(label, data_dir, reruns):
+    app_render.clear_caches()
+    engine.get_engine(data_dir).snapshot()  # chargement des fichiers hors mesure
+    first, full, size = _rerun(data_dir)
+    warm = min(_rerun(data_dir)[1] for _ in range(reruns))
+    before = min(_uncached(data_dir) for _ in range(reruns))
+    print(f"{label} :")
+    print(f"  premier affichage (froid) : {first * 1000:8.1f} ms")
+    print(f"  page complète (froid)     : {full * 1000:8.1f} ms  ({size / 1024:.0f} Kio de HTML)")
+    print(f"  rerun (cache)             : {warm * 1000:8.1f} ms")
+    print(f"  rerun sans cache          : {before * 1000:8.1f} ms  (x{before / warm:.0f})")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--sizes", type=int, nargs="*", default=[10_000])
+    p.add_argument("--reruns", type=int, default=5)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    _report("données réelles", REAL_DATA, args.reruns)
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-bench-"))
+    try:
+        for size in args.sizes:
+            _report(f"{size} recettes synthétiques", write_data_dir(tmp / f"data_{size}", size, args.seed), args.reruns)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print("pandas chargé :", "pandas" in sys.modules)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
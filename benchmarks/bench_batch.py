@@ -0,0 +1,147 @@
+# benchmarks/bench_batch.py
+# Lot de foyers (batch.py) : H foyers (placard, dispos, sélection et nombre de personnes propres)
+# sur le même corpus.
+#   exactitude = chaque résultat du lot == compute_courses sur un snapshot dédié au foyer
+#                (placards / dispos donnés en liste ou en fichier, foyer au placard illisible)
+#                + processus : bases dérivées (placards) en lots simultanés, et démarrage sans fork
+#   débit      = foyers/s pour 1..N workers, threads et processus, contre un Engine neuf par foyer
+# Sort en erreur au moindre écart.
+from __future__ import annotations
+
+import argparse, json, multiprocessing, os, random, shutil, sys, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import batch
+import engine
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+
+def _households(ctx, n: int, seed: int, tmp: Path) -> list:
+    rnd = random.Random(seed)
+    names = list(dict.fromkeys(r["name"] for r in ctx.recettes))
+    catalogue = list(ctx.catalogue_norm_to_pretty.values())
+    out = []
+    for i in range(n):
+        pantry = [dict(p, quantity=round(rnd.uniform(0, 2) * float(p.get("quantity", 0)), 1))
+                  for p in ctx.provisions if rnd.random() < 0.7]
+        dispos = rnd.sample(catalogue, len(catalogue) // 2)
+        spec = {"id": f"foyer-{i}", "selection": rnd.sample(names, 7), "personnes": rnd.randint(1, 6),
+                "provisions": pantry, "dispos": dispos}
+        if i % 10 == 0:  # un foyer sur dix lu depuis ses propres fichiers
+            spec["provisions"] = tmp / f"provisions-{i}.txt"
+            spec["dispos"] = tmp / f"dispos-{i}.txt"
+            engine._dump_json(pantry, spec["provisions"])
+            engine._dump_json(dispos, spec["dispos"])
+        out.append(spec)
+    out.append({"id": "illisible", "selection": names[:3], "personnes": 2, "provisions": tmp / "absent.txt"})
+    (tmp / "absent.txt").write_text("[{", encoding="utf-8")
+    return out
+
+
+def _reference(ctx, spec: dict):
+    provisions, dispos = spec.get("provisions"), spec.get("dispos")
+    try:
+        if isinstance(provisions, Path):
+            provisions = engine._load_json(provisions)
+        if isinstance(dispos, Path):
+            dispos = engine._load_json(dispos)
+    except ValueError:
+        return None
+    snap = ctx.derive(provisions=(engine.provisions_part(provisions, ctx.provisions_path, ctx.aliases), ("ref", spec["id"])),
+                      dispos=(engine.dispos_part(dispos, ctx.aliases), ("ref", spec["id"])))
+    return engine.compute_courses(snap, spec["selection"], spec["personnes"])
+
+
+def check(ctx, households: list) -> int:
+    errors = 0
+    results = batch.compute_batch(ctx, households, executor="thread")
+    for spec, res in zip(households, results):
+        ref = _reference(ctx, spec)
+        if ref is None:
+            if "error" not in res:
+                errors += 1
+                print(f"[!] {spec['id']} : placard illisible non signalé")
+            continue
+        got = {k: res.get(k) for k in ref}
+        if res["id"] != spec["id"] or json.dumps(got, sort_keys=True, default=sorted) != \
+                json.dumps(ref, sort_keys=True, default=sorted):
+            errors += 1
+            print(f"[!] {spec['id']} : résultat du lot ≠ compute_courses dédié")
+    print(f"exactitude : {len(households)} foyers, {errors} écart(s)")
+    return errors
+
+
+def check_process(ctx, households: list) -> int:
+    """Lots "process" sur des bases dérivées (placards différents) : simultanés, puis sans fork."""
+    errors = 0
+    sample = [{k: spec[k] for k in ("id", "selection", "personnes")} for spec in households[:12]]
+    bases = {label: ctx.derive(isolated=True, provisions=(engine.provisions_part(
+                 [dict(p, quantity=float(p.get("quantity", 0)) * f) for p in ctx.provisions],
+                 ctx.provisions_path, ctx.aliases), ("check_process", label)))
+             for label, f in (("vide", 0), ("triple", 3))}
+    refs = {label: batch.compute_batch(b, sample, executor="serial") for label, b in bases.items()}
+    with ThreadPoolExecutor(len(bases)) as pool:  # chaque lot garde sa propre base
+        got = dict(zip(bases, pool.map(lambda b: batch.compute_batch(b, sample, 2, "process"),
+                                       bases.values())))
+    methods = multiprocessing.get_all_start_methods
+    multiprocessing.get_all_start_methods = lambda: ["spawn"]
+    try:
+        spawned = batch.compute_batch(bases["vide"], sample, 2, "process")
+    finally:
+        multiprocessing.get_all_start_methods = methods
+    dump = lambda res: json.dumps(res, sort_keys=True, default=sorted)
+    for label, res, ref in [(f"placard {b} simultané", got[b], refs[b]) for b in bases] + \
+                           [("placard vide sans fork", spawned, refs["vide"])]:
+        if dump(res) != dump(ref):
+            errors += 1
+            print(f"[!] process, {label} : résultats ≠ lot en série sur la même base")
+    if dump(refs["vide"]) == dump(refs["triple"]):
+        errors += 1
+        print("[!] placards vide et triple : mêmes courses, contrôle sans effet")
+    print(f"process : bases dérivées, {errors} écart(s)")
+    return errors
+
+
+def bench(label: str, data: Path, households: list, max_workers: int) -> None:
+    ctx = engine.Engine(data).snapshot()
+    sample = households[:20]
+    t0 = time.perf_counter()
+    for spec in sample:  # un Engine neuf par foyer : tout est relu à chaque appel
+        batch.compute_batch(engine.Engine(data), [spec], executor="serial")
+    naive = len(sample) / (time.perf_counter() - t0)
+    line = [f"{label} : Engine neuf par foyer {naive:7.1f} foyers/s"]
+    for executor in ("serial", "thread", "process"):
+        for workers in ([1] if executor == "serial" else range(1, max_workers + 1)):
+            t0 = time.perf_counter()
+            n = sum(1 for _ in batch.run_batch(ctx, households, workers, executor))
+            line.append(f"  {executor:7s} × {workers} : {n / (time.perf_counter() - t0):7.1f} foyers/s")
+    print("\n".join(line))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--households", type=int, default=200)
+    p.add_argument("--workers", type=int, default=max(2, os.cpu_count() or 1))
+    p.add_argument("--recettes", type=int, default=5_000, help="taille du corpus synthétique")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-batch-"))
+    try:
+        ctx = engine.Engine(REAL_DATA).snapshot()
+        households = _households(ctx, args.households, args.seed, tmp)
+        errors = check(ctx, households)
+        errors += check_process(ctx, households)
+        print(f"{os.cpu_count()} cœur(s)")
+        bench("corpus réel", REAL_DATA, households, args.workers)
+        synth = write_data_dir(tmp / "synth", args.recettes, args.seed)
+        bench("corpus synthétique", synth, _households(engine.Engine(synth).snapshot(), args.households,
+                                                       args.seed, tmp), args.workers)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# benchmarks/bench_cold_start.py
+# Démarrage à froid (nouveau processus) : import d'engine + premier snapshot, depuis le JSON
+# puis depuis l'index compilé (corpus_index.py build-index). Mesure le temps et le pic de RSS.
+# Vérifie aussi que l'index n'est jamais associé au details.bin d'une autre compilation (lecture
+# entre les deux remplacements, compilation interrompue) : il est alors ignoré.
+from __future__ import annotations
+
+import argparse, json, shutil, subprocess, sys, tempfile
+from pathlib import Path
+
+import corpus_index
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import json, resource, sys, time
+
+def peak_rss_mb():
+    # VmHWM repart de zéro à l'exec ; ru_maxrss, lui, hérite du pic du processus parent sous Linux
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+t0 = time.perf_counter()
+import engine
+snap = engine.get_engine(sys.argv[1]).snapshot()
+t_load = time.perf_counter() - t0
+rss_load = peak_rss_mb()
+engine.compute_matching(snap)
+t_match = time.perf_counter() - t0
+print(json.dumps({
+    "index": snap.recettes_details is not None,
+    "load_s": t_load, "first_match_s": t_match,
+    "load_rss_mb": rss_load,
+    "max_rss_mb": peak_rss_mb(),
+}))
+"""
+
+
+def _child(data_dir: Path) -> dict:
+    out = subprocess.run([sys.executable, "-c", CHILD, str(data_dir)], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(data_dir: Path, label: str, repeat: int):
+    shutil.rmtree(data_dir / corpus_index.INDEX_DIRNAME, ignore_errors=True)
+    from_json = min((_child(data_dir) for _ in range(repeat)), key=lambda r: r["load_s"])
+    corpus_index.build_index(data_dir)
+    from_index = min((_child(data_dir) for _ in range(repeat)), key=lambda r: r["load_s"])
+    assert from_index["index"] and not from_json["index"]
+    for name, r in (("json", from_json), ("index", from_index)):
+        print(f"{label:>16} | {name:>5} | chargement {r['load_s']:7.3f}s | 1er matching {r['first_match_s']:7.3f}s "
+              f"| RSS après chargement {r['load_rss_mb']:7.1f} Mo, max {r['max_rss_mb']:7.1f} Mo")
+
+
+def check_pairing(data_dir: Path) -> int:
+    errors = 0
+    source = data_dir / corpus_index.SOURCE_FILE
+    signature = (source.stat().st_mtime_ns, source.stat().st_size)
+    recettes = json.loads(source.read_text(encoding="utf-8"))
+    index_path, details_path = corpus_index.build_index(data_dir)
+    loaded = corpus_index.load_recettes(data_dir, signature)
+    if loaded is None or [loaded[1][k] for k in range(len(recettes))] != \
+            [{k: v for k, v in r.items() if k not in corpus_index.RECIPE_KEYS} for r in recettes]:
+        print("[!] index : détails ≠ JSON")
+        errors += 1
+    old_index = index_path.read_bytes()
+    corpus_index.build_index(data_dir)  # nouvelle génération de details.bin, ancien index remis en place
+    index_path.write_bytes(old_index)
+    if corpus_index.load_recettes(data_dir, signature) is not None:
+        print("[!] index d'une compilation associé au details.bin d'une autre")
+        errors += 1
+    corpus_index.build_index(data_dir)
+    details_path.write_bytes(details_path.read_bytes()[:-1])
+    if corpus_index.load_recettes(data_dir, signature) is not None:
+        print("[!] details.bin tronqué accepté")
+        errors += 1
+    shutil.rmtree(data_dir / corpus_index.INDEX_DIRNAME, ignore_errors=True)
+    return errors
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--sizes", type=int, nargs="*", default=[10_000, 100_000])
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-cold-"))
+    errors = 0
+    try:
+        real = tmp / "real"
+        shutil.copytree(REAL_DATA, real, ignore=shutil.ignore_patterns(corpus_index.INDEX_DIRNAME))
+        errors += check_pairing(real)
+        run(real, "data/ réel", args.repeat)
+        for n in args.sizes:
+            run(write_data_dir(tmp / f"syn{n}", n, args.seed), f"{n} recettes", args.repeat)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
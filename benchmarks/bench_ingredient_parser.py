@@ -0,0 +1,161 @@
+# benchmarks/bench_ingredient_parser.py
+# Analyse des lignes d'ingrédients :
+#   golden  = lignes reconstruites depuis data/recettes_hellofresh.txt → (nom, qty, unité) enregistrés
+#   diff    = ingredient_parser contre split_qty_name + split_number_and_unit d'origine (notebook),
+#             sur ces lignes, leurs variantes (quantité en fin, fractions, casse, espaces) et des lignes aléatoires
+#   débit   = lignes / seconde, avant / après, sur un corpus synthétique
+# Sort en erreur au moindre écart.
+from __future__ import annotations
+
+import argparse, json, math, random, re, sys, time
+
+import ingredient_parser
+from benchmarks.synthetic import REAL_DATA, ingredient_lines, synthetic_recettes
+
+# ---------- version d'origine (notebook de scraping) ----------
+FRACTIONS_CLASS = "".join(ingredient_parser.FRACTION_MAP)
+NUM = rf"(?:\d+(?:[.,]\d+)?|\d+/\d+|[{re.escape(FRACTIONS_CLASS)}])"
+UNIT = r"(?:{})(?!\S)".format("|".join([re.escape(u) for u in ingredient_parser.UNITS]))
+QTY_CORE = rf"{NUM}(?:\s*{UNIT})?"
+LEADING_QTY_RE = re.compile(rf"^\s*({QTY_CORE}(?:\s+{QTY_CORE})*)\s+(.+?)\s*$")
+TRAILING_QTY_RE = re.compile(rf"^\s*(.+?)\s+({QTY_CORE}(?:\s+{QTY_CORE})*)\s*$")
+TEXT_QTY = ingredient_parser.TEXT_QTY
+
+def normalize_space(s: str) -> str:
+    return re.sub(r"\s+", " ", s.strip())
+
+def frac_to_float(s: str):
+    s = s.strip().replace(",", ".")
+    if s in ingredient_parser.FRACTION_MAP:
+        return ingredient_parser.FRACTION_MAP[s]
+    if "/" in s:
+        try:
+            a, b = s.split("/")
+            return float(a) / float(b)
+        except Exception:
+            return None
+    try:
+        return float(s)
+    except Exception:
+        return None
+
+def split_qty_name(line: str):
+    s = normalize_space(line)
+    for t in TEXT_QTY:
+        if s.lower().startswith(t):
+            rem = normalize_space(s[len(t):])
+            return t, (rem if rem else s)
+    m = LEADING_QTY_RE.match(s)
+    if m:
+        return normalize_space(m.group(1)), normalize_space(m.group(2))
+    m = TRAILING_QTY_RE.match(s)
+    if m:
+        return normalize_space(m.group(2)), normalize_space(m.group(1))
+    return None, s
+
+def split_number_and_unit(qty_text: str):
+    if qty_text is None:
+        return None, ""
+    t = qty_text.strip()
+    for txt in TEXT_QTY:
+        if t.lower() == txt:
+            return None, txt
+    m = re.match(rf"^\s*({NUM})(?:\s+(.+))?\s*$", t)
+    if not m:
+        return None, t
+    unit = (m.group(2) or "").strip()
+    n = frac_to_float(m.group(1))
+    if n is not None:
+        if abs(n - round(n)) < 1e-9:
+            n = int(round(n))
+        else:
+            n = math.floor(n * 100 + 1e-9) / 100.0
+    return n, unit
+
+def parse_line_v0(line: str) -> tuple:
+    qty_text, name = split_qty_name(line)
+    qty, unit = split_number_and_unit(qty_text)
+    return name, qty, unit or ""
+
+
+# ---------- corpus de lignes ----------
+def variants(line: str, rnd: random.Random) -> list:
+    """Mêmes ingrédients écrits autrement : quantité en fin, casse, espaces, fractions."""
+    out = [f"  {line}\t", line.upper()]
+    m = re.match(r"^(\S+)(?: (\S+))? (.+)$", line)
+    if m:
+        qty, unit, name = m.groups()
+        out.append(f"{name} {qty} {unit or ''}".strip())
+        out.append(f"{rnd.choice(list(ingredient_parser.FRACTION_MAP))} {unit or ''} {name}")
+        out.append(f"{qty}{unit or ''} {name}")
+        out.append(f"{qty.replace('.', ',')} {unit or ''} {name}")
+    return out
+
+def random_line(rnd: random.Random, words: list) -> str:
+    pieces = [str(rnd.randint(0, 500)), f"{rnd.randint(1, 4)}/{rnd.randint(0, 4)}", "1,5", "0.25",
+              *ingredient_parser.FRACTION_MAP, *ingredient_parser.UNITS, *TEXT_QTY, "x", "de", "(", ")"]
+    toks = [rnd.choice(pieces) if rnd.random() < 0.5 else rnd.choice(words) for _ in range(rnd.randint(1, 6))]
+    return rnd.choice(["", " ", "  "]).join(toks) if rnd.random() < 0.1 else " ".join(toks)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--size", type=int, default=10_000, help="recettes synthétiques pour le débit")
+    p.add_argument("--fuzz", type=int, default=50_000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    rnd = random.Random(args.seed)
+    errors = []
+
+    with open(REAL_DATA / "recettes_hellofresh.txt", encoding="utf-8") as f:
+        recettes = json.load(f)
+
+    # golden : la ligne reconstruite redonne la saisie d'origine
+    golden = 0
+    for r in recettes:
+        for line, (name, d) in zip(ingredient_lines(r), r["ingredients"].items()):
+            want = (name, d.get("qty"), (d.get("unit") or "").strip())
+            got = ingredient_parser.parse_line(line)
+            golden += 1
+            if got != want:
+                errors.append(f"golden {line!r} : {got}, attendu {want}")
+
+    # différentiel contre la version d'origine
+    lines = [l for r in recettes for l in ingredient_lines(r)]
+    words = sorted({w for l in lines for w in l.split()})
+    corpus = lines + [v for l in lines for v in variants(l, rnd)] + [random_line(rnd, words) for _ in range(args.fuzz)]
+    for line in corpus:
+        got, want = ingredient_parser.parse_line(line), parse_line_v0(line)
+        if got != want:
+            errors.append(f"diff {line!r} : {got}, attendu {want}")
+    print(f"golden : {golden} lignes ; différentiel : {len(corpus)} lignes")
+
+    # débit
+    bench = [l for r in synthetic_recettes(args.size, args.seed) for l in ingredient_lines(r)]
+    t0 = time.perf_counter()
+    for line in bench:
+        parse_line_v0(line)
+    t_v0 = time.perf_counter() - t0
+    ingredient_parser.parse_line.cache_clear()
+    t0 = time.perf_counter()
+    for line in bench:
+        ingredient_parser.parse_line.__wrapped__(line)
+    t_raw = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in ingredient_parser.parse_lines(bench):
+        pass
+    t_new = time.perf_counter() - t0
+    n = len(bench)
+    print(f"débit sur {n} lignes ({len(set(bench))} distinctes) :")
+    print(f"  avant (2 regex + découpe)  : {n / t_v0:12,.0f} lignes/s")
+    print(f"  grammaire unique           : {n / t_raw:12,.0f} lignes/s  (x{t_v0 / t_raw:.1f})")
+    print(f"  parse_lines (avec cache)   : {n / t_new:12,.0f} lignes/s  (x{t_v0 / t_new:.1f})")
+
+    for e in errors[:20]:
+        print("  ÉCART :", e)
+    print(f"{len(errors)} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# benchmarks/bench_instrumentation.py
+# Instrumentation (profiling.py) :
+#   couverture = un compute_matching + compute_courses (écriture comprise) à froid remplit toutes les étapes
+#   surcoût    = instrumentation désactivée : coût d'une étape vide × nombre d'étapes par appel,
+#                rapporté au temps de compute_matching (doit rester < 1 %)
+#   texte      = compute_matching(with_text=False) : mêmes 'scored', temps gagné
+#   captures   = cProfile et tracemalloc renvoient un rapport
+# Sort en erreur si une étape manque, si le surcoût dépasse 1 % ou si with_text change le résultat.
+from __future__ import annotations
+
+import argparse, contextlib, io, shutil, sys, tempfile, timeit
+from pathlib import Path
+
+import engine
+import profiling
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+EXPECTED = ["init:recettes", "init:catalogue", "init:dispos", "init:provisions", "score", "filtre", "tri",
+            "texte", "courses", "placard", "écriture placard"]
+MAX_OVERHEAD = 0.01
+
+
+def _best(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def run(data: Path, label: str, repeat: int) -> int:
+    errors = 0
+    eng = engine.Engine(data)
+    with profiling.collect() as stats:
+        m = engine.compute_matching(eng)
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.compute_courses(eng, [r["name"] for r in m["scored"]][:7], 4, update_provisions=True)
+    missing = [s for s in EXPECTED if s not in stats["stages"]]
+    if missing or not any(s.startswith("index:") for s in stats["stages"]):
+        errors += 1
+        print(f"[!] étapes manquantes : {missing}")
+    print(f"{label} — appel à froid :\n{profiling.report(stats)}")
+
+    snap = eng.snapshot()
+    with profiling.collect() as warm:
+        engine.compute_matching(snap)
+    calls = sum(s["calls"] for s in warm["stages"].values()) + len(warm["counters"])
+    t_stage = _best(lambda: [profiling.stage("x").__enter__() for _ in range(1000)], repeat) / 1000
+    t_match = _best(lambda: engine.compute_matching(snap), repeat)
+    overhead = calls * t_stage / t_match
+    if overhead > MAX_OVERHEAD:
+        errors += 1
+    print(f"désactivé : {calls} étapes × {t_stage * 1e9:.0f} ns = {overhead:.4%} de compute_matching "
+          f"({t_match * 1e3:.2f} ms)")
+
+    lazy = engine.compute_matching(snap, with_text=False)
+    if lazy["scored"] != engine.compute_matching(snap)["scored"] or lazy["text"] is not None:
+        errors += 1
+        print("[!] with_text=False change 'scored' ou construit 'text'")
+    t_text = _best(lambda: engine.render_matching_text(lazy["scored"]), repeat)
+    print(f"texte : {t_text * 1e3:.2f} ms évités par appel avec with_text=False ({t_text / t_match:.0%} de compute_matching)")
+    return errors
+
+
+def check_captures(data: Path) -> int:
+    snap = engine.Engine(data).snapshot()
+    with profiling.collect("cprofile") as prof:
+        engine.compute_matching(snap)
+    with profiling.collect("tracemalloc") as mem:
+        engine.compute_matching(snap)
+    ok = "compute_matching" in prof.get("profile", "") and mem.get("allocations") and mem.get("peak_bytes", 0) > 0
+    print(f"captures : cProfile {len(prof.get('profile', '').splitlines())} lignes, "
+          f"tracemalloc pic {mem.get('peak_bytes', 0) / 2**20:.1f} Mio")
+    return 0 if ok else 1
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--recettes", type=int, default=5_000, help="taille du corpus synthétique")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-instrumentation-"))
+    try:
+        real = tmp / "real"
+        shutil.copytree(REAL_DATA, real, ignore=shutil.ignore_patterns(".*"))
+        errors = run(real, "corpus réel", args.repeat)
+        errors += run(write_data_dir(tmp / "synth", args.recettes, args.seed), "corpus synthétique", args.repeat)
+        errors += check_captures(real)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
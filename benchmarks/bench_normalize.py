@@ -0,0 +1,80 @@
+# benchmarks/bench_normalize.py
+# Coût par recette de la canonicalisation des ingrédients :
+#   avant  = normalize/canon d'origine (regex par mot, sans cache), appelés à chaque usage
+#   cache  = normalize/canon mémoïsés (lru_cache)
+#   clés   = recette_keys pré-calculées au chargement (ctx.recettes_keys), aucun appel
+from __future__ import annotations
+
+import argparse, re, shutil, sys, tempfile, time, unicodedata
+from pathlib import Path
+
+import engine
+from benchmarks.synthetic import write_data_dir
+
+
+def normalize_v0(s: str) -> str:
+    """normalize() tel qu'avant la mémoïsation."""
+    if not s: return ""
+    s = unicodedata.normalize("NFD", s.lower())
+    s = "".join(c for c in s if unicodedata.category(c) != "Mn")
+    words = s.split()
+    singularized = []
+    for w in words:
+        if len(w) > 3 and re.search(r"[sx]$", w):
+            w = re.sub(r"[sx]$", "", w)
+        singularized.append(w)
+    return " ".join(singularized)
+
+def canon_v0(name: str) -> str:
+    return engine.ALIASES_NORM.get(normalize_v0(name), name)
+
+
+def _per_recipe(recettes, canon, normalize):
+    """Travail de score_recette + _courses_nb sur les noms : canon puis normalize, deux fois."""
+    t0 = time.perf_counter()
+    for _ in range(2):
+        for r in recettes:
+            for raw in r["ingredients"]:
+                normalize(canon(raw))
+    return (time.perf_counter() - t0) / (2 * len(recettes))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--size", type=int, default=10_000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-bench-"))
+    try:
+        snap = engine.get_engine(write_data_dir(tmp / "data", args.size, args.seed)).snapshot()
+        recettes = snap.recettes
+
+        before = _per_recipe(recettes, canon_v0, normalize_v0)
+        engine.clear_normalize_caches()
+        cached = _per_recipe(recettes, engine.canon, engine.normalize)
+        t0 = time.perf_counter()
+        for keys in snap.recettes_keys:
+            for _, _, n, i in keys:
+                pass
+        keyed = (time.perf_counter() - t0) / len(recettes)
+
+        print(f"{args.size} recettes, coût par recette (canon + normalize de tous les ingrédients) :")
+        print(f"  avant (regex, sans cache) : {before * 1e6:8.2f} µs")
+        print(f"  lru_cache                 : {cached * 1e6:8.2f} µs  (x{before / cached:.1f})")
+        print(f"  clés pré-calculées        : {keyed * 1e6:8.2f} µs  (x{before / keyed:.1f})")
+
+        engine.clear_normalize_caches()
+        t0 = time.perf_counter()
+        engine.compute_matching(snap)
+        t_match = time.perf_counter() - t0
+        print(f"compute_matching : {t_match:.3f}s")
+        for name, st in engine.normalize_stats().items():
+            print(f"  {name}: {st}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# benchmarks/bench_planner.py
+# optimize_plan : qualité (coût) contre temps de résolution, par solveur.
+#   - données réelles, candidats = recettes retenues par compute_matching : exact vs glouton vs local,
+#     puis quotas qui empêchent d'atteindre K (plan le plus complet possible attendu)
+#   - corpus synthétiques (1k / 10k), tous candidats : glouton vs local (< 1 s attendu, construction
+#     du modèle comprise au 1er appel)
+# Sort en erreur si une heuristique bat l'exact (borne fausse), dépasse le budget de temps ou rend
+# un plan incomplet.
+from __future__ import annotations
+
+import argparse, shutil, sys, tempfile, time
+from pathlib import Path
+
+import engine
+import planner
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+TIME_BUDGET = 1.0  # secondes, solveurs heuristiques sur 10k recettes
+
+
+def _run(snap, k, personnes, solver, constraints):
+    t0 = time.perf_counter()
+    res = planner.optimize_plan(snap, k, personnes, constraints, solver=solver)
+    return res, time.perf_counter() - t0
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--sizes", type=int, nargs="*", default=[1_000, 10_000])
+    p.add_argument("--ks", type=int, nargs="*", default=[3, 5, 7])
+    p.add_argument("--personnes", type=int, default=2)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--exact-pool", type=int, default=30)
+    args = p.parse_args(argv)
+    errors = 0
+
+    # Données réelles : l'exact sert de référence, sur les EXACT_POOL premières candidates
+    # (au-delà de K=3 l'énumération complète des ~100 recettes retenues prend des secondes)
+    snap = engine.get_engine(REAL_DATA).snapshot()
+    matching = [r["name"] for r in engine.compute_matching(snap)["scored"]]
+    pool = matching[:args.exact_pool]
+    print(f"données réelles : {len(matching)} candidates, exact sur les {len(pool)} premières")
+    for k in args.ks:
+        constraints = {"candidates": pool}
+        exact, t_exact = _run(snap, k, args.personnes, "exact", constraints)
+        line = [f"  K={k}  exact {exact['cost']:8.3f} ({t_exact:6.3f}s)"]
+        for solver in ("greedy", "local"):
+            res, t = _run(snap, k, args.personnes, solver, constraints)
+            line.append(f"{solver} {res['cost']:8.3f} ({t:6.3f}s)")
+            if res["cost"] < exact["cost"] - 1e-6:
+                print(f"  ÉCART : {solver} ({res['cost']}) meilleur que l'exact ({exact['cost']}) pour K={k}")
+                errors += 1
+        print("  ".join(line))
+
+    # Quotas plus serrés que K : une recette par catégorie, le plan s'arrête au nombre de catégories
+    categories = {r["name"]: r.get("category") for r in snap.recettes}
+    quotas = {c: 1 for c in {categories[n] for n in pool} if c}
+    k = len(quotas) + 2
+    expected = len(quotas) + sum(1 for n in pool if not categories[n])
+    constraints = {"candidates": pool, "quotas": quotas}
+    results = {solver: _run(snap, k, args.personnes, solver, constraints)[0] for solver in ("greedy", "local")}
+    line = [f"  quotas 1/catégorie, K={k}"]
+    for solver, res in results.items():
+        line.append(f"{solver} {len(res['selection'])} recettes {res['cost']:8.3f}")
+        if len(res["selection"]) != min(k, expected):
+            print(f"  INCOMPLET : {solver} rend {len(res['selection'])} recettes, {min(k, expected)} possibles")
+            errors += 1
+    if results["local"]["cost"] > results["greedy"]["cost"] + 1e-6:
+        print(f"  ÉCART : local ({results['local']['cost']}) plus cher que le glouton sous quotas")
+        errors += 1
+    print("  ".join(line))
+
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-bench-"))
+    try:
+        for size in args.sizes:
+            snap = engine.get_engine(write_data_dir(tmp / f"data_{size}", size, args.seed)).snapshot()
+            # 1er appel : le modèle est construit dans le budget de temps
+            k = max(args.ks)
+            res, t = _run(snap, k, args.personnes, "local", {"candidates": "all"})
+            print(f"{size} recettes synthétiques (1er appel, modèle compris : local K={k} en {t:.3f}s) :")
+            if t > TIME_BUDGET or len(res["selection"]) != k:
+                print(f"  LENT : 1er appel local K={k} sur {size} recettes : {t:.3f}s, {len(res['selection'])} recettes")
+                errors += 1
+            for k in args.ks:
+                line = [f"  K={k}"]
+                for solver in ("greedy", "local"):
+                    res, t = _run(snap, k, args.personnes, solver, {"candidates": "all"})
+                    line.append(f"{solver} {res['cost']:8.3f} ({t:6.3f}s, {res['shared_market_items']} frais partagés)")
+                    if t > TIME_BUDGET or len(res["selection"]) != k:
+                        print(f"  LENT : {solver} K={k} sur {size} recettes : {t:.3f}s")
+                        errors += 1
+                print("  ".join(line))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# benchmarks/bench_provisions_db.py
+# Contention sur le placard : N processus écrivent en même temps des décréments de listes de courses
+# (plusieurs foyers / onglets), pendant qu'un lecteur relit le placard en boucle.
+#   sqlite = provisions_db (transaction par liste, WAL) : aucune mise à jour ne doit se perdre
+#   json   = update_provisions_files sur provisions.txt : les pertes sont comptées, pour comparaison
+# Alias automatiques (aliases_auto.json) : une entrée du placard nommée par un alias est décrémentée,
+# que la base ait été importée avec les alias du dossier ou sans ; une clé inconnue est signalée.
+# Sort en erreur si la base perd ou double un décrément, ou si une entrée aliasée n'est pas décrémentée.
+from __future__ import annotations
+
+import argparse, contextlib, io, multiprocessing as mp, random, shutil, statistics, sys, tempfile, time
+from pathlib import Path
+
+import engine
+import provisions_db
+from benchmarks.synthetic import REAL_DATA
+
+STOCK = 1_000_000  # quantité initiale : aucun décrément n'est plafonné à 0
+
+
+def _batches(norms: list, seed: int, n: int) -> list:
+    rnd = random.Random(seed)
+    return [{k: rnd.randint(1, 9) for k in rnd.sample(norms, rnd.randint(3, 6))} for _ in range(n)]
+
+def _writer_db(db_path, norms, seed, n, out):
+    db = provisions_db.ProvisionsDB(db_path)
+    lat = []
+    for batch in _batches(norms, seed, n):
+        t0 = time.perf_counter()
+        db.apply_consumption(batch)
+        lat.append(time.perf_counter() - t0)
+    out.put(lat)
+
+def _writer_json(data_dir, norms, seed, n, out):
+    lat = []
+    household = engine.get_engine(data_dir).household()
+    for batch in _batches(norms, seed, n):
+        t0 = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                engine.update_provisions_files(batch, household)
+        except ValueError:
+            pass  # fichier lu pendant qu'un autre processus l'écrivait (plus le cas avec l'écriture atomique)
+        lat.append(time.perf_counter() - t0)
+    out.put(lat)
+
+def _reader(read, stop, out):
+    reads = 0
+    while not stop.is_set():
+        read()
+        reads += 1
+    out.put(reads)
+
+
+def _run(target, arg, norms, writers, per_writer, read):
+    ctx = mp.get_context("fork")
+    out, reads_q, stop = ctx.Queue(), ctx.Queue(), ctx.Event()
+    reader = ctx.Process(target=_reader, args=(read, stop, reads_q))
+    reader.start()
+    procs = [ctx.Process(target=target, args=(arg, norms, seed, per_writer, out)) for seed in range(writers)]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    lat = [x for _ in procs for x in out.get()]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    reads = reads_q.get()
+    reader.join()
+    return elapsed, lat, reads
+
+def _expected(norms, writers, per_writer) -> dict:
+    used = dict.fromkeys(norms, 0)
+    for seed in range(writers):
+        for batch in _batches(norms, seed, per_writer):
+            for k, v in batch.items():
+                used[k] += v
+    return {k: STOCK - v for k, v in used.items()}
+
+def _report(label, elapsed, lat, reads):
+    lat.sort()
+    print(f"  {label:6s}: {len(lat) / elapsed:8.0f} listes/s, latence p50 {statistics.median(lat) * 1000:6.1f} ms, "
+          f"p99 {lat[int(len(lat) * 0.99) - 1] * 1000:6.1f} ms, {reads} lectures concurrentes")
+
+
+def check_aliases(tmp: Path) -> int:
+    errors = 0
+    data = tmp / "aliases"
+    shutil.copytree(REAL_DATA, data, ignore=shutil.ignore_patterns(".*"))
+    provisions = engine._load_json(data / "provisions.txt")
+    entry = next(e for e in provisions if float(e.get("quantity", 0)) >= 2)
+    target, entry["name"] = entry["name"], "MonAlias"
+    engine._dump_json(provisions, data / "provisions.txt")
+    engine._dump_json({"MonAlias": target}, data / engine.AUTO_ALIASES_FILE)
+    key = engine.normalize(target)
+    before = float(entry["quantity"])
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        provisions_db.main(["import", str(data / "provisions.txt"), str(data / "placard.db")])
+    household = engine.Engine(data).household(data / "placard.db")
+    if key not in household.context().provisions_index:
+        print(f"[!] alias : {target!r} absent du placard lu depuis la base")
+        errors += 1
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.update_provisions_files({key: 1}, household)
+    left = {e["name"]: e["quantity"] for e in household.db.provisions()}["MonAlias"]
+    if left != before - 1:
+        print(f"[!] alias, import avec les alias du dossier : {before} - 1 → {left}")
+        errors += 1
+
+    db = provisions_db.ProvisionsDB(tmp / "sans_alias.db")
+    db.import_json(data / "provisions.txt")  # clés sans les alias du dossier
+    db.apply_consumption({key: 1}, household.context().aliases)
+    left = {e["name"]: e["quantity"] for e in db.provisions()}["MonAlias"]
+    if left != before - 1:
+        print(f"[!] alias, import sans les alias du dossier : {before} - 1 → {left}")
+        errors += 1
+    version = db.version()
+    try:
+        db.apply_consumption({key: 1, "poudre de licorne": 1})
+        print("[!] clé absente du placard : pas d'erreur")
+        errors += 1
+    except ValueError:
+        pass
+    if db.version() != version:
+        print("[!] clé absente du placard : décréments écrits malgré l'erreur")
+        errors += 1
+    print(f"  alias : entrée 'MonAlias' → {target!r} décrémentée, {errors} erreur(s)")
+    return errors
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--writers", type=int, default=8)
+    p.add_argument("--per-writer", type=int, default=200)
+    args = p.parse_args(argv)
+    errors = 0
+
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-bench-"))
+    try:
+        data = tmp / "data"
+        shutil.copytree(REAL_DATA, data, ignore=shutil.ignore_patterns(".*"))
+        provisions = [{**e, "quantity": STOCK} for e in engine._load_json(data / "provisions.txt")]
+        engine._dump_json(provisions, data / "provisions.txt")
+        norms = sorted({engine.normalize(engine.canon(e["name"])) for e in provisions})
+        expected = _expected(norms, args.writers, args.per_writer)
+        print(f"{args.writers} écrivains x {args.per_writer} listes, {len(norms)} provisions")
+
+        db = provisions_db.ProvisionsDB(tmp / "provisions.db")
+        db.import_json(data / "provisions.txt")
+        elapsed, lat, reads = _run(_writer_db, db.path, norms, args.writers, args.per_writer, db.provisions)
+        _report("sqlite", elapsed, lat, reads)
+        got = {engine.normalize(engine.canon(e["name"])): e["quantity"] for e in db.provisions()}
+        lost = sum(1 for k in norms if got[k] != expected[k])
+        n_hist = len(db.history())
+        n_expected_hist = sum(len(b) for s in range(args.writers) for b in _batches(norms, s, args.per_writer))
+        print(f"          {lost} provisions fausses, {n_hist}/{n_expected_hist} lignes d'historique, version {db.version()}")
+        if lost or n_hist != n_expected_hist or db.version() != 1 + args.writers * args.per_writer:
+            errors += 1
+
+        elapsed, lat, reads = _run(_writer_json, data, norms, args.writers, args.per_writer,
+                                   lambda: engine._load_json(data / "provisions.txt"))
+        _report("json", elapsed, lat, reads)
+        got = {engine.normalize(engine.canon(e["name"])): e["quantity"] for e in engine._load_json(data / "provisions.txt")}
+        consumed = sum(STOCK - v for v in expected.values())
+        applied = sum(STOCK - got[k] for k in norms)
+        print(f"          décréments appliqués : {applied:.0f}/{consumed} ({(consumed - applied) / consumed:.0%} perdus)")
+        errors += check_aliases(tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
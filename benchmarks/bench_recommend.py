@@ -0,0 +1,97 @@
+# benchmarks/bench_recommend.py
+# recommend : K meilleures recettes par coût (recommend.py), contre un tri complet de référence.
+#   - données réelles puis corpus synthétiques (1k / 10k / 100k recettes)
+#   - modèles construits une fois par snapshot, puis latence d'une requête K=10/50/500 par backend
+# Sort en erreur si un backend ne rend pas exactement les K premières du tri complet
+# (coûts, puis noms), ou si une requête dépasse le budget de temps.
+from __future__ import annotations
+
+import argparse, random, shutil, sys, tempfile, time
+from pathlib import Path
+
+import engine
+import recommend
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+TIME_BUDGET = 0.5  # secondes, une requête sur modèles chauds (100k recettes, K=500)
+
+
+def reference(snap, personnes: int, candidates=None) -> list:
+    """(coût, nom) de toutes les recettes, coût recalculé ligne à ligne et trié en entier."""
+    lines = recommend.lines_model(snap, personnes)
+    terms = recommend.terms_model(snap, personnes)
+    names, weights = lines["demand"]["names"], lines["demand"]["weights"]
+    rows = []
+    for i, name in enumerate(names):
+        if candidates is not None and name not in candidates:
+            continue
+        cost = 0.0
+        for p in range(lines["start"][i], lines["start"][i + 1]):
+            j = lines["ids"][p]
+            frac = recommend._fraction(lines["vals"][p], terms["pantry"][j])
+            cost += terms["miss"][j] + recommend.PURCHASE_WEIGHT * weights[j] * frac
+        rows.append((round(cost, recommend.COST_DECIMALS), name.lower(), i, name))
+    rows.sort()
+    return [(c, name) for c, _, _, name in rows]
+
+
+def _check(label, got, expected) -> int:
+    got = [(round(r["cost"], 3), r["name"]) for r in got]
+    expected = [(round(c, 3), name) for c, name in expected]
+    if got != expected:
+        print(f"  ÉCART {label} : {got[:3]}… attendu {expected[:3]}…")
+        return 1
+    return 0
+
+
+def run(snap, ks, personnes: int, backends, label: str, candidates=None) -> int:
+    errors = 0
+    for backend in backends:  # modèles construits hors mesure (une fois par snapshot)
+        t0 = time.perf_counter()
+        recommend.recommend(snap, 1, personnes, candidates, backend)
+        print(f"  {label} {backend:6s} modèles {time.perf_counter() - t0:7.3f}s", end="")
+        for k in ks:
+            t0 = time.perf_counter()
+            res = recommend.recommend(snap, k, personnes, candidates, backend)
+            t = time.perf_counter() - t0
+            print(f"  K={k} {t * 1e3:8.2f} ms", end="")
+            errors += _check(f"{label} {backend} K={k}", res, reference(snap, personnes, candidates)[:k])
+            if t > TIME_BUDGET:
+                print(f"\n  LENT : {backend} K={k} ({label}) : {t:.3f}s", end="")
+                errors += 1
+        print()
+    return errors
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--sizes", type=int, nargs="*", default=[1_000, 10_000, 100_000])
+    p.add_argument("--ks", type=int, nargs="*", default=[10, 50, 500])
+    p.add_argument("--personnes", type=int, default=2)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    backends = ["python"] + (["numpy"] if recommend.np is not None else [])
+    errors = 0
+
+    snap = engine.get_engine(REAL_DATA).snapshot()
+    names = list(dict.fromkeys(r["name"] for r in snap.recettes))
+    print(f"données réelles : {len(names)} recettes")
+    errors += run(snap, args.ks, args.personnes, backends, "toutes")
+    subset = set(random.Random(args.seed).sample(names, len(names) // 3))
+    errors += run(snap, args.ks, args.personnes, backends, "tiers ", subset)
+
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-bench-"))
+    try:
+        for size in args.sizes:
+            snap = engine.get_engine(write_data_dir(tmp / f"data_{size}", size, args.seed)).snapshot()
+            print(f"{size} recettes synthétiques :")
+            errors += run(snap, args.ks, args.personnes, backends, f"{size}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
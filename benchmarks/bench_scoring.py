@@ -0,0 +1,49 @@
+# benchmarks/bench_scoring.py
+# compute_matching : backend "python" (boucle score_recette) vs "numpy" (vector_scoring)
+# sur des corpus synthétiques ; vérifie que les deux renvoient les mêmes recettes retenues.
+from __future__ import annotations
+
+import argparse, shutil, sys, tempfile, time
+from pathlib import Path
+
+import engine
+from benchmarks.synthetic import write_data_dir
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def run(size: int, seed: int, skip_python_above: int) -> bool:
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-bench-"))
+    try:
+        data_dir = write_data_dir(tmp / "data", size, seed)
+        snap, t_load = _timed(lambda: engine.get_engine(data_dir).snapshot())
+        np_cold, t_np_cold = _timed(lambda: engine.compute_matching(snap, backend="numpy", with_all=False))
+        np_warm, t_np_warm = _timed(lambda: engine.compute_matching(snap, backend="numpy", with_all=False))
+        line = f"{size:>8} recettes | chargement {t_load:7.3f}s | numpy 1er appel {t_np_cold:7.3f}s, suivants {t_np_warm:7.3f}s"
+        same = True
+        if size <= skip_python_above:
+            py, t_py = _timed(lambda: engine.compute_matching(snap))
+            same = py["scored"] == np_warm["scored"] and py["text"] == np_warm["text"]
+            line += f" | python {t_py:7.3f}s | x{t_py / max(t_np_warm, 1e-9):.0f} | {'identique' if same else 'DIFFÉRENT'}"
+        print(line, f"| {len(np_warm['scored'])} retenues")
+        return same
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--skip-python-above", type=int, default=100_000, help="ne pas lancer le backend python au-delà")
+    args = p.parse_args(argv)
+    ok = all([run(n, args.seed, args.skip_python_above) for n in args.sizes])
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
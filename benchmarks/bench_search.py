@@ -0,0 +1,119 @@
+# benchmarks/bench_search.py
+# Index de recherche (search_index.py) sur un gros corpus synthétique :
+#   construction = temps et mémoire (SearchIndex.memory_bytes) de l'index complet
+#   requêtes     = latence médiane / p99 de requêtes types (mots, préfixe, filtres d'ingrédients)
+#   incrémental  = ajout de recettes « scrapées » : mise à jour de l'index vs reconstruction,
+#                  et résultats identiques à ceux d'un index neuf
+# Les scores NumPy et Python sont comparés ; sort en erreur au moindre écart.
+from __future__ import annotations
+
+import argparse, json, math, shutil, statistics, sys, tempfile, time
+from pathlib import Path
+
+import engine
+import search_index
+from benchmarks.synthetic import synthetic_recettes, write_data_dir
+
+QUERIES = [
+    ("poulet curry", (), ()),
+    ("saumon citron", (), ()),
+    ("gratin de pommes de terre", (), ()),
+    ("pou", (), ()),
+    ("crème", (), ()),
+    ("pâtes", ("Poulet",), ("Crème",)),
+    ("", ("Oignon", "Ail"), ("Lardons",)),
+    ("sauce soja gingembre", ("Riz",), ()),
+]
+
+
+def _latencies(index, repeat: int) -> dict:
+    out = {}
+    for q, with_, without in QUERIES:
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            index.search(q, with_, without)
+            times.append(time.perf_counter() - t0)
+        out[(q, with_, without)] = times
+    return out
+
+def _same(a, b) -> bool:
+    return [p for p, _ in a] == [p for p, _ in b] and all(math.isclose(x, y, rel_tol=1e-4) for (_, x), (_, y) in zip(a, b))
+
+def _compare_backends(index) -> int:
+    errors = 0
+    for q, with_, without in QUERIES:
+        fast = index.search(q, with_, without, limit=50)
+        np_, search_index.np = search_index.np, None
+        try:
+            slow = index.search(q, with_, without, limit=50)
+        finally:
+            search_index.np = np_
+        if not _same(fast, slow):
+            errors += 1
+            print(f"[!] {q!r} : NumPy ≠ Python")
+    return errors
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--size", type=int, default=100_000)
+    p.add_argument("--added", type=int, default=500, help="recettes ajoutées pour la mise à jour incrémentale")
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    errors = 0
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-search-"))
+    try:
+        data_dir = write_data_dir(tmp / "data", args.size, args.seed)
+        eng = engine.Engine(data_dir)
+        snap = eng.snapshot()
+
+        t0 = time.perf_counter()
+        index = search_index.recipe_index(snap)
+        build = time.perf_counter() - t0
+        print(f"{args.size} recettes : construction {build:.1f} s, index {index.memory_bytes() / 2**20:.0f} Mio, "
+              f"{len(index.terms)} termes")
+
+        index.search("warm-up")
+        for (q, with_, without), times in _latencies(index, args.repeat).items():
+            times.sort()
+            label = q + "".join(f" +{x}" for x in with_) + "".join(f" -{x}" for x in without)
+            print(f"  {label!r:45s} p50 {statistics.median(times) * 1e3:6.2f} ms   p99 {times[-1] * 1e3:6.2f} ms")
+        errors += _compare_backends(index)
+        before = [index.search(q, w, wo, limit=50) for q, w, wo in QUERIES]
+
+        # nouveau scraping : recettes ajoutées à la fin + une recette modifiée + une supprimée
+        path = data_dir / engine.DATA_FILES["recettes"]
+        recettes = json.loads(path.read_text(encoding="utf-8"))
+        new = synthetic_recettes(args.size + args.added, args.seed + 1)[args.size:]
+        recettes[0]["name"] += " (revue)"
+        del recettes[1]
+        path.write_text(json.dumps(recettes + new, ensure_ascii=False), encoding="utf-8")
+        snap2 = eng.snapshot()
+        t0 = time.perf_counter()
+        updated = search_index.recipe_index(snap2)
+        t_update = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        fresh = search_index.SearchIndex.build(snap2)
+        t_build = time.perf_counter() - t0
+        print(f"+{args.added} recettes : mise à jour {t_update:.2f} s, reconstruction {t_build:.1f} s "
+              f"(x{t_build / t_update:.0f})")
+        if updated is index or [index.search(q, w, wo, limit=50) for q, w, wo in QUERIES] != before:
+            errors += 1
+            print("[!] l'index du snapshot précédent a été modifié par la mise à jour")
+        for q, with_, without in QUERIES + [("synthétique revue", (), ())]:
+            if not _same(updated.search(q, with_, without, limit=50), fresh.search(q, with_, without, limit=50)):
+                errors += 1
+                print(f"[!] {q!r} : index mis à jour ≠ index neuf")
+        if index.live != args.size or updated.live != args.size + args.added - 1:
+            errors += 1
+            print(f"[!] recettes indexées : {index.live} puis {updated.live}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
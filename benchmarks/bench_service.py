@@ -0,0 +1,195 @@
+# benchmarks/bench_service.py
+# Générateur de charge du service HTTP (service.py), entièrement sur localhost.
+#   - contrôles : corps identiques aux appels directs d'engine, 304 sur If-None-Match, ETag qui
+#     change quand un fichier data/ change, corps chunked sur un gros corpus synthétique
+#   - charge : --clients connexions keep-alive pendant --seconds, mélange d'endpoints
+#     (matching revalidé ou non, recommandations, placard, réappro, courses en POST)
+# Affiche latences p50 / p95 / p99 par endpoint et débit total ; sort en erreur sur tout écart.
+from __future__ import annotations
+
+import argparse, http.client, json, random, shutil, sys, tempfile, threading, time
+from collections import defaultdict
+from pathlib import Path
+
+import engine
+import service
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+
+def _get(conn, path: str, etag: str | None = None):
+    conn.request("GET", path, headers={"If-None-Match": etag} if etag else {})
+    r = conn.getresponse()
+    return r.status, r.getheader("ETag"), r.getheader("Transfer-Encoding"), r.read()
+
+def _post(conn, path: str, payload: dict):
+    conn.request("POST", path, body=json.dumps(payload), headers={"Content-Type": "application/json"})
+    r = conn.getresponse()
+    return r.status, None, r.getheader("Transfer-Encoding"), r.read()
+
+def _plain(obj):
+    """Forme JSON d'un résultat d'engine (ensembles → listes triées), pour comparer aux réponses."""
+    return json.loads(service._ENCODER.encode(obj))
+
+def _expected_matching(data_dir, with_all=False):
+    res = engine.compute_matching(data_dir, with_text=False)
+    return _plain({k: v for k, v in res.items() if k != "text" and (with_all or k != "scored_all")})
+
+
+def check(data_dir: Path, big_dir: Path) -> int:
+    errors = 0
+    server, url = service.serve(data_dir)
+    conn = http.client.HTTPConnection(url.split("//")[1])
+    try:
+        status, etag, _, body = _get(conn, "/matching")
+        if status != 200 or json.loads(body) != _expected_matching(data_dir):
+            print(f"  ÉCART /matching : statut {status} ou corps différent de compute_matching")
+            errors += 1
+        status, etag2, _, body = _get(conn, "/matching", etag)
+        if status != 304 or body or etag2 != etag:
+            print(f"  ÉCART If-None-Match : statut {status} (attendu 304)")
+            errors += 1
+        snap = engine.get_engine(data_dir).snapshot()
+        for path, expected in (("/placard", list(snap.provisions_index.values())),
+                               ("/reappro", engine.consume_provisions(snap.provisions_index, {})[1]),
+                               ("/recommandations?k=5", engine.recommend_recipes(snap, 5))):
+            status, _, _, body = _get(conn, path)
+            if status != 200 or json.loads(body) != _plain(expected):
+                print(f"  ÉCART {path} : statut {status} ou corps différent")
+                errors += 1
+        selection = [r["name"] for r in engine.compute_matching(snap)["scored"][:5]]
+        status, _, _, body = _post(conn, "/courses", {"selection": selection, "personnes": 4})
+        if status != 200 or json.loads(body) != _plain(engine.compute_courses(snap, selection, 4)):
+            print(f"  ÉCART /courses : statut {status} ou corps différent")
+            errors += 1
+        for path, want in (("/matching?month=13", 400), ("/inconnu", 404), ("/recommandations?k=x", 400)):
+            if _get(conn, path)[0] != want:
+                print(f"  ÉCART {path} : attendu {want}")
+                errors += 1
+        if _post(conn, "/courses", {"selection": "x"})[0] != 400:
+            print("  ÉCART /courses invalide : attendu 400")
+            errors += 1
+
+        # un fichier data/ change → nouvel ETag, l'ancien ne donne plus 304
+        dispos = data_dir / engine.DATA_FILES["dispos"]
+        names = json.loads(dispos.read_text(encoding="utf-8"))
+        time.sleep(0.01)
+        dispos.write_text(json.dumps(names[:-1], ensure_ascii=False), encoding="utf-8")
+        status, etag3, _, body = _get(conn, "/matching", etag)
+        if status != 200 or etag3 == etag or json.loads(body) != _expected_matching(data_dir):
+            print(f"  ÉCART après modification de data/ : statut {status}, ETag {'inchangé' if etag3 == etag else 'nouveau'}")
+            errors += 1
+        print(f"  contrôles : {server.service.stats}")
+    finally:
+        conn.close()
+        server.shutdown()
+        server.server_close()
+
+    server, url = service.serve(big_dir, warm=False)
+    conn = http.client.HTTPConnection(url.split("//")[1])
+    try:
+        t0 = time.perf_counter()
+        status, _, encoding, body = _get(conn, "/matching?all=1")
+        t = time.perf_counter() - t0
+        ok = status == 200 and encoding == "chunked" and json.loads(body) == _expected_matching(big_dir, True)
+        print(f"  gros corpus : {len(body) / 2**20:.1f} Mio en {t:.2f}s, {encoding or 'Content-Length'}")
+        if not ok:
+            print(f"  ÉCART corps chunked : statut {status}, encodage {encoding}")
+            errors += 1
+    finally:
+        conn.close()
+        server.shutdown()
+        server.server_close()
+    return errors
+
+
+def load(data_dir: Path, clients: int, seconds: float, workers: int, seed: int) -> int:
+    server, url = service.serve(data_dir, workers=workers)
+    snap = engine.get_engine(data_dir).snapshot()
+    names = [r["name"] for r in engine.compute_matching(snap)["scored"]]
+    latencies = defaultdict(list)
+    failures = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(k: int):
+        rnd = random.Random(seed + k)
+        conn = http.client.HTTPConnection(url.split("//")[1])
+        etag, mine = None, defaultdict(list)
+        try:
+            while time.perf_counter() < deadline:
+                roll = rnd.random()
+                t0 = time.perf_counter()
+                if roll < 0.4:
+                    label, (status, tag, _, _) = "matching 304", _get(conn, "/matching", etag)
+                    if etag is None:
+                        label, etag = "matching 200", tag
+                elif roll < 0.55:
+                    label, (status, _, _, _) = "matching 200", _get(conn, "/matching")
+                elif roll < 0.7:
+                    label, (status, _, _, _) = "recommandations", _get(conn, f"/recommandations?k={rnd.choice((10, 50))}")
+                elif roll < 0.8:
+                    label, (status, _, _, _) = "placard", _get(conn, "/placard")
+                elif roll < 0.9:
+                    label, (status, _, _, _) = "reappro", _get(conn, "/reappro")
+                else:
+                    payload = {"selection": rnd.sample(names, 5), "personnes": rnd.randint(1, 6)}
+                    label, (status, _, _, _) = "courses", _post(conn, "/courses", payload)
+                mine[label].append(time.perf_counter() - t0)
+                if status not in (200, 304) or (label == "matching 304" and status != 304):
+                    with lock:
+                        failures.append(f"{label} : statut {status}")
+        finally:
+            conn.close()
+        with lock:
+            for label, ts in mine.items():
+                latencies[label].extend(ts)
+
+    threads = [threading.Thread(target=client, args=(k,)) for k in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    server.shutdown()
+    server.server_close()
+
+    total = sum(len(ts) for ts in latencies.values())
+    print(f"  {clients} clients, {workers} threads serveur : {total} requêtes en {elapsed:.1f}s "
+          f"→ {total / elapsed:.0f} req/s")
+    for label, ts in sorted(latencies.items()):
+        ts.sort()
+        pct = lambda q: ts[min(len(ts) - 1, int(q * len(ts)))] * 1e3
+        print(f"    {label:16s} {len(ts):6d}  p50 {pct(0.5):7.2f} ms  p95 {pct(0.95):7.2f} ms  p99 {pct(0.99):7.2f} ms")
+    for f in failures[:5]:
+        print(f"  ÉCHEC {f}")
+    return len(failures)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--clients", type=int, nargs="*", default=[1, 8])
+    p.add_argument("--seconds", type=float, default=5.0)
+    p.add_argument("--workers", type=int, default=service.WORKERS)
+    p.add_argument("--big", type=int, default=5_000, help="recettes du corpus synthétique (corps chunked)")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-service-"))
+    errors = 0
+    try:
+        data_dir = tmp / "data"
+        shutil.copytree(REAL_DATA, data_dir)  # copie : le contrôle d'ETag modifie les dispos
+        big_dir = write_data_dir(tmp / "big", args.big, args.seed)
+        print("contrôles :")
+        errors += check(data_dir, big_dir)
+        for clients in args.clients:
+            print("charge :")
+            errors += load(data_dir, clients, args.seconds, args.workers, args.seed)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+# benchmarks/bench_startup.py
+# Démarrage de app.py sans navigateur, dans un nouveau processus, en suivant l'ordre de ses appels :
+#   premier écran = imports de app.py + matching + tableaux (1re page) + recommandations,
+#                   ou lecture du premier écran précalculé (app_render.first_screen)
+#   page complète = + watcher, écriture du premier écran s'il est périmé, contrôle de data/, noms du
+#                   catalogue (repris de l'écran précalculé)
+#   rerun         = mêmes appels dans le même processus, données inchangées
+# Mesuré sans écran précalculé (démarrage d'avant, qui l'écrit) puis avec. Vérifie aussi que l'écran
+# précalculé est identique au rendu calculé et qu'il est ignoré dès qu'un fichier de data/ change.
+from __future__ import annotations
+
+import argparse, json, shutil, subprocess, sys, tempfile, time
+from pathlib import Path
+
+import app_render
+import corpus_index
+import engine
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import app_render, engine, profiling, seasonal, watcher  # imports de app.py (hors Streamlit)
+t_import = time.perf_counter() - t0
+data_dir = sys.argv[1]
+
+def first_screen():
+    screen = app_render.first_screen(data_dir)
+    if screen is not None:
+        return screen, [html for _, _, _, html in screen["groups"]], screen["recommended"]
+    version, match = app_render.matching(data_dir, watcher=watcher.get_watcher(data_dir))
+    pages = [app_render.category_table(version, cat, rows, 0)
+             for cat, rows in app_render.category_groups(version, match["scored"])]
+    return None, pages, engine.recommend_recipes(data_dir, app_render.RECOMMENDED)
+
+def rest(screen):
+    watch = watcher.get_watcher(data_dir)
+    if screen is None:
+        app_render.save_first_screen(data_dir, watch)
+    engine.validate_data(data_dir)
+    app_render.ingredient_names(data_dir, screen)
+
+t = time.perf_counter()
+screen, _, _ = first_screen()
+t_first = time.perf_counter() - t
+numpy_first = "numpy" in sys.modules
+rest(screen)
+t_full = time.perf_counter() - t
+t = time.perf_counter()
+screen2, _, _ = first_screen()
+rest(screen2)
+t_rerun = time.perf_counter() - t
+print(json.dumps({"precomputed": screen is not None, "import_s": t_import, "first_s": t_first,
+                  "full_s": t_full, "rerun_s": t_rerun, "numpy_first": numpy_first}))
+"""
+
+
+def _child(data_dir: Path) -> dict:
+    out = subprocess.run([sys.executable, "-c", CHILD, str(data_dir)], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def check(data_dir: Path) -> int:
+    """Écran précalculé = rendu calculé ; périmé dès qu'un fichier de data/ change."""
+    errors = 0
+    app_render.clear_caches()
+    screen = app_render.first_screen(data_dir)
+    version, match = app_render.matching(data_dir)
+    groups = [[cat, len(rows), app_render.page_count(rows), app_render.category_table(version, cat, rows, 0)]
+              for cat, rows in app_render.category_groups(version, match["scored"])]
+    recommended = [{"name": r["name"], "cost": r["cost"], "missing": r["missing"]}
+                   for r in engine.recommend_recipes(data_dir, app_render.RECOMMENDED)]
+    if screen is None:
+        print("[!] premier écran absent après un démarrage complet")
+        return 1
+    ingredients = sorted(engine.context(data_dir).catalogue_norm_to_pretty.values())
+    if screen["groups"] != groups or screen["names"] != [r["name"] for r in match["scored"]] \
+            or screen["recommended"] != recommended or screen["ingredients"] != ingredients \
+            or app_render.ingredient_names(data_dir) != ingredients:
+        print("[!] premier écran ≠ rendu calculé")
+        errors += 1
+    dispos = data_dir / engine.DATA_FILES["dispos"]
+    names = json.loads(dispos.read_text(encoding="utf-8"))
+    time.sleep(0.01)
+    dispos.write_text(json.dumps(names[:-1], ensure_ascii=False), encoding="utf-8")
+    if app_render.first_screen(data_dir) is not None:
+        print("[!] premier écran repris alors que les dispos ont changé")
+        errors += 1
+    dispos.write_text(json.dumps(names, ensure_ascii=False), encoding="utf-8")
+    return errors
+
+
+def run(data_dir: Path, label: str, repeat: int) -> int:
+    (data_dir / corpus_index.INDEX_DIRNAME / app_render.FIRST_SCREEN_FILE).unlink(missing_ok=True)
+    cold = _child(data_dir)  # sans écran précalculé : l'écrit en fin de rendu
+    fast = min((_child(data_dir) for _ in range(repeat)), key=lambda r: r["first_s"])
+    errors = 0
+    if cold["precomputed"] or not fast["precomputed"]:
+        print(f"[!] {label} : premier écran {'repris' if cold['precomputed'] else 'non repris'} à tort")
+        errors += 1
+    for name, r in (("calculé", cold), ("précalculé", fast)):
+        print(f"{label:>16} | {name:>10} | imports {r['import_s'] * 1e3:6.0f} ms | premier écran "
+              f"{(r['import_s'] + r['first_s']) * 1e3:7.0f} ms | page complète {(r['import_s'] + r['full_s']) * 1e3:7.0f} ms "
+              f"| rerun {r['rerun_s'] * 1e3:6.1f} ms | NumPy au 1er écran : {'oui' if r['numpy_first'] else 'non'}")
+    return errors + check(data_dir)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--sizes", type=int, nargs="*", default=[10_000])
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-startup-"))
+    errors = 0
+    try:
+        real = tmp / "real"
+        shutil.copytree(REAL_DATA, real, ignore=shutil.ignore_patterns(corpus_index.INDEX_DIRNAME))
+        errors += run(real, "data/ réel", args.repeat)
+        for n in args.sizes:
+            errors += run(write_data_dir(tmp / f"syn{n}", n, args.seed), f"{n} recettes", args.repeat)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+# benchmarks/bench_suite.py
+# Suite de mesures reproductible (graine fixe) sur des dossiers data/ synthétiques à plusieurs échelles :
+# ×1, ×10, ×100 (voire ×1000) les 241 recettes et ~300 entrées du catalogue réels.
+#   init              = Engine neuf + premier snapshot (lecture + index des 4 fichiers)
+#   compute_matching  = snapshot chaud
+#   recipe_table      = modèle compact des lignes de courses (compact.py), construit une fois par snapshot
+#   _courses_nb       = 7 recettes, puis 52 semaines × 7 recettes (agrégation seule)
+#   compute_courses   = 7 recettes, placard déduit
+#   update_provisions = décrément du placard + courses_placard.txt (sur une copie)
+# Pour chaque mesure : meilleur temps sur --repeat passages, puis un passage sous tracemalloc
+# (pic d'allocation ; 'retained_mb' = mémoire gardée par le snapshot pour init).
+# Résultats en JSON (--output) ; --compare ancien.json affiche les écarts entre deux commits.
+from __future__ import annotations
+
+import argparse, contextlib, gc, io, json, platform, random, shutil, subprocess, sys, tempfile, time, tracemalloc
+from pathlib import Path
+
+import engine
+from benchmarks.synthetic import ROOT, write_data_dir
+
+RECETTES, CATALOGUE = 241, 294  # tailles du dossier data/ réel
+REGRESSION = 1.2  # --compare : signalé au-delà de ×1.2 (temps ou pic mémoire)
+NOISE = {"seconds": 0.002, "peak_mb": 0.1}  # écarts absolus en dessous : bruit de mesure, jamais signalés
+
+
+def _measure(fn, repeat: int, setup=None) -> dict:
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return {"seconds": round(best, 6), "peak_mb": round(peak / 2**20, 3), "retained_mb": round(current / 2**20, 3)}
+
+
+def run_scale(scale: int, tmp: Path, repeat: int, seed: int) -> dict:
+    data = write_data_dir(tmp / f"x{scale}", RECETTES * scale, seed, catalogue_size=CATALOGUE * scale)
+    out = {}
+
+    def init():
+        engine.clear_normalize_caches()
+        return engine.Engine(data).snapshot()
+    out["init"] = _measure(init, repeat)
+
+    snap = engine.Engine(data).snapshot()
+    engine.compute_matching(snap)
+    out["compute_matching"] = _measure(lambda: engine.compute_matching(snap), repeat)
+    if hasattr(engine, "recipe_table"):  # absent des commits antérieurs au modèle compact
+        out["recipe_table"] = _measure(lambda: engine.RecipeTable(snap), repeat)
+    names = list(dict.fromkeys(r["name"] for r in snap.recettes))
+    rnd = random.Random(seed)
+    week = rnd.sample(names, 7)
+    year = [n for _ in range(52) for n in rnd.sample(names, 7)]
+    out["_courses_nb"] = _measure(lambda: engine._courses_nb(snap, week, 4), repeat)
+    out["_courses_nb_52"] = _measure(lambda: engine._courses_nb(snap, year, 4), repeat)
+    out["compute_courses"] = _measure(lambda: engine.compute_courses(snap, week, 4), repeat)
+
+    conso = engine.compute_courses(snap, week, 4)["consommation_totale"]
+    pristine = (data / "provisions.txt").read_bytes()
+    restore = lambda: (data / "provisions.txt").write_bytes(pristine)
+    household = engine.Engine(data).household()
+
+    def update():
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.update_provisions_files(conso, household)
+    out["update_provisions"] = _measure(update, repeat, setup=restore)
+    out["sizes"] = {"recettes": len(snap.recettes), "catalogue": len(snap.catalogue),
+                    "dispos": len(snap.raw_dispos), "provisions": len(snap.provisions)}
+    return out
+
+
+def _meta(seed: int) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        import numpy
+        np_version = numpy.__version__
+    except ImportError:
+        np_version = None
+    return {"commit": commit, "python": platform.python_version(), "numpy": np_version, "seed": seed,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def compare(old: dict, new: dict) -> list:
+    """Lignes « échelle/mesure : ancien → nouveau (×ratio) », marquées [!] au-delà de REGRESSION."""
+    lines = []
+    for scale, benches in new["results"].items():
+        for name, m in benches.items():
+            o = old["results"].get(scale, {}).get(name)
+            if name == "sizes" or not o:
+                continue
+            for key, unit in (("seconds", "s"), ("peak_mb", "Mio")):
+                ratio = m[key] / o[key] if o[key] else float("inf") if m[key] else 1.0
+                flag = "[!]" if ratio > REGRESSION and m[key] - o[key] > NOISE[key] else "   "
+                lines.append(f"{flag} {scale:>5s} {name:18s} {key:8s} {o[key]:10.4f} → {m[key]:10.4f} {unit:3s} (×{ratio:.2f})")
+    return lines
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--scales", type=int, nargs="*", default=[1, 10, 100])
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--output", help="fichier JSON des résultats")
+    p.add_argument("--compare", help="résultats JSON d'un autre commit à comparer")
+    args = p.parse_args(argv)
+    results = {"meta": _meta(args.seed), "results": {}}
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-suite-"))
+    try:
+        for scale in args.scales:
+            res = results["results"][f"x{scale}"] = run_scale(scale, tmp, args.repeat, args.seed)
+            print(f"×{scale} {res['sizes']}")
+            for name, m in res.items():
+                if name != "sizes":
+                    print(f"  {name:18s} {m['seconds'] * 1e3:10.2f} ms  pic {m['peak_mb']:8.2f} Mio"
+                          + (f"  gardé {m['retained_mb']:8.2f} Mio" if name in ("init", "recipe_table") else ""))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    regressions = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            old = json.load(f)
+        lines = compare(old, results)
+        print(f"comparaison avec {old['meta'].get('commit')} :")
+        print("\n".join(lines))
+        regressions = sum(line.startswith("[!]") for line in lines)
+    print(f"{regressions} régression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# benchmarks/check_fuzzy.py
+# Suggestions pour les ingrédients inconnus (fuzzy_resolver.py) :
+#   exactitude = lookup (candidats filtrés par trigrammes rares / mots) == comparaison à tout le catalogue
+#   qualité    = variantes de noms du catalogue (pluriel, sans accents, faute de frappe, qualificatif)
+#                retrouvées en 1re suggestion (informatif)
+#   échelle    = catalogue synthétique de N noms : noms comparés par requête et temps vs parcours complet
+#   cache      = un 2e appel à suggest ne recalcule rien ; alias appliqués relus par l'Engine du dossier
+#                (sans en créer un neuf) et sans effet sur un autre dossier ni sur son snapshot
+# Sort en erreur si le filtre perd une suggestion, si le cache recalcule ou si l'alias n'est pas appliqué
+# (ou s'il déborde sur un autre dossier).
+from __future__ import annotations
+
+import argparse, heapq, json, random, shutil, sys, tempfile, time
+from pathlib import Path
+
+import engine
+import fuzzy_resolver as fz
+from benchmarks.synthetic import REAL_DATA
+
+QUALIFIERS = ["frais", "séché", "haché", "bio", "en poudre", "râpé", "entier"]
+
+
+def _variants(name: str, rnd: random.Random) -> list:
+    plain = engine.normalize(name)
+    out = [name + "s", plain, f"{name} {rnd.choice(QUALIFIERS)}"]
+    if len(plain) > 4:
+        i = rnd.randrange(1, len(plain) - 1)
+        out.append(plain[:i] + plain[i + 1:])                               # lettre oubliée
+        out.append(plain[:i] + plain[i + 1] + plain[i] + plain[i + 2:])     # lettres inversées
+    return out
+
+def _brute(index: fz.TrigramIndex, name: str, k: int) -> list:
+    norm = engine.normalize(engine.canon(name))
+    g, w = fz.trigrams(norm), fz.words(norm)
+    scored = ((fz.similarity(g, w, index.grams[i], index.words[i]), -i) for i in range(len(index.norms)))
+    return [(index.pretty[-i], round(s, 4)) for s, i in heapq.nlargest(k, (x for x in scored if x[0] >= fz.MIN_SIMILARITY))]
+
+
+def check_real(ctx, seed: int) -> int:
+    rnd = random.Random(seed)
+    index = fz.trigram_index(ctx)
+    errors, found, total = 0, 0, 0
+    for norm, pretty in ctx.catalogue_norm_to_pretty.items():
+        for v in _variants(pretty, rnd):
+            got = index.lookup(v)
+            if got != _brute(index, v, fz.TOP_K):
+                errors += 1
+                print(f"[!] {v!r} : {got} ≠ parcours complet {_brute(index, v, fz.TOP_K)}")
+            total += 1
+            found += bool(got) and engine.normalize(got[0][0]) == norm
+    print(f"catalogue réel : {total} variantes, {found / total:.0%} retrouvées en 1re suggestion, {errors} écart(s)")
+    return errors
+
+
+def bench_scale(ctx, size: int, queries: int, seed: int) -> int:
+    rnd = random.Random(seed)
+    base = list(ctx.catalogue_norm_to_pretty.values())
+    vocab = sorted({w for n in base for w in n.split() if len(w) > 3})
+    names = {}
+    while len(names) < size:
+        n = f"{rnd.choice(base)} {rnd.choice(vocab).lower()} {rnd.choice(QUALIFIERS)}"
+        names[engine.normalize(n)] = n
+    t0 = time.perf_counter()
+    index = fz.TrigramIndex(names)
+    build = time.perf_counter() - t0
+    sample = [v for n in rnd.sample(list(names.values()), queries) for v in _variants(n, rnd)[:2]]
+    errors = 0
+    t0 = time.perf_counter()
+    for q in sample:
+        index.lookup(q)
+    t_idx = (time.perf_counter() - t0) / len(sample)
+    compared = index.compared
+    t0 = time.perf_counter()
+    for q in sample[:20]:
+        if _brute(index, q, fz.TOP_K) != index.lookup(q):
+            errors += 1
+            print(f"[!] {q!r} : filtre ≠ parcours complet")
+    t_brute = (time.perf_counter() - t0) / 20
+    print(f"catalogue synthétique de {size} noms : index {build:.2f} s, {compared / len(sample):.0f} noms comparés "
+          f"par requête ({compared / len(sample) / size:.1%}), {t_idx * 1e3:.2f} ms/requête "
+          f"vs {t_brute * 1e3:.1f} ms en parcours complet, {errors} écart(s)")
+    return errors
+
+
+def check_cache_and_aliases(tmp: Path) -> int:
+    errors = 0
+    data = tmp / "data"
+    shutil.copytree(REAL_DATA, data, ignore=shutil.ignore_patterns(".*", engine.AUTO_ALIASES_FILE))
+    recettes = engine._load_json(data / "recettes_hellofresh.txt")
+    recettes[0]["ingredients"]["Échalotes ciselées"] = {"qty": 1, "unit": "pièce(s)"}
+    recettes[0]["ingredients"]["Zzz inconnu"] = {"qty": 1, "unit": "pièce(s)"}
+    engine._dump_json(recettes, data / "recettes_hellofresh.txt")
+    other = tmp / "other"
+    shutil.copytree(data, other)
+    other_engine = engine.Engine(other)
+    other_snap = other_engine.snapshot()
+
+    eng = engine.Engine(data)
+    ctx = eng.snapshot()
+    first = fz.suggest(ctx)
+    cache = data / ".index" / fz.CACHE_FILE
+    mtime = cache.stat().st_mtime_ns
+    lookups = []
+    real_lookup = fz.TrigramIndex.lookup
+    fz.TrigramIndex.lookup = lambda self, *a: lookups.append(a) or real_lookup(self, *a)
+    try:
+        second = fz.suggest(engine.Engine(data).snapshot())
+    finally:
+        fz.TrigramIndex.lookup = real_lookup
+    if second != first or lookups or cache.stat().st_mtime_ns != mtime:
+        errors += 1
+        print(f"[!] 2e appel : {len(lookups)} recherche(s), cache réécrit : {cache.stat().st_mtime_ns != mtime}")
+    print(f"suggestions : {json.dumps(first, ensure_ascii=False)}")
+
+    applied = fz.apply_aliases(ctx, min_similarity=0.6)
+    unknown = engine.compute_matching(eng)["unknown_ingredients"]
+    if applied.get("Échalotes ciselées") != "Échalote" or "Zzz inconnu" in applied or "Échalotes ciselées" in unknown:
+        errors += 1
+        print(f"[!] alias appliqués {applied}, inconnus restants {unknown}")
+    print(f"alias appliqués : {applied}, inconnus restants : {unknown}")
+    if other_engine.snapshot() is not other_snap \
+            or "Échalotes ciselées" not in engine.compute_matching(engine.Engine(other))["unknown_ingredients"]:
+        errors += 1
+        print("[!] alias d'un dossier appliqués à un autre dossier (ou son snapshot invalidé)")
+    return errors
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--size", type=int, default=50_000, help="noms du catalogue synthétique")
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    ctx = engine.Engine(REAL_DATA).snapshot()
+    errors = check_real(ctx, args.seed)
+    errors += bench_scale(ctx, args.size, args.queries, args.seed)
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-fuzzy-"))
+    try:
+        errors += check_cache_and_aliases(tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# benchmarks/check_incremental.py
+# Applique des deltas aléatoires (marché et placard) à IncrementalMatching et vérifie après
+# chacun que le résultat est identique à un compute_matching complet ; compare les temps.
+from __future__ import annotations
+
+import argparse, json, random, shutil, sys, tempfile, time
+from pathlib import Path
+
+import engine
+from incremental import IncrementalMatching
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+
+def run(data_dir: Path, steps: int, seed: int) -> int:
+    rnd = random.Random(seed)
+    snap = engine.get_engine(data_dir).snapshot()
+    inc = IncrementalMatching(snap)
+    market = sorted({p for keys in snap.recettes_keys for _, p, n, _ in keys if n in snap.market_indispensables_norm})
+    pantry = sorted(p["name"] for p in snap.provisions)
+    errors, t_inc, t_full = 0, 0.0, 0.0
+
+    for step in range(steps):
+        t0 = time.perf_counter()
+        if rnd.random() < 0.6:
+            current = sorted(inc.ctx.raw_dispos)
+            added = rnd.sample(market, k=rnd.randint(0, 3))
+            removed = rnd.sample(current, k=min(len(current), rnd.randint(0, 3)))
+            changed = inc.apply_availability_delta(added, removed)
+        else:
+            updated = {n: rnd.choice([0, 1, 250]) for n in rnd.sample(market + pantry, k=2)}
+            removed = rnd.sample(pantry, k=rnd.randint(0, 1))
+            changed = inc.apply_provisions_delta(updated, removed)
+        t_inc += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        full = engine.compute_matching(inc.ctx)
+        t_full += time.perf_counter() - t0
+        for kind, available in (("market", inc.ctx.dispos_norm), ("pantry", inc.ctx.provisions_index)):
+            fresh = engine._resolve(inc.ctx, engine.replacement_closure(inc.ctx), available)
+            if engine.resolution_table(inc.ctx, kind) != fresh:
+                errors += 1
+                print(f"[!] étape {step}: table de résolution {kind} mise à jour ≠ table recalculée")
+        if inc.result() != full:
+            errors += 1
+            print(f"[!] étape {step}: résultat incrémental ≠ recalcul complet ({len(changed)} lignes modifiées)")
+
+    # dernier état écrit sur disque puis relu par un Engine neuf
+    (data_dir / "ingredients_disponibles.txt").write_text(json.dumps(sorted(inc.ctx.raw_dispos), ensure_ascii=False), encoding="utf-8")
+    (data_dir / "provisions.txt").write_text(json.dumps(inc.ctx.provisions, ensure_ascii=False), encoding="utf-8")
+    if engine.compute_matching(engine.Engine(data_dir))["scored"] != inc.scored:
+        errors += 1
+        print("[!] état final ≠ recalcul depuis les fichiers")
+
+    print(f"{len(inc.rows)} recettes, {steps} deltas : incrémental {t_inc / steps * 1e3:.2f} ms/delta, "
+          f"complet {t_full / steps * 1e3:.2f} ms, {errors} écart(s)")
+    return errors
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--size", type=int, default=0, help="recettes synthétiques (0 = vraies données)")
+    p.add_argument("--steps", type=int, default=50)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-incr-"))
+    try:
+        if args.size:
+            data_dir = write_data_dir(tmp / "data", args.size, args.seed)
+        else:
+            data_dir = tmp / "data"
+            shutil.copytree(REAL_DATA, data_dir)
+        return 1 if run(data_dir, args.steps, args.seed) else 0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# benchmarks/check_quantities.py
+# Quantités avec unité (quantities.py) :
+#   conversions  = cas connus (g/kg, cs/cc, pièces → kg via le poids, unités incompatibles)
+#   courses      = pour un plan de plusieurs semaines, les totaux de _courses_nb (valeur + 'extra')
+#                  égalent aggregate() ligne à ligne, et rien n'est additionné entre unités incompatibles
+#   placard      = une provision avec unité est convertie avant déduction, ou signalée si impossible ;
+#                  planner et recommend déduisent le même reste que compute_courses
+#   aggregate    = NumPy et Python donnent les mêmes totaux ; temps pour N semaines
+# Sort en erreur au moindre écart.
+from __future__ import annotations
+
+import argparse, contextlib, io, math, random, shutil, sys, tempfile, time
+from pathlib import Path
+
+import engine
+import planner
+import recommend
+from quantities import MASS, Conversions, Quantity, UnitMismatch, aggregate, convert, unit_info
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+GOLDEN = [
+    # (valeur, de, vers, conversions, attendu)
+    (250, "g", "kg", None, 0.25),
+    (2, "cs", "cc", None, 6.0),
+    (3, "pièce(s)", "kg", Conversions(0.25), 0.75),
+    (0.5, "kg", "pièce(s)", Conversions(0.25), 2.0),
+    (1, "l", "g", Conversions(density=1.03), 1030.0),
+    (15, "cl", "ml", None, 150.0),
+    (2, "sachet(s)", "kg", Conversions(0.25), None),
+    (1, "pièce(s)", "g", None, None),
+    (1, "cs", "ml", None, None),
+    (3, "", "pièce(s)", None, 3),
+]
+
+
+def check_conversions() -> int:
+    errors = 0
+    for value, src, dst, conv, expected in GOLDEN:
+        got = convert(value, src, dst, conv or Conversions())
+        if (got is None) != (expected is None) or (got is not None and not math.isclose(got, expected)):
+            errors += 1
+            print(f"[!] {value} {src} → {dst} : {got}, attendu {expected}")
+    q = Quantity(Conversions(0.25))
+    q.add(2, "pièce(s)")
+    q.add(0.5, "kg")
+    try:
+        q.add(1, "sachet(s)")
+        errors += 1
+        print("[!] sachet ajouté à des pièces sans erreur")
+    except UnitMismatch:
+        pass
+    q.add(2, "sachet(s)")
+    if q.value != 4 or q.extra != [[3, "sachet(s)"]]:
+        errors += 1
+        print(f"[!] cumul pièces + kg + sachets : {q.value} {q.unit} + {q.extra}")
+    print(f"conversions : {len(GOLDEN)} cas, {errors} écart(s)")
+    return errors
+
+
+def _plan(snap, weeks: int, per_week: int, seed: int) -> list:
+    rnd = random.Random(seed)
+    names = [r["name"] for r in snap.recettes]
+    return [rnd.sample(names, k=min(per_week, len(names))) for _ in range(weeks)]
+
+def _base(value, unit, conv):
+    info = unit_info(unit)
+    g = conv.grams_per(info.dim) if info.dim != MASS else None
+    return (MASS, value * info.factor * g) if g is not None else (info.dim, value * info.factor)
+
+def _lines(snap, k: int, factor: float):
+    """(rayon, norm, libellé, quantité, unité) des lignes de courses de la recette k, comme compute_courses."""
+    for n, label, qty, unit, _ in engine.recipe_table(snap).lines(k):
+        rayon = snap.rayons_map.get(n, "inconnu")
+        yield (rayon, n, label) + engine._line_amount(snap, rayon, n, qty, unit, factor)
+
+def check_courses(snap, weeks: int, per_week: int, seed: int) -> int:
+    """Chaque semaine : totaux de _courses_nb == aggregate() des lignes des recettes."""
+    errors, n_items, n_extra = 0, 0, 0
+    for week, selection in enumerate(_plan(snap, weeks, per_week, seed)):
+        diagnostics = []
+        courses = engine._courses_nb(snap, selection, 4, diagnostics)
+        keys, values, units = [], [], []
+        for k in engine.recipe_table(snap).selection(selection):  # nom en double : la première seule
+            for _, n, _, val, unit in _lines(snap, k, 2.0):
+                if val is not None and unit_info(unit) is not None:
+                    keys.append(n), values.append(val), units.append(unit)
+        expected = aggregate(keys, values, units, snap.conversions_map)
+        for items in courses.values():
+            for label, d in items.items():
+                n_items += 1
+                n_extra += bool(d.get("extra"))
+                conv = snap.conversions_map.get(d["norm"], Conversions())
+                parts = [(d["val"], d["unit"])] * (d["val"] is not None) + [(e["val"], e["unit"]) for e in d.get("extra", [])]
+                dims = [_base(v, u, conv) for v, u in parts if unit_info(u) is not None]
+                if len({dim for dim, _ in dims}) != len(dims):
+                    errors += 1
+                    print(f"[!] semaine {week} {label} : deux parts dans la même dimension {parts}")
+                for dim, total in dims:
+                    want = expected.get((d["norm"], dim))
+                    # tolérance : les conversions sont arrondies à 2 décimales dans l'unité d'affichage
+                    if want is None or not math.isclose(total, want, rel_tol=0.02, abs_tol=10.0 if dim == MASS else 0.01):
+                        errors += 1
+                        print(f"[!] semaine {week} {label} : {total} {dim}, attendu {want}")
+    print(f"courses : {weeks} semaines x {per_week} recettes, {n_items} articles "
+          f"({n_extra} avec unité non convertible), {errors} écart(s)")
+    return errors
+
+
+def check_pantry(data_dir: Path) -> int:
+    """Placard en kg pour un besoin en g (déduit) ; placard en sachets pour un besoin en g (signalé)."""
+    errors = 0
+    snap = engine.get_engine(data_dir).snapshot()
+    needs = {}  # norm → (recette, label, val, unit) d'un besoin en g hors marché
+    for k, r in enumerate(snap.recettes):
+        for rayon, n, label, val, unit in _lines(snap, k, 1.0):
+            if rayon != "marché" and val and unit_info(unit) and unit_info(unit).name == "g":
+                needs.setdefault(n, (r["name"], label, val, unit))
+    (ok_norm, (ok_recipe, ok_label, ok_val, _)), (bad_norm, (bad_recipe, bad_label, _, _)) = list(needs.items())[:2]
+    provisions = [p for p in snap.provisions if engine.normalize(engine.canon(p["name"])) not in (ok_norm, bad_norm)]
+    provisions += [{"name": ok_label, "quantity": ok_val / 2000, "quantity_min": 0, "unit": "kg"},
+                   {"name": bad_label, "quantity": 5, "quantity_min": 0, "unit": "sachet(s)"}]
+    engine._dump_json(provisions, data_dir / "provisions.txt")
+    snap = engine.get_engine(data_dir).snapshot()
+    model = planner.plan_model(snap, 2)
+    pantry = recommend.terms_model(snap, 2)["pantry"]
+    ids = {n: j for j, (n, _, _) in enumerate(model["labels"])}
+    with contextlib.redirect_stdout(io.StringIO()):
+        out = engine.compute_courses(data_dir, [ok_recipe, bad_recipe], 2, update_provisions=True)
+    items = {d["norm"]: d for items in out["liste_courses"].values() for d in items.values()}
+    if not math.isclose(items[ok_norm]["val"], ok_val / 2, abs_tol=0.01):
+        errors += 1
+        print(f"[!] {ok_label} : reste {items[ok_norm]['val']}, attendu {ok_val / 2} (placard en kg)")
+    # même reste à acheter dans le planner (placard en kg, besoin en g) ; placard en sachets non déduit
+    j, bad = ids[ok_norm], ids[bad_norm]
+    need = dict(model["needs"][model["positions"][ok_recipe]])[j]
+    remaining = convert(items[ok_norm]["val"], items[ok_norm]["unit"], model["units"][j],
+                        snap.conversions_map.get(ok_norm, Conversions()))
+    if remaining is None or not math.isclose(max(0.0, need - model["pantry"][j]), remaining, rel_tol=0.01, abs_tol=0.01):
+        errors += 1
+        print(f"[!] planner {ok_label} : reste {need - model['pantry'][j]} {model['units'][j]}, "
+              f"compute_courses {items[ok_norm]['val']} {items[ok_norm]['unit']}")
+    if model["pantry"][bad] != 0.0 or pantry != model["pantry"]:
+        errors += 1
+        print(f"[!] placard du planner / recommend : {bad_label} {model['pantry'][bad]} (attendu 0), "
+              f"recommend {'identique' if pantry == model['pantry'] else 'différent'}")
+    left = {engine.normalize(engine.canon(p["name"])): p for p in engine._load_json(data_dir / "provisions.txt")}
+    if left[ok_norm]["quantity"] != 0 or left[bad_norm]["quantity"] != 5:
+        errors += 1
+        print(f"[!] placard après décrément : {left[ok_norm]} / {left[bad_norm]}")
+    if not any(bad_label in msg for msg in out["diagnostics"]):
+        errors += 1
+        print(f"[!] aucun diagnostic pour {bad_label} (placard en sachets) : {out['diagnostics']}")
+    print(f"placard : {len(out['diagnostics'])} diagnostic(s), {errors} écart(s)")
+    return errors
+
+
+def bench_aggregate(snap, weeks: int, per_week: int, seed: int, repeat: int) -> int:
+    keys, values, units = [], [], []
+    positions = engine.recipe_table(snap).positions
+    for selection in _plan(snap, weeks, per_week, seed):
+        for name in selection:
+            for _, n, _, val, unit in _lines(snap, positions[name], 2.0):
+                keys.append(n), values.append(val), units.append(unit)
+    timings = {}
+    for label, use_numpy in (("python", False), ("numpy", True)):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            totals = aggregate(keys, values, units, snap.conversions_map, use_numpy=use_numpy)
+        timings[label] = ((time.perf_counter() - t0) / repeat, totals)
+    (t_py, py), (t_np, nd) = timings["python"], timings["numpy"]
+    errors = sum(1 for k in py if not math.isclose(py[k], nd[k], rel_tol=1e-9, abs_tol=1e-9)) + (py.keys() != nd.keys())
+    print(f"aggregate : {len(keys)} lignes ({weeks} semaines), {len(py)} totaux, "
+          f"python {t_py * 1e3:.1f} ms, numpy {t_np * 1e3:.1f} ms, {errors} écart(s)")
+    return errors
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--weeks", type=int, default=52)
+    p.add_argument("--per-week", type=int, default=5)
+    p.add_argument("--size", type=int, default=10_000, help="recettes synthétiques pour la mesure d'aggregate")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    errors = check_conversions()
+    real = engine.get_engine(REAL_DATA).snapshot()
+    errors += check_courses(real, args.weeks, args.per_week, args.seed)
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-qty-"))
+    try:
+        shutil.copytree(REAL_DATA, tmp / "data", ignore=shutil.ignore_patterns(".*"))
+        errors += check_pantry(tmp / "data")
+        synth = engine.get_engine(write_data_dir(tmp / "synth", args.size, args.seed)).snapshot()
+        errors += bench_aggregate(synth, args.weeks, args.per_week * 20, args.seed, args.repeat)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# benchmarks/check_scraper.py
+# Vérification hors ligne du pipeline de scraping contre la doublure HTTP locale :
+#   - pages enregistrées reconstruites depuis data/recettes_hellofresh.txt (JSON-LD + DOM façon HelloFresh)
+#   - run interrompu (processus tué), puis reprise : les URL du checkpoint ne sont pas redemandées
+#   - run --refresh : toutes les pages sont revalidées par requête conditionnelle (304)
+#   - le résultat reparsé doit redonner les recettes d'origine
+# Sort en erreur au moindre écart.
+from __future__ import annotations
+
+import argparse, html, json, os, shutil, signal, subprocess, sys, tempfile, time
+from pathlib import Path
+
+import scraper
+from benchmarks.synthetic import REAL_DATA, ROOT, ingredient_lines
+
+FIELDS = ("name", "link", "ingredients", "total_time", "prep_time", "difficulty",
+          *(f"desc_part_{i}" for i in range(1, 7)))
+
+
+def render_page(r: dict) -> str:
+    """Page HTML minimale dont parse_recipe_html doit retrouver la recette `r`."""
+    ld = {"@context": "https://schema.org", "@type": "Recipe", "name": r["name"],
+          "recipeIngredient": ingredient_lines(r)}
+    steps = [r.get(f"desc_part_{i}", "") for i in range(1, 7)]
+    steps_html = "".join(f'<div data-test-id="instruction-step"><p>{html.escape(s)}</p></div>' for s in steps if s)
+    meta = "".join(
+        f"<div><span>{label}</span><span>{html.escape(r.get(key) or '')}</span></div>"
+        for label, key in (("Temps total", "total_time"), ("Temps de préparation", "prep_time"), ("Difficulté", "difficulty"))
+        if r.get(key)  # libellé absent de la page quand la valeur est vide
+    )
+    return (
+        "<!doctype html><html><head>"
+        f'<meta property="og:title" content="{html.escape(r["name"])} Recette | HelloFresh">'
+        f'<script type="application/ld+json">{json.dumps(ld, ensure_ascii=False)}</script>'
+        "<style>h1 { color: red; }</style>"
+        f"</head><body><h1>{html.escape(r['name'])}</h1>{meta}<section>{steps_html}</section><br></body></html>"
+    )
+
+
+def _expected(r: dict) -> dict:
+    exp = {k: r.get(k, "") for k in FIELDS}
+    # le parseur normalise les espaces de la ligne d'ingrédient
+    exp["ingredients"] = {n: {**d, "unit": (d.get("unit") or "").strip()} for n, d in r["ingredients"].items()}
+    return exp
+
+def _diff(expected: dict, got: list) -> list:
+    got = {r["link"]: r for r in got}
+    errors = []
+    for link, exp in expected.items():
+        rec = got.get(link)
+        if rec is None:
+            errors.append(f"{link} : absente")
+            continue
+        for k in FIELDS:
+            if rec.get(k, "") != exp[k]:
+                errors.append(f"{link} : {k} = {rec.get(k)!r}, attendu {exp[k]!r}")
+                break
+    return errors
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--kill-after", type=float, default=1.0, help="secondes avant d'interrompre le premier run")
+    args = p.parse_args(argv)
+
+    with open(REAL_DATA / "recettes_hellofresh.txt", encoding="utf-8") as f:
+        recettes = json.load(f)
+    expected = {r["link"]: _expected(r) for r in recettes}  # lien en double : la dernière version gagne
+    urls = list(expected)
+    errors = []
+
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-scrape-"))
+    try:
+        recorded = scraper.HttpCache(tmp / "recorded")
+        for r in recettes:
+            recorded.put(r["link"], render_page(r).encode("utf-8"), None, None, "utf-8")
+        server, base_url = scraper.serve_recorded(tmp / "recorded")
+        out = tmp / "data" / "recettes_hellofresh.txt"
+        out.parent.mkdir()
+        (tmp / "urls.json").write_text(json.dumps(urls), encoding="utf-8")
+        kw = dict(base_url=base_url, log=lambda *a: None)
+
+        # 1) run interrompu : débit bas pour tuer le processus en plein milieu
+        code = ("import json, sys, scraper;"
+                f"urls = json.load(open({str(tmp / 'urls.json')!r}));"
+                f"scraper.scrape_many_to_file(urls, {str(out)!r}, base_url={base_url!r}, rate=60, flush_every=10, log=lambda *a: None)")
+        proc = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT, start_new_session=True)
+        time.sleep(args.kill_after)
+        os.killpg(proc.pid, signal.SIGKILL)  # groupe entier : les processus de parsing aussi
+        proc.wait()
+        checkpoint = scraper.scrape_paths(out.parent)[1]
+        resumed = len(scraper._load_checkpoint(checkpoint))
+        before = sum(server.responses.values())
+        print(f"run interrompu : {resumed}/{len(urls)} recettes au checkpoint, {before} requêtes servies")
+        if not 0 < resumed < len(urls):
+            errors.append(f"interruption hors de la fenêtre utile ({resumed} recettes) : ajuster --kill-after")
+
+        # 2) reprise : seules les URL absentes du checkpoint sont redemandées
+        server.responses.clear()
+        t0 = time.perf_counter()
+        _, data = scraper.scrape_many_to_file(urls, out, rate=0, **kw)
+        served = sum(server.responses.values())
+        print(f"reprise : {served} requêtes ({dict(server.responses)}) en {time.perf_counter() - t0:.2f}s")
+        if served != len(urls) - resumed:
+            errors.append(f"reprise : {served} requêtes, attendu {len(urls) - resumed}")
+        if checkpoint.exists():
+            errors.append("checkpoint non supprimé après un run complet")
+        errors += _diff(expected, data)
+        first = out.read_bytes()
+
+        # 3) rafraîchissement : tout revalidé par le cache HTTP, rien de retéléchargé
+        server.responses.clear()
+        _, data = scraper.scrape_many_to_file(urls, out, rate=0, refresh=True, parse_workers=0, **kw)
+        print(f"refresh : {dict(server.responses)}")
+        if server.responses != {304: len(urls)}:
+            errors.append(f"refresh : réponses {dict(server.responses)}, attendu {{304: {len(urls)}}}")
+        if out.read_bytes() != first:
+            errors.append("refresh : fichier de sortie modifié")
+        server.shutdown()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    for e in errors[:20]:
+        print("  ÉCART :", e)
+    print(f"{len(errors)} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
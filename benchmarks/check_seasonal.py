@@ -0,0 +1,82 @@
+# benchmarks/check_seasonal.py
+# Mode saison (seasonal.py) :
+#   exactitude = vue annuelle (masques de 12 bits, calcul en bloc) == score_market de
+#                compute_matching(month=m, match_min=0) pour chacun des 12 mois, avec et sans NumPy
+#   isolation  = compute_matching(month=m) n'évince pas les index du snapshot de départ
+#   vitesse    = vue annuelle vs 12 appels à compute_matching, sur le corpus réel et un corpus synthétique
+# Sort en erreur au moindre écart de score.
+from __future__ import annotations
+
+import argparse, shutil, sys, tempfile, time
+from pathlib import Path
+
+import engine
+import seasonal
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+
+def _check(ctx, label: str) -> int:
+    errors = 0
+    t0 = time.perf_counter()
+    view = seasonal.year_view(ctx)
+    t_view = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    expected = []
+    for m in range(1, 13):
+        rows = engine.compute_matching(ctx, match_min=0, match_min_pantry=0, month=m)["scored_all"]
+        expected.append({r["name"]: r["score_market"] for r in rows})
+    t_full = time.perf_counter() - t0
+
+    np_saved = seasonal.np
+    seasonal.np = None
+    try:
+        plain = seasonal._build_year_view(ctx)["score_market"]
+    finally:
+        seasonal.np = np_saved
+    for i, name in enumerate(view["names"]):
+        got = [float(s) for s in view["score_market"][i]]
+        want = [expected[m][name] for m in range(12)]
+        if got != want or plain[i] != want:
+            errors += 1
+            if errors <= 5:
+                print(f"[!] {name} : vue {got}, sans NumPy {plain[i]}, compute_matching {want}")
+    before = engine.resolution_table(ctx, "market")
+    engine.compute_matching(ctx, month=6)
+    if engine.resolution_table(ctx, "market") is not before:
+        errors += 1
+        print("[!] compute_matching(month=6) a évincé la table marché du snapshot de départ")
+    in_june = len(seasonal.in_season(ctx, "juin"))
+    print(f"{label} : {len(view['names'])} recettes, vue annuelle {t_view * 1e3:.1f} ms "
+          f"vs 12 × compute_matching {t_full * 1e3:.0f} ms ; {in_june} recette(s) 100 % de saison en juin, "
+          f"{errors} écart(s)")
+    return errors
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--recettes", type=int, default=5_000, help="taille du corpus synthétique")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    errors = 0
+    for month in (1, "Août", "aout", "décembre"):
+        seasonal.month_index(month)
+    for bad in (0, 13, "brumaire"):
+        try:
+            seasonal.month_index(bad)
+            errors += 1
+            print(f"[!] mois {bad!r} accepté")
+        except ValueError:
+            pass
+    errors += _check(engine.Engine(REAL_DATA).snapshot(), "corpus réel")
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-seasonal-"))
+    try:
+        data = write_data_dir(tmp / "data", args.recettes, args.seed)
+        errors += _check(engine.Engine(data).snapshot(), "corpus synthétique")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# benchmarks/check_simulation.py
+# Simulation multi-semaines (simulation.py) :
+#   exactitude = simulate() en mémoire == compute_courses(update_provisions=True) semaine après semaine
+#                sur une copie de data/ (listes de courses, placard final), avec et sans réappro
+#   cumul      = courses de toutes les semaines (aggregate) == somme des listes, unité par unité
+#   fichiers   = simulate() n'écrit rien ; write=True écrit le placard final
+#   vitesse    = 52 semaines × 7 recettes, corpus réel et synthétique
+# Sort en erreur au moindre écart.
+from __future__ import annotations
+
+import argparse, contextlib, io, random, shutil, sys, tempfile, time
+from pathlib import Path
+
+import engine
+import simulation
+from quantities import MASS, NO_CONVERSIONS, base_unit, unit_info
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+
+def _plan(ctx, n_weeks: int, k: int, seed: int) -> list:
+    names = list(dict.fromkeys(r["name"] for r in ctx.recettes))
+    rnd = random.Random(seed)
+    return [rnd.sample(names, k) for _ in range(n_weeks)]
+
+
+def _replay(data: Path, weeks: list, personnes: int, restock_weekly: bool) -> tuple:
+    """Référence : compute_courses avec écriture des fichiers, réappro appliqué à la main."""
+    listes = []
+    for selection in weeks:
+        with contextlib.redirect_stdout(io.StringIO()):
+            res = engine.compute_courses(data, selection, personnes, update_provisions=True)
+        listes.append(res["liste_courses"])
+        if restock_weekly:
+            placard = engine._load_json(data / "courses_placard.txt")
+            provisions = engine._load_json(data / "provisions.txt")
+            low = {p["name"] for p in placard}
+            for p in provisions:
+                if p["name"] in low:
+                    p["quantity"] = float(p.get("quantity_min", 0))
+            engine._dump_json(provisions, data / "provisions.txt")
+    return listes, engine._load_json(data / "provisions.txt")
+
+
+def _check_totals(ctx, sim: dict) -> int:
+    """Courses cumulées == somme des listes hebdomadaires, ramenées à l'unité de base à la main."""
+    want = {}
+    for week in sim["weeks"]:
+        for items in week["liste_courses"].values():
+            for label, d in items.items():
+                conv = ctx.conversions_map.get(d["norm"], NO_CONVERSIONS)
+                for val, unit in [(d["val"], d["unit"])] + [(e["val"], e["unit"]) for e in d.get("extra", ())]:
+                    info = unit_info(unit)
+                    if val is None or info is None:
+                        continue
+                    dim, base = info.dim, val * info.factor
+                    if dim != MASS and conv.grams_per(dim) is not None:
+                        dim, base = MASS, base * conv.grams_per(dim)
+                    key = (label, base_unit(dim))
+                    want[key] = want.get(key, 0) + base
+    got = {(c["name"], c["unit"]): c["quantity"] for c in sim["courses"]}
+    bad = [k for k in want.keys() | got.keys() if k not in got or k not in want or abs(got[k] - want[k]) > 0.01]
+    for name, unit in bad[:5]:
+        print(f"[!] cumul {name} ({unit}) : {got.get((name, unit))}, attendu {want.get((name, unit))}")
+    return len(bad)
+
+
+def check_equivalence(tmp: Path, n_weeks: int, seed: int) -> int:
+    errors = 0
+    for restock_weekly in (False, True):
+        data = tmp / f"data-{restock_weekly}"
+        shutil.copytree(REAL_DATA, data, ignore=shutil.ignore_patterns(".*"))
+        before = [(data / f).read_bytes() for f in ("provisions.txt", "courses_placard.txt")]
+        weeks = _plan(engine.Engine(data).snapshot(), n_weeks, 7, seed)
+        sim = simulation.simulate(engine.Engine(data), weeks, 4, restock_weekly)
+        if [(data / f).read_bytes() for f in ("provisions.txt", "courses_placard.txt")] != before:
+            errors += 1
+            print("[!] simulate() a écrit dans data/")
+        listes, final = _replay(data, weeks, 4, restock_weekly)
+        for w, (got, want) in enumerate(zip(sim["weeks"], listes)):
+            if got["liste_courses"] != want:
+                errors += 1
+                print(f"[!] semaine {w + 1} (réappro {restock_weekly}) : liste de courses différente")
+        errors += _check_totals(engine.Engine(data).snapshot(), sim)
+        if sim["provisions"] != final:
+            errors += 1
+            print(f"[!] placard final différent (réappro {restock_weekly})")
+        print(f"réappro {restock_weekly} : {n_weeks} semaines identiques à compute_courses + écriture, "
+              f"{len(sim['restock'])} article(s) réapprovisionné(s), {len(sim['courses'])} total(aux) cumulé(s)")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            sim = simulation.simulate(str(data), weeks[:2], 2, restock_weekly, write=True)
+        if engine._load_json(data / "provisions.txt") != sim["provisions"]:
+            errors += 1
+            print("[!] write=True : placard écrit ≠ placard simulé")
+    return errors
+
+
+def bench(data: Path, label: str, n_weeks: int, seed: int) -> None:
+    ctx = engine.Engine(data).snapshot()
+    weeks = _plan(ctx, n_weeks, 7, seed)
+    t0 = time.perf_counter()
+    sim = simulation.simulate(ctx, weeks, [2 + w % 3 for w in range(n_weeks)])
+    dt = time.perf_counter() - t0
+    print(f"{label} : {n_weeks} semaines × 7 recettes en {dt:.2f} s ({dt / n_weeks * 1e3:.1f} ms/semaine), "
+          f"{len(sim['trajectory'])} états du placard")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--weeks", type=int, default=52)
+    p.add_argument("--recettes", type=int, default=10_000, help="taille du corpus synthétique")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-simulation-"))
+    try:
+        errors = check_equivalence(tmp, 8, args.seed)
+        bench(REAL_DATA, "corpus réel", args.weeks, args.seed)
+        bench(write_data_dir(tmp / "synth", args.recettes, args.seed), "corpus synthétique", args.weeks, args.seed)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
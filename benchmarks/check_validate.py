@@ -0,0 +1,228 @@
+# benchmarks/check_validate.py
+# Vérifie validate.py sur une copie de data/ :
+#   - les vraies données ne contiennent aucune erreur ;
+#   - chaque défaut injecté (ingrédient inconnu, remplaçant absent, quantity_min manquant, rayon
+#     mal orthographié, recette en double, JSON tronqué…) est signalé avec le bon code et la bonne ligne ;
+#   - un 2e appel sans modification reprend tout du cache ; un fichier modifié ne recontrôle
+#     que les sections qui en dépendent ;
+#   - les alias automatiques du dossier (aliases_auto.json) sont appliqués sans toucher à engine
+#     (table ALIASES, snapshots des Engine d'autres dossiers) ;
+#   - le contrôle par lots dans le pool de processus donne le même rapport que le contrôle en série,
+#     et mesure les deux sur un gros corpus synthétique.
+from __future__ import annotations
+
+import argparse, json, shutil, sys, tempfile, time
+from pathlib import Path
+
+import engine
+import validate
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+
+def _read(path: Path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def _write(path: Path, obj):
+    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+
+def _codes(report: dict) -> set:
+    return {(i["code"], i.get("where")) for i in report["issues"]}
+
+
+def check_faults(data_dir: Path) -> int:
+    errors = 0
+    base = validate.validate(data_dir, use_cache=False)
+    if not base["ok"]:
+        print(f"[!] vraies données : {base['errors']} erreur(s)")
+        errors += 1
+    paths = {key: data_dir / f for key, f in engine.DATA_FILES.items()}
+
+    recettes = _read(paths["recettes"])
+    recettes[3]["ingredients"]["Poudre de licorne"] = {"qty": 1, "unit": "g"}
+    recettes[5]["ingredients"][next(iter(recettes[5]["ingredients"]))]["qty"] = "beaucoup"
+    recettes.append(dict(recettes[0]))
+    recettes.append({"link": "", "ingredients": {}})
+    _write(paths["recettes"], recettes)
+    catalogue = _read(paths["catalogue"])
+    catalogue[0]["rayon"] = "epicerie"
+    catalogue[1]["remplacement"] = ["Ingrédient fantôme"]
+    catalogue[2]["saison"] = ["janvir"]
+    _write(paths["catalogue"], catalogue)
+    provisions = _read(paths["provisions"])
+    del provisions[0]["quantity_min"]
+    provisions.append({"name": "Sel de lune", "quantity": 1, "quantity_min": 0})
+    _write(paths["provisions"], provisions)
+    dispos = _read(paths["dispos"])
+    _write(paths["dispos"], dispos + [dispos[0]])
+
+    report = validate.validate(data_dir, use_cache=False)
+    found = _codes(report)
+    expected = {
+        ("recette.ingredient_inconnu", recettes[3]["name"]),
+        ("recette.quantite", recettes[5]["name"]),
+        ("recette.doublon", recettes[0]["name"]),
+        ("recette.nom", None),
+        ("catalogue.rayon", catalogue[0]["name"]),
+        ("catalogue.remplacement_inconnu", catalogue[1]["name"]),
+        ("catalogue.mois", catalogue[2]["name"]),
+        ("provisions.quantity_min", provisions[0]["name"]),
+        ("provisions.inconnu", "Sel de lune"),
+        ("dispos.doublon", dispos[0]),
+    }
+    for missing in sorted(expected - found, key=str):
+        print(f"[!] défaut injecté non signalé : {missing}")
+        errors += 1
+    rayon = [i for i in report["issues"] if i["code"] == "catalogue.rayon" and i["where"] == catalogue[0]["name"]]
+    if rayon and rayon[0].get("suggestion") != "épicerie":
+        print(f"[!] rayon 'epicerie' : suggestion {rayon[0].get('suggestion')!r}, attendu 'épicerie'")
+        errors += 1
+    dup = [i for i in report["issues"] if i["code"] == "recette.doublon"]
+    text = paths["recettes"].read_text(encoding="utf-8")
+    expected_line = text[:text.index('"name": ' + json.dumps(recettes[0]["name"], ensure_ascii=False),
+                              text.index("Poudre de licorne"))].count("\n")  # ligne de l'avant-dernière recette
+    if not dup or dup[-1]["line"] != expected_line:
+        print(f"[!] ligne du doublon : {dup[-1]['line'] if dup else None}, attendu {expected_line}")
+        errors += 1
+    if report["ok"] or not any(i["code"] == "recette.nom" for i in report["issues"]):
+        print("[!] recette sans nom : pas d'erreur")
+        errors += 1
+
+    # JSON tronqué : erreur localisée, sans exception
+    paths["dispos"].write_text('["tomate", "oignon"', encoding="utf-8")
+    lines = text.splitlines()
+    paths["recettes"].write_text("\n".join(lines[:40] + ["  },,"] + lines[40:]), encoding="utf-8")
+    report = validate.validate(data_dir, use_cache=False)
+    bad = {i["file"]: i for i in report["issues"] if i["code"] == "fichier.json"}
+    if set(bad) != {engine.DATA_FILES["dispos"], engine.DATA_FILES["recettes"]}:
+        print(f"[!] JSON invalide signalé pour {sorted(bad)}")
+        errors += 1
+    elif not 40 <= bad[engine.DATA_FILES["recettes"]]["line"] <= 42:
+        print(f"[!] JSON invalide : ligne {bad[engine.DATA_FILES['recettes']]['line']}, attendu ~41")
+        errors += 1
+    print(f"  défauts injectés : {len(expected)} attendus, {len(expected & found)} signalés")
+    return errors
+
+
+def check_cache(data_dir: Path) -> int:
+    errors = 0
+    first = validate.validate(data_dir)
+    validate._memo.clear()  # relit le cache sur disque, comme un nouveau processus
+    t0 = time.perf_counter()
+    second = validate.validate(data_dir)
+    t = time.perf_counter() - t0
+    if not all(s["cached"] for s in second["sections"].values()) or second["issues"] != first["issues"]:
+        print(f"[!] 2e appel : {second['sections']}")
+        errors += 1
+    dispos = data_dir / engine.DATA_FILES["dispos"]
+    names = _read(dispos)
+    time.sleep(0.01)
+    _write(dispos, names + ["Poudre de licorne"])
+    third = validate.validate(data_dir)
+    recomputed = {s for s, v in third["sections"].items() if not v["cached"]}
+    if recomputed != {"dispos"}:
+        print(f"[!] dispos modifiés : sections recontrôlées {sorted(recomputed)}, attendu ['dispos']")
+        errors += 1
+    if ("dispos.inconnu", "Poudre de licorne") not in _codes(third):
+        print("[!] dispos modifiés : nouvel ingrédient inconnu non signalé")
+        errors += 1
+    print(f"  cache : {t * 1e3:.1f} ms depuis le disque, recontrôlé après modification : {sorted(recomputed)}")
+    return errors
+
+
+def check_aliases(data_dir: Path) -> int:
+    errors = 0
+    paths = {key: data_dir / f for key, f in engine.DATA_FILES.items()}
+    recettes = _read(paths["recettes"])
+    recettes[0]["ingredients"]["Poudre de perlimpinpin"] = {"qty": 1, "unit": "g"}
+    _write(paths["recettes"], recettes)
+    target = _read(paths["catalogue"])[0]["name"]
+    aliases, other = dict(engine.ALIASES), engine.Engine(REAL_DATA)
+    snap = other.snapshot()
+    before = validate.validate(data_dir, use_cache=False)
+    _write(data_dir / engine.AUTO_ALIASES_FILE, {"Poudre de perlimpinpin": target})
+    after = validate.validate(data_dir, use_cache=False)
+    unknown = ("recette.ingredient_inconnu", recettes[0]["name"])
+    if unknown not in _codes(before) or unknown in _codes(after):
+        print(f"[!] alias automatique non appliqué : avant {unknown in _codes(before)}, après {unknown in _codes(after)}")
+        errors += 1
+    if engine.ALIASES != aliases or other.snapshot() is not snap:
+        print("[!] alias du dossier enregistrés dans engine (table globale ou autres Engine)")
+        errors += 1
+    (data_dir / engine.AUTO_ALIASES_FILE).write_text("{", encoding="utf-8")
+    bad = validate.validate(data_dir, use_cache=False)
+    if not any(i["code"] == "fichier.json" and i["file"] == engine.AUTO_ALIASES_FILE for i in bad["issues"]):
+        print("[!] aliases_auto.json invalide : pas d'erreur")
+        errors += 1
+    return errors
+
+
+def _forced_pool(data_dir: Path, workers: int) -> dict:
+    """Rapport avec le pool quelle que soit la taille des recettes et le nombre de CPU."""
+    limit, cpus = validate.PARALLEL_MIN, validate._cpus
+    validate.PARALLEL_MIN, validate._cpus = 0, lambda: workers
+    try:
+        return validate.validate(data_dir, workers=workers, use_cache=False)
+    finally:
+        validate.PARALLEL_MIN, validate._cpus = limit, cpus
+
+
+def check_pool(data_dir: Path, workers: int | None) -> int:
+    errors = 0
+    path = data_dir / engine.DATA_FILES["recettes"]
+    size = path.stat().st_size
+    t0 = time.perf_counter()
+    serial = validate.validate(data_dir, workers=0, use_cache=False)
+    t_serial = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    auto = validate.validate(data_dir, workers=workers, use_cache=False)
+    t_auto = time.perf_counter() - t0
+    used = validate.pool_workers(size, workers)
+    t0 = time.perf_counter()
+    forced = _forced_pool(data_dir, max(2, workers or 2))
+    t_forced = time.perf_counter() - t0
+    print(f"  {size / 2**20:.1f} Mio de recettes, {validate._cpus()} CPU : série {t_serial:.2f}s, "
+          f"{f'pool ({used}) {t_auto:.2f}s' if used else f'pool non utilisé ({t_auto:.2f}s)'}, "
+          f"pool forcé ({max(2, workers or 2)}) {t_forced:.2f}s, {len(serial['issues'])} problème(s)")
+    if auto["issues"] != serial["issues"] or forced["issues"] != serial["issues"]:
+        print("[!] pool de processus : rapport différent du contrôle en série")
+        errors += 1
+    if used and t_auto >= t_serial:
+        print(f"[!] pool utilisé mais plus lent que la série ({t_auto:.2f}s ≥ {t_serial:.2f}s) : relever PARALLEL_MIN")
+        errors += 1
+
+    # recettes compactes avec des listes d'objets : des frontières '}, {' tombent dans les recettes
+    recettes = _read(path)[:2000]
+    for r in recettes:
+        r["etapes"] = [{"n": 1, "texte": "émincer"}, {"n": 2, "texte": "cuire"}]
+    path.write_text(json.dumps(recettes, ensure_ascii=False), encoding="utf-8")
+    serial = validate.validate(data_dir, workers=0, use_cache=False)
+    if _forced_pool(data_dir, 2)["issues"] != serial["issues"]:
+        print("[!] pool de processus, tranches coupées dans une recette : rapport différent du contrôle en série")
+        errors += 1
+    return errors
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--size", type=int, default=50_000, help="recettes du corpus synthétique")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-validate-"))
+    errors = 0
+    try:
+        shutil.copytree(REAL_DATA, tmp / "cache", ignore=shutil.ignore_patterns(".index"))
+        errors += check_cache(tmp / "cache")
+        shutil.copytree(REAL_DATA, tmp / "faults", ignore=shutil.ignore_patterns(".index"))
+        errors += check_faults(tmp / "faults")
+        shutil.copytree(REAL_DATA, tmp / "aliases", ignore=shutil.ignore_patterns(".index"))
+        errors += check_aliases(tmp / "aliases")
+        errors += check_pool(write_data_dir(tmp / "big", args.size, args.seed), args.workers)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"{errors} erreur(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+# benchmarks/check_watcher.py
+# Modifie les fichiers d'une copie de data/ sur disque (dispos, placard, catalogue, réécritures à
+# l'identique) et vérifie après chaque tour de DataWatcher.poll() :
+#   - seul le fichier modifié est relu, les autres parties et leurs index sont repris tels quels ;
+#   - une réécriture à l'identique ne relit rien et ne change aucune version ;
+#   - tables de résolution, matching tenu à jour par deltas et index = ceux d'un Engine neuf ;
+#   - un fichier déjà relu par l'Engine est signalé sans être relu une 2e fois ;
+#   - un nouvel alias automatique (aliases_auto.json) change toutes les versions et toutes les vues ;
+#   - le thread de scrutation voit une modification et prévient les abonnés ; un fichier mal formé
+#     (entrée du placard sans 'name') ne l'arrête pas et le dernier snapshot valide est gardé.
+from __future__ import annotations
+
+import argparse, json, logging, os, random, shutil, sys, tempfile, threading, time
+from pathlib import Path
+
+import engine
+import watcher
+from benchmarks.synthetic import REAL_DATA, write_data_dir
+
+PARTS = {  # clé de engine.DATA_FILES → attributs du snapshot comparés à un Engine neuf
+    "recettes": ("recettes",),
+    "catalogue": ("catalogue_norm_index", "rayons_map", "indispensables_map", "replacements_ordered"),
+    "dispos": ("raw_dispos", "dispos_norm"),
+    "provisions": ("provisions", "provisions_index"),
+}
+
+
+def _write(path: Path, obj=None, raw: bytes | None = None):
+    """Écrit sur disque et garantit un mtime différent du précédent (horloge de fichiers grossière)."""
+    before = path.stat().st_mtime_ns
+    path.write_bytes(raw if raw is not None else json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8"))
+    mtime = max(time.time_ns(), before + 1_000_000)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def _compare(w, data_dir: Path, label: str) -> int:
+    errors = 0
+    snap = w.engine.snapshot()
+    fresh = engine.Engine(data_dir).snapshot()
+    for key, attrs in PARTS.items():
+        for attr in attrs:
+            if getattr(snap, attr) != getattr(fresh, attr):
+                print(f"[!] {label} : {attr} ≠ Engine neuf")
+                errors += 1
+    for kind, available in (("market", snap.dispos_norm), ("pantry", snap.provisions_index)):
+        if engine.resolution_table(snap, kind) != engine._resolve(snap, engine.replacement_closure(snap), available):
+            print(f"[!] {label} : table de résolution {kind} ≠ recalcul")
+            errors += 1
+    expected = engine.compute_matching(fresh, with_text=False)
+    got = w.matching()
+    if got["scored"] != expected["scored"] or got["unknown_ingredients"] != expected["unknown_ingredients"]:
+        print(f"[!] {label} : matching du watcher ≠ compute_matching sur un Engine neuf")
+        errors += 1
+    return errors
+
+
+def run(data_dir: Path, steps: int, seed: int) -> int:
+    rnd = random.Random(seed)
+    w = watcher.DataWatcher(data_dir)
+    errors = _compare(w, data_dir, "départ")
+    snap = w.engine.snapshot()
+    market = sorted({p for keys in snap.recettes_keys for _, p, n, _ in keys if n in snap.market_indispensables_norm})
+    paths = {key: data_dir / f for key, f in engine.DATA_FILES.items()}
+    t_poll = 0.0
+
+    for step in range(steps):
+        prev = w.engine.snapshot()
+        closure, table = engine.replacement_closure(prev), engine.recipe_table(prev)
+        versions, reloads = dict(w.versions), dict(w.reloads)
+        before = {k: path.read_bytes() for k, path in paths.items()}
+        roll = rnd.random()
+        if roll < 0.35:
+            key = "dispos"
+            dispos = sorted(prev.raw_dispos)
+            dispos = [d for d in dispos if rnd.random() > 0.1] + rnd.sample(market, k=rnd.randint(0, 3))
+            _write(paths[key], sorted(set(dispos)))
+        elif roll < 0.7:
+            key = "provisions"
+            provisions = [dict(p) for p in prev.provisions]
+            for p in rnd.sample(provisions, k=min(3, len(provisions))):
+                p["quantity"] = rnd.choice([0, 1, 250])
+            if provisions and rnd.random() < 0.3:
+                provisions.pop(rnd.randrange(len(provisions)))
+            if rnd.random() < 0.3:
+                provisions.append({"name": rnd.choice(market), "quantity": 1, "quantity_min": 0})
+            _write(paths[key], provisions)
+        elif roll < 0.85:
+            key = rnd.choice(("dispos", "provisions", "catalogue"))
+            _write(paths[key], raw=paths[key].read_bytes())  # réécrit à l'identique
+        else:
+            key = "catalogue"
+            catalogue = json.loads(paths[key].read_text(encoding="utf-8"))
+            item = rnd.choice(catalogue)
+            item["indispensable"] = not item.get("indispensable")
+            _write(paths[key], catalogue)
+        same_content = paths[key].read_bytes() == before[key]  # réécriture ou tirage sans effet
+
+        t0 = time.perf_counter()
+        changed = w.poll()
+        t_poll += time.perf_counter() - t0
+        snap = w.engine.snapshot()
+        label = f"étape {step} ({key}{', identique' if same_content else ''})"
+
+        expected = [] if same_content else [key]
+        if changed != expected:
+            print(f"[!] {label} : poll() → {changed}, attendu {expected}")
+            errors += 1
+        bumped = {k for k in versions if w.versions[k] != versions[k]}
+        reread = {k for k in reloads if w.reloads[k] != reloads[k]}
+        if bumped != set(expected) or reread != set(expected):
+            print(f"[!] {label} : versions changées {bumped}, fichiers relus {reread}")
+            errors += 1
+        if snap.signatures[key] != engine._file_signature(paths[key]):
+            print(f"[!] {label} : signature de l'Engine pas à jour (snapshot() relirait le fichier)")
+            errors += 1
+        for other in engine.DATA_FILES:
+            if (other != key or same_content) and snap.parts[other] is not prev.parts[other]:
+                print(f"[!] {label} : partie {other} relue sans raison")
+                errors += 1
+        if key != "catalogue" and engine.replacement_closure(snap) is not closure:
+            print(f"[!] {label} : fermeture des remplacements reconstruite")
+            errors += 1
+        if key in ("dispos", "provisions") and engine.recipe_table(snap) is not table:
+            print(f"[!] {label} : table des recettes reconstruite")
+            errors += 1
+        errors += _compare(w, data_dir, label)
+
+    # fichier déjà relu par l'Engine (snapshot() ou écriture du placard) avant le tour : compté, pas relu
+    provisions = w.engine.snapshot().provisions[1:]
+    _write(paths["provisions"], provisions)
+    w.engine.snapshot()
+    reloads = dict(w.reloads)
+    if w.poll() != ["provisions"] or w.reloads != reloads:
+        print("[!] placard relu par l'Engine : changement non signalé ou relu une 2e fois")
+        errors += 1
+    errors += _compare(w, data_dir, "relu par l'Engine")
+
+    # alias automatiques (fuzzy_resolver) : tous les fichiers sont relus avec, toutes les vues changent
+    snap = w.engine.snapshot()
+    raw, pretty = next((raw, p) for keys in snap.recettes_keys for raw, p, n, _ in keys if n in snap.catalogue_norm_index)
+    target = next(p for p in snap.catalogue_norm_to_pretty.values() if p != pretty)
+    engine._dump_json({raw: target}, data_dir / engine.AUTO_ALIASES_FILE)
+    versions = dict(w.versions)
+    if w.poll() != list(engine.DATA_FILES) or any(w.versions[k] == versions[k] for k in versions):
+        print("[!] alias automatiques modifiés : versions inchangées")
+        errors += 1
+    if engine.canon(raw, w.engine.snapshot().aliases) != target:
+        print(f"[!] alias automatiques modifiés : {raw!r} non résolu en {target!r}")
+        errors += 1
+    errors += _compare(w, data_dir, "alias automatiques")
+
+    # thread de scrutation : une modification est vue et les abonnés prévenus
+    seen = threading.Event()
+    w.subscribe(lambda keys, snap: "dispos" in keys and seen.set())
+    w.interval = 0.05
+    w.start()
+    try:
+        dispos = sorted(w.engine.snapshot().raw_dispos)
+        _write(paths["dispos"], dispos[1:])
+        if not seen.wait(5):
+            print("[!] thread : modification des dispos non vue en 5 s")
+            errors += 1
+        good = w.engine.snapshot()
+        provisions = [dict(p) for p in good.provisions]
+        del provisions[0]["name"]
+        logging.disable(logging.ERROR)  # trace attendue
+        try:
+            _write(paths["provisions"], provisions)
+            time.sleep(4 * w.interval)
+        finally:
+            logging.disable(logging.NOTSET)
+        if not w._thread.is_alive() or w.engine._snapshot is not good:
+            print("[!] thread : placard mal formé → thread arrêté ou snapshot valide perdu")
+            errors += 1
+        seen.clear()
+        w.subscribe(lambda keys, snap: "provisions" in keys and seen.set())
+        fixed = [dict(p) for p in good.provisions]
+        fixed[0]["quantity"] = float(fixed[0].get("quantity", 0)) + 1  # corrigé et modifié
+        _write(paths["provisions"], fixed)
+        if not seen.wait(5):
+            print("[!] thread : placard corrigé non vu en 5 s")
+            errors += 1
+    finally:
+        w.stop()
+    errors += _compare(w, data_dir, "thread")
+
+    print(f"{len(snap.recettes)} recettes, {steps} modifications : poll {t_poll / steps * 1e3:.2f} ms/tour, "
+          f"relus {w.reloads}, {errors} erreur(s)")
+    return errors
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--size", type=int, default=0, help="recettes synthétiques (0 = vraies données)")
+    p.add_argument("--steps", type=int, default=40)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+    tmp = Path(tempfile.mkdtemp(prefix="mealplanner-watch-"))
+    try:
+        if args.size:
+            data_dir = write_data_dir(tmp / "data", args.size, args.seed)
+        else:
+            data_dir = tmp / "data"
+            shutil.copytree(REAL_DATA, data_dir)
+        return 1 if run(data_dir, args.steps, args.seed) else 0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# benchmarks/stress_concurrency.py
+# N threads appellent compute_matching / compute_courses en parallèle sur le même Engine,
+# pendant qu'un autre thread modifie les fichiers data/ ; chaque résultat doit être égal
+# à celui d'un calcul séquentiel sur le même snapshot.
+from __future__ import annotations
+
+import argparse, contextlib, io, json, random, shutil, sys, tempfile, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import engine
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _copy_data(src: Path) -> Path:
+    dst = Path(tempfile.mkdtemp(prefix="mealplanner-stress-")) / "data"
+    shutil.copytree(src, dst)
+    return dst
+
+
+def _reference(ctx, selection, personnes):
+    m = engine.compute_matching(ctx)
+    c = engine.compute_courses(ctx, selection, personnes)
+    return m["scored"], c["liste_courses"], c["consommation_totale"]
+
+
+def stress_read(data_dir: Path, threads: int, iterations: int, seed: int) -> int:
+    """Lectures concurrentes + réécriture périodique de ingredients_disponibles.txt."""
+    eng = engine.get_engine(data_dir)
+    names = [r["name"] for r in eng.snapshot().recettes]
+    dispos_path = data_dir / "ingredients_disponibles.txt"
+    dispos_orig = json.loads(dispos_path.read_text(encoding="utf-8"))
+    stop = threading.Event()
+    errors = []
+
+    def writer():
+        rnd = random.Random(seed)
+        while not stop.is_set():
+            sub = rnd.sample(dispos_orig, k=max(1, len(dispos_orig) // 2))
+            dispos_path.write_text(json.dumps(sub, ensure_ascii=False), encoding="utf-8")
+            time.sleep(0.005)
+
+    def worker(i):
+        rnd = random.Random(seed + i)
+        for _ in range(iterations):
+            ctx = eng.snapshot()  # contexte figé pour tout l'appel
+            selection = rnd.sample(names, k=5)
+            personnes = rnd.randint(1, 6)
+            got = _reference(ctx, selection, personnes)
+            # même calcul, même snapshot → même résultat, quel que soit l'entrelacement
+            if got != _reference(ctx, selection, personnes):
+                errors.append((i, selection))
+
+    w = threading.Thread(target=writer, daemon=True)
+    w.start()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    w.join()
+    calls = threads * iterations * 2
+    print(f"lecture : {threads} threads × {iterations} itérations, {calls / elapsed:.1f} appels/s, {len(errors)} écart(s)")
+    return len(errors)
+
+
+def stress_households(data_dir: Path, threads: int, iterations: int) -> int:
+    """Décréments concurrents sur deux foyers : aucune mise à jour perdue, aucune fuite d'un foyer à l'autre."""
+    eng = engine.get_engine(data_dir)
+    base = json.loads((data_dir / "provisions.txt").read_text(encoding="utf-8"))
+    households = []
+    for name in ("foyer_a", "foyer_b"):
+        path = data_dir / name / "provisions.txt"
+        path.parent.mkdir()
+        path.write_text(json.dumps(base, ensure_ascii=False), encoding="utf-8")
+        households.append(eng.household(path))
+    key = engine.normalize(engine.canon(base[0]["name"]))
+    start = float(base[0]["quantity"])
+    step = start / (threads * iterations * 2)
+
+    def worker(i):
+        hh = households[i % 2]
+        for _ in range(iterations):
+            engine.update_provisions_files({key: step}, hh)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(worker, range(threads)))
+
+    errors = 0
+    for i, hh in enumerate(households):
+        n_calls = sum(iterations for t in range(threads) if t % 2 == i)
+        got = float(hh.reload().provisions_index[key]["quantity"])
+        expected = start - step * n_calls
+        if abs(got - expected) > 1e-6:
+            print(f"[!] {hh.provisions_path}: {got} au lieu de {expected}")
+            errors += 1
+    shared = float(eng.reload("provisions").provisions_index[key]["quantity"])
+    if shared != start:
+        print(f"[!] placard de data/ modifié : {shared} au lieu de {start}")
+        errors += 1
+    print(f"foyers : {threads} threads × {iterations} décréments, {errors} écart(s)")
+    return errors
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--data", type=Path, default=ROOT / "data")
+    p.add_argument("--threads", type=int, default=8)
+    p.add_argument("--iterations", type=int, default=10)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    data_dir = _copy_data(args.data)  # ne jamais toucher au vrai dossier data/
+    try:
+        errors = stress_read(data_dir, args.threads, args.iterations, args.seed)
+        errors += stress_households(data_dir, args.threads, args.iterations)
+    finally:
+        shutil.rmtree(data_dir.parent, ignore_errors=True)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# benchmarks/synthetic.py
+# Corpus synthétique reproductible (graine fixe) qui suit la forme du vrai dossier data/ :
+# nombre d'ingrédients par recette, fréquence des ingrédients, quantités/unités observées, catégories ;
+# et, si on agrandit le catalogue, rayons / saisons / poids / densité des remplacements du catalogue,
+# part du marché disponible et part du catalogue présente au placard.
+from __future__ import annotations
+
+import itertools, json, random, shutil
+from collections import Counter, defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+REAL_DATA = ROOT / "data"
+
+
+def _load(path: Path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class CorpusModel:
+    """Distributions empiriques tirées d'un corpus réel de recettes."""
+
+    def __init__(self, recettes: list):
+        self.sizes = [len(r["ingredients"]) for r in recettes] or [10]
+        self.categories = [r.get("category", "non classé") for r in recettes] or ["non classé"]
+        freq = self.freq = Counter(n for r in recettes for n in r["ingredients"])
+        self.ingredients = list(freq)
+        self.weights = [freq[n] for n in self.ingredients]
+        # champs descriptifs (desc_part_*, temps, difficulté) recopiés d'une vraie recette
+        self.details = [{k: v for k, v in r.items() if k not in ("name", "link", "category", "ingredients")}
+                        for r in recettes] or [{}]
+        self.quantities = defaultdict(list)  # nom → [(qty, unit)] observés
+        for r in recettes:
+            for n, d in r["ingredients"].items():
+                if isinstance(d, dict):
+                    self.quantities[n].append((d.get("qty"), d.get("unit", "")))
+
+    def _cum_weights(self) -> list:
+        # mêmes tirages que choices(weights=...), sans recalculer les cumuls à chaque recette
+        if len(getattr(self, "_cum", ())) != len(self.weights):
+            self._cum = list(itertools.accumulate(self.weights))
+        return self._cum
+
+    def add_ingredient(self, name: str, template: str):
+        """Nouvel ingrédient `name` utilisé comme `template` (même fréquence, mêmes quantités)."""
+        self.ingredients.append(name)
+        self.weights.append(self.freq[template])
+        self.quantities[name] = self.quantities.get(template, [])
+
+    def recipe(self, rnd: random.Random, i: int) -> dict:
+        k = min(rnd.choice(self.sizes), len(self.ingredients))
+        names = {}  # dict : ordre d'insertion stable, donc corpus identique d'un run à l'autre
+        while len(names) < k:
+            names.update(dict.fromkeys(rnd.choices(self.ingredients, cum_weights=self._cum_weights(), k=k - len(names))))
+        ingredients = {}
+        for n in names:
+            qty, unit = rnd.choice(self.quantities.get(n) or [(None, "")])
+            ingredients[n] = {"qty": qty, "unit": unit}
+        return {
+            "name": f"Recette synthétique {i:06d}",
+            "link": f"https://example.invalid/recettes/{i:06d}",
+            "category": rnd.choice(self.categories),
+            "ingredients": ingredients,
+            **rnd.choice(self.details),
+        }
+
+
+def ingredient_lines(r: dict) -> list:
+    """Lignes « qty unité nom » telles qu'une page JSON-LD les donnerait pour la recette `r`."""
+    lines = []
+    for name, d in r["ingredients"].items():
+        qty, unit = d.get("qty"), (d.get("unit") or "").strip()
+        if qty is None:
+            lines.append(f"{unit} {name}".strip())
+        else:
+            lines.append(" ".join(x for x in (str(qty), unit, name) if x))
+    return lines
+
+
+class CatalogueModel:
+    """Distributions empiriques tirées du catalogue, des dispos et du placard réels."""
+
+    def __init__(self, catalogue: list, dispos: list, provisions: list):
+        import engine
+        self.key = lambda name: engine.normalize(engine.canon(name))
+        self.items = {self.key(e["name"]): e for e in catalogue}
+        with_repl = [e for e in catalogue if e.get("remplacement")]
+        self.replacement_rate = len(with_repl) / max(1, len(catalogue))
+        self.replacement_sizes = [len(e["remplacement"]) for e in with_repl] or [1]
+        market = [k for k, e in self.items.items() if e.get("rayon", "").lower() == "marché"]
+        dispo_keys = {self.key(d) for d in dispos}
+        self.dispo_rate = sum(k in dispo_keys for k in market) / max(1, len(market))
+        self.pantry_rate = len(provisions) / max(1, len(catalogue) - len(market))
+        self.pantry_levels = [(p.get("quantity", 0), p.get("quantity_min", 0)) for p in provisions] or [(0, 0)]
+
+    def item(self, rnd: random.Random, name: str, template: str, names: list) -> dict:
+        """Entrée de catalogue pour `name`, copiée de celle de `template` (ou d'une entrée au hasard)."""
+        base = self.items.get(self.key(template)) or rnd.choice(list(self.items.values()))
+        item = {k: v for k, v in base.items() if k != "remplacement"}
+        item["name"] = name
+        if rnd.random() < self.replacement_rate:
+            item["remplacement"] = rnd.sample(names, min(len(names), rnd.choice(self.replacement_sizes)))
+        return item
+
+
+def synthetic_data(n_recettes: int, catalogue_size: int, seed: int = 0, src: Path = REAL_DATA) -> dict:
+    """Dossier data/ complet en mémoire : catalogue agrandi à `catalogue_size` entrées, dispos et
+    placard tirés dans les mêmes proportions que les vrais fichiers, `n_recettes` recettes qui
+    utilisent aussi les nouveaux ingrédients."""
+    rnd = random.Random(seed)
+    model = CorpusModel(_load(src / "recettes_hellofresh.txt"))
+    catalogue = _load(src / "ingredients_infos.txt")
+    dispos, provisions = _load(src / "ingredients_disponibles.txt"), _load(src / "provisions.txt")
+    cat_model = CatalogueModel(catalogue, dispos, provisions)
+    catalogue = list(catalogue)
+    names = [e["name"] for e in catalogue]
+    templates = list(model.ingredients)
+    for i in range(max(0, catalogue_size - len(catalogue))):
+        template = rnd.choice(templates)
+        name = f"{template} synthétique {i:06d}"
+        item = cat_model.item(rnd, name, template, names)
+        catalogue.append(item)
+        names.append(name)
+        model.add_ingredient(name, template)
+        rayon = item.get("rayon", "").lower()
+        if rayon == "marché":
+            if rnd.random() < cat_model.dispo_rate:
+                dispos.append(name)
+        elif rayon != "placard" and rnd.random() < cat_model.pantry_rate:
+            quantity, quantity_min = rnd.choice(cat_model.pantry_levels)
+            provisions.append({"name": name, "quantity": quantity, "quantity_min": quantity_min})
+    return {
+        "recettes_hellofresh.txt": [model.recipe(rnd, i) for i in range(n_recettes)],
+        "ingredients_infos.txt": catalogue,
+        "ingredients_disponibles.txt": dispos,
+        "provisions.txt": provisions,
+    }
+
+
+def synthetic_recettes(n: int, seed: int = 0, src: Path = REAL_DATA) -> list:
+    """`n` recettes synthétiques tirées des distributions de `src`/recettes_hellofresh.txt."""
+    model = CorpusModel(_load(src / "recettes_hellofresh.txt"))
+    rnd = random.Random(seed)
+    return [model.recipe(rnd, i) for i in range(n)]
+
+
+def write_data_dir(dst: Path, n_recettes: int, seed: int = 0, src: Path = REAL_DATA,
+                   catalogue_size: int | None = None) -> Path:
+    """Crée un dossier data/ complet dans `dst` : vrais catalogue/dispos/provisions + recettes synthétiques.
+
+    `catalogue_size` : catalogue, dispos et placard synthétiques aussi (voir synthetic_data).
+    """
+    dst = Path(dst)
+    dst.mkdir(parents=True, exist_ok=True)
+    if catalogue_size is not None:
+        for name, content in synthetic_data(n_recettes, catalogue_size, seed, src).items():
+            with open(dst / name, "w", encoding="utf-8") as f:
+                json.dump(content, f, ensure_ascii=False)
+        return dst
+    for name in ("ingredients_infos.txt", "ingredients_disponibles.txt", "provisions.txt"):
+        shutil.copy(src / name, dst / name)
+    recettes = synthetic_recettes(n_recettes, seed, src)
+    with open(dst / "recettes_hellofresh.txt", "w", encoding="utf-8") as f:
+        json.dump(recettes, f, ensure_ascii=False)
+    return dst
@@ -0,0 +1,95 @@
+# compact.py
+# Modèle compact des recettes pour la liste de courses : ingrédients, libellés et unités internés
+# en entiers, lignes de chaque recette rangées en colonnes array (ingrédient, libellé, quantité,
+# unité, indispensable forcé). Une table par snapshot (recettes + catalogue), remplie à la demande ;
+# les dicts de l'API (liste_courses) ne sont produits qu'à la fin de l'agrégation.
+from __future__ import annotations
+
+import math, threading
+from array import array
+
+INDISP_DEFAULT = -1  # pas de valeur "indispensable" dans la recette : celle du catalogue s'applique
+
+
+class RecipeTable:
+    """Lignes de courses des recettes (hors rayon placard), en colonnes.
+
+    Les colonnes sont remplies à la demande, recette par recette (première sélection) : le coût
+    suit le nombre de recettes réellement utilisées, pas la taille du corpus.
+    Lignes de la recette k : start[k]..start[k]+count[k] ; quantité NaN = pas de quantité numérique.
+    `positions` : nom → indice de la 1re recette de ce nom (les doublons sont ignorés, comme ailleurs).
+    """
+    __slots__ = ("names", "positions", "norms", "labels", "units", "start", "count",
+                 "line_norm", "line_label", "line_qty", "line_unit", "line_indisp",
+                 "_ids", "_recettes", "_keys", "_rayons", "_lock")
+
+    def __init__(self, ctx):
+        self._recettes, self._keys, self._rayons = ctx.recettes, ctx.recettes_keys, ctx.rayons_map
+        self.names = [r["name"] for r in self._recettes]
+        self.positions = {}
+        for k, name in enumerate(self.names):
+            self.positions.setdefault(name, k)
+        self.norms, self.labels, self.units = [], [], []
+        self._ids = ({}, {}, {})  # chaîne → id, pour norms / labels / units
+        self.start = array("i", [-1]) * len(self.names)  # -1 : recette pas encore rangée
+        self.count = array("H", [0]) * len(self.names)
+        self.line_norm, self.line_label, self.line_unit = array("I"), array("I"), array("I")
+        self.line_qty, self.line_indisp = array("d"), array("b")
+        self._lock = threading.Lock()
+
+    def _intern(self, which: int, values: list, s) -> int:
+        ids = self._ids[which]
+        i = ids.get(s)
+        if i is None:
+            i = ids[s] = len(values)
+            values.append(s)
+        return i
+
+    def _fill(self, k: int):
+        with self._lock:
+            if self.start[k] >= 0:
+                return
+            first = len(self.line_norm)
+            ingredients = self._recettes[k]["ingredients"]
+            for ing_raw, pretty, n, _ in self._keys[k]:
+                if self._rayons.get(n, "inconnu") == "placard":
+                    continue
+                data = ingredients[ing_raw]
+                if isinstance(data, dict):
+                    qty, unit, indisp = data.get("qty"), data.get("unit", ""), data.get("indispensable", None)
+                else:
+                    qty, unit, indisp = None, str(data), None
+                self.line_norm.append(self._intern(0, self.norms, n))
+                self.line_label.append(self._intern(1, self.labels, pretty))
+                self.line_unit.append(self._intern(2, self.units, unit))
+                self.line_qty.append(float(qty) if isinstance(qty, (int, float)) else math.nan)
+                self.line_indisp.append(INDISP_DEFAULT if indisp is None else int(bool(indisp)))
+            self.count[k] = len(self.line_norm) - first
+            self.start[k] = first  # en dernier : une recette rangée est complète pour les autres threads
+
+    def selection(self, names) -> list:
+        """Indices des recettes de `names` connues, dans l'ordre du corpus."""
+        positions = self.positions
+        return sorted(positions[n] for n in set(names) if n in positions)
+
+    def lines(self, k: int):
+        """(norm, libellé, quantité ou None, unité, indispensable forcé ou None) des lignes de la recette k."""
+        if self.start[k] < 0:
+            self._fill(k)
+        norms, labels, units = self.norms, self.labels, self.units
+        first = self.start[k]
+        for j in range(first, first + self.count[k]):
+            qty = self.line_qty[j]
+            indisp = self.line_indisp[j]
+            yield (norms[self.line_norm[j]], labels[self.line_label[j]], None if qty != qty else qty,
+                   units[self.line_unit[j]], None if indisp == INDISP_DEFAULT else bool(indisp))
+
+
+class Bucket:
+    """Cumul d'un ingrédient dans la liste de courses (un par ingrédient et par rayon)."""
+    __slots__ = ("label", "qty", "unit", "indispensable", "recipes", "market_available")
+
+    def __init__(self, label: str, qty, unit, indispensable: bool, market_available):
+        self.label, self.qty, self.unit = label, qty, unit
+        self.indispensable, self.market_available = indispensable, market_available
+        self.recipes = []  # indices de recettes (une recette est agrégée d'un bloc : pas de doublon)
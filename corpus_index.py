@@ -0,0 +1,284 @@
+# corpus_index.py
+# Index binaire compilé de recettes_hellofresh.txt :
+#   recettes.idx  : table des chaînes internées + table des recettes + table des ingrédients (colonnes array)
+#   details.bin   : champs non utilisés par le scoring (desc_part_*, temps, difficulté), en JSON par recette,
+#                   lus à la demande par offset via mmap.
+# Les deux fichiers portent le même identifiant de génération (et l'index la taille de details.bin) :
+# un index n'est jamais associé aux détails d'une autre compilation (lecture entre les deux
+# remplacements, compilation interrompue), il est alors ignoré comme un index périmé.
+# Usage : python corpus_index.py build-index [data_dir]
+from __future__ import annotations
+
+import argparse, json, mmap, os, struct, sys
+from array import array
+from pathlib import Path
+
+INDEX_DIRNAME = ".index"
+INDEX_FILE = "recettes.idx"
+DETAILS_FILE = "details.bin"
+SOURCE_FILE = "recettes_hellofresh.txt"
+
+MAGIC = b"MPIDX\x00\x00\x02"
+# magic, mtime_ns source, taille source, nb chaînes, nb recettes, nb ingrédients, taille blob chaînes,
+# génération, taille de details.bin
+HEADER = struct.Struct("<8sqqIIIQ16sQ")
+DETAILS_MAGIC = b"MPDET\x00\x00\x01"
+DETAILS_HEADER = struct.Struct("<8s16s")  # magic, génération (celle de l'index compilé avec)
+
+NONE, ABSENT = -1, -2  # codes de chaîne : valeur None / clé absente
+KIND_DICT, KIND_STR, KIND_JSON = 0, 1, 2  # forme de la valeur d'ingrédient
+QTY_NONE, QTY_INT, QTY_FLOAT = 0, 1, 2
+RECIPE_KEYS = ("name", "link", "category", "ingredients")  # le reste va dans details.bin
+
+
+def index_paths(data_dir: Path) -> tuple[Path, Path]:
+    d = Path(data_dir) / INDEX_DIRNAME
+    return d / INDEX_FILE, d / DETAILS_FILE
+
+
+# ---------- COMPILATION ----------
+class _Strings:
+    def __init__(self):
+        self.ids, self.values = {}, []
+
+    def add(self, s) -> int:
+        i = self.ids.get(s)
+        if i is None:
+            i = self.ids[s] = len(self.values)
+            self.values.append(s)
+        return i
+
+    def code(self, rec: dict, key: str) -> int:
+        if key not in rec:
+            return ABSENT
+        v = rec[key]
+        return NONE if v is None else self.add(v)
+
+
+def _compact(data: dict) -> bool:
+    """Vrai si la valeur {qty, unit[, indispensable]} se range exactement dans les colonnes."""
+    if "qty" not in data or not set(data) <= {"qty", "unit", "indispensable"}:
+        return False
+    qty = data["qty"]
+    if qty is not None and not (type(qty) in (int, float) and abs(qty) < 2 ** 53):
+        return False
+    if not isinstance(data.get("unit", ""), str):
+        return False
+    return "indispensable" not in data or type(data["indispensable"]) is bool
+
+def _ingredient_columns(strings: _Strings, data):
+    """(kind, sid, qty, qty_kind, indisp) d'une valeur d'ingrédient, sans perte."""
+    if isinstance(data, str):
+        return KIND_STR, strings.add(data), 0.0, QTY_NONE, NONE
+    if isinstance(data, dict) and _compact(data):
+        qty = data["qty"]
+        qty_kind = QTY_NONE if qty is None else (QTY_INT if type(qty) is int else QTY_FLOAT)
+        indisp = int(data["indispensable"]) if "indispensable" in data else NONE
+        return KIND_DICT, strings.code(data, "unit"), float(qty or 0), qty_kind, indisp
+    # forme inattendue : conservée telle quelle en JSON
+    return KIND_JSON, strings.add(json.dumps(data, ensure_ascii=False)), 0.0, QTY_NONE, NONE
+
+
+def build_index(data_dir: str | Path) -> tuple[Path, Path]:
+    """Compile data_dir/recettes_hellofresh.txt dans data_dir/.index/ ; renvoie les deux chemins."""
+    data_dir = Path(data_dir)
+    src = data_dir / SOURCE_FILE
+    st = src.stat()
+    with open(src, encoding="utf-8") as f:
+        recettes = json.load(f)
+
+    strings = _Strings()
+    r_name, r_link, r_cat = array("i"), array("i"), array("i")
+    r_ing_start, r_ing_count = array("I"), array("I")
+    r_det_off, r_det_len = array("Q"), array("I")
+    i_name, i_kind, i_sid, i_qty, i_qty_kind, i_indisp = (array("i"), array("b"), array("i"),
+                                                          array("d"), array("b"), array("b"))
+    generation = os.urandom(16)
+    details = bytearray(DETAILS_HEADER.pack(DETAILS_MAGIC, generation))  # offsets comptés depuis le début du fichier
+
+    for r in recettes:
+        r_name.append(strings.code(r, "name"))
+        r_link.append(strings.code(r, "link"))
+        r_cat.append(strings.code(r, "category"))
+        ingredients = r.get("ingredients") or {}
+        r_ing_start.append(len(i_name))
+        r_ing_count.append(len(ingredients))
+        for raw, data in ingredients.items():
+            kind, sid, qty, qty_kind, indisp = _ingredient_columns(strings, data)
+            i_name.append(strings.add(raw))
+            i_kind.append(kind)
+            i_sid.append(sid)
+            i_qty.append(qty)
+            i_qty_kind.append(qty_kind)
+            i_indisp.append(indisp)
+        extra = {k: v for k, v in r.items() if k not in RECIPE_KEYS}
+        blob = json.dumps(extra, ensure_ascii=False).encode("utf-8")
+        r_det_off.append(len(details))
+        r_det_len.append(len(blob))
+        details += blob
+
+    encoded = [s.encode("utf-8") for s in strings.values]
+    s_off = array("Q", [0])
+    for b in encoded:
+        s_off.append(s_off[-1] + len(b))
+    string_blob = b"".join(encoded)
+
+    index_path, details_path = index_paths(data_dir)
+    index_path.parent.mkdir(exist_ok=True)
+    columns = [s_off, r_name, r_link, r_cat, r_ing_start, r_ing_count, r_det_off, r_det_len,
+               i_name, i_kind, i_sid, i_qty, i_qty_kind, i_indisp]
+    header = HEADER.pack(MAGIC, st.st_mtime_ns, st.st_size, len(encoded), len(recettes), len(i_name), len(string_blob),
+                         generation, len(details))
+    _write_atomic(details_path, bytes(details))
+    _write_atomic(index_path, header + string_blob + b"".join(c.tobytes() for c in columns))
+    return index_path, details_path
+
+
+def _write_atomic(path: Path, payload: bytes):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+# ---------- LECTURE ----------
+class DetailsStore:
+    """Accès paresseux (mmap) aux champs descriptifs des recettes, par indice de recette."""
+
+    def __init__(self, mm: mmap.mmap, offsets: array, lengths: array, path: Path, generation: bytes):
+        self._mm = mm  # details.bin vérifié à l'ouverture : reste valide même s'il est remplacé ensuite
+        self._offsets, self._lengths = offsets, lengths
+        self._path, self._generation = path, generation
+
+    def __reduce__(self):
+        # vers un autre processus : details.bin rouvert là-bas, s'il vient toujours de la même compilation
+        return _reopen_details, (self._path, self._generation, len(self._mm), self._offsets, self._lengths)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, i: int) -> dict:
+        n = self._lengths[i]
+        if n == 0:
+            return {}
+        off = self._offsets[i]
+        return json.loads(self._mm[off:off + n].decode("utf-8"))
+
+
+def _take(buf: memoryview, pos: int, typecode: str, n: int) -> tuple[array, int]:
+    a = array(typecode)
+    size = a.itemsize * n
+    a.frombytes(buf[pos:pos + size])
+    return a, pos + size
+
+
+def load_recettes(data_dir: str | Path, source_signature=None):
+    """(recettes, DetailsStore) depuis l'index compilé, ou None s'il est absent ou périmé.
+
+    L'index est utilisé seulement s'il a été compilé depuis la version actuelle du JSON
+    (même mtime et même taille) et si details.bin vient de la même compilation : sinon l'appelant
+    relit le JSON.
+    """
+    index_path, details_path = index_paths(data_dir)
+    try:
+        with open(index_path, "rb") as f:
+            payload = f.read()
+    except FileNotFoundError:
+        return None
+    if len(payload) < HEADER.size:
+        return None
+    magic, mtime_ns, size, n_str, n_rec, n_ing, str_len, generation, details_len = HEADER.unpack_from(payload)
+    if magic != MAGIC or (source_signature is not None and (mtime_ns, size) != tuple(source_signature)):
+        return None
+    details = _open_details(details_path, generation, details_len)
+    if details is None:
+        return None
+
+    buf = memoryview(payload)
+    pos = HEADER.size
+    string_blob = payload[pos:pos + str_len]
+    pos += str_len
+    s_off, pos = _take(buf, pos, "Q", n_str + 1)
+    strings = [string_blob[s_off[i]:s_off[i + 1]].decode("utf-8") for i in range(n_str)]
+    cols = {}
+    for name, tc, n in (("r_name", "i", n_rec), ("r_link", "i", n_rec), ("r_cat", "i", n_rec),
+                        ("r_ing_start", "I", n_rec), ("r_ing_count", "I", n_rec),
+                        ("r_det_off", "Q", n_rec), ("r_det_len", "I", n_rec),
+                        ("i_name", "i", n_ing), ("i_kind", "b", n_ing), ("i_sid", "i", n_ing),
+                        ("i_qty", "d", n_ing), ("i_qty_kind", "b", n_ing), ("i_indisp", "b", n_ing)):
+        cols[name], pos = _take(buf, pos, tc, n)
+
+    i_name, i_kind, i_sid = cols["i_name"], cols["i_kind"], cols["i_sid"]
+    i_qty, i_qty_kind, i_indisp = cols["i_qty"], cols["i_qty_kind"], cols["i_indisp"]
+
+    def value(j):
+        kind = i_kind[j]
+        if kind == KIND_STR:
+            return strings[i_sid[j]]
+        if kind == KIND_JSON:
+            return json.loads(strings[i_sid[j]])
+        qk = i_qty_kind[j]
+        d = {"qty": None if qk == QTY_NONE else (int(i_qty[j]) if qk == QTY_INT else i_qty[j])}
+        if i_sid[j] != ABSENT:
+            d["unit"] = strings[i_sid[j]]
+        if i_indisp[j] != NONE:
+            d["indispensable"] = bool(i_indisp[j])
+        return d
+
+    recettes = []
+    for k in range(n_rec):
+        r = {}
+        for key, col in (("name", cols["r_name"]), ("link", cols["r_link"]), ("category", cols["r_cat"])):
+            sid = col[k]
+            if sid != ABSENT:
+                r[key] = None if sid == NONE else strings[sid]
+        start = cols["r_ing_start"][k]
+        r["ingredients"] = {strings[i_name[j]]: value(j) for j in range(start, start + cols["r_ing_count"][k])}
+        recettes.append(r)
+    return recettes, DetailsStore(details, cols["r_det_off"], cols["r_det_len"], details_path, generation)
+
+def _open_details(path: Path, generation: bytes, length: int):
+    """details.bin projeté en mémoire s'il vient de la compilation `generation` (et fait `length` octets)."""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size != length:
+                return None
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+    if DETAILS_HEADER.unpack_from(mm) != (DETAILS_MAGIC, generation):
+        mm.close()
+        return None
+    return mm
+
+def _reopen_details(path: Path, generation: bytes, length: int, offsets: array, lengths: array) -> DetailsStore:
+    mm = _open_details(path, generation, length)
+    if mm is None:
+        raise ValueError(f"{path} recompilé entre-temps : snapshot à recharger")
+    return DetailsStore(mm, offsets, lengths, path, generation)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Index binaire du corpus de recettes.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build-index", help="compile data_dir/recettes_hellofresh.txt dans data_dir/.index/")
+    b.add_argument("data_dir", nargs="?", default="data")
+    b.add_argument("--no-validate", action="store_true", help="compile sans contrôler data/ (validate.py)")
+    args = p.parse_args(argv)
+    if args.cmd == "build-index":
+        if not args.no_validate:
+            import validate
+            report = validate.validate(args.data_dir)
+            if not report["ok"]:
+                print(validate.summary(report))
+                print("→ Index non compilé : corriger les erreurs ci-dessus (ou --no-validate)")
+                return 1
+            print(f"→ Contrôle : {report['warnings']} avertissement(s) (python validate.py pour le détail)")
+        index_path, details_path = build_index(args.data_dir)
+        print(f"→ Index : {index_path} ({index_path.stat().st_size} octets)")
+        print(f"→ Détails : {details_path} ({details_path.stat().st_size} octets)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
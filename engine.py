@@ -2,9 +2,16 @@
 # Version robuste: logique issue du notebook, mais organisée en fonctions (sans exécution à l'import).
 from __future__ import annotations
 
-import json, math, re, unicodedata
+import json, math, os, threading, unicodedata
 from pathlib import Path
 from collections import defaultdict
+from functools import lru_cache
+
+import corpus_index
+import profiling
+from compact import Bucket, RecipeTable
+from ingredient_parser import canonical_unit
+from quantities import Conversions, NO_CONVERSIONS, Quantity, UnitMismatch, convert
 
 # ---------- PARAMÈTRES ----------
 MATCH_MIN = 100  # filtre des recettes selon score marché (%)
@@ -15,6 +22,7 @@ CATEGORY_ORDER = [
     "porc","canard","saumon","poisson blanc","crevettes","tarte","soupe",
 ]
 FLOAT_EPS = 1e-9  # tolérance flottants
+REPLACEMENT_DEPTH = 1  # sauts suivis dans le graphe des remplacements (1 = A→B ; 2 = aussi A→B→C)
 
 
 # ---------- NORMALISATION / ALIASES ----------
@@ -40,6 +48,9 @@ ALIASES = {
     "Gousse d'ail": "Ail"
 }
 
+NORMALIZE_CACHE_SIZE = 65536  # noms distincts gardés en cache par normalize() et canon()
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def normalize(s: str) -> str:
     if not s: return ""
     s = unicodedata.normalize("NFD", s.lower())
@@ -47,116 +58,588 @@ def normalize(s: str) -> str:
     words = s.split()
     singularized = []
     for w in words:
-        if len(w) > 3 and re.search(r"[sx]$", w):
-            w = re.sub(r"[sx]$", "", w)
+        if len(w) > 3 and w.endswith(("s", "x")):
+            w = w[:-1]
         singularized.append(w)
     return " ".join(singularized)
 
 ALIASES_NORM = {normalize(k): v for k, v in ALIASES.items()}
-def canon(name: str) -> str:
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _canon(name: str) -> str:
     return ALIASES_NORM.get(normalize(name), name)
 
+def canon(name: str, aliases: dict | None = None) -> str:
+    """Nom du catalogue pour `name` : alias automatiques du dossier (`aliases`, normalisé -> nom,
+    c.-à-d. ctx.aliases), puis ALIASES ; `name` lui-même sinon."""
+    if aliases:
+        hit = aliases.get(normalize(name))
+        if hit is not None:
+            return hit
+    return _canon(name)
+
+AUTO_ALIASES_FILE = "aliases_auto.json"  # alias appliqués par fuzzy_resolver (dans data/, propres à ce dossier)
+
+def clear_normalize_caches():
+    """Vide les caches de normalize()/canon() (à appeler après une modification de ALIASES)."""
+    normalize.cache_clear()
+    _canon.cache_clear()
+
+def normalize_stats() -> dict:
+    """Compteurs des caches de normalisation et taille de la table d'interning."""
+    stats = {}
+    for name, fn in (("normalize", normalize), ("canon", _canon)):
+        info = fn.cache_info()
+        calls = info.hits + info.misses
+        stats[name] = {
+            "hits": info.hits, "misses": info.misses, "size": info.currsize,
+            "hit_rate": round(info.hits / calls, 4) if calls else 0.0,
+        }
+    stats["interned"] = len(ING_NAMES)
+    return stats
+
+
+# ---------- INTERNING DES INGRÉDIENTS ----------
+# Table globale (ajout seulement) : nom normalisé <-> petit entier, partagée par tous les snapshots.
+ING_IDS: dict[str, int] = {}
+ING_NAMES: list[str] = []
+_INTERN_LOCK = threading.Lock()
+
+def intern_ingredient(norm: str) -> int:
+    """Id entier stable du nom normalisé `norm` (créé au premier appel)."""
+    i = ING_IDS.get(norm)
+    if i is None:
+        with _INTERN_LOCK:
+            i = ING_IDS.get(norm)
+            if i is None:
+                i = len(ING_NAMES)
+                ING_NAMES.append(norm)
+                ING_IDS[norm] = i
+    return i
+
+def recette_keys(r, aliases: dict | None = None) -> tuple:
+    """(nom brut, nom canon, nom normalisé, id) de chaque ingrédient de `r`, dans l'ordre de la recette."""
+    out = []
+    for raw in r["ingredients"]:
+        pretty = canon(raw, aliases)
+        n = normalize(pretty)
+        out.append((raw, pretty, n, intern_ingredient(n)))
+    return tuple(out)
+
+
+# ---------- SNAPSHOT DES DONNÉES ----------
+# Fichiers sources du dossier data/ ; chacun est rechargé seul quand sa signature (mtime, taille) change.
+DATA_FILES = {
+    "recettes": "recettes_hellofresh.txt",
+    "catalogue": "ingredients_infos.txt",
+    "dispos": "ingredients_disponibles.txt",
+    "provisions": "provisions.txt",
+}
+PROVISIONS_DB_SUFFIXES = (".db", ".sqlite", ".sqlite3")  # placard en base SQLite (provisions_db.py)
+
+def _file_signature(path: Path):
+    """(mtime_ns, taille) du fichier, ou None s'il n'existe pas."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _load_json(path: Path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _dump_json(obj, path: Path):
+    """Écrit `obj` en JSON de façon atomique (fichier temporaire + remplacement)."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def _build_recettes(path: Path, aliases: dict):
+    # index compilé (corpus_index.py build-index) s'il a été construit depuis cette version du JSON
+    loaded = corpus_index.load_recettes(path.parent, _file_signature(path))
+    if loaded is not None:
+        recettes, details = loaded
+    else:
+        recettes, details = _load_json(path), None
+    # clés d'ingrédients normalisées une fois pour toutes (scoring et courses les réutilisent)
+    return {
+        "recettes": recettes,
+        "recettes_keys": [recette_keys(r, aliases) for r in recettes],
+        "recettes_details": details,  # None : les détails sont dans les dicts de `recettes`
+    }
 
-# --- Globals initialisés par init(data_dir) ---
-DATA_DIR: Path | None = None
-recettes = []
-catalogue = []
-raw_dispos = set()
-provisions_path: Path | None = None
-provisions = []
-
-CATALOGUE_NORM_TO_PRETTY = {}
-rayons_map = {}
-indispensables_map = {}
-poids_map = {}
-REPLACEMENTS_NORM = {}
-dispo_norm_to_pretty = {}
-dispos_norm = set()
-provisions_index = {}
-catalogue_norm_index = {}
-market_indispensables_norm = set()
-
-def init(data_dir: str | Path):
-    """Charge les fichiers data/ et construit les index, exactement comme le notebook."""
-    global DATA_DIR, recettes, catalogue, raw_dispos, provisions_path, provisions
-    global CATALOGUE_NORM_TO_PRETTY, rayons_map, indispensables_map, poids_map, REPLACEMENTS_NORM
-    global dispo_norm_to_pretty, dispos_norm, provisions_index, catalogue_norm_index, market_indispensables_norm
-
-    DATA_DIR = Path(data_dir)
-    recettes = json.load(open(str(DATA_DIR / "recettes_hellofresh.txt"), encoding="utf-8"))
-    catalogue = json.load(open(str(DATA_DIR / "ingredients_infos.txt"), encoding="utf-8"))
-    raw_dispos = set(json.load(open(str(DATA_DIR / "ingredients_disponibles.txt"), encoding="utf-8")))
-
-    provisions_path = DATA_DIR / "provisions.txt"
-    provisions = json.load(open(provisions_path, encoding="utf-8")) if provisions_path.exists() else []
-
-    # ---------- INDEX ----------
+def _build_catalogue(path: Path, aliases: dict):
+    catalogue = _load_json(path)
     # catalogue
-    CATALOGUE_NORM_TO_PRETTY = {normalize(canon(i["name"])): canon(i["name"]) for i in catalogue}
-    rayons_map = {normalize(canon(i["name"])): i.get("rayon", "").lower() for i in catalogue}
-    indispensables_map = {normalize(canon(i["name"])): bool(i.get("indispensable")) for i in catalogue}
-    poids_map = {normalize(canon(i["name"])): i.get("poids") for i in catalogue}
-    
-    # remplacements (tous rayons)
-    REPLACEMENTS_NORM = {}
+    norm_to_pretty, rayons, indisp, poids, norm_index, conversions = {}, {}, {}, {}, {}, {}
+    replacements, replacements_ordered, market_indisp = {}, {}, set()
     for item in catalogue:
-        base = normalize(canon(item["name"]))
-        repls = {normalize(canon(r)) for r in item.get("remplacement", [])}
-        REPLACEMENTS_NORM[base] = repls | {base}
-    
+        pretty = canon(item["name"], aliases)
+        base = normalize(pretty)
+        norm_to_pretty[base] = pretty
+        rayons[base] = item.get("rayon", "").lower()
+        indisp[base] = bool(item.get("indispensable"))
+        poids[base] = item.get("poids")
+        if item.get("poids") or item.get("densite"):
+            conversions[base] = Conversions(item.get("poids"), item.get("densite"))
+        norm_index[base] = item
+        # remplacements (tous rayons)
+        ordered = list(dict.fromkeys(normalize(canon(r, aliases)) for r in item.get("remplacement", [])))
+        replacements[base] = set(ordered) | {base}
+        replacements_ordered[base] = [r for r in ordered if r != base]  # ordre du catalogue = priorité
+        # indispensables marché
+        if item.get("indispensable") and item.get("rayon", "").lower() == "marché":
+            market_indisp.add(base)
+    return {
+        "catalogue": catalogue,
+        "catalogue_norm_to_pretty": norm_to_pretty,
+        "rayons_map": rayons,
+        "indispensables_map": indisp,
+        "poids_map": poids,
+        "conversions_map": conversions,  # base -> Conversions (poids d'une pièce, densité)
+        "replacements_norm": replacements,
+        "replacements_ordered": replacements_ordered,
+        "catalogue_norm_index": norm_index,
+        "market_indispensables_norm": market_indisp,
+    }
+
+def _build_dispos(path: Path, aliases: dict):
+    return dispos_part(_load_json(path), aliases)
+
+def dispos_part(raw_dispos, aliases: dict) -> dict:
+    """Partie « dispos » d'un snapshot à partir de la liste brute des ingrédients disponibles."""
+    raw_dispos = set(raw_dispos)
     # ingrédients_disponibles → pretty & norm
     dispo_norm_to_pretty = {}
     for d in raw_dispos:
-        pretty = canon(d)
+        pretty = canon(d, aliases)
         dispo_norm_to_pretty.setdefault(normalize(pretty), pretty)
-    dispos_norm = set(dispo_norm_to_pretty.keys())
-    
-    # provisions
-    provisions_index = {normalize(canon(p["name"])): p for p in provisions}
-    
-    # indispensables marché
-    catalogue_norm_index = {normalize(canon(i["name"])): i for i in catalogue}
-    market_indispensables_norm = {
-        normalize(canon(i["name"]))
-        for i in catalogue
-        if i.get("indispensable") and i.get("rayon", "").lower() == "marché"
+    return {
+        "raw_dispos": raw_dispos,
+        "dispo_norm_to_pretty": dispo_norm_to_pretty,
+        "dispos_norm": frozenset(dispo_norm_to_pretty),
     }
 
+def _build_provisions(path: Path, aliases: dict):
+    if _is_provisions_db(path):
+        import provisions_db
+        return provisions_part(provisions_db.ProvisionsDB(path).provisions(), path, aliases)
+    return provisions_part(_load_json(path) if path.exists() else [], path, aliases)
+
+def _is_provisions_db(path) -> bool:
+    """Placard en base SQLite (provisions_db.py) plutôt qu'en fichier JSON, d'après l'extension."""
+    return path is not None and Path(path).suffix.lower() in PROVISIONS_DB_SUFFIXES
+
+def provisions_part(provisions: list, path: Path, aliases: dict) -> dict:
+    """Partie « provisions » d'un snapshot à partir des entrées du placard (fichier `path`)."""
+    return {
+        "provisions_path": path,
+        "courses_placard_path": path.with_name("courses_placard.txt"),
+        "provisions": provisions,
+        "provisions_index": {normalize(canon(p["name"], aliases)): p for p in provisions},
+    }
+
+def _build_aliases(path: Path) -> dict:
+    """Partie « aliases » : alias automatiques du dossier (aliases_auto.json), clés normalisées."""
+    raw = _load_json(path) if path.exists() else {}
+    return {"aliases": {normalize(k): v for k, v in raw.items()}}
+
+def data_signatures(data_dir: Path) -> dict:
+    """Signatures des fichiers de data/ qui font un snapshot (alias automatiques compris)."""
+    signatures = {k: _file_signature(data_dir / f) for k, f in DATA_FILES.items()}
+    signatures["aliases"] = _file_signature(data_dir / AUTO_ALIASES_FILE)
+    return signatures
+
+_PART_BUILDERS = {
+    "recettes": _build_recettes,
+    "catalogue": _build_catalogue,
+    "dispos": _build_dispos,
+    "provisions": _build_provisions,
+}
+
+
+class Snapshot:
+    """Données d'un dossier data/ + tous les index dérivés, à traiter en lecture seule.
+
+    Un snapshot n'est jamais modifié après construction : un changement de fichier
+    produit un nouveau snapshot qui réutilise les parties inchangées du précédent.
+    """
+
+    def __init__(self, data_dir: Path, signatures: dict, parts: dict, derived: dict | None = None):
+        self.data_dir = data_dir
+        self.signatures = signatures
+        self.parts = parts
+        self._derived = {} if derived is None else derived  # partagé entre snapshots d'un même Engine
+        for part in parts.values():
+            for key, value in part.items():
+                setattr(self, key, value)
+
+    def __reduce__(self):
+        # vers un processus démarré sans fork : les parties seulement, les index dérivés y sont recalculés
+        return Snapshot, (self.data_dir, self.signatures, self.parts)
+
+    @property
+    def version(self) -> tuple:
+        """Identifiant stable des fichiers chargés (change dès qu'un fichier change)."""
+        return tuple(self.signatures[k] for k in (*DATA_FILES, "aliases"))
+
+    def derive(self, isolated: bool = False, **overrides) -> "Snapshot":
+        """Nouveau snapshot où certaines parties sont remplacées : overrides = {clé: (part, signature)}.
+
+        Les autres parties (et donc leurs index) sont partagées, pas copiées.
+        `isolated=True` : les index déjà calculés sont repris, mais ceux calculés ensuite restent
+        propres au nouveau snapshot (ex. un foyer d'un lot n'évince pas ceux des autres).
+        """
+        parts, signatures = dict(self.parts), dict(self.signatures)
+        for key, (part, signature) in overrides.items():
+            parts[key] = part
+            signatures[key] = signature
+        return Snapshot(self.data_dir, signatures, parts, dict(self._derived) if isolated else self._derived)
+
+    def cached(self, name: str, deps: tuple, build, update=None):
+        """Index dérivé `name` = build(self), recalculé seulement si une des parties `deps` a changé.
+
+        `update(self, ancien)` : si fourni, met à jour une valeur périmée au lieu de tout reconstruire.
+        """
+        parts = tuple(self.parts[d] for d in deps)
+        hit = self._derived.get(name)
+        if hit is not None and all(a is b for a, b in zip(hit[0], parts)):
+            return hit[1]
+        with profiling.stage(f"index:{name}"):
+            value = build(self) if update is None or hit is None else update(self, hit[1])
+        self._derived[name] = (parts, value)
+        return value
+
+    def peek(self, name: str, deps: tuple):
+        """Index dérivé `name` s'il est déjà calculé pour les parties `deps` de ce snapshot, sinon None."""
+        hit = self._derived.get(name)
+        if hit is not None and all(a is self.parts[d] for a, d in zip(hit[0], deps)):
+            return hit[1]
+        return None
+
+    def seed(self, name: str, deps: tuple, value):
+        """Enregistre un index dérivé déjà calculé (ex. mis à jour par delta) pour les parties `deps`."""
+        self._derived[name] = (tuple(self.parts[d] for d in deps), value)
+
+
+class Engine:
+    """Cache d'un snapshot par dossier data/, rechargé fichier par fichier à la demande."""
+
+    def __init__(self, data_dir: str | Path):
+        self.data_dir = Path(data_dir)
+        self._snapshot: Snapshot | None = None
+        self._households: dict[Path, Household] = {}
+        self._derived: dict = {}
+        self._lock = threading.RLock()
+
+    def snapshot(self) -> Snapshot:
+        """Snapshot à jour ; seuls les fichiers modifiés depuis le dernier appel sont relus
+        (tous si les alias automatiques ont changé)."""
+        signatures = data_signatures(self.data_dir)
+        snap = self._snapshot
+        if snap is not None and snap.signatures == signatures:
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None and snap.signatures == signatures:
+                return snap
+            parts = {}
+            same_aliases = snap is not None and snap.signatures["aliases"] == signatures["aliases"]
+            if same_aliases:
+                parts["aliases"] = snap.parts["aliases"]
+            else:
+                try:
+                    parts["aliases"] = _build_aliases(self.data_dir / AUTO_ALIASES_FILE)
+                except ValueError:
+                    if snap is None:
+                        raise
+                    parts["aliases"], signatures["aliases"] = snap.parts["aliases"], snap.signatures["aliases"]
+                    same_aliases = True
+            aliases = parts["aliases"]["aliases"]
+            for key, filename in DATA_FILES.items():
+                if same_aliases and snap.signatures[key] == signatures[key]:
+                    parts[key] = snap.parts[key]
+                    continue
+                try:
+                    with profiling.stage(f"init:{key}"):
+                        parts[key] = _PART_BUILDERS[key](self.data_dir / filename, aliases)
+                except ValueError:
+                    # fichier en cours d'écriture : on garde l'ancienne version, relue au prochain appel
+                    if snap is None:
+                        raise
+                    parts[key] = snap.parts[key]
+                    signatures[key] = snap.signatures[key]
+            snap = Snapshot(self.data_dir, signatures, parts, self._derived)
+            self._snapshot = snap
+            return snap
+
+    def reload(self, *keys: str) -> Snapshot:
+        """Relit sans condition les fichiers `keys` (ex. après une écriture par ce processus)."""
+        with self._lock:
+            snap = self._snapshot
+            if snap is None:
+                return self.snapshot()
+            overrides = {
+                key: (_PART_BUILDERS[key](self.data_dir / DATA_FILES[key], snap.aliases),
+                      _file_signature(self.data_dir / DATA_FILES[key]))
+                for key in keys
+            }
+            snap = self._snapshot = snap.derive(**overrides)
+            return snap
+
+    def replace_part(self, key: str, part: dict, signature) -> Snapshot:
+        """Installe `part` pour le fichier `key` (déjà relu, ou le même objet si son contenu n'a pas
+        changé) sans relire les autres fichiers ; renvoie le nouveau snapshot.
+
+        Les tables de résolution déjà calculées sont mises à jour par delta (voir part_delta) ;
+        les autres index qui dépendent de `key` sont reconstruits à la demande, ceux qui n'en
+        dépendent pas sont repris tels quels.
+        """
+        with self._lock:
+            prev = self._snapshot if self._snapshot is not None else self.snapshot()
+            snap = prev.derive(**{key: (part, signature)})
+            if part is not prev.parts[key]:
+                for kind, touched in part_delta(prev, snap, key).items():
+                    deps = _RESOLUTIONS[kind][0]
+                    if prev.peek(f"resolution_{kind}_{REPLACEMENT_DEPTH}", deps) is not None:
+                        update_resolution(snap, prev, kind, touched)
+            self._snapshot = snap
+            return snap
+
+    def invalidate(self):
+        """Oublie le snapshot courant (prochain appel = rechargement complet)."""
+        with self._lock:
+            self._snapshot = None
+            self._households = {}
+
+    def household(self, provisions_path: str | Path | None = None) -> "Household":
+        """Foyer dont le placard est `provisions_path` (par défaut data/provisions.txt)."""
+        default = self.data_dir / DATA_FILES["provisions"]
+        path = Path(provisions_path) if provisions_path is not None else default
+        key = path.resolve()
+        with self._lock:
+            hh = self._households.get(key)
+            if hh is None:
+                hh = self._households[key] = Household(self, None if key == default.resolve() else path)
+            return hh
+
+
+class Household:
+    """Foyer : partage les index d'un Engine mais possède son propre placard.
+
+    Les mises à jour du placard d'un foyer sont sérialisées par son verrou, et
+    n'affectent ni le snapshot partagé ni les autres foyers. Un placard `.db` / `.sqlite`
+    est une base provisions_db (transactions, sûre entre processus).
+    """
+
+    def __init__(self, engine: Engine, provisions_path: Path | None = None):
+        self.engine = engine
+        self.provisions_path = provisions_path  # None = placard du dossier data/
+        self.lock = threading.RLock()
+        self._part = None
+        self._signature = None
+        self._aliases = None
+        self.db = None
+        if _is_provisions_db(provisions_path):
+            import provisions_db
+            self.db = provisions_db.ProvisionsDB(provisions_path)
+
+    def _provisions_signature(self):
+        if self.db is not None:
+            return ("sqlite", self.db.version())
+        return _file_signature(self.provisions_path)
+
+    def context(self) -> Snapshot:
+        """Snapshot partagé, avec le placard de ce foyer à la place de celui de data/."""
+        snap = self.engine.snapshot()
+        if self.provisions_path is None:
+            return snap
+        signature = self._provisions_signature()
+        with self.lock:
+            # relu aussi quand les alias du dossier changent (clés de provisions_index)
+            if self._part is None or signature != self._signature or self._aliases is not snap.aliases:
+                self._part = _build_provisions(self.provisions_path, snap.aliases)
+                self._signature = signature
+                self._aliases = snap.aliases
+            part = self._part
+        return snap.derive(provisions=(part, signature))
+
+    def reload(self) -> Snapshot:
+        """Relit le placard de ce foyer sans condition."""
+        if self.provisions_path is None:
+            self.engine.reload("provisions")
+        else:
+            with self.lock:
+                self._part = None
+        return self.context()
+
+
+def context(source) -> Snapshot:
+    """Contexte de calcul pour `source` : Snapshot, Household, Engine ou chemin du dossier data/."""
+    if isinstance(source, Snapshot):
+        return source
+    if isinstance(source, Household):
+        return source.context()
+    if isinstance(source, Engine):
+        return source.snapshot()
+    return get_engine(source).snapshot()
+
+def _household(source) -> Household:
+    if isinstance(source, Household):
+        return source
+    if isinstance(source, Snapshot):
+        return get_engine(source.data_dir).household(source.provisions_path)
+    if isinstance(source, Engine):
+        return source.household()
+    return get_engine(source).household()
+
+
+_ENGINES: dict[Path, Engine] = {}
+_ENGINES_LOCK = threading.Lock()
+
+def get_engine(data_dir: str | Path) -> Engine:
+    """Engine partagé pour ce dossier data/ (un seul par chemin résolu)."""
+    key = Path(data_dir).resolve()
+    with _ENGINES_LOCK:
+        eng = _ENGINES.get(key)
+        if eng is None:
+            eng = _ENGINES[key] = Engine(data_dir)
+        return eng
+
+
+def init(data_dir: str | Path) -> Snapshot:
+    """Charge (ou reprend du cache) les fichiers data/ et renvoie le snapshot de leurs index."""
+    return get_engine(data_dir).snapshot()
+
+
 # ---------- HELPERS ----------
-def pretty_from_norm(n: str) -> str:
-    return CATALOGUE_NORM_TO_PRETTY.get(n, dispo_norm_to_pretty.get(n, n))
-
-def find_available_market(norm_name: str):
-    for cand in [norm_name] + [c for c in REPLACEMENTS_NORM.get(norm_name, {norm_name}) if c != norm_name]:
-        if cand in dispos_norm:
-            return cand
-    return None
-
-def find_available_pantry(norm_name: str):
-    cand_list = [norm_name] + [c for c in REPLACEMENTS_NORM.get(norm_name, {norm_name}) if c != norm_name]
-    for cand in cand_list:
-        if cand in provisions_index:
-            return cand
-    return None
+def pretty_from_norm(ctx: Snapshot, n: str) -> str:
+    return ctx.catalogue_norm_to_pretty.get(n, ctx.dispo_norm_to_pretty.get(n, n))
+
+# ---------- REMPLACEMENTS : FERMETURE + TABLES DE RÉSOLUTION ----------
+def _build_replacement_closure(ctx: Snapshot) -> dict:
+    """norm → candidats par priorité : lui-même, puis les remplaçants par profondeur croissante
+    (à profondeur égale, dans l'ordre de la liste `remplacement` du catalogue)."""
+    closure = {}
+    for base in ctx.replacements_ordered:
+        order, frontier = {base: None}, [base]
+        for _ in range(REPLACEMENT_DEPTH):
+            nxt = []
+            for n in frontier:
+                for r in ctx.replacements_ordered.get(n, ()):
+                    if r not in order:
+                        order[r] = None
+                        nxt.append(r)
+            frontier = nxt
+        closure[base] = tuple(order)
+    return closure
+
+def replacement_closure(ctx: Snapshot) -> dict:
+    return ctx.cached(f"replacement_closure_{REPLACEMENT_DEPTH}", ("catalogue",), _build_replacement_closure)
+
+def replacement_candidates(ctx: Snapshot, norm_name: str) -> tuple:
+    """Candidats de `norm_name` par priorité (lui-même d'abord)."""
+    return replacement_closure(ctx).get(norm_name, (norm_name,))
+
+def _build_replacement_users(ctx: Snapshot) -> dict:
+    users = defaultdict(set)
+    for base, cands in replacement_closure(ctx).items():
+        for c in cands:
+            users[c].add(base)
+    return dict(users)
+
+def replacement_users(ctx: Snapshot) -> dict:
+    """Inverse de la fermeture : candidat → ingrédients du catalogue qui peuvent l'utiliser."""
+    return ctx.cached(f"replacement_users_{REPLACEMENT_DEPTH}", ("catalogue",), _build_replacement_users)
+
+def _resolve(ctx: Snapshot, bases, available) -> dict:
+    closure = replacement_closure(ctx)
+    return {b: next((c for c in closure[b] if c in available), None) for b in bases}
+
+# table ingrédient du catalogue → meilleur candidat disponible (ou None), par type de disponibilité
+_RESOLUTIONS = {
+    "market": (("catalogue", "dispos"), lambda ctx: ctx.dispos_norm),
+    "pantry": (("catalogue", "provisions"), lambda ctx: ctx.provisions_index),
+}
+
+def resolution_table(ctx: Snapshot, kind: str) -> dict:
+    deps, available = _RESOLUTIONS[kind]
+    name = f"resolution_{kind}_{REPLACEMENT_DEPTH}"
+    return ctx.cached(name, deps, lambda c: _resolve(c, replacement_closure(c), available(c)))
+
+def update_resolution(ctx: Snapshot, previous: Snapshot, kind: str, touched) -> dict:
+    """Table de `ctx` déduite de celle de `previous` en ne recalculant que les ingrédients
+    dont un candidat est dans `touched` (noms normalisés ajoutés/retirés)."""
+    deps, available = _RESOLUTIONS[kind]
+    current = ctx.peek(f"resolution_{kind}_{REPLACEMENT_DEPTH}", deps)
+    if current is not None:  # déjà à jour (ex. mise à jour faite par Engine.replace_part)
+        return current
+    users = replacement_users(ctx)
+    table = dict(resolution_table(previous, kind))
+    table.update(_resolve(ctx, {b for n in touched for b in users.get(n, ())}, available(ctx)))
+    ctx.seed(f"resolution_{kind}_{REPLACEMENT_DEPTH}", deps, table)
+    return table
+
+def part_delta(previous: Snapshot, ctx: Snapshot, key: str) -> dict:
+    """Noms normalisés ajoutés ou retirés de la partie `key` entre deux snapshots, par table de
+    résolution concernée ({'market': ...} ou {'pantry': ...}) ; {} pour recettes et catalogue.
+    Une quantité du placard qui change ne touche aucune table (seule la présence compte)."""
+    if key == "dispos":
+        return {"market": set(previous.dispos_norm ^ ctx.dispos_norm)}
+    if key == "provisions":
+        return {"pantry": set(previous.provisions_index.keys() ^ ctx.provisions_index.keys())}
+    return {}
+
+def find_available_market(ctx: Snapshot, norm_name: str):
+    table = resolution_table(ctx, "market")
+    if norm_name in table:
+        return table[norm_name]
+    return norm_name if norm_name in ctx.dispos_norm else None
+
+def find_available_pantry(ctx: Snapshot, norm_name: str):
+    table = resolution_table(ctx, "pantry")
+    if norm_name in table:
+        return table[norm_name]
+    return norm_name if norm_name in ctx.provisions_index else None
+
+def _recette_positions(ctx: Snapshot) -> dict:
+    positions = {}
+    for i, r in enumerate(ctx.recettes):
+        positions.setdefault(r["name"], i)
+    return positions
+
+def recette_details(ctx: Snapshot, name: str) -> dict:
+    """Champs descriptifs (desc_part_1..6, temps, difficulté…) de la recette `name`, lus à la demande."""
+    i = ctx.cached("recette_positions", ("recettes",), _recette_positions).get(name)
+    if i is None:
+        return {}
+    if ctx.recettes_details is not None:
+        return ctx.recettes_details[i]
+    return {k: v for k, v in ctx.recettes[i].items() if k not in corpus_index.RECIPE_KEYS}
 
 # ---------- SCORING RECETTES ----------
-def score_recette(r):
-    rec_ing_pretty = {canon(n) for n in r["ingredients"].keys()}
-    rec_ing_norm = {normalize(n) for n in rec_ing_pretty}
-    inconnus = sorted(n for n in rec_ing_pretty if normalize(n) not in catalogue_norm_index)
+def score_recette(ctx: Snapshot, r, keys: tuple | None = None):
+    """Scores marché/placard de `r` ; `keys` = recette_keys(r) déjà calculé (ctx.recettes_keys)."""
+    if keys is None:
+        keys = recette_keys(r, ctx.aliases)
+    pretty_to_norm = {pretty: n for _, pretty, n, _ in keys}
+    rec_ing_norm = set(pretty_to_norm.values())
+    inconnus = sorted(p for p, n in pretty_to_norm.items() if n not in ctx.catalogue_norm_index)
 
     # marché
-    besoins_m = market_indispensables_norm & rec_ing_norm
+    besoins_m = ctx.market_indispensables_norm & rec_ing_norm
     ok_m, manque_m = [], []
     if besoins_m:
         for n_norm in besoins_m:
-            base_pretty = pretty_from_norm(n_norm)
-            cand = find_available_market(n_norm)
+            base_pretty = pretty_from_norm(ctx, n_norm)
+            cand = find_available_market(ctx, n_norm)
             if cand is None:
                 manque_m.append(base_pretty)
             else:
                 if cand != n_norm:
-                    ok_m.append(f"{base_pretty} (remplacé par : {pretty_from_norm(cand)})")
+                    ok_m.append(f"{base_pretty} (remplacé par : {pretty_from_norm(ctx, cand)})")
                 else:
                     ok_m.append(base_pretty)
         score_m = 100 * len(ok_m) / len(besoins_m)
@@ -164,17 +647,17 @@ def score_recette(r):
         score_m = 100.0
 
     # placard (rayons choisis)
-    besoins_p = {n for n in rec_ing_norm if rayons_map.get(n) in PANTRY_RAYONS}
+    besoins_p = {n for n in rec_ing_norm if ctx.rayons_map.get(n) in PANTRY_RAYONS}
     ok_p, manque_p = [], []
     if besoins_p:
         for n_norm in besoins_p:
-            base_pretty = pretty_from_norm(n_norm)
-            cand = find_available_pantry(n_norm)
+            base_pretty = pretty_from_norm(ctx, n_norm)
+            cand = find_available_pantry(ctx, n_norm)
             if cand is None:
                 manque_p.append(base_pretty)
             else:
                 if cand != n_norm:
-                    ok_p.append(f"{base_pretty} (remplacé par : {pretty_from_norm(cand)})")
+                    ok_p.append(f"{base_pretty} (remplacé par : {pretty_from_norm(ctx, cand)})")
                 else:
                     ok_p.append(base_pretty)
         score_p = 100 * len(ok_p) / len(besoins_p)
@@ -194,34 +677,13 @@ def score_recette(r):
         "inconnus": inconnus,
     }
 
-def compute_matching(data_dir: str | Path, match_min: float = None, match_min_pantry: float = None, write_ingredients_a_completer: bool = False):
-    """Calcule les scores et renvoie les mêmes infos que l'affichage du notebook."""
-    init(data_dir)
-    if match_min is None:
-        match_min = MATCH_MIN
-    if match_min_pantry is None:
-        match_min_pantry = MATCH_MIN_PANTRY
+def sort_key_recette(r):
+    cat = r.get("category", "").lower()
+    cat_index = CATEGORY_ORDER.index(cat) if cat in CATEGORY_ORDER else len(CATEGORY_ORDER)
+    return (cat_index, -r["score_pantry"], r["name"].lower())
 
-    scored, unknown_global_pretty, seen = [], set(), set()
-    for r in recettes:
-        key = r["name"]
-        if key in seen:
-            continue
-        seen.add(key)
-        s = score_recette(r)
-        scored.append(s)
-        unknown_global_pretty.update(s["inconnus"])
-
-    scored_all = list(scored)
-    scored = [r for r in scored if r["score_market"] >= match_min and r["score_pantry"] >= match_min_pantry]
-
-    def sort_key_recette(r):
-        cat = r.get("category", "").lower()
-        cat_index = CATEGORY_ORDER.index(cat) if cat in CATEGORY_ORDER else len(CATEGORY_ORDER)
-        return (cat_index, -r["score_pantry"], r["name"].lower())
-    scored.sort(key=sort_key_recette)
-
-    # rendu texte comme le notebook
+def render_matching_text(scored: list) -> str:
+    """Rendu texte comme le notebook, pour des lignes déjà triées."""
     out_lines = []
     current_cat = None
     for r in scored:
@@ -237,21 +699,78 @@ def compute_matching(data_dir: str | Path, match_min: float = None, match_min_pa
         if r["inconnus"]:
             out_lines.append("[⚠️] Ingrédients non définis dans ingredients_infos.txt : " + ", ".join(r["inconnus"]))
         out_lines.append("")
-    text = "\n".join(out_lines)
+    return "\n".join(out_lines)
+
+def compute_matching(data_dir, match_min: float = None, match_min_pantry: float = None, write_ingredients_a_completer: bool = False,
+                     backend: str = "python", with_all: bool = True, month=None, with_text: bool = True):
+    """Calcule les scores et renvoie les mêmes infos que l'affichage du notebook.
+
+    `data_dir` : chemin du dossier data/, ou contexte explicite (Snapshot, Household, Engine).
+    `backend="numpy"` : scores calculés en bloc (vector_scoring), seules les recettes retenues
+    sont détaillées ; dans ce mode, `with_all=False` renvoie 'scored_all' = None.
+    `month` (1..12 ou nom français) : dispos marché = ingrédients du catalogue de saison ce mois-là,
+    au lieu de ingredients_disponibles.txt (voir seasonal.py).
+    `with_text=False` : 'text' = None (rendu texte du notebook non construit ; render_matching_text
+    le produit à la demande à partir de 'scored').
+    """
+    ctx = context(data_dir)
+    if month is not None:
+        import seasonal
+        ctx = seasonal.seasonal_snapshot(ctx, month)
+    if match_min is None:
+        match_min = MATCH_MIN
+    if match_min_pantry is None:
+        match_min_pantry = MATCH_MIN_PANTRY
+
+    if backend == "numpy":
+        import vector_scoring
+        with profiling.stage("score"):
+            scored, scored_all = vector_scoring.score_rows(ctx, match_min, match_min_pantry, with_all)
+            unknown_global_pretty = vector_scoring.unknown_ingredients(ctx)
+    elif backend == "python":
+        scored, unknown_global_pretty, seen = [], set(), set()
+        with profiling.stage("score"):
+            for r, keys in zip(ctx.recettes, ctx.recettes_keys):
+                key = r["name"]
+                if key in seen:
+                    continue
+                seen.add(key)
+                s = score_recette(ctx, r, keys)
+                scored.append(s)
+                unknown_global_pretty.update(s["inconnus"])
+        profiling.count("recettes scorées", len(scored))
+
+        with profiling.stage("filtre"):
+            scored_all = list(scored)
+            scored = [r for r in scored if r["score_market"] >= match_min and r["score_pantry"] >= match_min_pantry]
+    else:
+        raise ValueError(f"backend inconnu : {backend!r} (attendu 'python' ou 'numpy')")
 
-    unknown_missing = sorted(n for n in unknown_global_pretty if normalize(n) not in catalogue_norm_index)
+    with profiling.stage("tri"):
+        scored.sort(key=sort_key_recette)
+    text = None
+    if with_text:
+        with profiling.stage("texte"):
+            text = render_matching_text(scored)
+
+    unknown_missing = sorted(n for n in unknown_global_pretty if normalize(n) not in ctx.catalogue_norm_index)
     if write_ingredients_a_completer and unknown_missing:
         TEMPLATE_MONTHS = ["janvier","février","mars","avril","mai","jui...n","juillet","août","septembre","octobre","novembre","décembre"]
+        import fuzzy_resolver
+        suggestions = fuzzy_resolver.suggest(ctx, unknown_missing)
         def render_ing_block(name: str) -> str:
+            # noms proches du catalogue : à mettre dans ALIASES plutôt que d'ajouter une entrée
+            proches = [f"{s} ({score:.2f})" for s, score in suggestions.get(name, [])]
             return (
                 "  {\n"
                 f"    \"name\": \"{name}\",\n"
                 f"    \"saison\": {json.dumps(TEMPLATE_MONTHS, ensure_ascii=False)},\n"
                 f"    \"rayon\": \"à définir\",\n"
-                f"    \"indispensable\": true\n"
-                "  }"
+                f"    \"indispensable\": true"
+                + (f",\n    \"suggestions\": {json.dumps(proches, ensure_ascii=False)}\n" if proches else "\n")
+                + "  }"
             )
-        out_path = DATA_DIR / "ingredients_a_completer.txt"
+        out_path = ctx.data_dir / "ingredients_a_completer.txt"
         with open(out_path, "w", encoding="utf-8") as f:
             blocks = [render_ing_block(n) for n in unknown_missing]
             f.write(",\n".join(blocks))
@@ -269,160 +788,170 @@ def compute_matching(data_dir: str | Path, match_min: float = None, match_min_pa
 
 def scale_and_round(value, unit, factor):
     scaled = value * factor
-    if unit and unit.lower().startswith("g"):
+    if canonical_unit(unit) == "g":
         return int(math.ceil(scaled / 10.0) * 10), unit
     return int(math.ceil(scaled)), unit
 
-def _courses_nb(selection_names, personnes):
-    """Construit la liste de courses brute (avant déduction du placard), en marquant la dispo marché."""
+def _line_amount(ctx: Snapshot, rayon: str, n: str, qty, unit, factor: float):
+    """(quantité, unité) d'une ligne de recette mise à l'échelle, convertie en kg au marché."""
+    val = None
+    if qty is not None:
+        val, unit = scale_and_round(qty, unit, factor)
+
+    # conversions marché (pièces -> kg / g -> kg)
+    if (
+        rayon == "marché"
+        and isinstance(val, (int, float))
+        and canonical_unit(unit) == "pièce"
+        and ctx.poids_map.get(n)
+    ):
+        val = round(val * ctx.poids_map[n], 2)
+        unit = "kg"
+    elif rayon == "marché" and canonical_unit(unit) == "g" and isinstance(val, (int, float)):
+        val = round(val / 1000, 2)
+        unit = "kg"
+    return val, unit
+
+def recipe_table(ctx: Snapshot) -> RecipeTable:
+    """Lignes de courses de toutes les recettes en colonnes (compact.py), une fois par snapshot."""
+    return ctx.cached("recipe_table", ("recettes", "catalogue"), RecipeTable)
+
+def _courses_nb(ctx: Snapshot, selection_names, personnes, diagnostics: list | None = None):
+    """Construit la liste de courses brute (avant déduction du placard), en marquant la dispo marché.
+
+    Les quantités d'un même ingrédient sont cumulées avec leurs unités (quantities.Quantity) :
+    g + kg, pièces + kg via le poids du catalogue ; ce qui reste non convertible est gardé
+    dans 'extra' et signalé dans `diagnostics` au lieu d'être additionné ou perdu.
+    """
     factor = personnes / 2
-    result = defaultdict(dict)  # rayon -> {ing_norm -> bucket}
-
-    selected, seen = set(selection_names), set()
-    for r in recettes:
-        if r["name"] not in selected or r["name"] in seen:
-            continue
-        seen.add(r["name"])
-
-        for ing_raw, data in r["ingredients"].items():
-            pretty = canon(ing_raw)
-            n = normalize(pretty)
-            rayon = rayons_map.get(n, "inconnu")
-            if rayon == "placard":
-                continue
-
-            # quantités
-            if isinstance(data, dict):
-                qty = data.get("qty")
-                unit = data.get("unit", "")
-                override_indisp = data.get("indispensable", None)
-            else:
-                qty, unit, override_indisp = None, str(data), None
-
-            indisp_flag = override_indisp if override_indisp is not None else indispensables_map.get(n, False)
-
-            val = None
-            if isinstance(qty, (int, float)):
-                val, unit = scale_and_round(qty, unit, factor)
-
-            # conversions marché (pièces -> kg / g -> kg)
-            if (
-                rayon == "marché"
-                and isinstance(val, (int, float))
-                and unit and unit.strip().lower() in ["pièce","pièces","pièce(s)","piece","pieces","piece(s)"]
-                and poids_map.get(n)
-            ):
-                val = round(val * poids_map[n], 2)
-                unit = "kg"
-            elif rayon == "marché" and unit and unit.lower().startswith("g") and isinstance(val, (int, float)):
-                val = round(val / 1000, 2)
-                unit = "kg"
+    table = recipe_table(ctx)
+    result = defaultdict(dict)  # rayon -> {ing_norm -> Bucket}
+    rayons, indispensables = ctx.rayons_map, ctx.indispensables_map
+
+    for k in table.selection(selection_names):
+        for n, pretty, qty, unit, override_indisp in table.lines(k):
+            rayon = rayons.get(n, "inconnu")
+            indisp_flag = override_indisp if override_indisp is not None else indispensables.get(n, False)
+            val, unit = _line_amount(ctx, rayon, n, qty, unit, factor)
 
             # dispo marché ?
             is_market = (rayon == "marché")
-            market_available = (find_available_market(n) is not None) if is_market else None
+            market_available = (find_available_market(ctx, n) is not None) if is_market else None
 
             bucket = result[rayon].get(n)
-            if not bucket:
-                bucket = {
-                    "label": pretty, "val": 0, "unit": unit, "indispensable": indisp_flag,
-                    "recipes": set(), "norm": n, "market_available": market_available
-                }
-                result[rayon][n] = bucket
-
-            # cumuls
-            bucket["indispensable"] = bucket["indispensable"] or indisp_flag
-            if val is None:
-                bucket["val"] = None
-            elif bucket["val"] is not None:
-                bucket["val"] += val
-            else:
-                bucket["val"] = val
-            if not bucket["unit"] and unit:
-                bucket["unit"] = unit
+            if bucket is None:
+                bucket = result[rayon][n] = Bucket(pretty, Quantity(ctx.conversions_map.get(n, NO_CONVERSIONS)),
+                                                   unit, indisp_flag, market_available)
+
+            # cumuls : une ligne sans quantité (« selon le goût ») n'efface plus les autres
+            bucket.indispensable = bucket.indispensable or indisp_flag
+            if val is not None:
+                try:
+                    bucket.qty.add(val, unit)
+                except UnitMismatch as e:
+                    if diagnostics is not None:
+                        diagnostics.append(f"{pretty} ({table.names[k]}) : {e}")
+            elif not bucket.unit and unit:
+                bucket.unit = unit
             if is_market:
-                prev = bucket.get("market_available")
-                bucket["market_available"] = bool(prev) or bool(market_available)
-            bucket["recipes"].add(r["name"])
+                bucket.market_available = bool(bucket.market_available) or bool(market_available)
+            if not bucket.recipes or bucket.recipes[-1] != k:
+                bucket.recipes.append(k)
 
-    # structure d'affichage
+    # structure d'affichage (dicts de l'API)
     printable = {}
+    names = table.names
     for rayon, by_norm in result.items():
         printable[rayon] = {}
-        for ing_norm, data in by_norm.items():
-            data["recipes"] = sorted(data["recipes"])
-            printable[rayon][data["label"]] = {
-                "val": data["val"],
-                "unit": data["unit"],
-                "indispensable": data["indispensable"],
-                "recipes": data["recipes"],
+        for ing_norm, b in by_norm.items():
+            qty = b.qty
+            item = printable[rayon][b.label] = {
+                "val": qty.value,
+                "unit": qty.unit if qty.value is not None else b.unit,
+                "indispensable": b.indispensable,
+                "recipes": sorted(names[k] for k in b.recipes),
                 "norm": ing_norm,
-                "market_available": data.get("market_available"),
+                "market_available": b.market_available,
             }
+            if qty.extra:
+                item["extra"] = [{"val": v, "unit": u} for v, u in qty.extra]
     return printable
 
+def pantry_key(ctx: Snapshot, base_norm: str, label: str):
+    """Entrée du placard utilisée pour un ingrédient : base -> (label) -> remplacements."""
+    if base_norm in ctx.provisions_index:
+        return base_norm
+    label_norm = normalize(canon(label, ctx.aliases))
+    if label_norm in ctx.provisions_index:
+        return label_norm
+    return find_available_pantry(ctx, base_norm)
+
 # -------- Exemple d’utilisation --------
 
-def compute_courses(data_dir: str | Path, selection_names, personnes: int, update_provisions: bool = False):
-    """Calcule la liste de courses + déduction placard (comme le notebook)."""
-    init(data_dir)
-    liste_courses = _courses_nb(selection_names, personnes)
+def compute_courses(data_dir, selection_names, personnes: int, update_provisions: bool = False):
+    """Calcule la liste de courses + déduction placard (comme le notebook).
+
+    `data_dir` : chemin du dossier data/, ou contexte explicite (Snapshot, Household, Engine).
+    """
+    ctx = context(data_dir)
+    provisions_index = ctx.provisions_index
+    diagnostics = []  # unités non convertibles (recettes entre elles, ou recette / placard)
+    with profiling.stage("courses"):
+        liste_courses = _courses_nb(ctx, selection_names, personnes, diagnostics)
     # ----- AJUSTEMENT SELON LE PLACARD (bloc notebook) -----
     consommation_totale = defaultdict(float)  # quantités réellement prélevées du placard (clé = norm placard/base/remplaçant)
     pantry_used = {}  # pour affichage "PLACARD UTILISÉ"
     
-    for rayon, items in liste_courses.items():
-        for label, data in list(items.items()):
-            base_norm = data["norm"]
-            val = data["val"]
-            if val is None:
-                continue
+    with profiling.stage("placard"):
+        for rayon, items in liste_courses.items():
+            for label, data in list(items.items()):
+                base_norm = data["norm"]
+                val = data["val"]
+                if val is None:
+                    continue
     
-            # recherche robuste dans le placard: base -> (label) -> remplacements
-            prov = provisions_index.get(base_norm)
-            used_key = base_norm
-            if not prov:
-                label_norm = normalize(canon(label))
-                if label_norm in provisions_index:
-                    prov = provisions_index[label_norm]
-                    used_key = label_norm
-            if not prov:
-                for repl in REPLACEMENTS_NORM.get(base_norm, []):
-                    if repl in provisions_index:
-                        prov = provisions_index[repl]
-                        used_key = repl
-                        break
+                used_key = pantry_key(ctx, base_norm, label)
+                prov = provisions_index.get(used_key) if used_key is not None else None
     
-            if prov:
-                dispo = float(prov.get("quantity", 0))
-                used = min(float(val), dispo)
-                reste = max(0.0, float(val) - dispo)
+                if prov:
+                    dispo = float(prov.get("quantity", 0))
+                    prov_unit = prov.get("unit")  # placard sans unité : même unité que le besoin
+                    if prov_unit is not None:
+                        dispo = convert(dispo, prov_unit, data["unit"], ctx.conversions_map.get(base_norm, NO_CONVERSIONS))
+                        if dispo is None:
+                            diagnostics.append(f"{label} : placard en {prov_unit}, besoin en {data['unit'] or 'pièce(s)'} "
+                                               "non convertibles, placard non déduit")
+                            continue
+                    used = min(float(val), dispo)
+                    reste = max(0.0, float(val) - dispo)
     
-                # Ce qu'il reste à acheter
-                if reste <= FLOAT_EPS:
-                    del items[label]
-                else:
-                    data["val"] = round(reste, 2)
+                    # Ce qu'il reste à acheter
+                    if reste <= FLOAT_EPS:
+                        del items[label]
+                    else:
+                        data["val"] = round(reste, 2)
     
-                if used > FLOAT_EPS:
-                    consommation_totale[used_key] += used
-                    entry = pantry_used.get(used_key)
-                    if not entry:
-                        pantry_label = pretty_from_norm(used_key)
-                        entry = {
-                            "label": pantry_label, "val": 0.0, "unit": data["unit"],
-                            "indispensable": indispensables_map.get(used_key, False),
-                            "recipes": set(),
-                        }
-                        pantry_used[used_key] = entry
-                    entry["val"] += used
-                    entry["recipes"].update(data.get("recipes", []))
+                    if used > FLOAT_EPS:
+                        consommation_totale[used_key] += (
+                            used if prov_unit is None
+                            else convert(used, data["unit"], prov_unit, ctx.conversions_map.get(base_norm, NO_CONVERSIONS)))
+                        entry = pantry_used.get(used_key)
+                        if not entry:
+                            pantry_label = pretty_from_norm(ctx, used_key)
+                            entry = {
+                                "label": pantry_label, "val": 0.0, "unit": data["unit"],
+                                "indispensable": ctx.indispensables_map.get(used_key, False),
+                                "recipes": set(),
+                            }
+                            pantry_used[used_key] = entry
+                        entry["val"] += used
+                        entry["recipes"].update(data.get("recipes", []))
     
     #arrondir les affichages pour ne pas avoir trop de décimales
     def _fmt_amount(val, unit):
         if val is None:
           return ""
-        u = (unit or "").lower()
+        u = canonical_unit(unit)
     
         # règles simples :
         # - kg / l : 2 décimales max
@@ -430,9 +959,7 @@ def compute_courses(data_dir: str | Path, selection_names, personnes: int, updat
         # - pièces : entier
         if u in ("kg", "l"):
             s = f"{float(val):.2f}".rstrip("0").rstrip(".")
-        elif u.startswith("g"):
-            s = str(int(round(float(val))))
-        elif u.startswith(("pièce", "piece")):
+        elif u in ("g", "pièce"):
             s = str(int(round(float(val))))
         else:
             # défaut : 2 décimales max
@@ -442,36 +969,120 @@ def compute_courses(data_dir: str | Path, selection_names, personnes: int, updat
     
     # --- AFFICHAGE COURSES ---
     if update_provisions:
-        update_provisions_files(consommation_totale, data_dir)
+        with profiling.stage("écriture placard"):
+            update_provisions_files(consommation_totale, _household(data_dir))
     return {
         'liste_courses': liste_courses,
         'consommation_totale': dict(consommation_totale),
         'pantry_used': pantry_used,
+        'diagnostics': diagnostics,
     }
 
-def update_provisions_files(consommation_totale: dict, data_dir: str | Path):
-    """Décrémente provisions.txt et génère courses_placard.txt (comme la cellule 3)."""
-    init(data_dir)
+def consume_provisions(provisions_index: dict, consommation_totale: dict) -> tuple:
+    """(placard décrémenté, courses_placard) sans toucher au placard d'origine.
+
+    Seules les entrées consommées sont copiées : les autres sont partagées avec `provisions_index`.
+    """
     # code notebook
     # ----- DÉCRÉMENTER LES PROVISIONS & GÉNÉRER courses_placard.txt -----
+    new_index = dict(provisions_index)
     for ing_norm, used in consommation_totale.items():
-        prov = provisions_index.get(ing_norm)
+        prov = new_index.get(ing_norm)
         if prov:
+            prov = new_index[ing_norm] = dict(prov)
             prov["quantity"] = max(0, float(prov.get("quantity", 0)) - float(used))
-    
+
     courses_placard = []
-    for prov in provisions_index.values():
+    for prov in new_index.values():
         qte = float(prov.get("quantity", 0))
         qte_min = float(prov.get("quantity_min", 0))
         if qte < qte_min:
             courses_placard.append({"name": prov["name"], "quantity": round(qte_min - qte, 2)})
-    
-    with open(provisions_path, "w", encoding="utf-8") as f:
-        json.dump(list(provisions_index.values()), f, ensure_ascii=False, indent=2)
-    
-    courses_placard_path = DATA_DIR / "courses_placard.txt"
-    with open(courses_placard_path, "w", encoding="utf-8") as f:
-        json.dump(courses_placard, f, ensure_ascii=False, indent=2)
-    
+    return new_index, courses_placard
+
+def update_provisions_files(consommation_totale: dict, data_dir):
+    """Décrémente provisions.txt et génère courses_placard.txt (comme la cellule 3).
+
+    `data_dir` : chemin du dossier data/ ou Household ; la lecture-décrément-écriture est
+    faite sous le verrou du foyer, sur son placard le plus récent. Placard en base SQLite :
+    un seul décrément transactionnel, courses_placard reste une vue de la base.
+    """
+    household = _household(data_dir)
+    if household.db is not None:
+        with household.lock:
+            courses_placard = household.db.apply_consumption(consommation_totale, household.engine.snapshot().aliases)
+            household.reload()
+        print(f"→ Placard mis à jour : {household.db.path.resolve()}")
+        print(f"→ Réappro placard : {len(courses_placard)} article(s) (vue courses_placard)")
+        return
+    with household.lock:
+        ctx = household.context()
+        provisions_path = ctx.provisions_path
+        new_index, courses_placard = consume_provisions(ctx.provisions_index, consommation_totale)
+        _dump_json(list(new_index.values()), provisions_path)
+        courses_placard_path = ctx.courses_placard_path
+        _dump_json(courses_placard, courses_placard_path)
+        household.reload()
+
     print(f"→ Placard mis à jour : {provisions_path.resolve()}")
     print(f"→ Réappro placard : {courses_placard_path.resolve()}")
+
+# =========================
+#   PARTIE 3 — PLAN DE REPAS
+# =========================
+
+def optimize_plan(data_dir, k: int, personnes: int, constraints: dict | None = None, solver: str = "auto"):
+    """Choisit K recettes qui minimisent les achats restants et mutualisent le frais (voir planner.py)."""
+    import planner
+    return planner.optimize_plan(data_dir, k, personnes, constraints, solver)
+
+def recommend_recipes(data_dir, k: int = 10, personnes: int = 2, candidates=None, backend: str = "auto") -> list:
+    """Les K recettes les plus proches d'être cuisinables, sans seuil MATCH_MIN (voir recommend.py)."""
+    import recommend
+    return recommend.recommend(data_dir, k, personnes, candidates, backend)
+
+# =========================
+#   PARTIE 4 — RECHERCHE
+# =========================
+
+def search_recipes(data_dir, query: str = "", with_ingredients=(), without_ingredients=(), limit: int = 20,
+                   prefix: bool = True) -> list:
+    """Recherche plein texte BM25 dans les recettes, avec filtres d'ingrédients (voir search_index.py)."""
+    import search_index
+    return search_index.search(data_dir, query, with_ingredients, without_ingredients, limit, prefix)
+
+# =========================
+#   PARTIE 5 — SAISONS
+# =========================
+
+def season_year_view(data_dir) -> dict:
+    """Score marché de chaque recette pour les 12 mois, d'après la saison du catalogue (voir seasonal.py)."""
+    import seasonal
+    return seasonal.year_view(data_dir)
+
+# =========================
+#   PARTIE 6 — SIMULATION
+# =========================
+
+def simulate_weeks(data_dir, weeks, personnes, restock_weekly: bool = True, write: bool = False) -> dict:
+    """Courses et placard semaine après semaine, rejoués en mémoire (voir simulation.py)."""
+    import simulation
+    return simulation.simulate(data_dir, weeks, personnes, restock_weekly, write)
+
+# =========================
+#   PARTIE 7 — LOTS DE FOYERS
+# =========================
+
+def compute_courses_batch(data_dir, households, workers: int = None, executor: str = "thread") -> list:
+    """compute_courses pour plusieurs foyers sur un snapshot partagé (voir batch.py)."""
+    import batch
+    return batch.compute_batch(data_dir, households, workers, executor)
+
+# =========================
+#   PARTIE 8 — VALIDATION
+# =========================
+
+def validate_data(data_dir, workers: int = None, use_cache: bool = True) -> dict:
+    """Rapport de schéma et de cohérence des fichiers de data/, mis en cache par empreinte (voir validate.py)."""
+    import validate
+    return validate.validate(data_dir, workers, use_cache)
@@ -0,0 +1,171 @@
+# fuzzy_resolver.py
+# Ingrédients inconnus → suggestions du catalogue. Index de trigrammes de caractères + index de
+# mots sur les noms normalisés du catalogue ; seuls les noms qui partagent assez de trigrammes
+# rares (ou un mot) avec la requête sont comparés, pas tout le catalogue.
+# Les suggestions sont gardées dans data/.index/fuzzy_cache.json (par version du catalogue) :
+# chaque nom inconnu n'est résolu qu'une fois. Les meilleures peuvent devenir des alias
+# (data/aliases_auto.json), relus par engine au démarrage.
+# Usage : python fuzzy_resolver.py suggest data/
+#         python fuzzy_resolver.py apply data/ [--min 0.85]
+from __future__ import annotations
+
+import argparse, heapq, json, math, sys
+from array import array
+from collections import defaultdict
+from pathlib import Path
+
+import engine
+
+MIN_SIMILARITY = 0.35    # en dessous : pas une suggestion
+AUTO_ALIAS_MIN = 0.85    # seuil par défaut pour appliquer une suggestion comme alias
+AUTO_ALIAS_MARGIN = 0.1  # écart minimal avec la 2e suggestion (sinon ambigu, laissé à la main)
+TOP_K = 3
+TRIGRAM_WEIGHT = 0.6     # similarité = 0.6 × Dice(trigrammes) + 0.4 × Dice(mots)
+CACHE_FILE = "fuzzy_cache.json"   # dans data/.index/
+
+
+def trigrams(norm: str) -> set:
+    s = f" {norm} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+def words(norm: str) -> set:
+    return {w for w in norm.split() if len(w) > 2}
+
+def _dice(a: set, b: set) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+def similarity(a_grams: set, a_words: set, b_grams: set, b_words: set) -> float:
+    return TRIGRAM_WEIGHT * _dice(a_grams, b_grams) + (1 - TRIGRAM_WEIGHT) * _dice(a_words, b_words)
+
+
+class TrigramIndex:
+    """Noms normalisés du catalogue indexés par trigramme et par mot."""
+
+    def __init__(self, norm_to_pretty: dict, aliases: dict | None = None):
+        self.aliases = aliases  # alias automatiques du dossier (ctx.aliases)
+        self.norms = list(norm_to_pretty)
+        self.pretty = [norm_to_pretty[n] for n in self.norms]
+        self.grams = [trigrams(n) for n in self.norms]
+        self.words = [words(n) for n in self.norms]
+        self.by_gram = defaultdict(lambda: array("I"))
+        self.by_word = defaultdict(lambda: array("I"))
+        for i, (gs, ws) in enumerate(zip(self.grams, self.words)):
+            for g in gs:
+                self.by_gram[g].append(i)
+            for w in ws:
+                self.by_word[w].append(i)
+        self.by_gram, self.by_word = dict(self.by_gram), dict(self.by_word)
+        self.compared = 0  # noms comparés depuis la création (mesure du filtrage)
+
+    @staticmethod
+    def _probe(keys: set, postings: dict, t: float) -> set:
+        """Noms dont le Dice avec `keys` peut atteindre t : un tel nom partage au moins
+        ceil(t·|A| / (2 - t)) clés avec A, donc au moins une des |A| - ce minimum + 1 plus rares."""
+        if not keys:
+            return set()
+        min_shared = max(1, math.ceil(t * len(keys) / (2 - t)))
+        rarest = sorted(keys, key=lambda g: len(postings.get(g, ())))[:len(keys) - min_shared + 1]
+        return {i for g in rarest for i in postings.get(g, ())}
+
+    def _candidates(self, grams: set, ws: set, t: float) -> set:
+        # similarité ≥ t ⇒ Dice(trigrammes) ≥ t ou Dice(mots) ≥ t (moyenne pondérée de deux Dice)
+        return self._probe(grams, self.by_gram, t) | self._probe(ws, self.by_word, t)
+
+    def _top(self, grams, ws, cands, k):
+        self.compared += len(cands)
+        scored = ((similarity(grams, ws, self.grams[i], self.words[i]), -i) for i in cands)
+        return heapq.nlargest(k, (x for x in scored if x[0] >= MIN_SIMILARITY))
+
+    def lookup(self, name: str, k: int = TOP_K) -> list:
+        """[(nom du catalogue, similarité)] des k meilleures correspondances de `name`."""
+        norm = engine.normalize(engine.canon(name, self.aliases))
+        grams, ws = trigrams(norm), words(norm)
+        # 1er passage avec un seuil élevé (peu de candidats) ; le k-ième score obtenu sert de seuil
+        # au 2e passage, qui ne peut rien rater au-dessus
+        best = self._top(grams, ws, self._candidates(grams, ws, 0.9), k)
+        t = best[-1][0] if len(best) == k else MIN_SIMILARITY
+        if t < 0.9:
+            best = self._top(grams, ws, self._candidates(grams, ws, t), k)
+        return [(self.pretty[-i], round(s, 4)) for s, i in best]
+
+
+def trigram_index(ctx) -> TrigramIndex:
+    return ctx.cached("trigram_index", ("catalogue",), lambda c: TrigramIndex(c.catalogue_norm_to_pretty, c.aliases))
+
+
+# ---------- SUGGESTIONS (cache disque par version du catalogue) ----------
+def _cache_path(ctx) -> Path:
+    return ctx.data_dir / ".index" / CACHE_FILE
+
+def _load_cache(ctx) -> dict:
+    try:
+        with open(_cache_path(ctx), encoding="utf-8") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return cache.get("suggestions", {}) if cache.get("catalogue") == list(ctx.signatures["catalogue"] or ()) else {}
+
+def suggest(source, names=None, k: int = TOP_K) -> dict:
+    """{nom inconnu: [(nom du catalogue, similarité)]} ; par défaut les inconnus de compute_matching.
+
+    Les noms déjà résolus pour cette version du catalogue sont lus dans le cache disque.
+    """
+    ctx = engine.context(source)
+    if names is None:
+        names = engine.compute_matching(ctx, with_text=False)["unknown_ingredients"]
+    cache = _load_cache(ctx)
+    missing = [n for n in names if cache.get(n, {}).get("k", 0) < k]
+    if missing:
+        index = trigram_index(ctx)
+        for n in missing:
+            cache[n] = {"k": k, "suggestions": index.lookup(n, k)}
+        path = _cache_path(ctx)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        engine._dump_json({"catalogue": list(ctx.signatures["catalogue"] or ()), "suggestions": cache}, path)
+    return {n: [tuple(s) for s in cache[n]["suggestions"][:k]] for n in names}
+
+def auto_aliases(suggestions: dict, min_similarity: float = AUTO_ALIAS_MIN) -> dict:
+    """{nom inconnu: nom du catalogue} pour les suggestions sûres (au-dessus du seuil, sans rivale proche)."""
+    out = {}
+    for name, sugg in suggestions.items():
+        if sugg and sugg[0][1] >= min_similarity and (len(sugg) < 2 or sugg[0][1] - sugg[1][1] >= AUTO_ALIAS_MARGIN):
+            out[name] = sugg[0][0]
+    return out
+
+def apply_aliases(source, min_similarity: float = AUTO_ALIAS_MIN) -> dict:
+    """Ajoute les alias sûrs à data/aliases_auto.json ; renvoie les nouveaux.
+
+    L'Engine du dossier les prend en compte au prochain snapshot() (signature du fichier)."""
+    ctx = engine.context(source)
+    new = auto_aliases(suggest(ctx), min_similarity)
+    if new:
+        path = ctx.data_dir / engine.AUTO_ALIASES_FILE
+        saved = engine._load_json(path) if path.exists() else {}
+        engine._dump_json({**saved, **new}, path)
+    return new
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Suggestions du catalogue pour les ingrédients inconnus.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("suggest", help="affiche les suggestions pour les ingrédients inconnus")
+    s.add_argument("data_dir")
+    s.add_argument("-k", type=int, default=TOP_K)
+    a = sub.add_parser("apply", help="applique les suggestions sûres comme alias (data/aliases_auto.json)")
+    a.add_argument("data_dir")
+    a.add_argument("--min", type=float, default=AUTO_ALIAS_MIN)
+    args = p.parse_args(argv)
+
+    if args.cmd == "suggest":
+        for name, sugg in suggest(args.data_dir, k=args.k).items():
+            print(f"{name} : " + (", ".join(f"{s} ({score:.2f})" for s, score in sugg) or "aucune suggestion"))
+    else:
+        new = apply_aliases(args.data_dir, args.min)
+        for name, target in new.items():
+            print(f"{name} → {target}")
+        print(f"→ {len(new)} alias ajouté(s) dans {Path(args.data_dir) / engine.AUTO_ALIASES_FILE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# incremental.py
+# Matching incrémental : quand la liste du marché ou le placard change de quelques éléments,
+# seules les recettes concernées sont re-scorées (index inversé ingrédient → recettes).
+from __future__ import annotations
+
+import bisect
+from collections import defaultdict
+
+import engine
+
+
+class IncrementalMatching:
+    """Résultat de compute_matching tenu à jour par deltas, sans jamais écrire de fichier.
+
+    L'index inversé associe chaque ingrédient normalisé (besoin direct ou remplaçant)
+    aux recettes dont le score marché / placard peut en dépendre.
+    """
+
+    def __init__(self, source, match_min: float = None, match_min_pantry: float = None):
+        ctx = engine.context(source)
+        self.ctx = ctx
+        self.match_min = engine.MATCH_MIN if match_min is None else match_min
+        self.match_min_pantry = engine.MATCH_MIN_PANTRY if match_min_pantry is None else match_min_pantry
+
+        self._recettes, self._keys, seen = [], [], set()
+        for r, keys in zip(ctx.recettes, ctx.recettes_keys):
+            if r["name"] in seen:
+                continue
+            seen.add(r["name"])
+            self._recettes.append(r)
+            self._keys.append(keys)
+
+        self._market_index = defaultdict(set)  # ingrédient → recettes (indices) concernées côté marché
+        self._pantry_index = defaultdict(set)  # idem côté placard
+        for i, keys in enumerate(self._keys):
+            norms = {n for _, _, n, _ in keys}
+            for n in ctx.market_indispensables_norm & norms:
+                for cand in engine.replacement_candidates(ctx, n):
+                    self._market_index[cand].add(i)
+            for n in norms:
+                if ctx.rayons_map.get(n) in engine.PANTRY_RAYONS:
+                    for cand in engine.replacement_candidates(ctx, n):
+                        self._pantry_index[cand].add(i)
+
+        self.rows = [engine.score_recette(ctx, r, keys) for r, keys in zip(self._recettes, self._keys)]
+        self.unknown_ingredients = sorted(self._unknown())
+        self._sorted = sorted(
+            (self._sort_key(i), i) for i, row in enumerate(self.rows) if self._passes(row)
+        )
+
+    def _unknown(self):
+        pretty = {n for row in self.rows for n in row["inconnus"]}
+        return (n for n in pretty if engine.normalize(n) not in self.ctx.catalogue_norm_index)
+
+    # ---------- ÉTAT ----------
+    def _passes(self, row) -> bool:
+        return row["score_market"] >= self.match_min and row["score_pantry"] >= self.match_min_pantry
+
+    def _sort_key(self, i: int) -> tuple:
+        # l'indice dans le corpus départage les égalités comme le tri stable de compute_matching
+        return engine.sort_key_recette(self.rows[i]) + (i,)
+
+    @property
+    def scored(self) -> list:
+        """Recettes retenues, triées comme compute_matching()['scored']."""
+        return [self.rows[i] for _, i in self._sorted]
+
+    def result(self, with_text: bool = True) -> dict:
+        """Même dictionnaire que compute_matching() pour l'état courant."""
+        scored = self.scored
+        return {
+            "scored": scored,
+            "scored_all": list(self.rows),
+            "text": engine.render_matching_text(scored) if with_text else None,
+            "unknown_ingredients": self.unknown_ingredients,
+        }
+
+    # ---------- DELTAS ----------
+    def _rescore(self, ctx, affected: set) -> list:
+        """Re-score les recettes `affected` avec `ctx` ; renvoie les lignes qui ont changé."""
+        self.ctx = ctx
+        changed = []
+        for i in sorted(affected):
+            old = self.rows[i]
+            new = engine.score_recette(ctx, self._recettes[i], self._keys[i])
+            if new == old:
+                continue
+            if self._passes(old):
+                pos = bisect.bisect_left(self._sorted, (self._sort_key(i), i))
+                del self._sorted[pos]
+            self.rows[i] = new
+            if self._passes(new):
+                bisect.insort(self._sorted, (self._sort_key(i), i))
+            changed.append(new)
+        return changed
+
+    def apply_snapshot(self, ctx) -> list:
+        """Passe au snapshot `ctx` (autres dispos et/ou autre placard, ex. fichier modifié sur disque) ;
+        renvoie les lignes modifiées. Recettes ou catalogue différents : ValueError (à reconstruire)."""
+        old = self.ctx
+        if ctx.parts["recettes"] is not old.parts["recettes"] or ctx.parts["catalogue"] is not old.parts["catalogue"]:
+            raise ValueError("recettes ou catalogue modifiés : IncrementalMatching à reconstruire")
+        affected = set()
+        for kind, index, key in (("market", self._market_index, "dispos"), ("pantry", self._pantry_index, "provisions")):
+            if ctx.parts[key] is old.parts[key]:
+                continue
+            touched = engine.part_delta(old, ctx, key)[kind]
+            engine.update_resolution(ctx, old, kind, touched)
+            affected.update(*(index.get(n, ()) for n in touched))
+        return self._rescore(ctx, affected)
+
+    def apply_availability_delta(self, added=(), removed=()) -> list:
+        """Ajoute / retire des ingrédients disponibles au marché ; renvoie les lignes modifiées."""
+        touched = {engine.normalize(engine.canon(x, self.ctx.aliases)) for x in (*added, *removed)}
+        if not touched:
+            return []
+        removed_norm = {engine.normalize(engine.canon(x, self.ctx.aliases)) for x in removed}
+        raw = [d for d in self.ctx.raw_dispos if engine.normalize(engine.canon(d, self.ctx.aliases)) not in removed_norm]
+        raw.extend(added)
+        version = ("delta", self.ctx.signatures["dispos"], tuple(sorted(added)), tuple(sorted(removed)))
+        ctx = self.ctx.derive(dispos=(engine.dispos_part(raw, self.ctx.aliases), version))
+        engine.update_resolution(ctx, self.ctx, "market", touched)
+        affected = set().union(*(self._market_index.get(n, ()) for n in touched))
+        return self._rescore(ctx, affected)
+
+    def apply_provisions_delta(self, updated=None, removed=()) -> list:
+        """Met à jour le placard en mémoire ; renvoie les lignes modifiées.
+
+        `updated` : {nom: quantité} ou {nom: entrée complète} ; `removed` : noms retirés du placard.
+        """
+        updated = updated or {}
+        touched = {engine.normalize(engine.canon(x, self.ctx.aliases)) for x in (*updated, *removed)}
+        if not touched:
+            return []
+        removed_norm = {engine.normalize(engine.canon(x, self.ctx.aliases)) for x in removed}
+        entries = {engine.normalize(engine.canon(p["name"], self.ctx.aliases)): p for p in self.ctx.provisions}
+        for name in removed_norm:
+            entries.pop(name, None)
+        for name, value in updated.items():
+            n = engine.normalize(engine.canon(name, self.ctx.aliases))
+            entry = dict(entries.get(n) or {"name": name, "quantity": 0, "quantity_min": 0})
+            if isinstance(value, dict):
+                entry.update(value)
+            else:
+                entry["quantity"] = value
+            entries[n] = entry
+        version = ("delta", self.ctx.signatures["provisions"], tuple(sorted(touched)))
+        part = engine.provisions_part(list(entries.values()), self.ctx.provisions_path, self.ctx.aliases)
+        ctx = self.ctx.derive(provisions=(part, version))
+        engine.update_resolution(ctx, self.ctx, "pantry", touched)
+        # le score placard ne dépend que de la présence au placard, pas de la quantité
+        affected = set().union(*(self._pantry_index.get(n, ()) for n in touched))
+        return self._rescore(ctx, affected)
@@ -0,0 +1,123 @@
+# ingredient_parser.py
+# Lignes d'ingrédients (« 200 g Farine », « Sel selon le goût », « Oignon ½ pièce(s) ») → (nom, qty, unité).
+# Une seule regex compilée reconnaît quantité en tête, quantité en fin ou quantité textuelle ;
+# même résultat que split_qty_name + split_number_and_unit du notebook de scraping.
+# La table des unités sert aussi à engine.py pour reconnaître grammes / pièces.
+from __future__ import annotations
+
+import math, re
+from functools import lru_cache
+
+# ---------- UNITÉS ----------
+# graphie reconnue dans les lignes → unité canonique
+UNIT_TABLE = {
+    "g": "g", "kg": "kg", "mg": "mg", "ml": "ml", "cl": "cl", "l": "l",
+    "cs": "cs", "cc": "cc", "c.à.s": "cs", "c.à.c": "cc",
+    "sachet": "sachet", "sachet(s)": "sachet",
+    "pièce": "pièce", "pièce(s)": "pièce",
+    "tranche": "tranche", "tranche(s)": "tranche",
+    "botte": "botte", "botte(s)": "botte",
+    "pincée": "pincée", "pincée(s)": "pincée",
+    "brin": "brin", "brin(s)": "brin",
+    "bouquet": "bouquet", "bouquet(s)": "bouquet",
+    "paquet": "paquet", "paquet(s)": "paquet",
+    "pot": "pot", "pot(s)": "pot",
+    "cm": "cm",
+    "boule": "boule", "boule(s)": "boule",
+    "boîte(s)": "boîte", "boîte": "boîte",
+    "filet(s)": "filet",
+    "tube(s)": "tube", "tube": "tube",
+}
+UNITS = list(UNIT_TABLE)
+# autres graphies rencontrées dans les recettes saisies à la main (non reconnues dans les lignes)
+UNIT_ALIASES = {
+    "pièces": "pièce", "piece": "pièce", "pieces": "pièce", "piece(s)": "pièce",
+    "gr": "g", "gramme": "g", "grammes": "g", "gramme(s)": "g",
+    "kilo": "kg", "kilos": "kg", "litre": "l", "litres": "l",
+}
+TEXT_QTY = ["selon le goût", "au goût", "à volonté"]
+
+FRACTION_MAP = {
+    "¼": 1/4, "½": 1/2, "¾": 3/4,
+    "⅐": 1/7, "⅑": 1/9, "⅒": 1/10,
+    "⅓": 1/3, "⅔": 2/3,
+    "⅕": 1/5, "⅖": 2/5, "⅗": 3/5, "⅘": 4/5,
+    "⅙": 1/6, "⅚": 5/6,
+    "⅛": 1/8, "⅜": 3/8, "⅝": 5/8, "⅞": 7/8,
+}
+
+@lru_cache(maxsize=1024)
+def canonical_unit(unit: str | None) -> str | None:
+    """Unité canonique ('pièce(s)' → 'pièce', 'Grammes' → 'g'), ou None si inconnue."""
+    if not unit:
+        return None
+    u = unit.strip().lower()
+    return UNIT_TABLE.get(u) or UNIT_ALIASES.get(u)
+
+
+# ---------- GRAMMAIRE ----------
+_NUM = r"(?:\d+(?:[.,]\d+)?|\d+/\d+|[{}])".format(re.escape("".join(FRACTION_MAP)))
+_UNIT = r"(?:{})(?!\S)".format("|".join(re.escape(u) for u in UNITS))
+_QTY_CORE = rf"{_NUM}(?:\s*{_UNIT})?"
+
+def _qty(tag: str) -> str:
+    # suite de quantités ; le premier nombre est capturé à part
+    return rf"(?P<{tag}>(?P<{tag}_num>{_NUM})(?:\s*{_UNIT})?(?:\s+{_QTY_CORE})*)"
+
+LINE_RE = re.compile(
+    r"^(?:"
+    rf"(?P<text>(?i:{'|'.join(re.escape(t) for t in TEXT_QTY)}))(?P<text_rest>.*)"
+    rf"|{_qty('lead')}\s+(?P<lead_name>.+?)"
+    rf"|(?P<trail_name>.+?)\s+{_qty('trail')}"
+    r")\s*$",
+    re.S,
+)
+
+
+def _number(raw: str):
+    s = raw.replace(",", ".")
+    n = FRACTION_MAP.get(s)
+    if n is None:
+        if "/" in s:
+            a, b = s.split("/")
+            n = float(a) / float(b) if float(b) else None
+        else:
+            n = float(s)
+    if n is not None:
+        if abs(n - round(n)) < 1e-9:
+            n = int(round(n))
+        else:
+            n = math.floor(n * 100 + 1e-9) / 100.0
+    return n
+
+def _qty_unit(qty_text: str, num: str):
+    rest = qty_text[len(num):]
+    if not rest:
+        return _number(num), ""
+    if rest[0] != " ":
+        return None, qty_text  # « 200g » : nombre collé à l'unité, gardé tel quel
+    return _number(num), rest.strip()
+
+
+@lru_cache(maxsize=65536)
+def parse_line(line: str) -> tuple:
+    """(nom, qty, unité) : qty = nombre ou None, unité = '' / unité / quantité textuelle."""
+    s = " ".join(line.split())
+    m = LINE_RE.match(s)
+    if m is None:
+        return s, None, ""
+    if m.group("text"):
+        rem = m.group("text_rest").strip()
+        return (rem if rem else s), None, m.group("text").lower()
+    tag = "lead" if m.group("lead") is not None else "trail"
+    qty, unit = _qty_unit(m.group(tag), m.group(f"{tag}_num"))
+    return m.group(f"{tag}_name"), qty, unit
+
+def parse_lines(lines):
+    """Analyse un flux de lignes ; produit un tuple (nom, qty, unité) par ligne, dans l'ordre."""
+    for line in lines:
+        yield parse_line(str(line))
+
+def parse_ingredients(lines) -> dict:
+    """{nom: {"qty", "unit"}} comme les recettes de recettes_hellofresh.txt (dernière ligne gagnante)."""
+    return {name: {"qty": qty, "unit": unit} for name, qty, unit in parse_lines(lines) if name}
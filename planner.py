@@ -0,0 +1,319 @@
+# planner.py
+# Choix automatique de K recettes : minimiser ce qu'il reste à acheter après déduction du placard
+# et mutualiser les produits frais du marché entre recettes.
+from __future__ import annotations
+
+import math, time, unicodedata
+
+import engine
+from quantities import NO_CONVERSIONS, convert
+
+PERISHABLE_WEIGHT = 1.5  # poids d'un produit du marché (frais) dans le coût, par rapport à 1 pour les autres
+EXACT_MAX_COMBINATIONS = 250_000  # au-delà, solver="auto" passe en glouton + recherche locale
+LOCAL_SEARCH_POOL = 400  # candidats examinés par échange lors de la recherche locale
+TIME_LIMIT = 0.8  # secondes, budget d'optimize_plan en glouton / local, construction du modèle comprise
+LATE_SCAN = 256   # délai dépassé : candidats encore examinés pour chaque recette restant à choisir
+
+
+def category_key(cat: str | None) -> str:
+    """Catégorie sans emoji ni accents : '🍗 Poulet' → 'poulet' (clé des quotas)."""
+    if not cat:
+        return ""
+    s = "".join(c for c in cat if unicodedata.category(c) not in ("So", "Sk", "Cf"))
+    return engine.normalize(s.strip())
+
+
+# ---------- MODÈLE (par snapshot et nombre de personnes) ----------
+def _build_demand(ctx, personnes: int) -> dict:
+    """Besoins par recette (dédupliquée par nom) : [(id ingrédient, quantité ou None)] ; ne dépend
+    que des recettes et du catalogue. Quantités d'un ingrédient exprimées dans une seule unité
+    (la première rencontrée, `units`) ; une ligne non convertible compte comme sans quantité."""
+    factor = personnes / 2
+    names, categories, needs, seen = [], [], [], set()
+    norm_ids, labels, units = {}, [], []
+    table = engine.recipe_table(ctx)  # lignes lues comme pour compute_courses
+    for k, r in enumerate(ctx.recettes):
+        if r["name"] in seen:
+            continue
+        seen.add(r["name"])
+        totals = {}  # norm id → quantité numérique (ou None si aucune)
+        for n, pretty, qty, unit, _ in table.lines(k):
+            rayon = ctx.rayons_map.get(n, "inconnu")
+            val, unit = engine._line_amount(ctx, rayon, n, qty, unit, factor)
+            j = norm_ids.get(n)
+            if j is None:
+                j = norm_ids[n] = len(labels)
+                labels.append((n, pretty, rayon))
+                units.append(None)
+            if val is not None:
+                if units[j] is None:
+                    units[j] = unit
+                elif unit != units[j]:
+                    val = convert(val, unit, units[j], ctx.conversions_map.get(n, NO_CONVERSIONS))
+            if val is not None:
+                totals[j] = (totals.get(j) or 0) + val
+            else:
+                totals.setdefault(j, None)
+        names.append(r["name"])
+        categories.append(category_key(r.get("category")))
+        needs.append(tuple(totals.items()))
+    return {
+        "names": names, "categories": categories, "needs": needs, "labels": labels, "units": units,
+        "weights": [PERISHABLE_WEIGHT if rayon == "marché" else 1.0 for _, _, rayon in labels],
+        "positions": {name: i for i, name in enumerate(names)},
+    }
+
+def demand_model(ctx, personnes: int) -> dict:
+    return ctx.cached(f"plan_demand_{personnes}", ("recettes", "catalogue"), lambda c: _build_demand(c, personnes))
+
+def pantry_vector(ctx, labels: list, units: list) -> list:
+    """Quantité au placard pour chaque ingrédient de `labels` (entrée de pantry_key, 0 si aucune),
+    convertie dans l'unité du besoin comme dans compute_courses : 0 si non convertible."""
+    pantry = []
+    for (n, pretty, _), unit in zip(labels, units):
+        key = engine.pantry_key(ctx, n, pretty)
+        prov = ctx.provisions_index.get(key) if key is not None else None
+        dispo = float(prov.get("quantity", 0)) if prov else 0.0
+        if prov and prov.get("unit") is not None and unit is not None:
+            dispo = convert(dispo, prov["unit"], unit, ctx.conversions_map.get(n, NO_CONVERSIONS)) or 0.0
+        pantry.append(dispo)
+    return pantry
+
+def _build_model(ctx, personnes: int) -> dict:
+    demand = demand_model(ctx, personnes)
+    return {**demand, "pantry": pantry_vector(ctx, demand["labels"], demand["units"])}
+
+def plan_model(ctx, personnes: int) -> dict:
+    # seul le vecteur placard est recalculé quand provisions.txt change
+    return ctx.cached(f"plan_model_{personnes}", ("recettes", "catalogue", "provisions"),
+                      lambda c: _build_model(c, personnes))
+
+
+class _Plan:
+    """Sélection en cours et coût tenu à jour ingrédient par ingrédient."""
+
+    def __init__(self, model: dict):
+        self.m = model
+        n = len(model["labels"])
+        self.count = [0] * n      # recettes qui utilisent l'ingrédient
+        self.numeric = [0] * n    # dont avec une quantité
+        self.total = [0.0] * n    # quantité cumulée
+        self.selected = []
+        self.cost = 0.0
+
+    def _contrib(self, j, count, numeric, total) -> float:
+        if count == 0:
+            return 0.0
+        if numeric < count:
+            return self.m["weights"][j]  # une recette sans quantité : l'ingrédient reste à acheter
+        if total <= engine.FLOAT_EPS:
+            return 0.0
+        return self.m["weights"][j] * max(0.0, total - self.m["pantry"][j]) / total
+
+    def delta(self, i: int, sign: int = 1) -> float:
+        """Variation du coût si l'on ajoute (sign=1) ou retire (sign=-1) la recette i."""
+        d = 0.0
+        count, numeric, total = self.count, self.numeric, self.total
+        for j, val in self.m["needs"][i]:
+            c, nu, t = count[j], numeric[j], total[j]
+            new_nu, new_t = (nu + sign, t + sign * val) if val is not None else (nu, t)
+            d += self._contrib(j, c + sign, new_nu, new_t) - self._contrib(j, c, nu, t)
+        return d
+
+    def apply(self, i: int, sign: int = 1):
+        self.cost += self.delta(i, sign)
+        for j, val in self.m["needs"][i]:
+            self.count[j] += sign
+            if val is not None:
+                self.numeric[j] += sign
+                self.total[j] += sign * val
+        if sign > 0:
+            self.selected.append(i)
+        else:
+            self.selected.remove(i)
+
+
+# ---------- CONTRAINTES ----------
+class _Constraints:
+    def __init__(self, model: dict, k: int, constraints: dict, candidates):
+        self.model = model
+        self.quotas = {category_key(c): q for c, q in (constraints.get("quotas") or {}).items()}
+        pos = model["positions"]
+        excluded = {pos[n] for n in constraints.get("exclude") or () if n in pos}
+        missing = [n for n in constraints.get("require") or () if n not in pos]
+        if missing:
+            raise ValueError(f"Recettes imposées inconnues : {', '.join(missing)}")
+        self.required = list(dict.fromkeys(pos[n] for n in constraints.get("require") or ()))
+        if len(self.required) > k:
+            raise ValueError(f"{len(self.required)} recettes imposées pour un plan de {k}")
+        req = set(self.required)
+        self.candidates = [i for i in candidates if i not in excluded and i not in req]
+
+    def allows(self, plan: _Plan, i: int) -> bool:
+        cat = self.model["categories"][i]
+        quota = self.quotas.get(cat)
+        if quota is None:
+            return True
+        used = sum(1 for s in plan.selected if self.model["categories"][s] == cat)
+        return used < quota
+
+
+# ---------- SOLVEURS ----------
+def _start(model, cons) -> _Plan:
+    plan = _Plan(model)
+    for i in cons.required:
+        plan.apply(i)
+    return plan
+
+def _greedy_fill(plan: _Plan, k, cons, candidates, deadline=None) -> _Plan:
+    """Complète le plan jusqu'à k recettes ; passé `deadline`, chaque choix se fait parmi les
+    LATE_SCAN premiers candidats encore possibles (le plan reste complet, le temps borné)."""
+    chosen = set(plan.selected)
+    while len(plan.selected) < k:
+        best, best_d = None, math.inf
+        late = deadline is not None and time.perf_counter() >= deadline
+        seen = 0
+        for i in candidates:
+            if i in chosen or not cons.allows(plan, i):
+                continue
+            d = plan.delta(i)
+            if d < best_d:
+                best, best_d = i, d
+            seen += 1
+            if seen % LATE_SCAN == 0 and best is not None:
+                if late or (deadline is not None and time.perf_counter() >= deadline):
+                    break
+        if best is None:
+            break
+        plan.apply(best)
+        chosen.add(best)
+    return plan
+
+def solve_greedy(model, k, cons, deadline=None) -> _Plan:
+    """Ajoute à chaque étape la recette de plus faible coût marginal (égalités : ordre du corpus)."""
+    return _greedy_fill(_start(model, cons), k, cons, cons.candidates, deadline)
+
+def _swaps(plan: _Plan, cons, pool, deadline) -> _Plan:
+    """Échanges 1-contre-1 (retirer une recette, en ajouter une du pool) tant que le coût baisse."""
+    required = set(cons.required)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for out in [s for s in plan.selected if s not in required]:
+            before = plan.cost
+            plan.apply(out, -1)
+            best, best_cost = out, before
+            for i in pool:
+                if i in plan.selected or i == out or not cons.allows(plan, i):
+                    continue
+                c = plan.cost + plan.delta(i)
+                if c < best_cost - engine.FLOAT_EPS:
+                    best, best_cost = i, c
+            plan.apply(best)
+            if best != out:
+                improved = True
+            if time.perf_counter() >= deadline:
+                break
+    return plan
+
+def solve_local(model, k, cons, deadline=None) -> _Plan:
+    """Glouton sur le pool (candidats de plus faible coût seuls) + échanges, puis redémarrages en
+    imposant chaque recette du pool comme premier choix ; meilleur plan trouvé avant `deadline`."""
+    if deadline is None:
+        deadline = time.perf_counter() + TIME_LIMIT
+    alone = _Plan(model)
+    pool = sorted(cons.candidates, key=lambda i: (alone.delta(i), i))[:LOCAL_SEARCH_POOL]
+    best = _swaps(_greedy_fill(_start(model, cons), k, cons, pool, deadline), cons, pool, deadline)
+    for first in pool:
+        if time.perf_counter() >= deadline or len(cons.required) >= k:
+            break
+        plan = _start(model, cons)
+        if not cons.allows(plan, first):
+            continue
+        plan.apply(first)
+        plan = _swaps(_greedy_fill(plan, k, cons, pool, deadline), cons, pool, deadline)
+        # plan le plus complet d'abord (quotas), puis le moins cher
+        if (-len(plan.selected), plan.cost + engine.FLOAT_EPS) < (-len(best.selected), best.cost):
+            best = plan
+    return best
+
+def solve_exact(model, k, cons) -> _Plan:
+    """Séparation-évaluation : le coût ne fait que croître quand on ajoute une recette,
+    donc une sélection partielle déjà plus chère que la meilleure connue est abandonnée."""
+    # borne initiale : la recherche locale, à égalité on garde sa solution
+    seed = solve_local(model, k, cons, time.perf_counter() + TIME_LIMIT / 4)
+    best = {"cost": seed.cost + engine.FLOAT_EPS, "selection": list(seed.selected)}
+    plan = _start(model, cons)
+    alone = _Plan(model)
+    order = sorted(cons.candidates, key=lambda i: (alone.delta(i), i))
+
+    def dfs(start):
+        if plan.cost >= best["cost"] - engine.FLOAT_EPS:
+            return
+        if len(plan.selected) == k:
+            best["cost"], best["selection"] = plan.cost, list(plan.selected)
+            return
+        if len(order) - start < k - len(plan.selected):
+            return
+        for pos in range(start, len(order)):
+            i = order[pos]
+            if not cons.allows(plan, i):
+                continue
+            plan.apply(i)
+            dfs(pos + 1)
+            plan.apply(i, -1)
+
+    dfs(0)
+    result = _Plan(model)
+    for i in best["selection"]:
+        result.apply(i)
+    return result
+
+
+def _summary(model, plan: _Plan, solver: str, elapsed: float) -> dict:
+    used = [j for j, c in enumerate(plan.count) if c]
+    market = [j for j in used if model["labels"][j][2] == "marché"]
+    return {
+        "selection": [model["names"][i] for i in plan.selected],
+        "cost": round(plan.cost, 4),
+        "solver": solver,
+        "items": len(used),
+        "market_items": len(market),
+        "shared_market_items": sum(1 for j in market if plan.count[j] > 1),
+        "elapsed_s": round(elapsed, 4),
+    }
+
+
+def optimize_plan(source, k: int, personnes: int, constraints: dict | None = None, solver: str = "auto") -> dict:
+    """Choisit `k` recettes qui minimisent le coût d'achat restant (après placard).
+
+    constraints :
+      "candidates" : "matching" (défaut : recettes retenues par compute_matching), "all", ou liste de noms
+      "quotas"     : {catégorie: nombre maximum} (catégorie avec ou sans emoji)
+      "exclude"    : noms à ne jamais proposer ; "require" : noms imposés
+    solver : "exact", "greedy", "local", ou "auto" (exact si le nombre de combinaisons est raisonnable).
+    Glouton et local rendent leur plan en TIME_LIMIT secondes environ, construction du modèle comprise.
+    """
+    t0 = time.perf_counter()
+    deadline = t0 + TIME_LIMIT
+    ctx = engine.context(source)
+    constraints = constraints or {}
+    model = plan_model(ctx, personnes)
+
+    cand = constraints.get("candidates", "matching")
+    if cand == "all":
+        candidates = range(len(model["names"]))
+    else:
+        if cand == "matching":
+            cand = [r["name"] for r in engine.compute_matching(ctx, with_text=False)["scored"]]
+        candidates = [model["positions"][n] for n in cand if n in model["positions"]]
+    cons = _Constraints(model, k, constraints, candidates)
+
+    if solver == "auto":
+        free = k - len(cons.required)
+        solver = "exact" if math.comb(len(cons.candidates), max(free, 0)) <= EXACT_MAX_COMBINATIONS else "local"
+    solvers = {"exact": solve_exact, "greedy": solve_greedy, "local": solve_local}
+    if solver not in solvers:
+        raise ValueError(f"solveur inconnu : {solver!r} (attendu {', '.join(solvers)} ou 'auto')")
+    plan = solvers[solver](model, k, cons) if solver == "exact" else solvers[solver](model, k, cons, deadline)
+    return _summary(model, plan, solver, time.perf_counter() - t0)
@@ -0,0 +1,101 @@
+# profiling.py
+# Instrumentation à la demande : temps et compteurs par étape (lecture des fichiers, index,
+# score, tri, texte, courses, placard, écriture), pour le thread courant.
+# Désactivée, une étape coûte un appel de fonction et un getattr (pas de mesure du temps).
+# Usage :
+#   with profiling.collect() as stats:            # ou collect("cprofile") / collect("tracemalloc")
+#       engine.compute_matching("data")
+#   stats → {'stages': {nom: {'calls', 'seconds'}}, 'counters': {nom: n}, 'seconds': total, ...}
+from __future__ import annotations
+
+import contextlib, io, threading, time
+
+CAPTURE_TOP = 25  # lignes gardées dans les rapports cProfile / tracemalloc
+
+_local = threading.local()
+_NULL = contextlib.nullcontext()
+
+
+class _Stage:
+    __slots__ = ("stats", "name", "t0")
+
+    def __init__(self, stats: dict, name: str):
+        self.stats, self.name = stats, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        entry = self.stats["stages"].setdefault(self.name, {"calls": 0, "seconds": 0.0})
+        entry["calls"] += 1
+        entry["seconds"] += time.perf_counter() - self.t0
+        return False
+
+
+def stage(name: str):
+    """Contexte qui chronomètre l'étape `name` si une collecte est active (sinon ne fait rien)."""
+    stats = getattr(_local, "stats", None)
+    return _NULL if stats is None else _Stage(stats, name)
+
+def count(name: str, n: int = 1):
+    """Ajoute n au compteur `name` si une collecte est active."""
+    stats = getattr(_local, "stats", None)
+    if stats is not None:
+        stats["counters"][name] = stats["counters"].get(name, 0) + n
+
+def enabled() -> bool:
+    return getattr(_local, "stats", None) is not None
+
+
+@contextlib.contextmanager
+def collect(capture: str | None = None, top: int = CAPTURE_TOP):
+    """Active l'instrumentation dans ce bloc (thread courant) et remplit le dict renvoyé.
+
+    `capture="cprofile"` : ajoute 'profile' (fonctions les plus coûteuses, temps cumulé) ;
+    `capture="tracemalloc"` : ajoute 'allocations' (lignes qui allouent le plus) et 'peak_bytes'.
+    """
+    if capture not in (None, "cprofile", "tracemalloc"):
+        raise ValueError(f"capture inconnue : {capture!r} (attendu 'cprofile' ou 'tracemalloc')")
+    stats = {"stages": {}, "counters": {}, "seconds": 0.0}
+    previous = getattr(_local, "stats", None)
+    _local.stats = stats
+    profiler = tracing = None
+    if capture == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif capture == "tracemalloc":
+        import tracemalloc
+        tracing = not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+    t0 = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats["seconds"] = time.perf_counter() - t0
+        _local.stats = previous
+        if profiler is not None:
+            import pstats
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+            stats["profile"] = out.getvalue()
+        elif capture == "tracemalloc":
+            diff = tracemalloc.take_snapshot().compare_to(before, "lineno")
+            stats["allocations"] = [str(d) for d in diff[:top]]
+            stats["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            if tracing:
+                tracemalloc.stop()
+
+
+def report(stats: dict) -> str:
+    """Tableau texte des étapes (temps décroissant) et des compteurs."""
+    lines = [f"total {stats['seconds'] * 1e3:9.2f} ms"]
+    for name, s in sorted(stats["stages"].items(), key=lambda kv: -kv[1]["seconds"]):
+        lines.append(f"  {name:40s} {s['seconds'] * 1e3:9.2f} ms  × {s['calls']}")
+    for name, n in sorted(stats["counters"].items()):
+        lines.append(f"  {name:40s} {n:9d}")
+    return "\n".join(lines)
@@ -0,0 +1,206 @@
+# provisions_db.py
+# Placard en base SQLite (optionnel) : provisions + quantity_min + historique des consommations.
+# Chaque décrément est une transaction (BEGIN IMMEDIATE) et la base est en mode WAL : plusieurs
+# foyers / onglets / processus peuvent écrire en même temps sans perte de mise à jour, et les
+# lecteurs ne sont jamais bloqués. courses_placard est une vue, pas un fichier réécrit.
+# Usage : python provisions_db.py import data/provisions.txt data/provisions.db [--data data/]
+#         python provisions_db.py export data/provisions.db data/
+#         python provisions_db.py placard data/provisions.db
+from __future__ import annotations
+
+import argparse, json, sqlite3, sys, time
+from pathlib import Path
+
+import engine
+
+BUSY_TIMEOUT = 30.0  # secondes d'attente du verrou d'écriture
+
+# quantity / quantity_min sans type déclaré : SQLite garde int et float tels quels (export JSON identique)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS provisions (
+    norm TEXT PRIMARY KEY,          -- normalize(canon(name)) : clé de provisions_index
+    pos INTEGER NOT NULL,           -- ordre des entrées dans provisions.txt
+    name TEXT NOT NULL,
+    quantity NOT NULL,
+    quantity_min NOT NULL,
+    extra TEXT NOT NULL DEFAULT '{}' -- autres champs de l'entrée JSON
+);
+CREATE TABLE IF NOT EXISTS consumption (
+    id INTEGER PRIMARY KEY,
+    at REAL NOT NULL,
+    batch INTEGER NOT NULL,         -- un appel à apply_consumption
+    norm TEXT NOT NULL,
+    used REAL NOT NULL,
+    before NOT NULL,
+    after NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+INSERT OR IGNORE INTO meta VALUES ('version', 0);
+CREATE VIEW IF NOT EXISTS courses_placard AS
+    SELECT name, quantity_min - quantity AS manque FROM provisions
+    WHERE quantity < quantity_min ORDER BY pos;
+"""
+
+
+class ProvisionsDB:
+    """Placard stocké dans le fichier SQLite `path` (créé au besoin)."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(SCHEMA)
+
+    def _connect(self) -> "_Closing":
+        # une connexion par opération : utilisable depuis n'importe quel thread ou processus
+        con = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        con.execute("PRAGMA synchronous=NORMAL")
+        return _Closing(con)
+
+    def _write(self, con, fn):
+        """Exécute fn(con) dans une transaction d'écriture et incrémente la version."""
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(con)
+            con.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        return result
+
+    # ---------- LECTURE ----------
+    def version(self) -> int:
+        """Compteur incrémenté à chaque écriture (sert de signature au cache du foyer)."""
+        with self._connect() as con:
+            return con.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def provisions(self) -> list:
+        """Entrées au format de provisions.txt, dans l'ordre du fichier importé."""
+        with self._connect() as con:
+            rows = con.execute("SELECT name, quantity, quantity_min, extra FROM provisions ORDER BY pos").fetchall()
+        return [{"name": name, "quantity": q, "quantity_min": q_min, **json.loads(extra)}
+                for name, q, q_min, extra in rows]
+
+    def courses_placard(self) -> list:
+        """Réappro du placard (même contenu que courses_placard.txt)."""
+        with self._connect() as con:
+            rows = con.execute("SELECT name, manque FROM courses_placard").fetchall()
+        return [{"name": name, "quantity": round(float(manque), 2)} for name, manque in rows]
+
+    def history(self, limit: int | None = None) -> list:
+        """Consommations enregistrées, la plus récente d'abord."""
+        sql = "SELECT at, batch, norm, used, before, after FROM consumption ORDER BY id DESC"
+        with self._connect() as con:
+            rows = con.execute(sql + (" LIMIT ?" if limit else ""), (limit,) if limit else ()).fetchall()
+        return [dict(zip(("at", "batch", "norm", "used", "before", "after"), r)) for r in rows]
+
+    # ---------- ÉCRITURE ----------
+    def replace_all(self, provisions: list, aliases: dict | None = None):
+        """Remplace tout le placard (l'historique est conservé) ; `aliases` = ctx.aliases du dossier data/."""
+        rows = {}
+        for pos, p in enumerate(provisions):
+            extra = {k: v for k, v in p.items() if k not in ("name", "quantity", "quantity_min")}
+            # même règle que provisions_index : à clé égale, la dernière entrée gagne (à la place de la première)
+            norm = engine.normalize(engine.canon(p["name"], aliases))
+            rows[norm] = (
+                rows[norm][0] if norm in rows else pos, p["name"], p.get("quantity", 0), p.get("quantity_min", 0), json.dumps(extra, ensure_ascii=False))
+
+        def fn(con):
+            con.execute("DELETE FROM provisions")
+            con.executemany("INSERT INTO provisions VALUES (?, ?, ?, ?, ?, ?)",
+                            [(norm, *row) for norm, row in rows.items()])
+        with self._connect() as con:
+            self._write(con, fn)
+
+    def apply_consumption(self, consommation_totale: dict, aliases: dict | None = None) -> list:
+        """Décrémente le placard de toute une liste de courses en une transaction ; renvoie courses_placard.
+
+        `consommation_totale` : {ingrédient normalisé: quantité utilisée}, comme compute_courses, avec
+        les alias `aliases` (ctx.aliases) : une entrée importée avec d'autres alias est retrouvée par son nom.
+        Lève ValueError (rien n'est décrémenté) si une clé ne correspond à aucune entrée du placard.
+        """
+        def fn(con):
+            now = time.time()
+            batch = con.execute("SELECT COALESCE(MAX(batch), 0) + 1 FROM consumption").fetchone()[0]
+            by_key, unknown = None, []  # clé avec `aliases` → norm stocké, calculé au premier raté
+            for key, used in consommation_totale.items():
+                norm = key
+                row = con.execute("SELECT quantity FROM provisions WHERE norm = ?", (norm,)).fetchone()
+                if row is None:
+                    if by_key is None:
+                        by_key = {engine.normalize(engine.canon(name, aliases)): n
+                                  for n, name in con.execute("SELECT norm, name FROM provisions")}
+                    norm = by_key.get(key)
+                    row = None if norm is None else \
+                        con.execute("SELECT quantity FROM provisions WHERE norm = ?", (norm,)).fetchone()
+                if row is None:
+                    unknown.append(key)
+                    continue
+                after = max(0, float(row[0]) - float(used))
+                con.execute("UPDATE provisions SET quantity = ? WHERE norm = ?", (after, norm))
+                con.execute("INSERT INTO consumption (at, batch, norm, used, before, after) VALUES (?, ?, ?, ?, ?, ?)",
+                            (now, batch, norm, float(used), row[0], after))
+            if unknown:
+                raise ValueError(f"absent(s) du placard {self.path} : {', '.join(sorted(unknown))}")
+        with self._connect() as con:
+            self._write(con, fn)
+        return self.courses_placard()
+
+    # ---------- IMPORT / EXPORT JSON ----------
+    def import_json(self, provisions_path: str | Path, aliases: dict | None = None):
+        """Remplace le placard par provisions.txt ; `aliases` = ctx.aliases du dossier data/ qui lira la base."""
+        with open(provisions_path, encoding="utf-8") as f:
+            self.replace_all(json.load(f), aliases)
+
+    def export_json(self, provisions_path: str | Path, courses_placard_path: str | Path | None = None):
+        """Écrit provisions.txt (et courses_placard.txt) au format habituel."""
+        engine._dump_json(self.provisions(), Path(provisions_path))
+        if courses_placard_path is not None:
+            engine._dump_json(self.courses_placard(), Path(courses_placard_path))
+
+
+class _Closing:
+    """Connexion utilisable en `with` qui se ferme en sortie (sqlite3 ne fait que commit/rollback)."""
+
+    def __init__(self, con: sqlite3.Connection):
+        self.con = con
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self.con
+
+    def __exit__(self, *exc):
+        self.con.close()
+        return False
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Placard en base SQLite.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    i = sub.add_parser("import", help="charge provisions.txt dans la base")
+    i.add_argument("provisions_json")
+    i.add_argument("db")
+    i.add_argument("--data", help="dossier data/ dont les alias automatiques servent de clés (défaut : celui du JSON)")
+    e = sub.add_parser("export", help="écrit provisions.txt et courses_placard.txt depuis la base")
+    e.add_argument("db")
+    e.add_argument("out_dir")
+    c = sub.add_parser("placard", help="affiche la réappro du placard")
+    c.add_argument("db")
+    args = p.parse_args(argv)
+
+    db = ProvisionsDB(args.db)
+    if args.cmd == "import":
+        data_dir = Path(args.data) if args.data else Path(args.provisions_json).parent
+        db.import_json(args.provisions_json, engine._build_aliases(data_dir / engine.AUTO_ALIASES_FILE)["aliases"])
+        print(f"→ {len(db.provisions())} provisions importées dans {args.db}")
+    elif args.cmd == "export":
+        out = Path(args.out_dir)
+        db.export_json(out / "provisions.txt", out / "courses_placard.txt")
+        print(f"→ Placard exporté dans {out.resolve()}")
+    elif args.cmd == "placard":
+        print(json.dumps(db.courses_placard(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+# quantities.py
+# Quantités avec unité : dimensions (masse, volume, cuillères, nombre), conversions dans une même
+# dimension, et entre dimensions pour un ingrédient donné (poids d'une pièce, densité).
+# Sert à cumuler les besoins de plusieurs recettes et à déduire le placard sans additionner
+# des grammes et des pièces ; toute conversion impossible est signalée, jamais devinée.
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import NamedTuple
+
+from ingredient_parser import canonical_unit
+
+MASS, VOLUME, SPOON, COUNT = "masse", "volume", "cuillère", "nombre"
+
+# unité canonique → (dimension, facteur vers l'unité de base : g, ml, cc, pièce)
+UNIT_DEFS = {
+    "mg": (MASS, 0.001), "g": (MASS, 1.0), "kg": (MASS, 1000.0),
+    "ml": (VOLUME, 1.0), "cl": (VOLUME, 10.0), "l": (VOLUME, 1000.0),
+    "cc": (SPOON, 1.0), "cs": (SPOON, 3.0),
+    "pièce": (COUNT, 1.0),
+}
+BASE_UNITS = {MASS: "g", VOLUME: "ml", SPOON: "cc", COUNT: "pièce"}
+# les autres unités reconnues (sachet, pot, tranche…) comptent des contenants : une dimension chacune
+
+
+class Unit(NamedTuple):
+    name: str        # unité canonique
+    dim: str         # dimension ; « nombre:sachet » pour un contenant
+    factor: float    # facteur vers l'unité de base de la dimension
+
+
+@lru_cache(maxsize=1024)
+def unit_info(unit: str | None) -> Unit | None:
+    """Unit d'une graphie ('pièce(s)', 'Kg', '' = pièce), ou None si l'unité n'est pas une mesure connue."""
+    if unit is None or not unit.strip():
+        return Unit("pièce", COUNT, 1.0)
+    name = canonical_unit(unit)
+    if name is None:
+        return None
+    dim, factor = UNIT_DEFS.get(name, (f"{COUNT}:{name}", 1.0))
+    return Unit(name, dim, factor)
+
+
+class Conversions(NamedTuple):
+    """Passerelles entre dimensions pour un ingrédient (catalogue : 'poids', 'densite')."""
+    piece_kg: float | None = None   # kg par pièce
+    density: float | None = None    # kg par litre
+
+    def grams_per(self, dim: str) -> float | None:
+        """Grammes par unité de base de `dim` (g, ml, pièce), ou None."""
+        if dim == MASS:
+            return 1.0
+        if dim == COUNT and self.piece_kg:
+            return self.piece_kg * 1000.0
+        if dim == VOLUME and self.density:
+            return self.density
+        return None
+
+NO_CONVERSIONS = Conversions()
+
+
+def convert(value: float, src: str | None, dst: str | None, conv: Conversions = NO_CONVERSIONS) -> float | None:
+    """`value` exprimé en `src`, converti en `dst` ; None si les unités ne sont pas convertibles."""
+    if src == dst:
+        return value
+    a, b = unit_info(src), unit_info(dst)
+    if a is None or b is None:
+        return None
+    base = value * a.factor
+    if a.dim != b.dim:
+        g_src, g_dst = conv.grams_per(a.dim), conv.grams_per(b.dim)
+        if g_src is None or g_dst is None:
+            return None
+        base = base * g_src / g_dst
+    return base / b.factor
+
+
+class UnitMismatch(ValueError):
+    """Deux quantités d'un même ingrédient qu'aucune conversion connue ne permet d'additionner."""
+
+
+class Quantity:
+    """Total d'un ingrédient : une quantité principale (unité d'affichage) + d'éventuels restes
+    dans des unités non convertibles, gardés à part plutôt qu'additionnés à tort."""
+
+    __slots__ = ("value", "unit", "extra", "conv")
+
+    def __init__(self, conv: Conversions = NO_CONVERSIONS):
+        self.value, self.unit = None, None
+        self.extra = []  # [[valeur, unité]] non convertibles vers `unit`
+        self.conv = conv
+
+    def add(self, value: float, unit: str | None, ndigits: int = 2):
+        """Ajoute `value` `unit` ; lève UnitMismatch (après l'avoir mis de côté) si non convertible."""
+        if self.value is None:
+            self.value, self.unit = value, unit
+            return
+        if unit == self.unit:
+            self.value += value
+            return
+        v = convert(value, unit, self.unit, self.conv)
+        if v is not None:
+            self.value += round(v, ndigits)
+            return
+        for part in self.extra:
+            v = convert(value, unit, part[1], self.conv)
+            if v is not None:
+                part[0] += v if unit == part[1] else round(v, ndigits)
+                return
+        self.extra.append([value, unit])
+        raise UnitMismatch(f"{value} {unit or ''}".strip() + f" non convertible en {self.unit or 'pièce(s)'}")
+
+
+def aggregate(keys, values, units, conversions=None, use_numpy: bool = True) -> dict:
+    """Totaux en unités de base : {(clé, dimension): total}, dimension après conversion vers la masse
+    quand l'ingrédient le permet. Calcul en bloc avec NumPy s'il est installé (plans de plusieurs
+    semaines), en Python sinon ; `conversions` : {clé: Conversions}. Valeurs sans unité connue ignorées."""
+    conversions = conversions or {}
+    groups = {}   # (clé, dimension) → indice
+    pairs = {}    # (clé, unité) → (indice, facteur vers l'unité de base), None si unité inconnue
+    ids, factors, vals = [], [], []
+    for key, value, unit in zip(keys, values, units):
+        if value is None:
+            continue
+        pair = pairs.get((key, unit), False)
+        if pair is False:
+            pair = pairs[(key, unit)] = _group(key, unit, conversions, groups)
+        if pair is None:
+            continue
+        ids.append(pair[0])
+        factors.append(pair[1])
+        vals.append(value)
+    np = None
+    if use_numpy:
+        try:
+            import numpy as np
+        except ImportError:
+            pass
+    if np is None:
+        totals = [0.0] * len(groups)
+        for gid, f, v in zip(ids, factors, vals):
+            totals[gid] += v * f
+        return dict(zip(groups, totals))
+    weights = np.asarray(vals, dtype=np.float64) * np.asarray(factors, dtype=np.float64)
+    return dict(zip(groups, np.bincount(np.asarray(ids, dtype=np.int64), weights=weights, minlength=len(groups)).tolist()))
+
+def base_unit(dim: str) -> str:
+    """Unité de base d'une dimension d'aggregate : 'masse' → 'g', 'nombre:sachet' → 'sachet'."""
+    return BASE_UNITS.get(dim) or dim.split(":", 1)[1]
+
+def _group(key, unit, conversions, groups):
+    info = unit_info(unit)
+    if info is None:
+        return None
+    dim, factor = info.dim, info.factor
+    g = conversions.get(key, NO_CONVERSIONS).grams_per(dim) if dim != MASS else None
+    if g is not None:
+        dim, factor = MASS, factor * g
+    return groups.setdefault((key, dim), len(groups)), factor
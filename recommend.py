@@ -0,0 +1,217 @@
+# recommend.py
+# Recettes « les plus proches d'être cuisinables » : les K meilleures selon un coût, sans seuil
+# MATCH_MIN ni tri de toutes les recettes.
+#   coût = Σ ingrédients manquants (marché non disponible, ou rayon placard absent du placard),
+#          pondérés INDISPENSABLE_WEIGHT / OPTIONAL_WEIGHT
+#        + PURCHASE_WEIGHT × Σ poids planner (frais 1.5, autres 1) × part de l'ingrédient à acheter
+#          après déduction du placard (1 sans quantité, comme dans planner.py)
+# Le coût se décompose par ligne : la partie connue sans regarder les quantités du placard
+# (manques + lignes sans placard, achetées en entier) est un minorant exact de chaque recette.
+#   NumPy : coût exact de toutes les recettes en bloc (tableau de flottants), puis argpartition.
+#   Python : recettes parcourues par minorant croissant (tas), tas borné des K meilleures,
+#            arrêt dès que le minorant suivant dépasse le K-ième coût.
+# Seules les K recettes retenues sont détaillées (score_recette).
+from __future__ import annotations
+
+import heapq, math
+
+try:
+    import numpy as np
+except ImportError:  # optionnel : parcours par minorants en Python
+    np = None
+
+import engine
+import planner
+
+INDISPENSABLE_WEIGHT = 3.0  # ingrédient manquant marqué indispensable
+OPTIONAL_WEIGHT = 1.0       # ingrédient manquant non indispensable
+PURCHASE_WEIGHT = 0.5       # part à acheter (0..1) × poids planner de l'ingrédient
+COST_DECIMALS = 6           # arrondi du coût pour le classement (NumPy et Python départagent pareil)
+_PARTS = ("recettes", "catalogue", "dispos", "provisions")  # parts dont dépendent coûts et minorants
+
+
+# ---------- LIGNES (par recettes + catalogue + nombre de personnes) ----------
+def _build_lines(ctx, personnes: int) -> dict:
+    demand = planner.demand_model(ctx, personnes)
+    start, ids, vals = [0], [], []
+    for needs in demand["needs"]:
+        for j, val in needs:
+            ids.append(j)
+            vals.append(math.nan if val is None else float(val))
+        start.append(len(ids))
+    # achat de la ligne entière (placard vide) ; 0 pour une quantité nulle, jamais achetée
+    weights = demand["weights"]
+    full = [0.0 if v <= engine.FLOAT_EPS else PURCHASE_WEIGHT * weights[j] for j, v in zip(ids, vals)]
+    lines = {"demand": demand, "start": start, "ids": ids, "vals": vals, "full": full}
+    if np is not None:
+        lines["np"] = (np.asarray(start, dtype=np.int64), np.asarray(ids, dtype=np.int64),
+                       np.asarray(vals, dtype=np.float64), np.asarray(full, dtype=np.float64))
+    return lines
+
+def lines_model(ctx, personnes: int) -> dict:
+    return ctx.cached(f"reco_lines_{personnes}", ("recettes", "catalogue"), lambda c: _build_lines(c, personnes))
+
+
+# ---------- TERMES PAR INGRÉDIENT (dépendent aussi des dispos et du placard) ----------
+def _build_terms(ctx, personnes: int) -> dict:
+    lines = lines_model(ctx, personnes)
+    labels = lines["demand"]["labels"]
+    miss = []
+    for n, _, rayon in labels:
+        missing = ((rayon == "marché" and engine.find_available_market(ctx, n) is None)
+                   or (rayon in engine.PANTRY_RAYONS and engine.find_available_pantry(ctx, n) is None))
+        weight = INDISPENSABLE_WEIGHT if ctx.indispensables_map.get(n, False) else OPTIONAL_WEIGHT
+        miss.append(weight if missing else 0.0)
+    return {"miss": miss, "pantry": planner.pantry_vector(ctx, labels, lines["demand"]["units"])}
+
+def terms_model(ctx, personnes: int) -> dict:
+    return ctx.cached(f"reco_terms_{personnes}", _PARTS, lambda c: _build_terms(c, personnes))
+
+def _build_costs(ctx, personnes: int):
+    lines, terms = lines_model(ctx, personnes), terms_model(ctx, personnes)
+    return np.round(_costs_numpy(lines, np.asarray(terms["miss"]), np.asarray(terms["pantry"])), COST_DECIMALS)
+
+def _build_bounds(ctx, personnes: int) -> dict:
+    # minorant : manques + lignes sans placard (achat entier) ; les lignes avec placard ne sont
+    # évaluées que pour les recettes sorties du tas
+    lines, terms = lines_model(ctx, personnes), terms_model(ctx, personnes)
+    start, ids, full = lines["start"], lines["ids"], lines["full"]
+    miss, pantry = terms["miss"], terms["pantry"]
+    lower = []
+    for i in range(len(start) - 1):
+        total = 0.0
+        for p in range(start[i], start[i + 1]):
+            j = ids[p]
+            total += miss[j] + (full[p] if pantry[j] <= 0 else 0.0)
+        lower.append(total)
+    order = [(round(b, COST_DECIMALS), i) for i, b in enumerate(lower)]
+    heapq.heapify(order)  # O(n), sans tri : chaque requête en dépile une copie
+    return {"lower": lower, "order": order}
+
+def costs_model(ctx, personnes: int):
+    """Coût de chaque recette (tableau NumPy, arrondi à COST_DECIMALS)."""
+    return ctx.cached(f"reco_costs_{personnes}", _PARTS, lambda c: _build_costs(c, personnes))
+
+def bounds_model(ctx, personnes: int) -> dict:
+    """Minorant du coût de chaque recette et tas (minorant, i)."""
+    return ctx.cached(f"reco_bounds_{personnes}", _PARTS, lambda c: _build_bounds(c, personnes))
+
+
+def _fraction(val: float, stock: float) -> float:
+    """Part d'un besoin `val` à acheter avec `stock` au placard (règles de planner._Plan._contrib)."""
+    if val != val:  # pas de quantité : l'ingrédient reste à acheter
+        return 1.0
+    if val <= engine.FLOAT_EPS:
+        return 0.0
+    return max(0.0, val - stock) / val
+
+def _exact_python(lines: dict, terms: dict, bounds: dict, i: int) -> float:
+    """Coût de la recette i : minorant + part achetée des lignes couvertes en partie par le placard."""
+    pantry, weights = terms["pantry"], lines["demand"]["weights"]
+    ids, vals = lines["ids"], lines["vals"]
+    cost = bounds["lower"][i]
+    for p in range(lines["start"][i], lines["start"][i + 1]):
+        j = ids[p]
+        if pantry[j] > 0:
+            cost += PURCHASE_WEIGHT * weights[j] * _fraction(vals[p], pantry[j])
+    return cost
+
+def _costs_numpy(lines: dict, miss, pantry):
+    start, ids, vals, full = lines["np"]
+    weights = np.asarray(lines["demand"]["weights"], dtype=np.float64)
+    stock = pantry[ids]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.where(np.isnan(vals), 1.0, np.maximum(0.0, vals - stock) / vals)
+    purchase = np.where(stock > 0, PURCHASE_WEIGHT * weights[ids] * frac, full)
+    purchase[vals <= engine.FLOAT_EPS] = 0.0
+    per_line = miss[ids] + purchase
+    sums = np.zeros(len(start) - 1)
+    nonempty = start[:-1] < start[1:]
+    sums[nonempty] = np.add.reduceat(per_line, start[:-1][nonempty])
+    return sums
+
+
+# ---------- TOP K ----------
+def _top_numpy(ctx, personnes: int, k: int, keep) -> list:
+    costs = costs_model(ctx, personnes)
+    idx = np.flatnonzero(keep) if keep is not None else np.arange(len(costs))
+    if idx.size > k:
+        kth = np.partition(costs[idx], k - 1)[k - 1]
+        idx = idx[costs[idx] <= kth]  # toutes les égalités au seuil : départagées par nom ensuite
+    return [(float(costs[i]), int(i)) for i in idx]
+
+def _top_python(ctx, personnes: int, k: int, keep) -> list:
+    lines, terms, bounds = lines_model(ctx, personnes), terms_model(ctx, personnes), bounds_model(ctx, personnes)
+    order = bounds["order"][:]  # tas des minorants, copié pour être dépilé
+    names = lines["demand"]["names"]
+    best = []  # tas des K meilleures, la pire en tête : (-coût, nom inversé, i)
+    while order:
+        lower, i = heapq.heappop(order)
+        if len(best) == k and lower > -best[0][0]:
+            break  # minorants restants ≥ celui-ci > K-ième coût : plus rien ne peut entrer
+        if keep is not None and not keep[i]:
+            continue
+        cost = round(_exact_python(lines, terms, bounds, i), COST_DECIMALS)
+        entry = (-cost, _Reversed((names[i].lower(), i)), i)
+        if len(best) < k:
+            heapq.heappush(best, entry)
+        elif entry > best[0]:
+            heapq.heapreplace(best, entry)
+    return [(-c, i) for c, _, i in best]
+
+class _Reversed:
+    """Clé d'ordre inversée (tas max sur le nom à coût égal)."""
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return self.key > other.key
+
+    def __gt__(self, other):
+        return self.key < other.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+def recommend(source, k: int = 10, personnes: int = 2, candidates=None, backend: str = "auto") -> list:
+    """Les `k` recettes de plus faible coût (voir en-tête), détaillées comme compute_matching.
+
+    Chaque ligne = score_recette + 'cost', 'missing' (ingrédients manquants) et 'purchase'
+    (part du coût due aux achats). `candidates` : noms de recettes autorisées (None = toutes).
+    `backend` : "numpy", "python" ou "auto" (NumPy s'il est installé).
+    """
+    ctx = engine.context(source)
+    if backend == "auto":
+        backend = "numpy" if np is not None else "python"
+    if backend not in ("numpy", "python") or (backend == "numpy" and np is None):
+        raise ValueError(f"backend indisponible : {backend!r} (attendu 'numpy', 'python' ou 'auto')")
+    if k <= 0:
+        return []
+    lines, terms = lines_model(ctx, personnes), terms_model(ctx, personnes)
+    demand = lines["demand"]
+    keep = None
+    if candidates is not None:
+        allowed = {demand["positions"][n] for n in candidates if n in demand["positions"]}
+        keep = [i in allowed for i in range(len(demand["names"]))]
+        if backend == "numpy":
+            keep = np.asarray(keep, dtype=bool)
+
+    top = (_top_numpy if backend == "numpy" else _top_python)(ctx, personnes, k, keep)
+    top = sorted(top, key=lambda ci: (ci[0], demand["names"][ci[1]].lower(), ci[1]))[:k]
+
+    table = engine.recipe_table(ctx)
+    out = []
+    for cost, i in top:
+        pos = table.positions[demand["names"][i]]
+        row = engine.score_recette(ctx, ctx.recettes[pos], ctx.recettes_keys[pos])
+        missing, purchase = [], 0.0
+        for p in range(lines["start"][i], lines["start"][i + 1]):
+            j = lines["ids"][p]
+            if terms["miss"][j]:
+                missing.append(demand["labels"][j][1])
+            purchase += PURCHASE_WEIGHT * demand["weights"][j] * _fraction(lines["vals"][p], terms["pantry"][j])
+        out.append({**row, "cost": round(cost, 3), "missing": sorted(missing), "purchase": round(purchase, 3)})
+    return out
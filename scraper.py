@@ -0,0 +1,568 @@
+# scraper.py
+# Scraping HelloFresh (logique issue de notebooks/scrape-hellofresh.ipynb), en pipeline :
+#   téléchargement concurrent (pool de threads, débit limité par hôte, cache disque ETag/Last-Modified)
+#   → parsing en pool de processus → fusion au fil de l'eau dans recettes_hellofresh.txt,
+#   avec un fichier de reprise (checkpoint) pour relancer un run interrompu sans tout refaire.
+# Bibliothèque standard uniquement (urllib, html.parser) : pas de requests / BeautifulSoup.
+# Usage : python scraper.py scrape [--urls data/urls_hellofresh.txt] [--out data/recettes_hellofresh.txt]
+#         python scraper.py serve-recorded [--cache-dir data/.scrape/cache] [--port 8000]
+from __future__ import annotations
+
+import argparse, hashlib, json, os, re, sys, threading, time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from email.utils import formatdate
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+import ingredient_parser
+
+# ---------- PARAMÈTRES ----------
+DATA_DIR = Path(__file__).resolve().parent / "data"
+SCRAPE_DIRNAME = ".scrape"  # cache HTTP + checkpoint, sous data/
+MAX_WORKERS = 8          # téléchargements simultanés
+PARSE_WORKERS = None     # processus de parsing (None = nb de CPU ; 0 = parsing dans le thread de téléchargement)
+RATE_PER_HOST = 4.0      # requêtes / seconde / hôte
+TIMEOUT = 30             # secondes
+RETRIES = 2              # nouvelles tentatives sur erreur réseau / 429 / 5xx
+FLUSH_EVERY = 25         # recettes entre deux réécritures du fichier de sortie
+
+UA = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/124.0.0.0 Safari/537.36"
+    )
+}
+
+
+def scrape_paths(data_dir: Path) -> tuple[Path, Path]:
+    """(dossier du cache HTTP, fichier checkpoint) pour un dossier data/."""
+    d = Path(data_dir) / SCRAPE_DIRNAME
+    return d / "cache", d / "checkpoint.jsonl"
+
+def _write_atomic(path: Path, payload: bytes):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+# ---------- PARSING HTML ----------
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+ISO_RE = re.compile(r"^P(T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)$", re.I)
+
+def clean_title(title: str) -> str:
+    return re.sub(r"\s*Recette\s*\|\s*HelloFresh\s*$", "", title).strip()
+
+def iso_to_human(iso: str) -> str:
+    """'PT40M' -> '40 min', 'PT1H30M' -> '1 h 30 min'"""
+    if not iso:
+        return ""
+    m = ISO_RE.match(iso.strip())
+    if not m:
+        return ""
+    h = int(m.group(2) or 0)
+    mnt = int(m.group(3) or 0)
+    parts = []
+    if h:
+        parts.append(f"{h} h")
+    if mnt:
+        parts.append(f"{mnt} min")
+    return " ".join(parts)
+
+
+class _Capture:
+    __slots__ = ("kind", "tag", "depth", "texts", "items")
+
+    def __init__(self, kind, tag):
+        self.kind, self.tag, self.depth = kind, tag, 1
+        self.texts, self.items = [], []
+
+    def text(self) -> str:
+        return " ".join(self.texts)
+
+
+class _PageParser(HTMLParser):
+    """Un seul passage sur la page : og:title, h1, JSON-LD, étapes d'instructions, textes visibles.
+
+    Les textes sont collectés comme get_text(" ", strip=True) de BeautifulSoup.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.og_title, self.h1 = None, None
+        self.jsonld = []     # contenus des <script type="application/ld+json">
+        self.steps = []      # blocs data-test-id="instruction-step"
+        self.events = []     # ("h", titre) / ("ul", [items]) dans l'ordre du document (repli instructions)
+        self.texts = []      # nœuds texte visibles (repli temps / difficulté)
+        self._open = []
+        self._raw = None     # tampon du <script>/<style> en cours (None = ignoré)
+        self._in_raw = False
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        if tag == "meta" and a.get("property") == "og:title" and self.og_title is None:
+            self.og_title = a.get("content")
+        if tag in ("script", "style"):
+            self._in_raw = True
+            self._raw = [] if tag == "script" and a.get("type") == "application/ld+json" else None
+            return
+        if tag in VOID_TAGS:
+            return
+        for c in self._open:
+            if c.tag == tag:
+                c.depth += 1
+        if a.get("data-test-id") == "instruction-step":
+            self._open.append(_Capture("box", tag))
+        if tag == "h1" and self.h1 is None:
+            self._open.append(_Capture("h1", tag))
+        elif tag in ("h2", "h3", "h4"):
+            self._open.append(_Capture("h", tag))
+        elif tag in ("li", "ul"):
+            self._open.append(_Capture(tag, tag))
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            if self._raw is not None:
+                self.jsonld.append("".join(self._raw))
+            self._in_raw, self._raw = False, None
+            return
+        for c in [c for c in self._open if c.tag == tag]:
+            c.depth -= 1
+            if c.depth == 0:
+                self._open.remove(c)
+                self._close(c)
+
+    def _close(self, c: _Capture):
+        text = c.text()
+        if c.kind == "li":
+            for kind in ("ul", "box"):
+                parent = next((o for o in reversed(self._open) if o.kind == kind), None)
+                if parent is not None:
+                    parent.items.append(text)
+        elif c.kind == "ul":
+            self.events.append(("ul", c.items))
+        elif c.kind == "h":
+            self.events.append(("h", text))
+        elif c.kind == "h1":
+            self.h1 = text
+        elif c.kind == "box":
+            step = " ".join(c.items) if c.items else text
+            if step:
+                self.steps.append(step)
+
+    def handle_data(self, data):
+        if self._in_raw:
+            if self._raw is not None:
+                self._raw.append(data)
+            return
+        s = data.strip()
+        if not s:
+            return
+        self.texts.append(s)
+        for c in self._open:
+            c.texts.append(s)
+
+
+def _instructions(page: _PageParser) -> list:
+    if page.steps:
+        return page.steps
+    # repli : listes sous un titre « Instructions », jusqu'au titre suivant
+    steps, inside = [], False
+    for kind, value in page.events:
+        if kind == "h":
+            if inside:
+                break
+            inside = value.lower().startswith("instructions")
+        elif inside:
+            items = [v for v in value if v]
+            if items:
+                steps.append(" ".join(items))
+    return steps
+
+def _value_after_label(texts: list, label: str, want_digits=False) -> str:
+    """Premier texte non vide qui suit le libellé (avec des chiffres si want_digits)."""
+    label_re = re.compile(rf"\s*{re.escape(label)}\s*", re.I)
+    for i, t in enumerate(texts):
+        if not label_re.fullmatch(t):
+            continue
+        for v in texts[i + 1:i + 13]:
+            if label_re.fullmatch(v) or (want_digits and not re.search(r"\d", v)):
+                continue
+            return v
+        return ""
+    return ""
+
+def parse_recipe_html(html: str, url: str) -> dict:
+    """Recette (même forme que parse_recipe_jsonld_only du notebook) depuis le HTML d'une page."""
+    page = _PageParser()
+    page.feed(html)
+    page.close()
+
+    title = clean_title(page.og_title) if page.og_title else ""
+    if not title:
+        title = clean_title(page.h1 or "Recette")
+
+    ingredients_obj = {}
+    total_time = prep_time = difficulty = ""
+    for raw_json in page.jsonld:
+        try:
+            data = json.loads(raw_json)
+        except ValueError:
+            continue
+        for obj in (data if isinstance(data, list) else [data]):
+            if not isinstance(obj, dict):
+                continue
+            t = obj.get("@type")
+            if not ((isinstance(t, list) and "Recipe" in t) or t == "Recipe"):
+                continue
+            total_time = total_time or iso_to_human(obj.get("totalTime", ""))
+            prep_time = prep_time or iso_to_human(obj.get("prepTime", ""))
+            ingredients_obj.update(ingredient_parser.parse_ingredients(obj.get("recipeIngredient") or []))
+
+    # repli texte/DOM pour temps / difficulté
+    total_time = total_time or _value_after_label(page.texts, "Temps total", want_digits=True)
+    prep_time = prep_time or _value_after_label(page.texts, "Temps de préparation", want_digits=True)
+    difficulty = difficulty or _value_after_label(page.texts, "Difficulté")
+
+    steps = _instructions(page)
+    desc = {f"desc_part_{i}": steps[i - 1] if i - 1 < len(steps) else "" for i in range(1, 6)}
+    desc["desc_part_6"] = " ".join(steps[5:])
+
+    return {
+        "name": title,
+        "link": url,
+        "ingredients": ingredients_obj,
+        "total_time": total_time,         # ex. '40 min' ou '1 h 30 min'
+        "prep_time": prep_time,
+        "difficulty": difficulty,         # ex. 'Intermédiaire'
+        **desc
+    }
+
+
+# ---------- HTTP : CACHE DISQUE + DÉBIT PAR HÔTE ----------
+class HttpCache:
+    """Réponses 200 sur disque (corps + méta ETag / Last-Modified), revalidées par requête conditionnelle."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        h = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self.root / f"{h}.html", self.root / f"{h}.json"
+
+    def get(self, url: str):
+        """(méta, corps) ou None."""
+        body_path, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            return meta, body_path.read_bytes()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, url: str, body: bytes, etag: str | None, last_modified: str | None, charset: str):
+        body_path, meta_path = self._paths(url)
+        meta = {"url": url, "etag": etag, "last_modified": last_modified, "charset": charset}
+        _write_atomic(body_path, body)  # corps d'abord : une méta présente a toujours son corps
+        _write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+    def entries(self):
+        """(méta, chemin du corps) de chaque réponse en cache."""
+        for meta_path in sorted(self.root.glob("*.json")):
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except ValueError:
+                continue
+            yield meta, meta_path.with_suffix(".html")
+
+
+class RateLimiter:
+    """Espacement minimal entre deux requêtes vers un même hôte (réservation de créneaux)."""
+
+    def __init__(self, per_second: float = RATE_PER_HOST):
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Fetcher:
+    """GET avec en-têtes conditionnels, reprises sur erreur transitoire et cache disque.
+
+    `base_url` : sert chaque URL depuis un autre serveur (même chemin), p. ex. la doublure locale
+    de serve_recorded ; le cache reste indexé par l'URL d'origine.
+    """
+
+    def __init__(self, cache: HttpCache | None = None, limiter: RateLimiter | None = None,
+                 base_url: str | None = None, timeout: float = TIMEOUT, retries: int = RETRIES):
+        self.cache, self.limiter = cache, limiter or RateLimiter()
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.timeout, self.retries = timeout, retries
+        self.stats = {"fetched": 0, "not_modified": 0, "retries": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _target(self, url: str) -> str:
+        if not self.base_url:
+            return url
+        parts = urlsplit(url)
+        return self.base_url + parts.path + (f"?{parts.query}" if parts.query else "")
+
+    def get(self, url: str) -> str:
+        target = self._target(url)
+        cached = self.cache.get(url) if self.cache else None
+        headers = dict(UA)
+        if cached:
+            meta = cached[0]
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        for attempt in range(self.retries + 1):
+            self.limiter.wait(urlsplit(target).netloc)
+            try:
+                with urlopen(Request(target, headers=headers), timeout=self.timeout) as resp:
+                    body = resp.read()
+                    charset = resp.headers.get_content_charset() or "utf-8"
+                    if self.cache:
+                        self.cache.put(url, body, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), charset)
+                self._count("fetched")
+                return body.decode(charset, errors="replace")
+            except HTTPError as e:
+                if e.code == 304 and cached:
+                    self._count("not_modified")
+                    return cached[1].decode(cached[0].get("charset") or "utf-8", errors="replace")
+                if e.code != 429 and e.code < 500 or attempt == self.retries:
+                    raise
+            except (URLError, TimeoutError, ConnectionError):
+                if attempt == self.retries:
+                    raise
+            self._count("retries")
+            time.sleep(0.5 * 2 ** attempt)
+
+
+# ---------- PIPELINE ----------
+def _load_existing(out_file: Path) -> dict:
+    if not out_file.exists():
+        return {}
+    try:
+        with open(out_file, encoding="utf-8") as f:
+            return {rec["link"]: rec for rec in json.load(f) if rec and rec.get("link")}
+    except (ValueError, OSError) as e:
+        print(f"[warn] Impossible de charger l’existant ({e})")
+        return {}
+
+def _load_checkpoint(path: Path) -> dict:
+    """url → recette des URL déjà traitées avec succès lors d'un run interrompu."""
+    done = {}
+    if not path.exists():
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # dernière ligne tronquée par l'interruption
+            if entry.get("ok"):
+                done[entry["url"]] = entry["record"]
+            else:
+                done.pop(entry.get("url"), None)
+    return done
+
+def _fetch_and_parse(fetcher: Fetcher, url: str, parse_inline: bool):
+    html = fetcher.get(url)
+    return parse_recipe_html(html, url) if parse_inline else html
+
+def scrape_many_to_file(urls, out_path=DATA_DIR / "recettes_hellofresh.txt", *, cache_dir=None, checkpoint=None,
+                        max_workers: int = MAX_WORKERS, parse_workers: int | None = PARSE_WORKERS,
+                        rate: float = RATE_PER_HOST, refresh: bool = False, base_url: str | None = None,
+                        retries: int = RETRIES, flush_every: int = FLUSH_EVERY, log=print):
+    """Scrape `urls` et fusionne le résultat dans `out_path` (par lien, ordre d'origine conservé).
+
+    Les recettes déjà présentes (avec un nom) sont gardées telles quelles, sauf `refresh=True` :
+    elles sont alors revalidées via le cache HTTP et mises à jour champ par champ (la catégorie
+    saisie à la main est conservée). Le fichier de sortie est réécrit toutes les `flush_every`
+    recettes et le checkpoint reçoit chaque résultat : un run interrompu reprend là où il s'est arrêté.
+    """
+    out_file = Path(out_path)
+    default_cache, default_checkpoint = scrape_paths(out_file.parent)
+    cache = HttpCache(cache_dir or default_cache)
+    checkpoint = Path(checkpoint or default_checkpoint)
+    checkpoint.parent.mkdir(parents=True, exist_ok=True)
+
+    results = _load_existing(out_file)
+    resumed = _load_checkpoint(checkpoint)
+    for url, rec in resumed.items():
+        results[url] = {**results.get(url, {}), **rec}
+
+    todo, seen = [], set()
+    for u in urls:
+        url = u.strip().rstrip("/")
+        if not url or url in seen:
+            continue
+        seen.add(url)
+        if url in resumed:
+            continue
+        if not refresh and results.get(url, {}).get("name"):
+            log(f"[skip] {url} déjà présent, on garde l’ancien")
+            continue
+        todo.append(url)
+    if resumed:
+        log(f"[resume] {len(resumed)} recette(s) reprises du checkpoint")
+
+    def flush():
+        _write_atomic(out_file, json.dumps(list(results.values()), ensure_ascii=False, indent=2).encode("utf-8"))
+
+    fetcher = Fetcher(cache, RateLimiter(rate), base_url, retries=retries)
+    parse_inline = parse_workers == 0
+    pending_since_flush = 0
+    with open(checkpoint, "a", encoding="utf-8") as ck, \
+            ThreadPoolExecutor(max_workers=max_workers) as fetch_pool, \
+            (ProcessPoolExecutor(max_workers=parse_workers) if not parse_inline else _NoPool()) as parse_pool:
+        pending = {fetch_pool.submit(_fetch_and_parse, fetcher, url, parse_inline): ("fetch", url) for url in todo}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage, url = pending.pop(fut)
+                try:
+                    value = fut.result()
+                except Exception as e:
+                    log(f"[warn] {url}: {e}")
+                    ck.write(json.dumps({"url": url, "ok": False, "error": str(e)}, ensure_ascii=False) + "\n")
+                    ck.flush()
+                    if url not in results:
+                        results[url] = {"name": None, "link": url, "ingredients": {}}
+                    continue
+                if stage == "fetch" and not parse_inline:
+                    pending[parse_pool.submit(parse_recipe_html, value, url)] = ("parse", url)
+                    continue
+                results[url] = {**results.get(url, {}), **value}
+                ck.write(json.dumps({"url": url, "ok": True, "record": value}, ensure_ascii=False) + "\n")
+                ck.flush()
+                log(f"[ok] {url} ajouté")
+                pending_since_flush += 1
+                if pending_since_flush >= flush_every:
+                    flush()
+                    pending_since_flush = 0
+
+    flush()
+    checkpoint.unlink(missing_ok=True)  # run complet : plus rien à reprendre
+    log(f"[http] {fetcher.stats}")
+    return out_path, list(results.values())
+
+
+class _NoPool:
+    """Remplace le pool de processus quand le parsing est fait dans les threads (parse_workers=0)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+# ---------- DOUBLURE HTTP LOCALE (pages enregistrées) ----------
+def serve_recorded(cache_dir: str | Path, host: str = "127.0.0.1", port: int = 0):
+    """Sert les pages du cache HTTP par chemin d'URL, avec ETag / Last-Modified et réponses 304.
+
+    Renvoie (serveur, base_url) ; le serveur tourne dans un thread démon (server.shutdown() pour l'arrêter)
+    et compte les réponses par code dans server.responses. Sert de doublure hors ligne :
+    scrape_many_to_file(..., base_url=base_url).
+    """
+    pages = {}
+    for meta, body_path in HttpCache(cache_dir).entries():
+        parts = urlsplit(meta["url"])
+        path = parts.path.rstrip("/") + (f"?{parts.query}" if parts.query else "")
+        pages[path] = (body_path, meta)
+
+    class Handler(BaseHTTPRequestHandler):
+        def send_response(self, code, message=None):
+            with lock:
+                server.responses[code] += 1
+            super().send_response(code, message)
+
+        def do_GET(self):
+            page = pages.get(self.path.rstrip("/"))
+            if page is None:
+                self.send_error(404)
+                return
+            body_path, meta = page
+            body = body_path.read_bytes()
+            etag = meta.get("etag") or f'"{hashlib.sha1(body).hexdigest()}"'
+            last_modified = meta.get("last_modified") or formatdate(body_path.stat().st_mtime, usegmt=True)
+            if self.headers.get("If-None-Match") == etag or (
+                    "If-None-Match" not in self.headers and self.headers.get("If-Modified-Since") == last_modified):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", f"text/html; charset={meta.get('charset') or 'utf-8'}")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    lock = threading.Lock()
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.responses = Counter()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Scraping des recettes HelloFresh.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("scrape", help="scrape les URL et fusionne dans le fichier de recettes")
+    s.add_argument("--urls", default=str(DATA_DIR / "urls_hellofresh.txt"))
+    s.add_argument("--out", default=str(DATA_DIR / "recettes_hellofresh.txt"))
+    s.add_argument("--workers", type=int, default=MAX_WORKERS)
+    s.add_argument("--parse-workers", type=int, default=PARSE_WORKERS)
+    s.add_argument("--rate", type=float, default=RATE_PER_HOST)
+    s.add_argument("--refresh", action="store_true", help="revalide aussi les recettes déjà présentes")
+    s.add_argument("--base-url", help="serveur à interroger à la place (p. ex. la doublure serve-recorded)")
+    r = sub.add_parser("serve-recorded", help="sert les pages du cache HTTP en local")
+    r.add_argument("--cache-dir", default=str(scrape_paths(DATA_DIR)[0]))
+    r.add_argument("--port", type=int, default=8000)
+    args = p.parse_args(argv)
+
+    if args.cmd == "scrape":
+        with open(args.urls, encoding="utf-8") as f:
+            urls = json.load(f)
+        out_file, data = scrape_many_to_file(urls, args.out, max_workers=args.workers, parse_workers=args.parse_workers,
+                                             rate=args.rate, refresh=args.refresh, base_url=args.base_url)
+        print("Fichier écrit:", out_file)
+        print(f"{len(data)} recettes sauvegardées")
+    elif args.cmd == "serve-recorded":
+        server, base_url = serve_recorded(args.cache_dir, port=args.port)
+        print(f"→ Pages enregistrées servies sur {base_url} (Ctrl-C pour arrêter)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
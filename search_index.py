@@ -0,0 +1,315 @@
+# search_index.py
+# Recherche plein texte dans les recettes : nom, ingrédients, catégorie et étapes (desc_part_1..6).
+# Index inversé (terme → recettes) construit à côté du snapshot, classement BM25, complétion
+# du dernier mot tapé (préfixe) et filtres par ingrédient (« avec Poulet, sans Crème »).
+# Quand recettes_hellofresh.txt change (nouveau scraping), seules les recettes ajoutées ou
+# modifiées sont indexées : l'index précédent reste intact pour les snapshots qui l'utilisent.
+from __future__ import annotations
+
+import bisect, math, re, sys
+from array import array
+from collections import Counter
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # optionnel : sans NumPy les scores sont cumulés dans un dict
+    np = None
+
+import engine
+
+# poids des champs dans la fréquence d'un terme (BM25 « par champ » simplifié) ; étapes : 1
+FIELD_WEIGHTS = {"name": 3.0, "ingredients": 2.0, "category": 1.0}
+DESC_FIELDS = tuple(f"desc_part_{i}" for i in range(1, 7))
+EMPTY_DESC = {"", "NA", "N/A"}
+BM25_K1, BM25_B = 1.2, 0.75
+PREFIX_MAX_TERMS = 64     # complétions gardées pour le dernier mot (les plus fréquentes)
+COMPACT_RATIO = 0.25      # part de recettes supprimées au-delà de laquelle l'index est reconstruit
+
+_WORD_RE = re.compile(r"\w+")
+STOPWORDS = frozenset(engine.normalize(w) for w in (
+    "le la les l de des du d un une et en a à au aux pour avec sans dans sur par ce cette ces se s sa son ses "
+    "vos votre vous y il elle ils qui que qu ou puis plus tout tous toute bien pendant min minutes ajoutez"
+).split())
+
+
+@lru_cache(maxsize=4 * engine.NORMALIZE_CACHE_SIZE)
+def _term(word: str) -> str:
+    """Terme indexé pour un mot en minuscules ('' : mot vide ou trop court)."""
+    t = engine.normalize(word)
+    return t if len(t) > 1 and t not in STOPWORDS else ""
+
+def tokenize(text: str) -> list:
+    """Mots de `text` passés par engine.normalize (sans accents, singulier), sans mots vides."""
+    return [t for t in map(_term, _WORD_RE.findall(text.lower())) if t]
+
+
+def _recipe_terms(r: dict, details: dict) -> Counter:
+    """Fréquences pondérées des termes d'une recette (un même terme cumule ses champs)."""
+    tf = Counter(t for f in DESC_FIELDS if (v := details.get(f)) and v not in EMPTY_DESC for t in tokenize(v))
+    for field, text in (("name", r.get("name") or ""), ("category", r.get("category") or ""),
+                        ("ingredients", " ".join(r.get("ingredients") or ()))):
+        w = FIELD_WEIGHTS[field]
+        for t in tokenize(text):
+            tf[t] += w
+    return tf
+
+def _fingerprint(r: dict, details: dict) -> int:
+    """Empreinte du contenu indexé : une recette modifiée au scraping est réindexée."""
+    return hash((r.get("name"), r.get("link"), r.get("category"), tuple(r.get("ingredients") or ()),
+                 tuple(details.get(f) for f in DESC_FIELDS)))
+
+def _details(ctx, i: int, r: dict) -> dict:
+    return r if ctx.recettes_details is None else ctx.recettes_details[i]
+
+
+class SearchIndex:
+    """Index d'un corpus de recettes. Les documents (doc) sont numérotés dans l'ordre d'ajout ;
+    `doc_pos` donne leur position dans ctx.recettes (-1 : recette supprimée depuis)."""
+
+    def __init__(self):
+        self.terms = {}          # terme → (array docs, array fréquences pondérées), docs croissants
+        self.ingredients = {}    # ingrédient normalisé → array docs
+        self.doc_len = array("f")
+        self.doc_pos = array("i")
+        self.doc_fp = {}         # empreinte → doc (recettes vivantes)
+        self.live, self.total_len = 0, 0.0
+        self._vocab = None       # termes triés (complétion), calculé à la demande
+        self._np = {}            # vues NumPy des postings, calculées à la demande
+        self.aliases = None      # alias automatiques du dossier (ctx.aliases), pour les noms d'ingrédients
+
+    # ---------- CONSTRUCTION ----------
+    @classmethod
+    def build(cls, ctx) -> "SearchIndex":
+        index = cls()
+        index.aliases = ctx.aliases
+        index._add_all(ctx, *index._diff(ctx))
+        return index
+
+    def updated(self, ctx) -> "SearchIndex":
+        """Nouvel index pour ctx.recettes : ajouts / modifications / suppressions seulement.
+        Les postings non touchés sont partagés avec `self`, qui n'est pas modifié."""
+        added, positions = self._diff(ctx)
+        removed = len(self.doc_fp) - (len(positions) - len(added))
+        if self.live and (removed + len(added)) > COMPACT_RATIO * self.live:
+            return SearchIndex.build(ctx)  # gros changement : reconstruire est plus simple et plus compact
+        new = SearchIndex()
+        new.aliases = ctx.aliases
+        new.terms, new.ingredients = dict(self.terms), dict(self.ingredients)
+        new.doc_len = array("f", self.doc_len)
+        new.doc_pos = array("i", [-1]) * len(self.doc_pos)
+        new.total_len = 0.0
+        for fp, pos in positions.items():
+            doc = self.doc_fp.get(fp)
+            if doc is not None:
+                new.doc_pos[doc] = pos
+                new.doc_fp[fp] = doc
+                new.total_len += self.doc_len[doc]
+        new.live = len(new.doc_fp)
+        new._add_all(ctx, added, positions, copy_on_write=True)
+        return new
+
+    def _diff(self, ctx):
+        """(empreintes à ajouter, {empreinte: position}) ; une seule recette par nom (la première)."""
+        positions, seen, added = {}, set(), []
+        for i, r in enumerate(ctx.recettes):
+            if r["name"] in seen:
+                continue
+            seen.add(r["name"])
+            fp = _fingerprint(r, _details(ctx, i, r))
+            positions[fp] = i
+            if fp not in self.doc_fp:
+                added.append(fp)
+        return added, positions
+
+    def _add_all(self, ctx, added, positions, copy_on_write: bool = False):
+        touched = set()  # listes déjà copiées dans cet appel
+        terms = self.terms
+        for fp in added:
+            pos = positions[fp]
+            r = ctx.recettes[pos]
+            doc = len(self.doc_pos)
+            tf = _recipe_terms(r, _details(ctx, pos, r))
+            for t, w in tf.items():
+                p = terms.get(t)
+                if p is None:
+                    p = terms[t] = (array("I"), array("f"))
+                    touched.add(t)
+                elif copy_on_write and t not in touched:
+                    p = terms[t] = (array("I", p[0]), array("f", p[1]))
+                    touched.add(t)
+                p[0].append(doc)
+                p[1].append(w)
+            for n in {n for _, _, n, _ in ctx.recettes_keys[pos]}:
+                docs = self.ingredients.get(n)
+                if docs is None:
+                    docs = self.ingredients[n] = array("I")
+                    touched.add(("ing", n))
+                elif copy_on_write and ("ing", n) not in touched:
+                    docs = self.ingredients[n] = array("I", docs)
+                    touched.add(("ing", n))
+                docs.append(doc)
+            length = float(sum(tf.values()))
+            self.doc_len.append(length)
+            self.doc_pos.append(pos)
+            self.doc_fp[fp] = doc
+            self.live += 1
+            self.total_len += length
+
+    # ---------- REQUÊTE ----------
+    def vocabulary(self) -> list:
+        if self._vocab is None:
+            self._vocab = sorted(self.terms)
+        return self._vocab
+
+    def complete(self, prefix: str, limit: int = PREFIX_MAX_TERMS) -> list:
+        """Termes de l'index qui commencent par `prefix` (normalisé), les plus fréquents d'abord."""
+        vocab = self.vocabulary()
+        lo = bisect.bisect_left(vocab, prefix)
+        hi = bisect.bisect_left(vocab, prefix + "\uffff")
+        terms = vocab[lo:hi]
+        if len(terms) > limit:
+            terms = sorted(terms, key=lambda t: -len(self.terms[t][0]))[:limit]
+        return terms
+
+    def ingredient_postings(self, name: str) -> list:
+        """Listes de docs des ingrédients qui correspondent à `name` : même nom normalisé, ou qui en
+        contiennent tous les mots (« Poulet » trouve « Filet de poulet »)."""
+        target = engine.normalize(engine.canon(name, self.aliases))
+        words = set(target.split())
+        return [d for n, d in self.ingredients.items() if n == target or words <= set(n.split())]
+
+    def _groups(self, query: str, prefix: bool) -> list:
+        """Termes de la requête ; le dernier mot tapé devient la liste de ses complétions."""
+        words = _WORD_RE.findall(query.lower())
+        groups = [[t] for t in tokenize(" ".join(words[:-1] if prefix else words)) if t in self.terms]
+        if prefix and words:
+            last = engine.normalize(words[-1])
+            # « poulets » → « poulet » : normalize peut retirer la lettre finale tapée
+            groups.append(self.complete(last) or ([last] if last in self.terms else []))
+        return [g for g in groups if g]
+
+    def _idf(self, df: int) -> float:
+        return math.log(1.0 + (self.live - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str = "", with_ingredients=(), without_ingredients=(), limit: int = 20,
+               prefix: bool = True) -> list:
+        """[(position dans ctx.recettes, score)] des meilleures recettes, score décroissant.
+
+        `prefix` : le dernier mot de `query` est complété (saisie en cours). Sans texte,
+        les recettes qui passent les filtres sont rendues dans l'ordre du corpus (score 0).
+        """
+        groups = self._groups(query, prefix)
+        if not groups and query.strip():
+            return []  # aucun terme connu
+        with_ = [self.ingredient_postings(name) for name in with_ingredients]
+        without = [d for name in without_ingredients for d in self.ingredient_postings(name)]
+        if np is not None:
+            return self._search_numpy(groups, with_, without, limit)
+        return self._search_python(groups, with_, without, limit)
+
+    def _search_python(self, groups, with_, without, limit):
+        pos = self.doc_pos
+        allowed = None
+        for lists in with_:
+            docs = {d for lst in lists for d in lst}
+            allowed = docs if allowed is None else allowed & docs
+        banned = {d for lst in without for d in lst}
+        if not groups:
+            docs = range(len(pos)) if allowed is None else sorted(allowed)
+            return [(pos[d], 0.0) for d in docs if pos[d] >= 0 and d not in banned][:limit]
+        avgdl = self.total_len / max(self.live, 1)
+        exact = self.live == len(pos)  # aucune recette supprimée : df = longueur des postings
+        scores = {}
+        for group in groups:
+            best = {}  # complétions d'un même mot : on garde la meilleure, pas la somme
+            for t in group:
+                docs, tfs = self.terms[t]
+                idf = self._idf(len(docs) if exact else sum(1 for d in docs if pos[d] >= 0))
+                for d, tf in zip(docs, tfs):
+                    s = idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[d] / avgdl))
+                    if s > best.get(d, 0.0):
+                        best[d] = s
+            for d, s in best.items():
+                scores[d] = scores.get(d, 0.0) + s
+        hits = [(s, d) for d, s in scores.items()
+                if pos[d] >= 0 and d not in banned and (allowed is None or d in allowed)]
+        hits.sort(key=lambda x: (-x[0], pos[x[1]]))
+        return [(pos[d], s) for s, d in hits[:limit]]
+
+    def _arrays_np(self):
+        """(positions, normalisation BM25 de la longueur, recettes vivantes) en NumPy, par index."""
+        arrays = self._np.get(None)
+        if arrays is None:
+            avgdl = self.total_len / max(self.live, 1)
+            dl = np.asarray(self.doc_len, dtype=np.float64)
+            pos = np.asarray(self.doc_pos, dtype=np.int64)
+            arrays = self._np[None] = (pos, BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl), pos >= 0)
+        return arrays
+
+    def _postings_np(self, t: str):
+        p = self._np.get(t)
+        if p is None:
+            docs, tfs = self.terms[t]
+            p = self._np[t] = (np.asarray(docs, dtype=np.intp), np.asarray(tfs, dtype=np.float64))
+        return p
+
+    def _search_numpy(self, groups, with_, without, limit):
+        pos, norm, alive = self._arrays_np()
+        mask = alive.copy()
+        for lists in with_:
+            m = np.zeros(len(mask), dtype=bool)
+            for lst in lists:
+                m[np.asarray(lst, dtype=np.intp)] = True
+            mask &= m
+        for lst in without:
+            mask[np.asarray(lst, dtype=np.intp)] = False
+        if not groups:
+            return [(int(pos[d]), 0.0) for d in sorted(np.flatnonzero(mask).tolist(), key=lambda d: pos[d])[:limit]]
+        exact = self.live == len(pos)
+        scores = np.zeros(len(pos), dtype=np.float64)
+        for group in groups:
+            best = scores if len(group) == 1 else np.zeros_like(scores)
+            for t in group:
+                docs, tfs = self._postings_np(t)
+                idf = self._idf(len(docs) if exact else int(np.count_nonzero(alive[docs])))
+                s = idf * tfs * (BM25_K1 + 1) / (tfs + norm[docs])
+                if best is scores:
+                    scores[docs] += s
+                else:
+                    best[docs] = np.maximum(best[docs], s)
+            if best is not scores:
+                scores += best
+        scores[~mask] = 0.0
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > limit:
+            # seuil = limit-ième score : tous les ex aequo sont gardés, puis départagés par position
+            kth = np.partition(scores[hits], len(hits) - limit)[len(hits) - limit]
+            hits = hits[scores[hits] >= kth]
+        order = sorted(hits.tolist(), key=lambda d: (-scores[d], pos[d]))[:limit]
+        return [(int(pos[d]), float(scores[d])) for d in order]
+
+    def memory_bytes(self) -> int:
+        """Taille approximative de l'index : tableaux, dictionnaires et termes (sans le cache NumPy)."""
+        size = sys.getsizeof(self.terms) + sys.getsizeof(self.ingredients) + sys.getsizeof(self.doc_fp)
+        size += sum(sys.getsizeof(t) + sys.getsizeof(p) + sys.getsizeof(p[0]) + sys.getsizeof(p[1])
+                    for t, p in self.terms.items())
+        size += sum(sys.getsizeof(n) + sys.getsizeof(d) for n, d in self.ingredients.items())
+        size += sum(sys.getsizeof(fp) for fp in self.doc_fp)
+        return size + sys.getsizeof(self.doc_len) + sys.getsizeof(self.doc_pos)
+
+
+# ---------- ACCÈS PAR SNAPSHOT ----------
+def recipe_index(ctx) -> SearchIndex:
+    """Index du snapshot ; mis à jour (pas reconstruit) quand recettes_hellofresh.txt change."""
+    return ctx.cached("search_index", ("recettes",), SearchIndex.build,
+                     # alias changés : les clés d'ingrédients des recettes inchangées aussi
+                     lambda c, old: old.updated(c) if old.aliases is c.aliases else SearchIndex.build(c))
+
+def search(source, query: str = "", with_ingredients=(), without_ingredients=(), limit: int = 20,
+           prefix: bool = True) -> list:
+    """Recettes trouvées : [{name, link, category, score}], meilleures d'abord."""
+    ctx = engine.context(source)
+    hits = recipe_index(ctx).search(query, with_ingredients, without_ingredients, limit, prefix)
+    return [{"name": ctx.recettes[i]["name"], "link": ctx.recettes[i].get("link"),
+             "category": ctx.recettes[i].get("category"), "score": round(s, 4)} for i, s in hits]
@@ -0,0 +1,128 @@
+# seasonal.py
+# Mode saison : la disponibilité au marché vient des mois `saison` du catalogue au lieu de
+# ingredients_disponibles.txt. Masque de 12 bits par ingrédient (remplacements compris),
+# calculé une fois par snapshot ; score marché de chaque recette pour les 12 mois en un passage.
+from __future__ import annotations
+
+from datetime import date
+
+import engine
+
+# NumPy (optionnel : vue annuelle calculée en Python sans lui) n'est importé qu'au premier calcul de
+# la vue annuelle : app.py importe ce module au démarrage pour MONTHS, sans en avoir besoin
+np = False
+
+def _numpy():
+    global np
+    if np is False:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+MONTHS = ["janvier", "février", "mars", "avril", "mai", "juin",
+          "juillet", "août", "septembre", "octobre", "novembre", "décembre"]
+_MONTH_INDEX = {engine.normalize(m): i for i, m in enumerate(MONTHS)}
+
+
+def month_index(month) -> int:
+    """0..11 pour un mois donné en nombre (1..12), en nom français (accents facultatifs) ou en date."""
+    if isinstance(month, date):
+        return month.month - 1
+    if isinstance(month, int):
+        if not 1 <= month <= 12:
+            raise ValueError(f"mois hors de 1..12 : {month}")
+        return month - 1
+    i = _MONTH_INDEX.get(engine.normalize(str(month).strip()))
+    if i is None:
+        raise ValueError(f"mois inconnu : {month!r} (attendu 1..12 ou {', '.join(MONTHS)})")
+    return i
+
+
+# ---------- MASQUES (par catalogue) ----------
+def _build_season_masks(ctx) -> dict:
+    masks = {}
+    for base, item in ctx.catalogue_norm_index.items():
+        m = 0
+        for name in item.get("saison", ()):
+            i = _MONTH_INDEX.get(engine.normalize(name))
+            if i is not None:  # mois mal saisi (ex. gabarit « jui...n ») : ignoré
+                m |= 1 << i
+        masks[base] = m
+    return masks
+
+def season_masks(ctx) -> dict:
+    """norm → masque des mois où l'ingrédient est de saison (bit i = MONTHS[i])."""
+    return ctx.cached("season_masks", ("catalogue",), _build_season_masks)
+
+def _build_need_masks(ctx) -> dict:
+    masks = season_masks(ctx)
+    out = {}
+    for base, cands in engine.replacement_closure(ctx).items():
+        m = 0
+        for c in cands:
+            m |= masks.get(c, 0)
+        out[base] = m
+    return out
+
+def need_masks(ctx) -> dict:
+    """norm → mois où l'ingrédient ou l'un de ses remplaçants est de saison."""
+    return ctx.cached(f"season_need_masks_{engine.REPLACEMENT_DEPTH}", ("catalogue",), _build_need_masks)
+
+
+# ---------- SNAPSHOT D'UN MOIS ----------
+def seasonal_snapshot(source, month) -> "engine.Snapshot":
+    """Snapshot où les dispos marché sont les ingrédients du catalogue de saison ce mois-là.
+    Ses index dérivés des dispos lui restent propres : ceux du snapshot de départ ne sont pas évincés."""
+    ctx = engine.context(source)
+    i = month_index(month)
+
+    def build(c):
+        masks = season_masks(c)
+        return engine.dispos_part((c.catalogue_norm_to_pretty[n] for n, m in masks.items() if m >> i & 1), c.aliases)
+    part = ctx.cached(f"season_dispos_{i}", ("catalogue",), build)
+    return ctx.derive(isolated=True, dispos=(part, ("saison", MONTHS[i])))
+
+
+# ---------- VUE ANNUELLE ----------
+def _build_year_view(ctx) -> dict:
+    masks = need_masks(ctx)
+    names, needs, seen = [], [], set()
+    for r, keys in zip(ctx.recettes, ctx.recettes_keys):
+        if r["name"] in seen:
+            continue
+        seen.add(r["name"])
+        names.append(r["name"])
+        rec = {n for _, _, n, _ in keys}
+        needs.append([masks.get(n, 0) for n in ctx.market_indispensables_norm & rec])
+    np = _numpy()
+    if np is not None:
+        counts = np.fromiter((len(m) for m in needs), dtype=np.int64, count=len(needs))
+        flat = np.fromiter((m for ms in needs for m in ms), dtype=np.int64, count=int(counts.sum()))
+        bits = (flat[:, None] >> np.arange(12)) & 1                       # besoin × mois
+        ok = np.zeros((len(needs), 12), dtype=np.int64)
+        np.add.at(ok, np.repeat(np.arange(len(needs)), counts), bits)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = np.where(counts[:, None] > 0, 100 * ok / counts[:, None], 100.0)
+        scores = np.round(scores, 1)
+    else:
+        scores = [[round(100 * sum(m >> i & 1 for m in ms) / len(ms), 1) if ms else 100.0 for i in range(12)]
+                  for ms in needs]
+    return {"months": list(MONTHS), "names": names, "score_market": scores}
+
+def year_view(source) -> dict:
+    """Score marché de chaque recette (dédupliquée par nom) pour les 12 mois, calculé une fois par snapshot.
+
+    {'months': [...], 'names': [...], 'score_market': tableau recettes × 12 (NumPy, ou listes sans NumPy)}.
+    """
+    return engine.context(source).cached("season_year_view", ("recettes", "catalogue"), _build_year_view)
+
+def in_season(source, month, match_min: float = None) -> list:
+    """[(nom, score marché)] des recettes au-dessus de `match_min` ce mois-là, lu dans la vue annuelle."""
+    view = year_view(source)
+    i = month_index(month)
+    match_min = engine.MATCH_MIN if match_min is None else match_min
+    col = [row[i] for row in view["score_market"]]
+    return [(name, float(s)) for name, s in zip(view["names"], col) if s >= match_min]
@@ -0,0 +1,311 @@
+# service.py
+# Service HTTP/JSON local autour d'engine.py (bibliothèque standard uniquement), pour les outils
+# hors Streamlit (raccourci téléphone, tablette du frigo).
+#   GET  /matching?match_min=&match_min_pantry=&month=&all=1   → compute_matching (sans texte)
+#   GET  /recommandations?k=10&personnes=2                      → recommend_recipes
+#   POST /courses {"selection": [...], "personnes": 4, "update_provisions": false} → compute_courses
+#   GET  /placard                                               → entrées de provisions.txt
+#   GET  /reappro                                               → courses_placard du placard actuel
+# Un seul Engine (snapshot chaud, relu fichier par fichier quand data/ change), requêtes servies
+# par un pool de threads de taille fixe. Les réponses GET portent un ETag dérivé des signatures
+# des fichiers utilisés : If-None-Match → 304 sans recalcul ; le corps JSON du matching est gardé
+# en cache par ETag. Les corps au-delà de STREAM_MIN octets partent en chunked, au fil de l'encodage.
+# Usage : python service.py [--data data] [--port 8080] [--workers 8]
+from __future__ import annotations
+
+import argparse, hashlib, json, sys, threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import engine
+
+# ---------- PARAMÈTRES ----------
+DATA_DIR = Path(__file__).resolve().parent / "data"
+WORKERS = 8              # threads du pool de requêtes
+CHUNK = 64 * 1024        # taille des morceaux envoyés en chunked
+STREAM_MIN = 256 * 1024  # corps plus gros : envoyés en chunked pendant l'encodage
+MAX_BODIES = 8           # corps de /matching gardés en cache (par ETag)
+MAX_REQUEST = 1 << 20    # taille max d'un corps POST
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(obj):
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f"non sérialisable en JSON : {type(obj).__name__}")
+
+_ENCODER = json.JSONEncoder(ensure_ascii=False, default=_json_default)
+
+def json_chunks(obj, size: int = CHUNK):
+    """Encodage JSON de `obj` en morceaux d'environ `size` octets (UTF-8), produits au fil de l'eau."""
+    buf, n = [], 0
+    for piece in _ENCODER.iterencode(obj):
+        data = piece.encode("utf-8")
+        buf.append(data)
+        n += len(data)
+        if n >= size:
+            yield b"".join(buf)
+            buf, n = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+def _etag(*key) -> str:
+    return '"' + hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:20] + '"'
+
+
+# ---------- PARAMÈTRES DE REQUÊTE ----------
+def _param(query: dict, name: str, cast, default=None):
+    values = query.get(name)
+    if not values or values[-1] == "":
+        return default
+    try:
+        return cast(values[-1])
+    except ValueError:
+        raise HttpError(400, f"paramètre {name} invalide : {values[-1]!r}") from None
+
+def _month(value: str):
+    return int(value) if value.isdigit() else value
+
+
+# ---------- SERVICE ----------
+class Service:
+    """Calculs servis en HTTP pour un dossier data/ (un Engine partagé par toutes les requêtes)."""
+
+    def __init__(self, data_dir: str | Path = DATA_DIR):
+        self.engine = engine.get_engine(data_dir)
+        self._lock = threading.Lock()
+        self._bodies = OrderedDict()  # ETag → morceaux JSON de /matching
+        self.stats = {"requests": 0, "not_modified": 0, "body_hits": 0}
+
+    def warm(self):
+        """Lecture des fichiers et matching par défaut avant la première requête."""
+        self.matching({})
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    # --- GET : (ETag, fabrique des morceaux) ; la fabrique n'est appelée que si l'ETag ne correspond pas
+    def matching(self, query: dict):
+        snap = self.engine.snapshot()
+        match_min = _param(query, "match_min", float)
+        match_min_pantry = _param(query, "match_min_pantry", float)
+        month = _param(query, "month", _month)
+        with_all = _param(query, "all", int, 0) == 1
+        if month is not None:
+            import seasonal
+            try:
+                seasonal.month_index(month)
+            except ValueError as e:
+                raise HttpError(400, str(e)) from None
+        tag = _etag("matching", snap.version, match_min, match_min_pantry, month, with_all)
+
+        def body():
+            with self._lock:
+                chunks = self._bodies.get(tag)
+                if chunks is not None:
+                    self._bodies.move_to_end(tag)
+                    self.stats["body_hits"] += 1
+                    return iter(chunks)
+            result = engine.compute_matching(snap, match_min, match_min_pantry, with_all=with_all,
+                                             month=month, with_text=False)
+            drop = ("text",) if with_all else ("text", "scored_all")  # scored_all : toutes les recettes
+            return self._remember(tag, json_chunks({k: v for k, v in result.items() if k not in drop}))
+        return tag, body
+
+    def _remember(self, tag: str, chunks):
+        """Envoie les morceaux en les gardant ; le corps complet entre dans le cache à la fin."""
+        kept = []
+        for chunk in chunks:
+            kept.append(chunk)
+            yield chunk
+        with self._lock:
+            self._bodies[tag] = kept
+            while len(self._bodies) > MAX_BODIES:
+                self._bodies.popitem(last=False)
+
+    def recommendations(self, query: dict):
+        snap = self.engine.snapshot()
+        k = _param(query, "k", int, 10)
+        personnes = _param(query, "personnes", int, 2)
+        if k < 0 or personnes < 1:
+            raise HttpError(400, "k ≥ 0 et personnes ≥ 1 attendus")
+        tag = _etag("recommandations", snap.version, k, personnes)
+        return tag, lambda: json_chunks(engine.recommend_recipes(snap, k, personnes))
+
+    def pantry(self, query: dict):
+        ctx = self.engine.household().context()
+        tag = _etag("placard", ctx.signatures["provisions"])
+        return tag, lambda: json_chunks(list(ctx.provisions_index.values()))
+
+    def restock(self, query: dict):
+        ctx = self.engine.household().context()
+        tag = _etag("reappro", ctx.signatures["provisions"])
+        return tag, lambda: json_chunks(engine.consume_provisions(ctx.provisions_index, {})[1])
+
+    # --- POST
+    def courses(self, payload: dict):
+        selection, personnes = payload.get("selection"), payload.get("personnes")
+        if not isinstance(selection, list) or not isinstance(personnes, int) or personnes < 1:
+            raise HttpError(400, "attendu {'selection': [noms], 'personnes': n ≥ 1}")
+        update = bool(payload.get("update_provisions", False))
+        source = self.engine.household() if update else self.engine.snapshot()
+        return json_chunks(engine.compute_courses(source, selection, personnes, update_provisions=update))
+
+    GET = {"/matching": matching, "/recommandations": recommendations, "/placard": pantry, "/reappro": restock}
+    POST = {"/courses": courses}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # connexions gardées ouvertes (keep-alive)
+    server_version = "MealPlanner"
+    disable_nagle_algorithm = True  # en-têtes puis corps en deux envois : sans TCP_NODELAY, +40 ms (ACK retardé)
+
+    def _send(self, status: int, chunks, etag: str | None = None):
+        first = []
+        size = 0
+        for chunk in chunks:  # jusqu'à STREAM_MIN : réponse à Content-Length, sinon chunked
+            first.append(chunk)
+            size += len(chunk)
+            if size >= STREAM_MIN:
+                break
+        streamed = size >= STREAM_MIN
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")  # toujours revalider : data/ peut changer
+        if not streamed:
+            body = b"".join(first)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in first:
+            self._chunk(chunk)
+        for chunk in chunks:
+            self._chunk(chunk)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, data: bytes):
+        if data:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def _error(self, status: int, message: str):
+        self._send(status, json_chunks({"error": message}))
+
+    def _dispatch(self, routes, call):
+        service = self.server.service
+        parts = urlsplit(self.path)
+        handler = routes.get(parts.path.rstrip("/") or "/")
+        service._count("requests")
+        if handler is None:
+            self._error(404, f"chemin inconnu : {parts.path}")
+            return
+        try:
+            call(service, handler, parse_qs(parts.query))
+        except HttpError as e:
+            self._error(e.status, str(e))
+        except (OSError, ValueError) as e:  # fichier data/ illisible ou en cours d'écriture
+            self._error(503, f"{type(e).__name__}: {e}")
+
+    def do_GET(self):
+        def call(service, handler, query):
+            tag, body = handler(service, query)
+            if tag in (t.strip() for t in self.headers.get("If-None-Match", "").split(",")):
+                service._count("not_modified")
+                self.send_response(304)
+                self.send_header("ETag", tag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self._send(200, iter(body()), tag)
+        self._dispatch(Service.GET, call)
+
+    def do_POST(self):
+        def call(service, handler, query):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_REQUEST:
+                raise HttpError(413, f"corps trop gros ({length} octets)")
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError as e:
+                raise HttpError(400, f"JSON invalide : {e}") from None
+            if not isinstance(payload, dict):
+                raise HttpError(400, "objet JSON attendu")
+            self._send(200, iter(handler(service, payload)))
+        self._dispatch(Service.POST, call)
+
+    def log_message(self, *args):
+        pass
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer dont les connexions sont servies par un pool de threads de taille fixe."""
+
+    def __init__(self, address, handler, workers: int = WORKERS):
+        super().__init__(address, handler)
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="service")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def serve(data_dir: str | Path = DATA_DIR, host: str = "127.0.0.1", port: int = 0, workers: int = WORKERS,
+          warm: bool = True):
+    """Démarre le service dans un thread démon ; renvoie (serveur, base_url).
+
+    server.service.stats compte les requêtes, les 304 et les corps repris du cache ;
+    server.shutdown() puis server.server_close() pour l'arrêter.
+    """
+    service = Service(data_dir)
+    if warm:
+        service.warm()
+    server = PooledHTTPServer((host, port), _Handler, workers)
+    server.service = service
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Service HTTP/JSON local du Meal Planner.")
+    p.add_argument("--data", default=str(DATA_DIR))
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--workers", type=int, default=WORKERS)
+    args = p.parse_args(argv)
+    server, base_url = serve(args.data, args.host, args.port, args.workers)
+    print(f"→ Service sur {base_url} (Ctrl-C pour arrêter)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
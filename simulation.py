@@ -0,0 +1,108 @@
+# simulation.py
+# Simulation sur plusieurs semaines : chaque semaine, liste de courses (compute_courses), déduction
+# du placard et réappro jusqu'à quantity_min (logique de courses_placard), rejouées en mémoire.
+# Le placard de chaque semaine est un snapshot dérivé (copie à l'écriture : seules les entrées
+# consommées ou réapprovisionnées sont copiées). Aucun fichier n'est écrit sauf `write=True`.
+from __future__ import annotations
+
+import engine
+from quantities import aggregate, base_unit
+
+
+def restock(provisions_index: dict, courses_placard: list, aliases: dict | None = None) -> dict:
+    """Placard après achat de `courses_placard` (chaque entrée remontée à son quantity_min)."""
+    new_index = dict(provisions_index)
+    for item in courses_placard:
+        n = engine.normalize(engine.canon(item["name"], aliases))
+        prov = new_index[n] = dict(new_index[n])
+        prov["quantity"] = float(prov.get("quantity_min", 0))
+    return new_index
+
+
+def courses_totals(ctx, listes: list) -> list:
+    """Courses cumulées de plusieurs semaines ({rayon: {libellé: entrée}} chacune) : une entrée par
+    ingrédient et dimension, en unité de base (quantities.aggregate) ; lignes sans quantité ignorées."""
+    keys, values, units, labels = [], [], [], {}
+    for liste in listes:
+        for items in liste.values():
+            for label, d in items.items():
+                labels.setdefault(d["norm"], label)
+                for val, unit in [(d["val"], d["unit"])] + [(e["val"], e["unit"]) for e in d.get("extra", ())]:
+                    keys.append(d["norm"]), values.append(val), units.append(unit)
+    totals = aggregate(keys, values, units, ctx.conversions_map)
+    return [{"name": labels[n], "quantity": round(q, 2), "unit": base_unit(dim)} for (n, dim), q in totals.items()]
+
+
+def _week_snapshot(ctx, previous, provisions_index: dict, week: int):
+    part = engine.provisions_part(list(provisions_index.values()), ctx.provisions_path, ctx.aliases)
+    snap = ctx.derive(provisions=(part, ("simulation", ctx.signatures["provisions"], week)))
+    # les quantités changent, pas la présence des entrées : la table placard est reprise telle quelle
+    engine.update_resolution(snap, previous, "pantry", ())
+    return snap
+
+
+def simulate(source, weeks, personnes, restock_weekly: bool = True, write: bool = False) -> dict:
+    """Rejoue `weeks` (une sélection de recettes par semaine) sur le placard, en mémoire.
+
+    `personnes` : un nombre pour toutes les semaines ou un par semaine.
+    `restock_weekly` : en fin de semaine, le réappro (courses_placard) est acheté et remonte
+    les entrées à leur quantity_min ; sinon le placard ne fait que baisser.
+    `write=True` : le placard final est écrit (fichier ou base) comme par update_provisions_files.
+
+    Renvoie {'weeks': [{'selection', 'personnes', 'liste_courses', 'pantry_used', 'consommation',
+    'restock', 'diagnostics'}], 'restock': réappro cumulé [{'name', 'quantity'}],
+    'courses': courses cumulées [{'name', 'quantity', 'unit'}] (voir courses_totals),
+    'trajectory': [{nom: quantité}] (état initial puis fin de chaque semaine), 'provisions': placard final}.
+    """
+    ctx = engine.context(source)
+    weeks = [list(w) for w in weeks]
+    sizes = list(personnes) if isinstance(personnes, (list, tuple)) else [personnes] * len(weeks)
+    if len(sizes) != len(weeks):
+        raise ValueError(f"{len(sizes)} nombre(s) de personnes pour {len(weeks)} semaine(s)")
+
+    index = ctx.provisions_index
+    trajectory = [{p["name"]: p.get("quantity", 0) for p in index.values()}]
+    total_restock, out_weeks = {}, []
+    snap = ctx
+    for w, (selection, n) in enumerate(zip(weeks, sizes)):
+        snap = _week_snapshot(ctx, snap, index, w) if w else ctx
+        res = engine.compute_courses(snap, selection, n)
+        index, courses_placard = engine.consume_provisions(index, res["consommation_totale"])
+        if restock_weekly:
+            index = restock(index, courses_placard, ctx.aliases)
+            for item in courses_placard:
+                total_restock[item["name"]] = round(total_restock.get(item["name"], 0) + item["quantity"], 2)
+        out_weeks.append({
+            "selection": selection, "personnes": n,
+            "liste_courses": res["liste_courses"], "pantry_used": res["pantry_used"],
+            "consommation": res["consommation_totale"], "restock": courses_placard,
+            "diagnostics": res["diagnostics"],
+        })
+        trajectory.append({p["name"]: p.get("quantity", 0) for p in index.values()})
+
+    provisions = list(index.values())
+    if write:
+        _write(ctx, provisions)
+    return {
+        "weeks": out_weeks,
+        "restock": [{"name": k, "quantity": v} for k, v in total_restock.items()],
+        "courses": courses_totals(ctx, [w["liste_courses"] for w in out_weeks]),
+        "trajectory": trajectory,
+        "provisions": provisions,
+    }
+
+
+def _write(ctx, provisions: list):
+    household = engine._household(ctx)
+    with household.lock:
+        if household.context().signatures["provisions"] != ctx.signatures["provisions"]:
+            raise RuntimeError("placard modifié pendant la simulation : relancer la simulation avant d'écrire")
+        if household.db is not None:
+            household.db.replace_all(provisions, ctx.aliases)
+        else:
+            final = {engine.normalize(engine.canon(p["name"], ctx.aliases)): p for p in provisions}
+            _, courses_placard = engine.consume_provisions(final, {})
+            engine._dump_json(provisions, ctx.provisions_path)
+            engine._dump_json(courses_placard, ctx.courses_placard_path)
+        household.reload()
+    print(f"→ Placard mis à jour (simulation) : {ctx.provisions_path.resolve()}")
@@ -0,0 +1,566 @@
+# validate.py
+# Contrôle du dossier data/ : schéma de chaque fichier et cohérence entre fichiers, en un rapport
+# lisible par machine (JSON) au lieu des 'inconnus' du matching et de la déduplication silencieuse.
+#   recettes   : champs, quantités / unités, ingrédients absents du catalogue, noms en double
+#   catalogue  : champs, rayons inconnus (faute de frappe → suggestion), mois, remplacements
+#                vers un ingrédient absent, noms en double
+#   provisions : champs, quantity_min absent, ingrédient absent du catalogue, doublons
+#   dispos     : ingrédients absents du catalogue, doublons
+# recettes_hellofresh.txt est décodé élément par élément (avec numéros de ligne) ; au-delà de
+# PARALLEL_MIN octets, s'il y a plusieurs CPU, le texte est découpé en tranches entre deux recettes
+# et chaque processus du pool décode et contrôle les siennes (le processus principal ne décode rien).
+# Résultats gardés dans data/.index/validation.json par empreinte (SHA-1) des fichiers dont
+# dépend chaque section : un fichier inchangé n'est jamais recontrôlé.
+# Usage : python validate.py [data_dir] [--json] [--workers N] [--no-cache]
+from __future__ import annotations
+
+import argparse, difflib, hashlib, json, multiprocessing, os, re, sys, threading, time
+from concurrent.futures import ProcessPoolExecutor
+from numbers import Real
+from pathlib import Path
+
+import engine
+from quantities import unit_info
+
+# ---------- PARAMÈTRES ----------
+CACHE_FILE = "validation.json"  # dans data/.index/
+CACHE_VERSION = 1               # à changer quand les règles changent (invalide le cache)
+PARALLEL_MIN = 4 * 2**20        # recettes plus grosses (octets) : contrôle dans un pool de processus
+BATCH = 500                     # recettes par appel à check_recipes
+SLICES_PER_WORKER = 4           # tranches du texte par processus du pool
+KNOWN_RAYONS = ("marché", "épicerie", "épices", "frais", "placard", "fromagerie", "boucherie",
+                "fruits secs", "poissonnerie", "boulangerie")
+MONTHS = ("janvier", "février", "mars", "avril", "mai", "juin", "juillet", "août", "septembre",
+          "octobre", "novembre", "décembre")
+
+ERROR, WARNING = "erreur", "avertissement"  # erreur : fichier que l'engine ne peut pas lire tel quel
+
+# section du rapport → fichiers dont ses résultats dépendent (clés de engine.DATA_FILES + alias)
+SECTIONS = {
+    "catalogue": ("catalogue", "aliases"),
+    "recettes": ("recettes", "catalogue", "aliases"),
+    "provisions": ("provisions", "catalogue", "aliases"),
+    "dispos": ("dispos", "catalogue", "aliases"),
+}
+FILES = {**engine.DATA_FILES, "aliases": engine.AUTO_ALIASES_FILE}
+
+
+def issue(section: str, severity: str, code: str, message: str, line=None, where=None, suggestion=None) -> dict:
+    out = {"file": FILES[section], "severity": severity, "code": code, "message": message}
+    if line is not None:
+        out["line"] = line
+    if where is not None:
+        out["where"] = where
+    if suggestion is not None:
+        out["suggestion"] = suggestion
+    return out
+
+
+# ---------- DÉCODAGE ÉLÉMENT PAR ÉLÉMENT ----------
+_WS = re.compile(r"[ \t\n\r]*")
+
+def _array_start(text: str) -> int:
+    """Position du 1er élément du tableau JSON `text` (celle du ']' final s'il est vide)."""
+    pos = _WS.match(text, 0).end()
+    if text[pos:pos + 1] != "[":
+        raise json.JSONDecodeError("tableau JSON attendu", text, pos)
+    return _WS.match(text, pos + 1).end()
+
+def _elements(text: str, pos: int, line: int):
+    """(ligne, élément, début) des éléments du tableau `text` à partir de `pos`, qui doit être le début
+    d'un élément (ligne `line`) ; s'arrête après le ']' final."""
+    decoder = json.JSONDecoder()
+    counted = pos
+    while True:
+        line += text.count("\n", counted, pos)
+        counted = start = pos
+        value, pos = decoder.raw_decode(text, pos)
+        yield line, value, start
+        pos = _WS.match(text, pos).end()
+        sep = text[pos:pos + 1]
+        if sep == ",":
+            pos = _WS.match(text, pos + 1).end()
+        elif sep == "]":
+            pos = _WS.match(text, pos + 1).end()
+            break
+        else:
+            raise json.JSONDecodeError("',' ou ']' attendu", text, pos)
+    if pos != len(text):
+        raise json.JSONDecodeError("données après la fin du tableau", text, pos)
+
+def iter_array(text: str):
+    """(ligne, élément) pour chaque élément du tableau JSON `text`, décodés un à un.
+
+    Lève json.JSONDecodeError (avec ligne et colonne) au premier élément mal formé.
+    """
+    pos = _array_start(text)
+    if text[pos:pos + 1] == "]":
+        pos = _WS.match(text, pos + 1).end()
+        if pos != len(text):
+            raise json.JSONDecodeError("données après la fin du tableau", text, pos)
+        return
+    for line, value, _ in _elements(text, pos, 1 + text.count("\n", 0, pos)):
+        yield line, value
+
+
+def _norm(name: str, aliases: dict) -> str:
+    return engine.normalize(engine.canon(name, aliases))
+
+def _aliases(files, out: list) -> dict:
+    """Alias automatiques du dossier (nom normalisé → nom du catalogue), comme ctx.aliases d'un snapshot."""
+    if files.signatures["aliases"] is None:
+        return {}
+    raw = files.json("aliases", "aliases", out)
+    if raw is None:
+        return {}
+    if not isinstance(raw, dict) or not all(isinstance(v, str) for v in raw.values()):
+        out.append(issue("aliases", ERROR, "fichier.type", "objet JSON {nom: nom du catalogue} attendu"))
+        return {}
+    return {engine.normalize(k): v for k, v in raw.items()}
+
+def _is_number(v) -> bool:
+    return isinstance(v, Real) and not isinstance(v, bool)
+
+
+# ---------- RECETTES (par lot : dans ce processus ou par tranche dans le pool) ----------
+_TEXT, _CATALOGUE, _ALIASES = None, None, None  # dans un processus du pool : texte des recettes, noms
+                                                # normalisés du catalogue et alias du dossier
+
+def _init_worker(text: str, catalogue: frozenset, aliases: dict):
+    global _TEXT, _CATALOGUE, _ALIASES
+    _TEXT, _CATALOGUE, _ALIASES = text, catalogue, aliases
+
+def _check_slice_in_worker(start: int, end: int, line: int):
+    """Décode et contrôle les recettes qui commencent dans [start, end) ; (problèmes, noms, fin) où
+    fin = début de la recette suivante (len(texte) après la dernière), ou None si le JSON est invalide
+    depuis `start` (tranche mal découpée, ou fichier mal formé : le contrôle en série le dira)."""
+    out, names, batch = [], [], []
+    stop = len(_TEXT)
+    try:
+        for line, r, pos in _elements(_TEXT, start, line):
+            if pos >= end:
+                stop = pos
+                break
+            batch.append((line, r))
+            if len(batch) >= BATCH:
+                _merge(out, names, check_recipes(batch, _CATALOGUE, _ALIASES))
+                batch = []
+    except json.JSONDecodeError:
+        return None
+    _merge(out, names, check_recipes(batch, _CATALOGUE, _ALIASES))
+    return out, names, stop
+
+def check_recipes(batch: list, catalogue: frozenset, aliases: dict):
+    """(problèmes, [(nom, ligne)]) pour un lot de (ligne, recette)."""
+    out, names = [], []
+    for line, r in batch:
+        if not isinstance(r, dict):
+            out.append(issue("recettes", ERROR, "recette.type", f"objet attendu, trouvé {type(r).__name__}", line))
+            continue
+        name = r.get("name")
+        if not isinstance(name, str) or not name.strip():
+            out.append(issue("recettes", ERROR, "recette.nom", "champ 'name' absent ou vide", line))
+            name = None
+        else:
+            names.append((name, line))
+        for key in ("link", "category"):
+            if key in r and r[key] is not None and not isinstance(r[key], str):
+                out.append(issue("recettes", WARNING, f"recette.{key}", f"'{key}' devrait être une chaîne", line, name))
+        ingredients = r.get("ingredients")
+        if not isinstance(ingredients, dict):
+            out.append(issue("recettes", ERROR, "recette.ingredients", "champ 'ingredients' absent ou pas un objet",
+                             line, name))
+            continue
+        seen = {}
+        for raw, data in ingredients.items():
+            n = _norm(raw, aliases)
+            if n not in catalogue:
+                out.append(issue("recettes", WARNING, "recette.ingredient_inconnu",
+                                 f"ingrédient absent du catalogue : {raw}", line, name))
+            if n in seen:
+                out.append(issue("recettes", WARNING, "recette.ingredient_double",
+                                 f"{seen[n]} et {raw} désignent le même ingrédient", line, name))
+            seen[n] = raw
+            if isinstance(data, dict):
+                qty, unit = data.get("qty"), data.get("unit", "")
+                if qty is not None and (not _is_number(qty) or qty < 0):
+                    out.append(issue("recettes", WARNING, "recette.quantite",
+                                     f"{raw} : quantité {qty!r} ignorée (nombre ≥ 0 attendu)", line, name))
+                if "indispensable" in data and not isinstance(data["indispensable"], bool):
+                    out.append(issue("recettes", WARNING, "recette.indispensable",
+                                     f"{raw} : 'indispensable' devrait être true/false", line, name))
+            else:
+                qty, unit = None, data
+            if not isinstance(unit, str):
+                out.append(issue("recettes", WARNING, "recette.unite", f"{raw} : unité {unit!r} (chaîne attendue)",
+                                 line, name))
+            elif qty is not None and unit_info(unit) is None:  # sans quantité ('selon le goût') : rien à convertir
+                out.append(issue("recettes", WARNING, "recette.unite", f"{raw} : unité inconnue {unit!r}", line, name))
+    return out, names
+
+
+def _cpus() -> int:
+    """CPU utilisables par ce processus."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def pool_workers(size: int, workers: int | None = None) -> int:
+    """Processus du pool pour des recettes de `size` octets (0 = contrôle en série).
+
+    Jamais plus que de CPU utilisables : sur un seul CPU le pool ne fait qu'ajouter son coût.
+    """
+    workers = _cpus() if workers is None else min(workers, _cpus())
+    return workers if workers > 1 and size >= PARALLEL_MIN else 0
+
+def _recipes_section(text: str, catalogue: frozenset, aliases: dict, workers) -> list:
+    out, names = [], []
+    workers = pool_workers(len(text), workers)
+    try:
+        if not workers or not _recipes_in_pool(text, catalogue, aliases, workers, out, names):
+            batch = []
+            for item in iter_array(text):
+                batch.append(item)
+                if len(batch) >= BATCH:
+                    _merge(out, names, check_recipes(batch, catalogue, aliases))
+                    batch = []
+            _merge(out, names, check_recipes(batch, catalogue, aliases))
+    except json.JSONDecodeError as e:
+        out.append(issue("recettes", ERROR, "fichier.json", f"JSON invalide : {e.msg}", e.lineno,
+                         suggestion=f"colonne {e.colno}"))
+    first = {}
+    for name, line in names:  # compute_matching ne garde que la 1re recette d'un nom
+        if name in first:
+            out.append(issue("recettes", WARNING, "recette.doublon",
+                             f"nom déjà utilisé ligne {first[name]} : recette ignorée par le matching", line, name))
+        else:
+            first[name] = line
+    out.sort(key=lambda i: i.get("line", 0))
+    return out
+
+def _merge(out: list, names: list, result):
+    out.extend(result[0])
+    names.extend(result[1])
+
+_BOUNDARY = re.compile(r"\}[ \t\n\r]*,[ \t\n\r]*(?=\{)")  # fin d'une recette, début de la suivante (probable)
+
+def _slices(text: str, parts: int) -> list:
+    """Débuts de tranches : le 1er élément, puis la 1re frontière '}, {' après chaque 1/parts du texte.
+
+    Une frontière peut tomber à l'intérieur d'une recette (liste d'objets imbriquée, chaîne) :
+    _recipes_in_pool le voit, car la tranche précédente ne s'arrête alors pas dessus.
+    """
+    starts = [_array_start(text)]
+    step = max(1, len(text) // parts)
+    for cut in range(step, len(text), step):
+        m = _BOUNDARY.search(text, max(cut, starts[-1]))
+        if m is None:
+            break
+        if m.end() > starts[-1]:
+            starts.append(m.end())
+    return starts
+
+def _recipes_in_pool(text: str, catalogue: frozenset, aliases: dict, workers, out: list, names: list) -> bool:
+    """Contrôle par tranches dans le pool ; False (rien d'ajouté) si une tranche ne commence pas
+    exactement où la précédente s'arrête, ou si le JSON est invalide : à refaire en série."""
+    starts = _slices(text, workers * SLICES_PER_WORKER)
+    if text[starts[0]:starts[0] + 1] != "{":
+        return False  # tableau vide ou d'autre chose que des recettes : rien à gagner
+    ends = starts[1:] + [len(text)]
+    lines, line = [], 1
+    for k, start in enumerate(starts):
+        line += text.count("\n", starts[k - 1] if k else 0, start)
+        lines.append(line)
+    methods = multiprocessing.get_all_start_methods()
+    mp = multiprocessing.get_context("fork" if "fork" in methods else None)  # fork : texte partagé, pas copié
+    with ProcessPoolExecutor(workers, mp_context=mp, initializer=_init_worker,
+                             initargs=(text, catalogue, aliases)) as pool:
+        results = list(pool.map(_check_slice_in_worker, starts, ends, lines))
+    if any(r is None or r[2] != end for r, end in zip(results, ends)):
+        return False
+    for r in results:
+        _merge(out, names, r)
+    return True
+
+
+# ---------- CATALOGUE, PROVISIONS, DISPOS ----------
+def _catalogue_section(catalogue, aliases: dict) -> list:
+    out, seen = [], {}
+    if not isinstance(catalogue, list):
+        return [issue("catalogue", ERROR, "fichier.type", "tableau JSON attendu")]
+    names = {_norm(i["name"], aliases) for i in catalogue if isinstance(i, dict) and isinstance(i.get("name"), str)}
+    for k, item in enumerate(catalogue):
+        if not isinstance(item, dict) or not isinstance(item.get("name"), str) or not item["name"].strip():
+            out.append(issue("catalogue", ERROR, "catalogue.nom", f"entrée {k} : 'name' absent ou vide"))
+            continue
+        name = item["name"]
+        n = _norm(name, aliases)
+        if n in seen:
+            out.append(issue("catalogue", WARNING, "catalogue.doublon", f"même ingrédient que {seen[n]!r} (la 2e entrée l'emporte)",
+                             where=name))
+        seen[n] = name
+        rayon = item.get("rayon")
+        if not isinstance(rayon, str) or rayon.lower() not in KNOWN_RAYONS:
+            close = difflib.get_close_matches(str(rayon).lower(), KNOWN_RAYONS, 1, 0.75)
+            out.append(issue("catalogue", WARNING, "catalogue.rayon", f"rayon inconnu {rayon!r}", where=name,
+                             suggestion=close[0] if close else None))
+        if "indispensable" in item and not isinstance(item["indispensable"], bool):
+            out.append(issue("catalogue", WARNING, "catalogue.indispensable", "'indispensable' devrait être true/false",
+                             where=name))
+        for key in ("poids", "densite"):
+            v = item.get(key)
+            if v is not None and (not _is_number(v) or v <= 0):
+                out.append(issue("catalogue", WARNING, f"catalogue.{key}", f"'{key}' {v!r} ignoré (nombre > 0 attendu)",
+                                 where=name))
+        saison = item.get("saison", [])
+        if not isinstance(saison, list):
+            out.append(issue("catalogue", WARNING, "catalogue.saison", "'saison' devrait être une liste de mois", where=name))
+        else:
+            for m in saison:
+                if not isinstance(m, str) or engine.normalize(m.strip()) not in _MONTHS_NORM:
+                    close = difflib.get_close_matches(str(m).lower(), MONTHS, 1, 0.75)
+                    out.append(issue("catalogue", WARNING, "catalogue.mois", f"mois inconnu {m!r}", where=name,
+                                     suggestion=close[0] if close else None))
+        remplacement = item.get("remplacement", [])
+        if not isinstance(remplacement, list) or not all(isinstance(r, str) for r in remplacement):
+            out.append(issue("catalogue", ERROR, "catalogue.remplacement", "'remplacement' doit être une liste de noms",
+                             where=name))
+            continue
+        for r in remplacement:
+            if _norm(r, aliases) not in names:  # se remplacer soi-même (alias) est ignoré par l'engine : pas signalé
+                out.append(issue("catalogue", WARNING, "catalogue.remplacement_inconnu",
+                                 f"remplaçant absent du catalogue : {r}", where=name))
+    return out
+
+_MONTHS_NORM = {engine.normalize(m) for m in MONTHS}
+
+
+def _provisions_section(provisions, catalogue: frozenset, aliases: dict) -> list:
+    if not isinstance(provisions, list):
+        return [issue("provisions", ERROR, "fichier.type", "tableau JSON attendu")]
+    out, seen = [], {}
+    for k, p in enumerate(provisions):
+        if not isinstance(p, dict) or not isinstance(p.get("name"), str) or not p["name"].strip():
+            out.append(issue("provisions", ERROR, "provisions.nom", f"entrée {k} : 'name' absent ou vide"))
+            continue
+        name = p["name"]
+        n = _norm(name, aliases)
+        if n in seen:
+            out.append(issue("provisions", WARNING, "provisions.doublon", f"même entrée que {seen[n]!r} (la 2e l'emporte)",
+                             where=name))
+        seen[n] = name
+        if n not in catalogue:
+            out.append(issue("provisions", WARNING, "provisions.inconnu", "ingrédient absent du catalogue", where=name))
+        qty = p.get("quantity", 0)
+        if not _is_number(qty):
+            out.append(issue("provisions", ERROR, "provisions.quantite", f"'quantity' {qty!r} : nombre attendu", where=name))
+        elif qty < 0:
+            out.append(issue("provisions", WARNING, "provisions.quantite", f"'quantity' négative ({qty})", where=name))
+        if "quantity_min" not in p:
+            out.append(issue("provisions", WARNING, "provisions.quantity_min",
+                             "'quantity_min' absent : jamais proposé au réappro", where=name))
+        elif not _is_number(p["quantity_min"]):
+            out.append(issue("provisions", ERROR, "provisions.quantity_min",
+                             f"'quantity_min' {p['quantity_min']!r} : nombre attendu", where=name))
+        unit = p.get("unit")
+        if unit is not None and (not isinstance(unit, str) or unit_info(unit) is None):
+            out.append(issue("provisions", WARNING, "provisions.unite", f"unité inconnue {unit!r}", where=name))
+    return out
+
+
+def _dispos_section(dispos, catalogue: frozenset, aliases: dict) -> list:
+    if not isinstance(dispos, list):
+        return [issue("dispos", ERROR, "fichier.type", "tableau JSON de noms attendu")]
+    out, seen = [], {}
+    for d in dispos:
+        if not isinstance(d, str):
+            out.append(issue("dispos", ERROR, "dispos.nom", f"nom attendu, trouvé {d!r}"))
+            continue
+        n = _norm(d, aliases)
+        if n in seen:
+            out.append(issue("dispos", WARNING, "dispos.doublon", f"même ingrédient que {seen[n]!r}", where=d))
+        seen[n] = d
+        if n not in catalogue:
+            out.append(issue("dispos", WARNING, "dispos.inconnu", "ingrédient absent du catalogue", where=d))
+    return out
+
+
+# ---------- CACHE PAR EMPREINTE ----------
+def _cache_path(data_dir: Path) -> Path:
+    return data_dir / ".index" / CACHE_FILE
+
+def _load_cache(data_dir: Path) -> dict:
+    try:
+        with open(_cache_path(data_dir), encoding="utf-8") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return cache if cache.get("version") == CACHE_VERSION else {}
+
+
+class _Files:
+    """Contenu et empreinte des fichiers de data/, lus au plus une fois ; l'empreinte d'un fichier
+    dont la signature (mtime, taille) n'a pas changé est reprise du cache sans le relire."""
+
+    def __init__(self, data_dir: Path, cached: dict):
+        self.data_dir, self.cached = data_dir, cached
+        self.signatures = {key: engine._file_signature(data_dir / f) for key, f in FILES.items()}
+        self._text, self._hash = {}, {}
+
+    def text(self, key: str):
+        if key not in self._text:
+            path = self.data_dir / FILES[key]
+            raw = path.read_bytes() if self.signatures[key] is not None else None
+            self._text[key] = None if raw is None else raw.decode("utf-8")
+            self._hash[key] = None if raw is None else hashlib.sha1(raw).hexdigest()
+        return self._text[key]
+
+    def hash(self, key: str):
+        if key not in self._hash:
+            entry = self.cached.get(key)
+            if self.signatures[key] is None:
+                self._hash[key] = None
+            elif entry and entry[0] == list(self.signatures[key]):
+                self._hash[key] = entry[1]
+            else:
+                self.text(key)
+        return self._hash[key]
+
+    def json(self, key: str, section: str, out: list):
+        """Fichier décodé, ou None avec le problème ajouté à `out`."""
+        text = self.text(key)
+        if text is None:
+            out.append(issue(section, ERROR, "fichier.absent", f"{FILES[key]} introuvable"))
+            return None
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            out.append(issue(section, ERROR, "fichier.json", f"JSON invalide : {e.msg}", e.lineno,
+                             suggestion=f"colonne {e.colno}"))
+            return None
+
+
+# ---------- RAPPORT ----------
+_memo = {}  # dossier → (signatures, rapport) du dernier contrôle dans ce processus
+_memo_lock = threading.Lock()
+
+def validate(data_dir, workers: int | None = None, use_cache: bool = True) -> dict:
+    """Rapport de contrôle du dossier data/ :
+    {'ok', 'errors', 'warnings', 'issues': [...], 'sections': {section: {'cached', 'issues'}}, 'seconds'}.
+
+    Problème = {'file', 'severity' (erreur | avertissement), 'code', 'message', ['line'], ['where'],
+    ['suggestion']}. `workers` : processus pour les grosses recettes (None = nb de CPU ; 0 ou 1 = en série ;
+    jamais plus que de CPU utilisables, voir pool_workers).
+    """
+    t0 = time.perf_counter()
+    data_dir = Path(data_dir)
+    signatures = {key: engine._file_signature(data_dir / f) for key, f in FILES.items()}
+    key = data_dir.resolve()
+    if use_cache:
+        with _memo_lock:
+            hit = _memo.get(key)
+        if hit is not None and hit[0] == signatures:
+            return hit[1]
+
+    cache = _load_cache(data_dir) if use_cache else {}
+    files = _Files(data_dir, cache.get("files", {}))
+    alias_issues = []
+    aliases = _aliases(files, alias_issues)  # propres à ce dossier : rien n'est changé dans engine
+
+    catalogue_norms = None
+    def catalogue():
+        nonlocal catalogue_norms
+        if catalogue_norms is None:
+            items = files.json("catalogue", "catalogue", [])
+            items = items if isinstance(items, list) else []
+            catalogue_norms = frozenset(_norm(i["name"], aliases) for i in items
+                                        if isinstance(i, dict) and isinstance(i.get("name"), str))
+        return catalogue_norms
+
+    sections, issues = {}, []
+    for section, deps in SECTIONS.items():
+        hashes = {d: files.hash(d) for d in deps}
+        entry = cache.get("sections", {}).get(section)
+        if entry is not None and entry["deps"] == hashes:
+            found, cached = entry["issues"], True
+        else:
+            cached, found = False, []
+            if section == "catalogue":
+                found.extend(alias_issues)
+                data = files.json("catalogue", section, found)
+                if data is not None:
+                    found.extend(_catalogue_section(data, aliases))
+            elif section == "recettes":
+                text = files.text("recettes")
+                if text is None:
+                    found.append(issue(section, ERROR, "fichier.absent", f"{FILES['recettes']} introuvable"))
+                else:
+                    found.extend(_recipes_section(text, catalogue(), aliases, workers))
+            elif section == "provisions":
+                if files.signatures["provisions"] is not None:  # placard absent : vide pour l'engine
+                    data = files.json("provisions", section, found)
+                    if data is not None:
+                        found.extend(_provisions_section(data, catalogue(), aliases))
+            else:
+                data = files.json("dispos", section, found)
+                if data is not None:
+                    found.extend(_dispos_section(data, catalogue(), aliases))
+        sections[section] = {"cached": cached, "deps": hashes, "issues": found}
+        issues.extend(found)
+
+    if use_cache and not all(s["cached"] for s in sections.values()):
+        path = _cache_path(data_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        engine._dump_json({
+            "version": CACHE_VERSION,
+            "files": {k: [list(files.signatures[k]), files.hash(k)] for k in FILES if files.signatures[k] is not None},
+            "sections": {s: {"deps": v["deps"], "issues": v["issues"]} for s, v in sections.items()},
+        }, path)
+
+    errors = sum(i["severity"] == ERROR for i in issues)
+    report = {
+        "ok": errors == 0,
+        "errors": errors,
+        "warnings": len(issues) - errors,
+        "issues": issues,
+        "sections": {s: {"cached": v["cached"], "issues": len(v["issues"])} for s, v in sections.items()},
+        "seconds": round(time.perf_counter() - t0, 4),
+    }
+    if use_cache:
+        with _memo_lock:
+            _memo[key] = (signatures, report)
+    return report
+
+
+def summary(report: dict) -> str:
+    """Une ligne par problème (erreurs d'abord), puis le décompte."""
+    lines = []
+    for i in sorted(report["issues"], key=lambda i: i["severity"] != ERROR):
+        where = f":{i['line']}" if "line" in i else ""
+        who = f" [{i['where']}]" if "where" in i else ""
+        hint = f" → {i['suggestion']}" if "suggestion" in i else ""
+        lines.append(f"{i['severity']:13s} {i['file']}{where}{who} {i['code']} : {i['message']}{hint}")
+    cached = [s for s, v in report["sections"].items() if v["cached"]]
+    lines.append(f"{report['errors']} erreur(s), {report['warnings']} avertissement(s) en {report['seconds']:.3f}s"
+                 + (f" (repris du cache : {', '.join(cached)})" if cached else ""))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Contrôle du schéma et de la cohérence du dossier data/.")
+    p.add_argument("data_dir", nargs="?", default="data")
+    p.add_argument("--json", action="store_true", help="rapport complet en JSON sur la sortie standard")
+    p.add_argument("--workers", type=int, default=None, help="processus pour les grosses recettes (0 = aucun)")
+    p.add_argument("--no-cache", action="store_true", help="recontrôle tout, sans lire ni écrire le cache")
+    args = p.parse_args(argv)
+    report = validate(args.data_dir, args.workers, not args.no_cache)
+    if args.json:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print(summary(report))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
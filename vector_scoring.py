@@ -0,0 +1,151 @@
+# vector_scoring.py
+# Scoring marché / placard vectorisé (NumPy) : mêmes scores que engine.score_recette,
+# calculés pour tout le corpus en quelques opérations sur des matrices creuses.
+from __future__ import annotations
+
+try:
+    import numpy as np
+except ImportError:  # optionnel : seul le backend "numpy" de compute_matching en a besoin
+    np = None
+
+import engine
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Le backend 'numpy' de compute_matching nécessite numpy (pip install numpy).")
+
+
+# ---------- MATRICE RECETTES × INGRÉDIENTS (par recettes + catalogue) ----------
+def _csr(rows):
+    """Listes d'ids par recette → (indptr, indices, row_ids, counts)."""
+    counts = np.fromiter((len(r) for r in rows), dtype=np.int64, count=len(rows))
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    indices = np.fromiter((i for r in rows for i in r), dtype=np.int32, count=int(indptr[-1]))
+    row_ids = np.repeat(np.arange(len(rows), dtype=np.int32), counts)
+    return {"indptr": indptr, "indices": indices, "row_ids": row_ids, "counts": counts}
+
+def _build_recipe_matrix(ctx):
+    _require_numpy()
+    # colonnes = ids de la table d'interning globale (engine.intern_ingredient)
+    recs, rows_m, rows_p, inconnus, unknown, seen = [], [], [], [], set(), set()
+    for r, keys in zip(ctx.recettes, ctx.recettes_keys):
+        if r["name"] in seen:
+            continue
+        seen.add(r["name"])
+        norm_to_id = {n: i for _, _, n, i in keys}
+        pretty_to_norm = {pretty: n for _, pretty, n, _ in keys}
+        inc = sorted(p for p, n in pretty_to_norm.items() if n not in ctx.catalogue_norm_index)
+        inconnus.append(inc)
+        unknown.update(inc)
+        recs.append(r)
+        rows_m.append([norm_to_id[n] for n in ctx.market_indispensables_norm & norm_to_id.keys()])
+        rows_p.append([i for n, i in norm_to_id.items() if ctx.rayons_map.get(n) in engine.PANTRY_RAYONS])
+
+    return {
+        "recettes": recs,
+        "names": list(engine.ING_NAMES),
+        "market": _csr(rows_m),
+        "pantry": _csr(rows_p),
+        "inconnus": inconnus,
+        "unknown": unknown,
+    }
+
+def recipe_matrix(ctx) -> dict:
+    """Recettes dédupliquées (par nom, 1re occurrence) + besoins marché/placard en CSR, par snapshot."""
+    return ctx.cached("np_recipe_matrix", ("recettes", "catalogue"), _build_recipe_matrix)
+
+
+# ---------- VECTEURS DE DISPONIBILITÉ (remplacements inclus) ----------
+def _availability(ctx, find):
+    """Par id : disponible ?, libellé « OK » (avec remplaçant éventuel), libellé « manque »."""
+    names = recipe_matrix(ctx)["names"]
+    available = np.zeros(len(names), dtype=bool)
+    ok_labels, missing_labels = [], []
+    for i, n in enumerate(names):
+        base_pretty = engine.pretty_from_norm(ctx, n)
+        cand = find(ctx, n)
+        available[i] = cand is not None
+        if cand is not None and cand != n:
+            ok_labels.append(f"{base_pretty} (remplacé par : {engine.pretty_from_norm(ctx, cand)})")
+        else:
+            ok_labels.append(base_pretty)
+        missing_labels.append(base_pretty)
+    return {"available": available, "flags": available.tolist(), "ok": ok_labels, "manque": missing_labels}
+
+def market_availability(ctx) -> dict:
+    return ctx.cached("np_market", ("recettes", "catalogue", "dispos"),
+                      lambda c: _availability(c, engine.find_available_market))
+
+def pantry_availability(ctx) -> dict:
+    return ctx.cached("np_pantry", ("recettes", "catalogue", "provisions"),
+                      lambda c: _availability(c, engine.find_available_pantry))
+
+
+# ---------- SCORES ----------
+def _round_table(max_n: int):
+    """lut[n, ok] = round(100 * ok / n, 1) avec l'arrondi Python (identique à score_recette)."""
+    lut = np.full((max_n + 1, max_n + 1), 100.0)
+    for n in range(1, max_n + 1):
+        for ok in range(n + 1):
+            lut[n, ok] = round(100 * ok / n, 1)
+    return lut
+
+def _scores(csr, available):
+    ok = np.bincount(csr["row_ids"], weights=available[csr["indices"]], minlength=len(csr["counts"])).astype(np.int64)
+    counts = csr["counts"]
+    lut = _round_table(int(counts.max()) if len(counts) else 0)
+    return lut[counts, ok]
+
+def scores(ctx):
+    """(score_market, score_pantry) de toutes les recettes de recipe_matrix(ctx), en float64."""
+    mat = recipe_matrix(ctx)
+    return (_scores(mat["market"], market_availability(ctx)["available"]),
+            _scores(mat["pantry"], pantry_availability(ctx)["available"]))
+
+def unique_recettes(ctx) -> list:
+    return recipe_matrix(ctx)["recettes"]
+
+def unknown_ingredients(ctx) -> set:
+    """Noms (canon) absents du catalogue, sur tout le corpus."""
+    return recipe_matrix(ctx)["unknown"]
+
+def _split(csr, avail, i):
+    ids = csr["indices"][csr["indptr"][i]:csr["indptr"][i + 1]].tolist()
+    flags = avail["flags"]
+    ok = sorted(avail["ok"][j] for j in ids if flags[j])
+    manque = sorted(avail["manque"][j] for j in ids if not flags[j])
+    return ok, manque
+
+def rows(ctx, indices, score_m, score_p) -> list:
+    """Lignes au format de engine.score_recette pour les recettes `indices` uniquement."""
+    mat = recipe_matrix(ctx)
+    market, pantry = market_availability(ctx), pantry_availability(ctx)
+    out = []
+    for i in indices:
+        r = mat["recettes"][i]
+        ok_m, manque_m = _split(mat["market"], market, i)
+        ok_p, manque_p = _split(mat["pantry"], pantry, i)
+        out.append({
+            "name": r["name"],
+            "link": r["link"],
+            "category": r.get("category", "non classé"),
+            "score_market": float(score_m[i]),
+            "score_pantry": float(score_p[i]),
+            "ok_market": ok_m,
+            "manque_market": manque_m,
+            "ok_pantry": ok_p,
+            "manque_pantry": manque_p,
+            "inconnus": list(mat["inconnus"][i]),
+        })
+    return out
+
+def score_rows(ctx, match_min: float, match_min_pantry: float, with_all: bool = True):
+    """(lignes retenues, toutes les lignes ou None), dans l'ordre du corpus."""
+    score_m, score_p = scores(ctx)
+    keep = np.flatnonzero((score_m >= match_min) & (score_p >= match_min_pantry))
+    if not with_all:
+        return rows(ctx, keep, score_m, score_p), None
+    all_rows = rows(ctx, range(len(score_m)), score_m, score_p)
+    return [all_rows[i] for i in keep], all_rows
@@ -0,0 +1,185 @@
+# watcher.py
+# Surveillance des fichiers de data/ par scrutation (bibliothèque standard uniquement) : mtime + taille
+# à chaque tour, puis empreinte du contenu pour écarter les écritures sans changement réel.
+# Un fichier modifié est relu seul et installé dans l'Engine (Engine.replace_part) : seuls les index
+# qui en dépendent sont reconstruits, les tables de résolution marché / placard par delta.
+# Chaque fichier a un compteur de version ; une vue déclare les fichiers dont elle dépend (VIEWS)
+# et n'est invalidée que quand l'un d'eux change. Le matching est tenu à jour par deltas
+# (IncrementalMatching) quand seuls les dispos ou le placard changent.
+# Usage :
+#   w = watcher.get_watcher("data")          # thread de scrutation démarré
+#   w.view_version("matching")               # clé de cache : change seulement si un fichier lu change
+#   w.matching()                             # résultat de compute_matching (sans texte), à jour
+from __future__ import annotations
+
+import hashlib, logging, threading
+from pathlib import Path
+
+import engine
+from incremental import IncrementalMatching
+
+POLL_INTERVAL = 0.5  # secondes entre deux tours de scrutation
+
+log = logging.getLogger(__name__)
+
+# vue → fichiers (clés de engine.DATA_FILES) dont elle dépend
+VIEWS = {
+    "matching": ("recettes", "catalogue", "dispos", "provisions"),
+    "recherche": ("recettes",),
+    "ingredients": ("catalogue",),
+    "placard": ("provisions",),
+}
+
+
+def _digest(path: Path):
+    """(signature engine, empreinte du contenu) ; (None, None) si le fichier n'existe pas."""
+    signature = engine._file_signature(path)  # avant la lecture : une écriture pendant le hachage sera revue
+    if signature is None:
+        return None, None
+    try:
+        with open(path, "rb") as f:
+            return signature, hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None, None
+
+
+class DataWatcher:
+    """Scrute les fichiers d'un dossier data/ et recharge dans son Engine ceux qui changent."""
+
+    def __init__(self, data_dir: str | Path, interval: float = POLL_INTERVAL):
+        self.engine = engine.get_engine(data_dir)
+        self.interval = interval
+        self.versions = {key: 0 for key in engine.DATA_FILES}
+        self.reloads = {key: 0 for key in engine.DATA_FILES}  # fichiers réellement relus
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._incremental = None
+        snap = self.engine.snapshot()
+        self._seen = {}  # clé → (signature, empreinte) de la version installée
+        for key, filename in engine.DATA_FILES.items():
+            self._seen[key] = (snap.signatures[key], _digest(self.engine.data_dir / filename)[1])
+        self._aliases = snap.signatures["aliases"]
+
+    # ---------- VERSIONS ----------
+    @property
+    def version(self) -> int:
+        """Nombre total de changements vus (tous fichiers)."""
+        return sum(self.versions.values())
+
+    def view_version(self, view: str) -> tuple:
+        """Versions des fichiers dont dépend `view` (VIEWS) : clé de cache de la vue."""
+        return tuple(self.versions[key] for key in VIEWS[view])
+
+    def subscribe(self, callback):
+        """`callback(clés changées, snapshot)` après chaque tour qui a changé au moins un fichier."""
+        self._listeners.append(callback)
+
+    # ---------- SCRUTATION ----------
+    def poll(self) -> list:
+        """Un tour de scrutation ; renvoie les clés des fichiers dont le contenu a changé."""
+        changed = []
+        with self._lock:
+            if engine._file_signature(self.engine.data_dir / engine.AUTO_ALIASES_FILE) != self._aliases:
+                # alias automatiques changés : l'Engine relit tous les fichiers, toutes les vues changent
+                snap = self.engine.snapshot()
+                self._aliases = snap.signatures["aliases"]
+                for key, filename in engine.DATA_FILES.items():
+                    self._seen[key] = (snap.signatures[key], _digest(self.engine.data_dir / filename)[1])
+                    self.versions[key] += 1
+                changed = list(engine.DATA_FILES)
+            for key, filename in engine.DATA_FILES.items():
+                path = self.engine.data_dir / filename
+                signature = engine._file_signature(path)
+                seen_signature, seen_hash = self._seen[key]
+                if signature == seen_signature:
+                    continue
+                signature, content_hash = _digest(path)
+                current = self.engine._snapshot  # sans snapshot() : il relirait lui-même le fichier
+                if content_hash == seen_hash:
+                    # réécrit à l'identique (ou simplement touché) : même partie, nouvelle signature
+                    if current is not None and current.signatures[key] != signature:
+                        self.engine.replace_part(key, current.parts[key], signature)
+                    self._seen[key] = (signature, content_hash)
+                    continue
+                if current is None or current.signatures[key] != signature:
+                    try:
+                        part = engine._PART_BUILDERS[key](path, (current or self.engine.snapshot()).aliases)
+                    except ValueError:
+                        continue  # fichier en cours d'écriture : revu au tour suivant
+                    self.engine.replace_part(key, part, signature)
+                    self.reloads[key] += 1
+                # sinon l'Engine l'a déjà relu lui-même (snapshot() ou reload() après une écriture)
+                self._seen[key] = (signature, content_hash)
+                self.versions[key] += 1
+                changed.append(key)
+            if changed and self._incremental is not None:
+                self._update_matching(changed)
+        if changed:
+            snap = self.engine.snapshot()
+            for callback in list(self._listeners):
+                callback(changed, snap)
+        return changed
+
+    def _update_matching(self, changed: list):
+        snap = self.engine.snapshot()
+        if "recettes" in changed or "catalogue" in changed:
+            self._incremental = IncrementalMatching(snap)
+        else:
+            self._incremental.apply_snapshot(snap)
+
+    def matching(self) -> dict:
+        """Résultat de compute_matching (seuils par défaut, sans texte) pour la version courante."""
+        with self._lock:
+            snap = self.engine.snapshot()
+            inc = self._incremental
+            if inc is None or inc.ctx.parts["recettes"] is not snap.parts["recettes"] \
+                    or inc.ctx.parts["catalogue"] is not snap.parts["catalogue"]:
+                inc = self._incremental = IncrementalMatching(snap)
+            elif inc.ctx is not snap:
+                inc.apply_snapshot(snap)  # fichier relu par l'Engine avant le tour de scrutation
+            return inc.result(with_text=False)
+
+    # ---------- THREAD ----------
+    def start(self) -> "DataWatcher":
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="data-watcher", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        last_error = None
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except OSError:
+                pass  # dossier momentanément illisible : tour suivant
+            except Exception as e:
+                # fichier lisible mais mal formé (entrée sans 'name'…) : l'Engine garde le dernier snapshot
+                # valide, le fichier est relu à chaque tour jusqu'à correction ; signalé une fois par erreur
+                if repr(e) != last_error:
+                    log.exception("data-watcher : %s non rechargé", self.engine.data_dir)
+                last_error = repr(e)
+            else:
+                last_error = None
+
+
+_WATCHERS: dict[Path, DataWatcher] = {}
+_WATCHERS_LOCK = threading.Lock()
+
+def get_watcher(data_dir: str | Path, interval: float = POLL_INTERVAL) -> DataWatcher:
+    """Watcher démarré partagé pour ce dossier data/ (un seul par chemin résolu)."""
+    key = Path(data_dir).resolve()
+    with _WATCHERS_LOCK:
+        w = _WATCHERS.get(key)
+        if w is None:
+            w = _WATCHERS[key] = DataWatcher(data_dir, interval).start()
+        return w